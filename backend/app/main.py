@@ -1,18 +1,22 @@
+import asyncio
 import os
 import subprocess
-import json
 import time
 from pathlib import Path
-from fastapi import Depends, FastAPI, Header, HTTPException, UploadFile, File
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, UploadFile, File
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 
 from app.services.alignment_service import AlignmentService
 from app.services.catalog_service import CatalogService
+from app.services.glyph_index_service import GlyphIndexService
+from app.services.image_service import ImageService
 from app.services.annotator_service import AnnotatorService
 from app.services.workbench_service import WorkbenchService
+from app.services.zip_export import ZipExportService
 from app.health import router as health_router
+from app.precompressed import PrecompressedStaticFiles, json_bytes_response
 
 app = FastAPI(title="墨阵 InkGrid API")
 app.include_router(health_router)
@@ -33,8 +37,66 @@ PUBLIC_DIR = os.path.join(BASE_DIR, "public")
 STELES_DIR = os.path.join(BASE_DIR, "steles")
 
 catalog_service = CatalogService(BASE_DIR, FRONTEND_DIR)
-annotator_service = AnnotatorService(BASE_DIR, STELES_DIR)
+annotator_service = AnnotatorService(
+    BASE_DIR, STELES_DIR, max_concurrent_applies=int(os.environ.get("INKGRID_APPLY_CONCURRENCY") or 2)
+)
 workbench_service = WorkbenchService(BASE_DIR, STELES_DIR)
+image_service = ImageService(
+    os.environ.get("INKGRID_IMAGE_CACHE_DIR") or os.path.join(BASE_DIR, ".cache", "images")
+)
+zip_export_service = ZipExportService(
+    workers=int(os.environ.get("INKGRID_EXPORT_WORKERS") or min(4, os.cpu_count() or 1))
+)
+glyph_index_service = GlyphIndexService(
+    BASE_DIR,
+    FRONTEND_DIR,
+    STELES_DIR,
+    workbench_service.projects_root,
+    index_path=os.environ.get("INKGRID_GLYPH_INDEX") or os.path.join(BASE_DIR, ".cache", "glyph_index.json"),
+    refresh_interval=float(os.environ.get("INKGRID_GLYPH_REFRESH_S") or 30.0),
+)
+
+
+@app.on_event("startup")
+async def resume_workbench_jobs():
+    # Requeue jobs interrupted by a restart (state lives in workbench/jobs/*.json).
+    workbench_service.resume_jobs()
+
+
+@app.on_event("startup")
+async def watch_catalog():
+    # Pick up steles.json / stele_knowledge.json edits without a restart.
+    try:
+        interval = float(os.environ.get("INKGRID_CATALOG_POLL_S") or 2.0)
+    except ValueError:
+        interval = 2.0
+    catalog_service.start_watching(interval)
+
+
+@app.on_event("shutdown")
+async def stop_yolo_worker():
+    workbench_service.stop_yolo_worker()
+
+
+@app.on_event("shutdown")
+async def stop_catalog_watch():
+    catalog_service.stop_watching()
+
+
+async def serve_file(
+    request: Request, root: str | Path, rel: str, *, w: int | None, fmt: str | None, v: str | None
+):
+    # Original or resized derivative of `root/rel` (ETag/304, Range, cache headers).
+    base = Path(root).resolve()
+    target = (base / str(rel or "").lstrip("/")).resolve()
+    if not str(target).startswith(str(base) + os.sep):
+        raise HTTPException(status_code=400, detail="Invalid path")
+    if not target.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        return await run_in_threadpool(image_service.response, request, target, w=w, fmt=fmt, v=v)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 def require_admin(x_inkgrid_admin_token: str | None = Header(default=None)) -> None:
@@ -49,7 +111,7 @@ def require_admin(x_inkgrid_admin_token: str | None = Header(default=None)) -> N
 @app.get("/api/annotator/overrides/{stele_path:path}")
 async def get_annotator_overrides(stele_path: str, _: None = Depends(require_admin)):
     try:
-        return annotator_service.get_overrides(stele_path)
+        return await run_in_threadpool(annotator_service.get_overrides, stele_path)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -61,7 +123,7 @@ async def save_annotator_overrides(
     stele_path: str, payload: dict, _: None = Depends(require_admin)
 ):
     try:
-        return annotator_service.save_overrides(stele_path, payload)
+        return await run_in_threadpool(annotator_service.save_overrides, stele_path, payload)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -79,7 +141,7 @@ async def apply_annotator_overrides(
         raise HTTPException(status_code=400, detail="only_files must be a list")
 
     try:
-        return annotator_service.apply_overrides(
+        return await annotator_service.apply_overrides(
             stele_path,
             dataset_dir=dataset_dir,
             only_files=[str(x) for x in (only_files or [])],
@@ -96,22 +158,27 @@ async def apply_annotator_overrides(
 @app.get("/api/annotator/datasets/{stele_path:path}")
 async def list_annotator_datasets(stele_path: str, _: None = Depends(require_admin)):
     try:
-        return annotator_service.list_datasets(stele_path)
+        return await run_in_threadpool(annotator_service.list_datasets, stele_path)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/api/workbench/inference/stats")
+async def get_workbench_inference_stats(_: None = Depends(require_admin)):
+    return await run_in_threadpool(workbench_service.yolo_worker_stats)
+
+
 @app.get("/api/workbench/projects")
 async def list_workbench_projects(_: None = Depends(require_admin)):
-    return workbench_service.list_projects()
+    return await run_in_threadpool(workbench_service.list_projects)
 
 
 @app.post("/api/workbench/projects")
 async def create_workbench_project(payload: dict, _: None = Depends(require_admin)):
     try:
-        return workbench_service.create_project(payload)
+        return await run_in_threadpool(workbench_service.create_project, payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -123,32 +190,35 @@ async def upload_workbench_pages(
     _: None = Depends(require_admin),
 ):
     try:
-        paths = workbench_service._resolve_project_dir(stele_slug)
-        paths.pages_raw_dir.mkdir(parents=True, exist_ok=True)
-        saved: list[str] = []
-        # Determine next index based on existing files.
-        existing = sorted(
-            [p for p in paths.pages_raw_dir.iterdir() if p.is_file()], key=lambda p: p.name
-        )
-        next_i = len(existing) + 1
-        for f in files:
-            ext = os.path.splitext(f.filename or "")[1].lower() or ".jpg"
-            out_name = f"page_{next_i:02d}{ext}"
-            next_i += 1
-            out_path = paths.pages_raw_dir / out_name
-            content = await f.read()
-            out_path.write_bytes(content)
-            saved.append(out_name)
-        workbench_service.add_pages(stele_slug, saved)
-        return {"saved": saved}
+        # Bodies are read on the loop; disk writes happen in a worker thread.
+        uploads = [(f.filename or "", await f.read()) for f in files]
+        return await run_in_threadpool(workbench_service.save_uploaded_pages, stele_slug, uploads)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _get_workbench_project(stele_slug: str) -> dict:
+    # Blocking (reads project files, stats pages); run in a worker thread.
+    data = workbench_service.get_project(stele_slug)
+    pages_dir = workbench_service._resolve_project_dir(stele_slug).pages_raw_dir.resolve()
+    try:
+        # Only projects under STELES_DIR (the default layout, not
+        # INKGRID_WORKBENCH_ROOT) are reachable through /steles.
+        url_dir = "/steles/" + pages_dir.relative_to(Path(STELES_DIR).resolve()).as_posix()
+    except ValueError:
+        return data
+    for page in data["pages"]:
+        image = pages_dir / str(page.get("image") or "")
+        if image.is_file():
+            # Versioned (immutable) thumbnail URL; not stored in pages.json.
+            page["thumb_url"] = f"{url_dir}/{image.name}?" + image_service.versioned_query(image, width=640)
+    return data
+
+
 @app.get("/api/workbench/projects/{stele_slug}")
 async def get_workbench_project(stele_slug: str, _: None = Depends(require_admin)):
     try:
-        return workbench_service.get_project(stele_slug)
+        return await run_in_threadpool(_get_workbench_project, stele_slug)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -160,7 +230,7 @@ async def update_workbench_project(
     stele_slug: str, payload: dict, _: None = Depends(require_admin)
 ):
     try:
-        return workbench_service.update_project(stele_slug, payload)
+        return await run_in_threadpool(workbench_service.update_project, stele_slug, payload)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -172,7 +242,7 @@ async def delete_workbench_page(
     stele_slug: str, image_name: str, _: None = Depends(require_admin)
 ):
     try:
-        return workbench_service.delete_page(stele_slug, image_name)
+        return await run_in_threadpool(workbench_service.delete_page, stele_slug, image_name)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -184,7 +254,7 @@ async def update_workbench_pages(
     stele_slug: str, payload: dict, _: None = Depends(require_admin)
 ):
     try:
-        return workbench_service.update_pages(stele_slug, payload)
+        return await run_in_threadpool(workbench_service.update_pages, stele_slug, payload)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -194,7 +264,7 @@ async def update_workbench_pages(
 @app.post("/api/workbench/projects/{stele_slug}/jobs")
 async def create_workbench_job(stele_slug: str, payload: dict, _: None = Depends(require_admin)):
     try:
-        return workbench_service.create_job(stele_slug, payload)
+        return await run_in_threadpool(workbench_service.create_job, stele_slug, payload)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -204,7 +274,7 @@ async def create_workbench_job(stele_slug: str, payload: dict, _: None = Depends
 @app.post("/api/workbench/projects/{stele_slug}/text/fetch")
 async def fetch_workbench_text(stele_slug: str, _: None = Depends(require_admin)):
     try:
-        return workbench_service.fetch_text_candidates(stele_slug)
+        return await run_in_threadpool(workbench_service.fetch_text_candidates, stele_slug)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -216,7 +286,7 @@ async def save_workbench_alignment(
     stele_slug: str, payload: dict, _: None = Depends(require_admin)
 ):
     try:
-        return workbench_service.save_alignment_text(stele_slug, payload)
+        return await run_in_threadpool(workbench_service.save_alignment_text, stele_slug, payload)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -226,7 +296,7 @@ async def save_workbench_alignment(
 @app.get("/api/workbench/projects/{stele_slug}/alignment")
 async def get_workbench_alignment(stele_slug: str, _: None = Depends(require_admin)):
     try:
-        return workbench_service.get_alignment(stele_slug)
+        return await run_in_threadpool(workbench_service.get_alignment, stele_slug)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -234,52 +304,78 @@ async def get_workbench_alignment(stele_slug: str, _: None = Depends(require_adm
 
 
 @app.get("/api/workbench/projects/{stele_slug}/files/{path:path}")
-async def get_workbench_file(stele_slug: str, path: str, _: None = Depends(require_admin)):
+async def get_workbench_file(
+    request: Request,
+    stele_slug: str,
+    path: str,
+    w: int | None = None,
+    fmt: str | None = None,
+    v: str | None = None,
+    _: None = Depends(require_admin),
+):
     try:
         paths = workbench_service._resolve_project_dir(stele_slug)
-        rel = str(path or "").lstrip("/")
-        target = (paths.stele_dir / rel).resolve()
-        if not str(target).startswith(str(paths.stele_dir.resolve()) + os.sep):
-            raise HTTPException(status_code=400, detail="Invalid path")
-        if not target.exists() or not target.is_file():
-            raise HTTPException(status_code=404, detail="File not found")
-        return FileResponse(str(target))
-    except HTTPException:
-        raise
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await serve_file(request, paths.stele_dir, path, w=w, fmt=fmt, v=v)
+
+
+@app.api_route("/api/workbench/projects/{stele_slug}/datasets/{dataset_dir}/export.zip", methods=["GET", "HEAD"])
+async def export_workbench_dataset(
+    request: Request, stele_slug: str, dataset_dir: str, _: None = Depends(require_admin)
+):
+    # Streamed on the fly (no temp file); Range/If-Range resume a download.
+    try:
+        paths = workbench_service._resolve_project_dir(stele_slug)
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    base = (paths.stele_dir / "datasets").resolve()
+    target = (base / str(dataset_dir or "").strip()).resolve()
+    if target.parent != base:
+        raise HTTPException(status_code=400, detail="Invalid dataset_dir")
+    if not target.is_dir():
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return await run_in_threadpool(zip_export_service.response, request, target)
+
+
+@app.get("/api/workbench/export/stats")
+async def get_workbench_export_stats(_: None = Depends(require_admin)):
+    return zip_export_service.stats
+
+
+def _list_workbench_dir(stele_slug: str, path: str) -> dict:
+    # Blocking (iterdir/stat per entry); run in a worker thread.
+    paths = workbench_service._resolve_project_dir(stele_slug)
+    rel = str(path or "").lstrip("/")
+    target = (paths.stele_dir / rel).resolve()
+    if not str(target).startswith(str(paths.stele_dir.resolve()) + os.sep):
+        raise HTTPException(status_code=400, detail="Invalid path")
+    if not target.exists() or not target.is_dir():
+        raise HTTPException(status_code=404, detail="Dir not found")
+    items = []
+    for p in sorted(target.iterdir(), key=lambda x: x.name):
+        try:
+            st = p.stat()
+            size = int(st.st_size)
+        except Exception:
+            size = 0
+        rel_item = (Path(rel) / p.name).as_posix() if rel else p.name
+        items.append(
+            {
+                "name": p.name,
+                "is_dir": p.is_dir(),
+                "size": size,
+                "path": rel_item,
+                "url": None if p.is_dir() else f"/api/workbench/projects/{stele_slug}/files/{rel_item}",
+            }
+        )
+    return {"path": rel, "items": items}
 
 
 @app.get("/api/workbench/projects/{stele_slug}/list")
 async def list_workbench_dir(stele_slug: str, path: str = "", _: None = Depends(require_admin)):
     try:
-        paths = workbench_service._resolve_project_dir(stele_slug)
-        rel = str(path or "").lstrip("/")
-        target = (paths.stele_dir / rel).resolve()
-        if not str(target).startswith(str(paths.stele_dir.resolve()) + os.sep):
-            raise HTTPException(status_code=400, detail="Invalid path")
-        if not target.exists() or not target.is_dir():
-            raise HTTPException(status_code=404, detail="Dir not found")
-        items = []
-        for p in sorted(target.iterdir(), key=lambda x: x.name):
-            try:
-                st = p.stat()
-                size = int(st.st_size)
-            except Exception:
-                size = 0
-            rel_item = (Path(rel) / p.name).as_posix() if rel else p.name
-            items.append(
-                {
-                    "name": p.name,
-                    "is_dir": p.is_dir(),
-                    "size": size,
-                    "path": rel_item,
-                    "url": None if p.is_dir() else f"/api/workbench/projects/{stele_slug}/files/{rel_item}",
-                }
-            )
-        return {"path": rel, "items": items}
+        return await run_in_threadpool(_list_workbench_dir, stele_slug, path)
     except HTTPException:
         raise
     except FileNotFoundError as e:
@@ -293,16 +389,7 @@ async def get_workbench_crop_overrides(
     stele_slug: str, dataset_dir: str, _: None = Depends(require_admin)
 ):
     try:
-        paths = workbench_service._resolve_project_dir(stele_slug)
-        ds = str(dataset_dir or "").strip().lstrip("/")
-        overrides_path = (paths.stele_dir / "datasets" / ds / "crop_overrides.json").resolve()
-        if not str(overrides_path).startswith(str(paths.stele_dir.resolve()) + os.sep):
-            raise HTTPException(status_code=400, detail="Invalid dataset_dir")
-        if not overrides_path.exists():
-            return {"version": 1, "crop_overrides": {}}
-        return json.loads(overrides_path.read_text(encoding="utf-8"))
-    except HTTPException:
-        raise
+        return await run_in_threadpool(workbench_service.get_crop_overrides, stele_slug, dataset_dir)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -312,27 +399,7 @@ async def save_workbench_crop_overrides(
     stele_slug: str, dataset_dir: str, payload: dict, _: None = Depends(require_admin)
 ):
     try:
-        paths = workbench_service._resolve_project_dir(stele_slug)
-        ds = str(dataset_dir or "").strip().lstrip("/")
-        target_dir = (paths.stele_dir / "datasets" / ds).resolve()
-        if not str(target_dir).startswith(str(paths.stele_dir.resolve()) + os.sep):
-            raise HTTPException(status_code=400, detail="Invalid dataset_dir")
-        target_dir.mkdir(parents=True, exist_ok=True)
-        overrides_path = (target_dir / "crop_overrides.json").resolve()
-        crop_overrides = payload.get("crop_overrides")
-        if crop_overrides is None:
-            crop_overrides = {}
-        if not isinstance(crop_overrides, dict):
-            raise HTTPException(status_code=400, detail="crop_overrides must be an object")
-        out = {
-            "version": 1,
-            "crop_overrides": crop_overrides,
-            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
-        }
-        overrides_path.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-        return out
-    except HTTPException:
-        raise
+        return await run_in_threadpool(workbench_service.save_crop_overrides, stele_slug, dataset_dir, payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -340,7 +407,7 @@ async def save_workbench_crop_overrides(
 @app.get("/api/workbench/projects/{stele_slug}/jobs")
 async def list_workbench_jobs(stele_slug: str, _: None = Depends(require_admin)):
     try:
-        return workbench_service.list_jobs(stele_slug)
+        return await run_in_threadpool(workbench_service.list_jobs, stele_slug)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -352,7 +419,52 @@ async def get_workbench_job(
     stele_slug: str, job_id: str, _: None = Depends(require_admin)
 ):
     try:
-        return workbench_service.get_job(stele_slug, job_id)
+        return await run_in_threadpool(workbench_service.get_job, stele_slug, job_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/workbench/projects/{stele_slug}/jobs/{job_id}/log")
+async def get_workbench_job_log(
+    stele_slug: str,
+    job_id: str,
+    offset: int = 0,
+    rev: int | None = None,
+    wait: float = 0.0,
+    _: None = Depends(require_admin),
+):
+    """Long-poll the job log.
+
+    Returns new log text from byte `offset` plus status/stage/progress. With
+    `rev` + `wait`, holds the request (up to 30s) until the job changes.
+    """
+    try:
+        deadline = time.monotonic() + max(0.0, min(float(wait), 30.0))
+        while True:
+            out = await run_in_threadpool(workbench_service.get_job_log, stele_slug, job_id, offset=offset)
+            if (
+                out["done"]
+                or out["data"]
+                or rev is None
+                or int(out["rev"]) != int(rev)
+                or time.monotonic() >= deadline
+            ):
+                return out
+            await asyncio.sleep(0.25)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/workbench/projects/{stele_slug}/jobs/{job_id}/cancel")
+async def cancel_workbench_job(
+    stele_slug: str, job_id: str, _: None = Depends(require_admin)
+):
+    try:
+        return await run_in_threadpool(workbench_service.cancel_job, stele_slug, job_id)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -368,40 +480,91 @@ async def list_steles():
 async def get_stele_content(name: str):
     content = alignment_service.get_stele_content(name)
     if not content:
-        return {"error": "Stele not found"}, 404
+        raise HTTPException(status_code=404, detail="Stele not found")
     return content
 
 
 @app.get("/api/static/steles/{path:path}")
-async def get_static_stele_file(path: str):
-    file_location = os.path.join(PUBLIC_DIR, "steles", path)
-    if os.path.exists(file_location):
-        return FileResponse(file_location)
-    return {"error": "File not found"}, 404
+async def get_static_stele_file(
+    request: Request, path: str, w: int | None = None, fmt: str | None = None, v: str | None = None
+):
+    return await serve_file(request, os.path.join(PUBLIC_DIR, "steles"), path, w=w, fmt=fmt, v=v)
+
+
+@app.get("/api/images/stats")
+async def get_image_stats(_: None = Depends(require_admin)):
+    return {"formats": image_service.formats, **image_service.stats}
 
 
 @app.get("/api/masterpieces")
-async def list_masterpieces(script_type: str | None = None, q: str | None = None):
-    return {
-        "masterpieces": catalog_service.list_masterpieces(script_type=script_type, q=q)
-    }
+async def list_masterpieces(request: Request, script_type: str | None = None, q: str | None = None):
+    return json_bytes_response(
+        request, catalog_service.list_masterpieces_json(script_type=script_type, q=q)
+    )
 
 
 @app.get("/api/masterpieces/{sid}")
-async def get_masterpiece(sid: str):
-    stele = catalog_service.get_masterpiece(sid)
-    if not stele:
+async def get_masterpiece(request: Request, sid: str):
+    body = catalog_service.get_masterpiece_json(sid)
+    if body is None:
         raise HTTPException(status_code=404, detail="Masterpiece not found")
-    knowledge = catalog_service.get_knowledge_for_masterpiece(sid)
-    return {"masterpiece": stele, "knowledge": knowledge}
+    return json_bytes_response(request, body)
 
 
 @app.get("/api/masterpieces/{sid}/knowledge")
-async def get_masterpiece_knowledge(sid: str):
-    knowledge = catalog_service.get_knowledge_for_masterpiece(sid)
-    if not knowledge:
+async def get_masterpiece_knowledge(request: Request, sid: str):
+    body = catalog_service.get_knowledge_json(sid)
+    if body is None:
         raise HTTPException(status_code=404, detail="Knowledge not found")
-    return knowledge
+    return json_bytes_response(request, body)
+
+
+@app.get("/api/glyphs/{char}")
+async def get_glyphs(
+    char: str,
+    offset: int = 0,
+    limit: int = 50,
+    stele: str | None = None,
+    dataset: str | None = None,
+    source: str = "public",
+    x_inkgrid_admin_token: str | None = Header(default=None),
+):
+    # Every crop of one char across datasets; `source=workbench|all` is admin-only.
+    sources = {"public": ("public",), "workbench": ("workbench",), "all": ("public", "workbench")}.get(source)
+    if sources is None:
+        raise HTTPException(status_code=400, detail="source must be public, workbench or all")
+    if "workbench" in sources:
+        require_admin(x_inkgrid_admin_token)
+    try:
+        return await run_in_threadpool(
+            glyph_index_service.lookup,
+            char,
+            offset=offset,
+            limit=limit,
+            sources=sources,
+            stele=stele,
+            dataset=dataset,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/glyphs")
+async def get_glyph_index_status(refresh: bool = False, _: None = Depends(require_admin)):
+    if refresh:
+        await run_in_threadpool(glyph_index_service.refresh, force=True)
+    return await run_in_threadpool(glyph_index_service.status)
+
+
+@app.get("/api/catalog/status")
+async def get_catalog_status(_: None = Depends(require_admin)):
+    return catalog_service.status()
+
+
+@app.post("/api/catalog/reload")
+async def reload_catalog(_: None = Depends(require_admin)):
+    reloaded = await run_in_threadpool(catalog_service.reload, force=True)
+    return {"reloaded": reloaded, **catalog_service.status()}
 
 
 @app.get("/")
@@ -412,9 +575,19 @@ async def read_root():
     return HTMLResponse("<h1>墨阵 InkGrid</h1><p>Frontend not built</p>")
 
 
-if os.path.exists(STELES_DIR):
-    app.mount("/steles", StaticFiles(directory=STELES_DIR), name="steles")
+@app.api_route("/steles/{path:path}", methods=["GET", "HEAD"])
+async def get_stele_file(
+    request: Request, path: str, w: int | None = None, fmt: str | None = None, v: str | None = None
+):
+    # Page originals, or `?w=` derivatives for previews (see ImageService).
+    # Web datasets (e.g. `chars_yang/*.webp`) only exist in the built frontend.
+    root = STELES_DIR
+    fallback = os.path.join(FRONTEND_DIR, "steles")
+    if not os.path.isfile(os.path.join(STELES_DIR, path)) and os.path.isdir(fallback):
+        root = fallback
+    return await serve_file(request, root, path, w=w, fmt=fmt, v=v)
 
 
 if os.path.exists(FRONTEND_DIR):
-    app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="static")
+    # Serves `*.br` / `*.gz` siblings from `npm run build:data` when accepted.
+    app.mount("/", PrecompressedStaticFiles(directory=FRONTEND_DIR, html=True), name="static")
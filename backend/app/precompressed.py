@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+# Sibling suffixes written by `frontend/scripts/build_data_assets.py`, best first.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Bodies smaller than this are not worth a Content-Encoding.
+MIN_COMPRESS_BYTES = 1024
+
+
+def accepts_encoding(accept_encoding: str | None, encoding: str) -> bool:
+    """True if `Accept-Encoding` allows `encoding` (honours `;q=0`)."""
+
+    for part in str(accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() not in (encoding, "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves `<file>.br` / `<file>.gz` siblings when accepted.
+
+    Siblings older than the file are ignored. Each representation keeps its
+    own ETag (from its stat), so `If-None-Match` answers 304 per encoding.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        request_headers = Headers(scope=scope)
+        accept = request_headers.get("accept-encoding")
+        for encoding, suffix in ENCODINGS:
+            if status_code != 200 or not accepts_encoding(accept, encoding):
+                continue
+            sibling = f"{full_path}{suffix}"
+            try:
+                sibling_stat = os.stat(sibling)
+            except OSError:
+                continue
+            if sibling_stat.st_mtime < stat_result.st_mtime:
+                continue
+            response = FileResponse(
+                sibling,
+                status_code=status_code,
+                stat_result=sibling_stat,
+                media_type=mimetypes.guess_type(str(full_path))[0] or "application/octet-stream",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if any(os.path.exists(f"{full_path}{suffix}") for _, suffix in ENCODINGS):
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+class _EncodedBody:
+    __slots__ = ("etag", "gzip")
+
+    def __init__(self, body: bytes):
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:32]}"'
+        self.gzip = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= MIN_COMPRESS_BYTES else None
+
+
+_ENCODED_CACHE_SIZE = 512
+_encoded: "OrderedDict[bytes, _EncodedBody]" = OrderedDict()
+_encoded_lock = threading.Lock()
+
+
+def _encode(body: bytes) -> _EncodedBody:
+    # Services hand out the same cached bytes objects, whose hash is cached
+    # too, so repeat lookups cost a dict probe.
+    with _encoded_lock:
+        hit = _encoded.get(body)
+        if hit is not None:
+            _encoded.move_to_end(body)
+            return hit
+    enc = _EncodedBody(body)
+    with _encoded_lock:
+        _encoded[body] = enc
+        while len(_encoded) > _ENCODED_CACHE_SIZE:
+            _encoded.popitem(last=False)
+    return enc
+
+
+def json_bytes_response(request: Request, body: bytes) -> Response:
+    """Serialized JSON with ETag/304 and gzip when the client accepts it."""
+
+    enc = _encode(body)
+    content, etag, headers = body, enc.etag, {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if enc.gzip is not None and accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        # Strong ETags are per representation.
+        content, etag = enc.gzip, f'{enc.etag[:-1]}-gz"'
+        headers["Content-Encoding"] = "gzip"
+    headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -1,17 +1,61 @@
 import os
 import json
+import threading
+from collections import OrderedDict
+
+from app.services.catalog_service import _normalize_key
+
+
+def _fold_name(value: str) -> str:
+    # _normalize_key plus book-title brackets: 《峄山刻石》 == 峄山刻石
+    key = _normalize_key(value)
+    for ch in "《》〈〉「」『』\"'":
+        key = key.replace(ch, "")
+    return key
+
+
+def _load_t2s() -> dict:
+    # Traditional -> simplified, one character each (app/data/hanzi_t2s.json;
+    # chars common in stele and calligrapher names, no OpenCC/zhconv here).
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "hanzi_t2s.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return str.maketrans(json.load(f).get("t2s") or {})
+    except (OSError, ValueError) as e:
+        print(f"WARNING: {path}: {e}")
+        return {}
+
+
+_T2S = _load_t2s()
+
+
+def _variant_key(folded: str) -> str:
+    # Per-character simplified form: 嶧山刻石 == 峄山刻石, 易山刻石 != 峄山刻石.
+    return folded.translate(_T2S)
+
 
 class AlignmentService:
+    # Resolved lookups (hits and misses) kept per service.
+    LOOKUP_CACHE_SIZE = 4096
+
     def __init__(self):
         self.steles_data = {}
         self.steles_full_data = []
+        # Lookup indexes over steles_full_data (row numbers, first wins).
+        self._by_name = {}
+        self._by_id = {}
+        self._by_key = {}
+        self._by_variant = {}
+        self._keys = []
+        self._lookup_cache = OrderedDict()
+        self._lookup_lock = threading.Lock()
         self._load_steles()
 
     def _load_steles(self):
         # 使用相对于此文件的路径
         current_dir = os.path.dirname(os.path.abspath(__file__))
         data_path = os.path.join(current_dir, "..", "data", "steles.json")
-        
+
         if os.path.exists(data_path):
             with open(data_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
@@ -20,20 +64,91 @@ class AlignmentService:
                     self.steles_data[stele["name"]] = stele["content"]
         else:
             print(f"WARNING: {data_path} not found.")
+        self._build_index()
+
+    def _build_index(self):
+        self._by_id, self._by_key, self._by_variant, self._keys = {}, {}, {}, []
+        # Same precedence as steles_data (last duplicate name wins).
+        self._by_name = {s["name"]: i for i, s in enumerate(self.steles_full_data)}
+        for i, s in enumerate(self.steles_full_data):
+            sid = str(s.get("id") or "").strip()
+            if sid:
+                self._by_id.setdefault(sid, i)
+            keys = []
+            for name in [s.get("name"), *(s.get("aliases") or [])]:
+                key = _fold_name(str(name or ""))
+                if key and key not in keys:
+                    keys.append(key)
+            self._keys.append(keys)
+            for key in keys:
+                self._by_key.setdefault(key, i)
+                self._by_variant.setdefault(_variant_key(key), []).append(i)
+        with self._lookup_lock:
+            self._lookup_cache.clear()
 
     def list_steles(self):
         # 返回简化的碑帖元数据列表
         return [{"id": s.get("id"), "name": s["name"], "dynasty": s.get("dynasty"), "author": s.get("author")} for s in self.steles_full_data]
 
+    def _fuzzy(self, key: str):
+        # Substring match either way, made deterministic: prefer the longest
+        # stele name contained in the query ("峄山刻石拓本"), then the shortest
+        # name containing it ("峄山"); ties go to catalog order.
+        inner, outer = [], []
+        for i, keys in enumerate(self._keys):
+            for k in keys:
+                if k in key:
+                    inner.append((-len(k), i))
+                elif key in k:
+                    outer.append((len(k), i))
+        if inner:
+            return min(inner)[1]
+        if outer:
+            return min(outer)[1]
+        return None
+
+    def resolve(self, stele_name: str):
+        """Row in steles_full_data for a name, id, alias or variant; or None.
+
+        Order: exact name, id, folded name/alias, folded name with traditional
+        chars simplified (only if unambiguous), then fuzzy substring. Results, including misses, are cached.
+        """
+
+        query = str(stele_name or "")
+        with self._lookup_lock:
+            if query in self._lookup_cache:
+                self._lookup_cache.move_to_end(query)
+                return self._lookup_cache[query]
+
+        row = None
+        if query in self._by_name:
+            row = self._by_name[query]
+        elif query.strip() in self._by_id:
+            row = self._by_id[query.strip()]
+        else:
+            key = _fold_name(query)
+            if key:
+                row = self._by_key.get(key)
+                if row is None:
+                    rows = self._by_variant.get(_variant_key(key)) or []
+                    if len(set(rows)) == 1:
+                        row = rows[0]
+                if row is None:
+                    row = self._fuzzy(key)
+
+        with self._lookup_lock:
+            self._lookup_cache[query] = row
+            while len(self._lookup_cache) > self.LOOKUP_CACHE_SIZE:
+                self._lookup_cache.popitem(last=False)
+        return row
+
     def get_stele_content(self, stele_name: str):
-        # 尝试精确匹配
+        # 精确匹配直接命中；其余经索引解析（id、别名、繁简、模糊）
         content = self.steles_data.get(stele_name)
         if content:
             return content
-            
-        # 尝试模糊匹配
-        for name, data in self.steles_data.items():
-            if name in stele_name or stele_name in name:
-                return data
-                
-        return []
+
+        row = self.resolve(stele_name)
+        if row is None:
+            return []
+        return self.steles_data.get(self.steles_full_data[row]["name"]) or []
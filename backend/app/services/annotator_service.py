@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import subprocess
@@ -13,10 +14,28 @@ class AnnotatorPaths:
     overrides_path: Path
 
 
+async def _run_checked(cmd: list[str]) -> None:
+    # asyncio counterpart of subprocess.check_call (output goes to our stdout).
+    proc = await asyncio.create_subprocess_exec(*cmd)
+    try:
+        rc = await proc.wait()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
+
+
 class AnnotatorService:
-    def __init__(self, base_dir: str, steles_dir: str):
+    def __init__(self, base_dir: str, steles_dir: str, *, max_concurrent_applies: int = 2):
         self.base_dir = Path(base_dir)
         self.steles_dir = Path(steles_dir)
+        self.max_concurrent_applies = max(1, int(max_concurrent_applies))
+        # Created lazily, on the event loop that runs the applies.
+        self._apply_slots: Optional[asyncio.Semaphore] = None
+        self._dataset_locks: Dict[str, asyncio.Lock] = {}
 
     def _resolve_stele_dir(self, stele_rel_path: str) -> AnnotatorPaths:
         rel = str(stele_rel_path or "").strip().lstrip("/")
@@ -57,14 +76,15 @@ class AnnotatorService:
         )
         return out
 
-    def apply_overrides(
+    def _apply_plan(
         self,
         stele_rel_path: str,
         *,
         dataset_dir: str,
         only_files: Optional[list[str]] = None,
         run_qa: bool = True,
-    ) -> Dict[str, Any]:
+    ) -> tuple[list[list[str]], Dict[str, Any]]:
+        # (commands to run in order, result) for apply_overrides.
         paths = self._resolve_stele_dir(stele_rel_path)
         if not dataset_dir:
             raise ValueError("Missing dataset_dir")
@@ -90,8 +110,7 @@ class AnnotatorService:
         ]
         if only_files:
             cmd += ["--only-files", ",".join(only_files)]
-
-        subprocess.check_call(cmd)
+        cmds = [cmd]
 
         if run_qa:
             qa_cmd = [
@@ -103,16 +122,52 @@ class AnnotatorService:
                 str(paths.stele_dir),
                 "--top",
                 "120",
+                # Only crops whose box/page/PNG changed are re-measured.
+                "--metrics-cache",
+                str(ds / ".qa" / "metrics.json"),
+                "--workers",
+                "0",
             ]
-            subprocess.check_call(qa_cmd)
+            cmds.append(qa_cmd)
 
-        return {
+        return cmds, {
             "dataset_dir": str(ds),
             "overrides": str(paths.overrides_path),
             "qa_report": str(ds / "qa_report.json"),
             "qa_summary": str(ds / "qa_summary.md"),
         }
 
+    def _dataset_lock(self, dataset_dir: str) -> asyncio.Lock:
+        lock = self._dataset_locks.get(dataset_dir)
+        if lock is None:
+            lock = self._dataset_locks[dataset_dir] = asyncio.Lock()
+        return lock
+
+    async def apply_overrides(
+        self,
+        stele_rel_path: str,
+        *,
+        dataset_dir: str,
+        only_files: Optional[list[str]] = None,
+        run_qa: bool = True,
+    ) -> Dict[str, Any]:
+        """Re-render overridden crops (+ QA) in subprocesses, off the event loop.
+
+        Applies to the same dataset run one at a time; at most
+        `max_concurrent_applies` run at once overall. Raises
+        `subprocess.CalledProcessError` when a step fails.
+        """
+
+        cmds, result = await asyncio.to_thread(
+            self._apply_plan, stele_rel_path, dataset_dir=dataset_dir, only_files=only_files, run_qa=run_qa
+        )
+        if self._apply_slots is None:
+            self._apply_slots = asyncio.Semaphore(self.max_concurrent_applies)
+        async with self._dataset_lock(result["dataset_dir"]), self._apply_slots:
+            for cmd in cmds:
+                await _run_checked(cmd)
+        return result
+
     def list_datasets(self, stele_rel_path: str) -> Dict[str, Any]:
         paths = self._resolve_stele_dir(stele_rel_path)
 
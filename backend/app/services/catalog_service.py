@@ -1,6 +1,11 @@
 import json
 import os
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pypinyin import lazy_pinyin
 
 
 def _read_json(path: str) -> Any:
@@ -8,6 +13,12 @@ def _read_json(path: str) -> Any:
         return json.load(f)
 
 
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
 def _normalize_key(value: str) -> str:
     # Minimal normalization (keep ASCII; avoid heavy deps)
     return (
@@ -22,8 +33,160 @@ def _normalize_key(value: str) -> str:
     )
 
 
+# Fields matched by `q=` (joined, lowercased; plus their pinyin spellings).
+_SEARCH_FIELDS = ("name", "author", "dynasty", "script_type", "location")
+
+# List response projection (metadata only); `aliases` defaults to [].
+_LIST_FIELDS = (
+    "id",
+    "name",
+    "aliases",
+    "script_type",
+    "author",
+    "dynasty",
+    "year",
+    "type",
+    "location",
+    "total_chars",
+    "description",
+    "knowledge_id",
+    "assets",
+)
+
+
+def _pinyin_keys(value: str) -> List[str]:
+    """Full pinyin and initials, e.g. 欧阳询 -> ["ouyangxun", "oyx"]."""
+
+    syllables = [p.strip().lower() for p in lazy_pinyin(str(value or ""))]
+    syllables = [p.replace(" ", "") for p in syllables if p]
+    if not syllables:
+        return []
+    return ["".join(syllables), "".join(p[0] for p in syllables)]
+
+
+def _grams(text: str) -> Set[str]:
+    # Unigrams + bigrams: any query of length >= 1 maps to postings.
+    return set(text) | {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _query_grams(text: str) -> Set[str]:
+    if len(text) <= 1:
+        return set(text)
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class _Snapshot:
+    """One catalog generation: data, search index and serialized responses.
+
+    Built completely before it is published and never mutated afterwards
+    (except the bounded list-response LRU), so readers take one reference
+    and need no lock.
+    """
+
+    def __init__(
+        self,
+        stamp: Tuple[Tuple[str, int, int], ...],
+        steles: List[Dict[str, Any]],
+        knowledge: List[Dict[str, Any]],
+        knowledge_overrides: Dict[str, str],
+    ):
+        self.stamp = stamp
+        self.loaded_at = time.time()
+        self.steles = steles
+        self.knowledge = knowledge
+
+        self.steles_by_id: Dict[str, Dict[str, Any]] = {}
+        for s in steles:
+            sid = str(s.get("id") or "").strip()
+            if sid and sid not in self.steles_by_id:
+                self.steles_by_id[sid] = s
+
+        self.knowledge_by_id: Dict[str, Dict[str, Any]] = {}
+        self.knowledge_by_name_key: Dict[str, Dict[str, Any]] = {}
+        for k in knowledge:
+            kid = str(k.get("id") or "").strip()
+            if kid and kid not in self.knowledge_by_id:
+                self.knowledge_by_id[kid] = k
+            name_key = _normalize_key(str(k.get("name") or ""))
+            if name_key and name_key not in self.knowledge_by_name_key:
+                self.knowledge_by_name_key[name_key] = k
+
+        # Search state: per stele (in steles.json order) the legacy haystack,
+        # pinyin keys and the list projection; an n-gram inverted index over
+        # both.
+        self.hay: List[str] = []
+        self.pinyin: List[List[str]] = []
+        self.projections: List[Dict[str, Any]] = []
+        self.grams: Dict[str, Set[int]] = {}
+        for i, s in enumerate(steles):
+            fields = [str(s.get(f) or "") for f in _SEARCH_FIELDS]
+            hay = " ".join(fields).lower()
+            keys: List[str] = []
+            for value in fields:
+                for key in _pinyin_keys(value):
+                    if key and key not in keys:
+                        keys.append(key)
+            projection = {f: s.get(f) for f in _LIST_FIELDS}
+            projection["aliases"] = s.get("aliases") or []
+
+            self.hay.append(hay)
+            self.pinyin.append(keys)
+            self.projections.append(projection)
+            for text in [hay, *keys]:
+                for g in _grams(text):
+                    self.grams.setdefault(g, set()).add(i)
+
+        # Per-id response bodies, serialized once per generation.
+        self.masterpiece_json: Dict[str, bytes] = {}
+        self.knowledge_json: Dict[str, bytes] = {}
+        for sid, s in self.steles_by_id.items():
+            k = self._resolve_knowledge(sid, s, knowledge_overrides)
+            self.masterpiece_json[sid] = _dumps({"masterpiece": s, "knowledge": k})
+            if k:
+                self.knowledge_json[sid] = _dumps(k)
+
+        # Serialized list responses (LRU per query).
+        self.responses: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.responses_lock = threading.Lock()
+
+    def _resolve_knowledge(
+        self, sid: str, s: Dict[str, Any], overrides: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        explicit = str(s.get("knowledge_id") or "").strip()
+        if explicit:
+            hit = self.knowledge_by_id.get(explicit)
+            if hit:
+                return hit
+
+        override = overrides.get(sid)
+        if override:
+            hit = self.knowledge_by_id.get(override)
+            if hit:
+                return hit
+
+        hit = self.knowledge_by_id.get(sid)
+        if hit:
+            return hit
+
+        # Fallback: name key
+        name_key = _normalize_key(str(s.get("name") or ""))
+        if name_key:
+            hit = self.knowledge_by_name_key.get(name_key)
+            if hit:
+                return hit
+
+        return None
+
+
 class CatalogService:
-    """Serve masterpieces + knowledge from JSON (dev) or built dist (prod)."""
+    """Serve masterpieces + knowledge from JSON (dev) or built dist (prod).
+
+    The catalog is an immutable `_Snapshot`. `start_watching()` polls the
+    source files' mtime/size off the request path; on a change (e.g. after
+    `masterpiece_import_assets.py`) a new snapshot is built in the watcher
+    thread and published with a single reference swap. A file that fails to
+    parse (mid-write) keeps the current snapshot and is retried next poll.
+    """
 
     # Known id mismatches between steles.json and stele_knowledge.json
     _KNOWLEDGE_ID_OVERRIDES: Dict[str, str] = {
@@ -35,17 +198,18 @@ class CatalogService:
         "kai_007": "kai_003",
     }
 
+    RESPONSE_CACHE_SIZE = 256
+
     def __init__(self, base_dir: str, frontend_dist_dir: str):
         self.base_dir = base_dir
         self.frontend_dist_dir = frontend_dist_dir
 
-        self._steles: List[Dict[str, Any]] = []
-        self._steles_by_id: Dict[str, Dict[str, Any]] = {}
-        self._knowledge: List[Dict[str, Any]] = []
-        self._knowledge_by_id: Dict[str, Dict[str, Any]] = {}
-        self._knowledge_by_name_key: Dict[str, Dict[str, Any]] = {}
+        self._reload_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
+        self.stats = {"reloads": 0, "reload_errors": 0, "last_error": None}
 
-        self._load()
+        self._snap = self._build_snapshot()
 
     def _candidate_paths(self) -> Dict[str, List[str]]:
         # Prefer source data in dev; fallback to built dist in production.
@@ -68,120 +232,159 @@ class CatalogService:
                 return p
         return None
 
-    def _load(self) -> None:
-        candidates = self._candidate_paths()
+    def _source_stamp(self) -> Tuple[Tuple[str, int, int], ...]:
+        stamp = []
+        for paths in self._candidate_paths().values():
+            p = self._pick_first_existing(paths)
+            try:
+                st = os.stat(p) if p else None
+            except OSError:
+                st = None
+            stamp.append((p or "", st.st_mtime_ns if st else 0, st.st_size if st else 0))
+        return tuple(stamp)
 
-        steles_path = self._pick_first_existing(candidates["steles"])
-        knowledge_path = self._pick_first_existing(candidates["knowledge"])
+    def _build_snapshot(self) -> _Snapshot:
+        stamp = self._source_stamp()
+        (steles_path, _, _), (knowledge_path, _, _) = stamp
 
+        steles: List[Dict[str, Any]] = []
         if steles_path:
             raw = _read_json(steles_path)
-            self._steles = list(raw.get("steles", []) or [])
-        else:
-            self._steles = []
+            steles = list(raw.get("steles", []) or [])
 
+        knowledge: List[Dict[str, Any]] = []
         if knowledge_path:
             raw = _read_json(knowledge_path)
-            self._knowledge = list(raw.get("steles", []) or [])
-        else:
-            self._knowledge = []
+            knowledge = list(raw.get("steles", []) or [])
 
-        self._steles_by_id = {}
-        for s in self._steles:
-            sid = str(s.get("id") or "").strip()
-            if not sid:
-                continue
-            if sid not in self._steles_by_id:
-                self._steles_by_id[sid] = s
-
-        self._knowledge_by_id = {}
-        self._knowledge_by_name_key = {}
-        for k in self._knowledge:
-            kid = str(k.get("id") or "").strip()
-            if kid and kid not in self._knowledge_by_id:
-                self._knowledge_by_id[kid] = k
-            name_key = _normalize_key(str(k.get("name") or ""))
-            if name_key and name_key not in self._knowledge_by_name_key:
-                self._knowledge_by_name_key[name_key] = k
+        return _Snapshot(stamp, steles, knowledge, self._KNOWLEDGE_ID_OVERRIDES)
+
+    def reload(self, *, force: bool = False) -> bool:
+        """Rebuild and publish a new snapshot if the sources changed.
+
+        Returns True when a new snapshot was published. Parse errors keep the
+        current snapshot (and are counted in `stats`).
+        """
+
+        with self._reload_lock:
+            if not force and self._source_stamp() == self._snap.stamp:
+                return False
+            try:
+                snap = self._build_snapshot()
+            except (OSError, ValueError) as e:
+                self.stats["reload_errors"] += 1
+                self.stats["last_error"] = str(e)
+                return False
+            self._snap = snap
+            self.stats["reloads"] += 1
+            self.stats["last_error"] = None
+            return True
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        if interval <= 0 or self._watch_thread is not None:
+            return
+        self._watch_stop.clear()
+
+        def _watch() -> None:
+            while not self._watch_stop.wait(interval):
+                self.reload()
+
+        self._watch_thread = threading.Thread(target=_watch, name="catalog-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        t, self._watch_thread = self._watch_thread, None
+        if t is not None:
+            t.join(timeout=5)
+
+    def status(self) -> Dict[str, Any]:
+        snap = self._snap
+        return {
+            "steles": len(snap.steles),
+            "knowledge": len(snap.knowledge),
+            "sources": [p for p, _, _ in snap.stamp],
+            "loaded_at": snap.loaded_at,
+            "watching": self._watch_thread is not None,
+            **self.stats,
+        }
+
+    @staticmethod
+    def _candidates(snap: _Snapshot, text: str) -> Set[int]:
+        postings = sorted(
+            (snap.grams.get(g, set()) for g in _query_grams(text)), key=len
+        )
+        if not postings:
+            return set()
+        out = set(postings[0])
+        for p in postings[1:]:
+            out &= p
+            if not out:
+                break
+        return out
+
+    def _search(self, snap: _Snapshot, script_type: str, qn: str) -> List[int]:
+        if qn:
+            # Substring of the joined fields (as before), or a pinyin
+            # substring/prefix: "ouyang", "jiucheng gong", "jcg".
+            qp = qn.replace(" ", "")
+            hits = {i for i in self._candidates(snap, qn) if qn in snap.hay[i]}
+            if qp:
+                hits |= {
+                    i
+                    for i in self._candidates(snap, qp)
+                    if any(qp in key for key in snap.pinyin[i])
+                }
+            rows = sorted(hits)
+        else:
+            rows = list(range(len(snap.steles)))
+        if script_type:
+            rows = [
+                i
+                for i in rows
+                if str(snap.steles[i].get("script_type") or "") == script_type
+            ]
+        return rows
 
     def list_masterpieces(
         self, script_type: Optional[str] = None, q: Optional[str] = None
     ) -> List[Dict[str, Any]]:
+        """Metadata of matching steles (shared dicts; do not mutate)."""
+
+        snap = self._snap
         script_type = (script_type or "").strip()
         qn = (q or "").strip().lower()
+        return [snap.projections[i] for i in self._search(snap, script_type, qn)]
 
-        out: List[Dict[str, Any]] = []
-        for s in self._steles:
-            if script_type and str(s.get("script_type") or "") != script_type:
-                continue
-
-            if qn:
-                hay = " ".join(
-                    [
-                        str(s.get("name") or ""),
-                        str(s.get("author") or ""),
-                        str(s.get("dynasty") or ""),
-                        str(s.get("script_type") or ""),
-                        str(s.get("location") or ""),
-                    ]
-                ).lower()
-                if qn not in hay:
-                    continue
-
-            # Metadata only
-            out.append(
-                {
-                    "id": s.get("id"),
-                    "name": s.get("name"),
-                    "aliases": s.get("aliases") or [],
-                    "script_type": s.get("script_type"),
-                    "author": s.get("author"),
-                    "dynasty": s.get("dynasty"),
-                    "year": s.get("year"),
-                    "type": s.get("type"),
-                    "location": s.get("location"),
-                    "total_chars": s.get("total_chars"),
-                    "description": s.get("description"),
-                    "knowledge_id": s.get("knowledge_id"),
-                    "assets": s.get("assets"),
-                }
-            )
-
-        return out
+    def list_masterpieces_json(
+        self, script_type: Optional[str] = None, q: Optional[str] = None
+    ) -> bytes:
+        """Serialized `{"masterpieces": [...]}` response, LRU-cached per query."""
 
-    def get_masterpiece(self, sid: str) -> Optional[Dict[str, Any]]:
-        s = self._steles_by_id.get(str(sid))
-        if not s:
-            return None
-        # Return full stele, including content.
-        return dict(s)
+        snap = self._snap
+        key = ((script_type or "").strip(), (q or "").strip().lower())
+        with snap.responses_lock:
+            hit = snap.responses.get(key)
+            if hit is not None:
+                snap.responses.move_to_end(key)
+                return hit
 
-    def get_knowledge_for_masterpiece(self, sid: str) -> Optional[Dict[str, Any]]:
-        s = self._steles_by_id.get(str(sid))
-        if not s:
-            return None
+        rows = self._search(snap, *key)
+        body = _dumps({"masterpieces": [snap.projections[i] for i in rows]})
 
-        explicit = str(s.get("knowledge_id") or "").strip()
-        if explicit:
-            hit = self._knowledge_by_id.get(explicit)
-            if hit:
-                return dict(hit)
+        with snap.responses_lock:
+            snap.responses[key] = body
+            snap.responses.move_to_end(key)
+            while len(snap.responses) > self.RESPONSE_CACHE_SIZE:
+                snap.responses.popitem(last=False)
+        return body
 
-        override = self._KNOWLEDGE_ID_OVERRIDES.get(str(sid))
-        if override:
-            hit = self._knowledge_by_id.get(override)
-            if hit:
-                return dict(hit)
+    def get_masterpiece_json(self, sid: str) -> Optional[bytes]:
+        """Serialized `{"masterpiece", "knowledge"}` response (prebuilt)."""
 
-        hit = self._knowledge_by_id.get(str(sid))
-        if hit:
-            return dict(hit)
+        return self._snap.masterpiece_json.get(str(sid))
 
-        # Fallback: name key
-        name_key = _normalize_key(str(s.get("name") or ""))
-        if name_key:
-            hit = self._knowledge_by_name_key.get(name_key)
-            if hit:
-                return dict(hit)
+    def get_knowledge_json(self, sid: str) -> Optional[bytes]:
+        """Serialized knowledge entry of a masterpiece (prebuilt)."""
 
-        return None
+        return self._snap.knowledge_json.get(str(sid))
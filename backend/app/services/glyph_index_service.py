@@ -0,0 +1,273 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.job_store import write_json_atomic
+
+# Placeholder chars of unaligned cells; not indexed.
+_SKIP_CHARS = {"", "?", "？", "□", "■"}
+
+INDEX_VERSION = 1
+
+# `U+4E4B`, `u4e4b` or bare `4E4B`: 4-6 hex digits, so `ab` is not a codepoint.
+_CODEPOINT_RE = re.compile(r"(?:[Uu]\+?)?([0-9A-Fa-f]{4,6})")
+
+
+def parse_char(value: str) -> str:
+    """`之`, `U+4E4B`, `u4e4b` or `4E4B` (4-6 hex digits) -> `之`.
+
+    Surrogates and Unicode noncharacters are rejected (ValueError).
+    """
+
+    s = str(value or "").strip()
+    if len(s) == 1:
+        cp = ord(s)
+    else:
+        m = _CODEPOINT_RE.fullmatch(s)
+        cp = int(m.group(1), 16) if m else -1
+    if not 0 <= cp <= 0x10FFFF or 0xD800 <= cp <= 0xDFFF or 0xFDD0 <= cp <= 0xFDEF or (cp & 0xFFFE) == 0xFFFE:
+        raise ValueError(f"Invalid char: {value!r}")
+    return chr(cp)
+
+
+def _dataset_rows(index_path: Path) -> Tuple[str, List[list]]:
+    raw = json.loads(index_path.read_text(encoding="utf-8"))
+    rows: List[list] = []
+    for e in raw.get("files") or []:
+        ch = str(e.get("char") or "").strip()
+        if ch in _SKIP_CHARS or len(ch) != 1:
+            continue
+        src = e.get("source") if isinstance(e.get("source"), dict) else {}
+        box = src.get("crop_box")
+        rows.append(
+            [
+                ch,
+                int(e.get("index") or 0),
+                str(e.get("file") or ""),
+                str(src.get("image") or ""),
+                [int(round(float(v))) for v in box] if isinstance(box, list) and len(box) == 4 else None,
+            ]
+        )
+    return str(raw.get("name") or ""), rows
+
+
+class _Generation:
+    # Immutable view for readers: char -> [(dataset key, row)] in stable order.
+    def __init__(self, datasets: Dict[str, Dict[str, Any]]):
+        self.datasets = datasets
+        self.by_char: Dict[str, List[Tuple[str, int]]] = {}
+        for key in sorted(datasets, key=lambda k: (datasets[k]["source"] != "public", datasets[k]["stele"], datasets[k]["dataset"])):
+            for i, row in enumerate(datasets[key]["rows"]):
+                self.by_char.setdefault(row[0], []).append((key, i))
+
+
+class GlyphIndexService:
+    """Inverted index char -> glyph crops across every dataset `index.json`.
+
+    Sources (first one wins for the same `<script>/<stele>/<dataset>`):
+    - `public`: `frontend/public/steles` (or `frontend/dist/steles`) and
+      `<repo>/steles`, served under `/steles/...`;
+    - `workbench`: `<projects_root>/<slug>/datasets/*`, served through the
+      admin-only workbench files endpoint.
+
+    Per-dataset rows are persisted in one JSON file keyed by the index path's
+    mtime/size; `refresh()` re-parses only index files that changed and runs
+    at most every `refresh_interval` seconds on the query path (or on demand).
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        frontend_dist_dir: str,
+        steles_dir: str,
+        projects_root: Optional[Path],
+        *,
+        index_path: str,
+        refresh_interval: float = 30.0,
+    ):
+        self.public_roots = [
+            Path(base_dir) / "frontend" / "public" / "steles",
+            Path(frontend_dist_dir) / "steles",
+            Path(steles_dir),
+        ]
+        self.projects_root = Path(projects_root) if projects_root else None
+        self.index_path = Path(index_path)
+        self.refresh_interval = max(0.0, float(refresh_interval))
+
+        self._lock = threading.Lock()
+        self._gen: Optional[_Generation] = None
+        self._checked_at = 0.0
+        self.stats = {"refreshes": 0, "parsed": 0, "errors": 0, "last_refresh_ms": 0.0}
+
+    def _discover(self) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        seen_public = False
+        for root in self.public_roots:
+            if not root.is_dir():
+                continue
+            # dist/steles is a copy of public/steles: only used without it.
+            if seen_public and root.parent.name == "dist":
+                continue
+            seen_public = seen_public or root.parent.name == "public"
+            for pattern in ("*/*/*/index.json", "*/*/index.json"):
+                for p in root.glob(pattern):
+                    rel = p.parent.relative_to(root).as_posix()
+                    if any(part.startswith(".") for part in rel.split("/")):
+                        continue
+                    key = f"public:{rel}"
+                    if key in found:
+                        continue
+                    parts = rel.split("/")
+                    found[key] = {
+                        "source": "public",
+                        "stele": "/".join(parts[:-1]),
+                        "dataset": parts[-1],
+                        "url_base": f"/steles/{rel}/",
+                        "path": str(p),
+                    }
+        if self.projects_root and self.projects_root.is_dir():
+            for p in self.projects_root.glob("*/datasets/*/index.json"):
+                slug, ds = p.parent.parent.parent.name, p.parent.name
+                found[f"workbench:{slug}/{ds}"] = {
+                    "source": "workbench",
+                    "stele": slug,
+                    "dataset": ds,
+                    "url_base": f"/api/workbench/projects/{slug}/files/datasets/{ds}/",
+                    "path": str(p),
+                }
+        return found
+
+    def _load_persisted(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            raw = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if raw.get("version") != INDEX_VERSION:
+            return {}
+        return dict(raw.get("datasets") or {})
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """Re-parse changed/new dataset indexes; True if anything changed."""
+
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._gen is not None and now - self._checked_at < self.refresh_interval:
+                return False
+            t0 = time.perf_counter()
+            old = self._gen.datasets if self._gen is not None else self._load_persisted()
+            datasets: Dict[str, Dict[str, Any]] = {}
+            changed = False
+            for key, meta in self._discover().items():
+                try:
+                    st = os.stat(meta["path"])
+                except OSError:
+                    continue
+                prev = old.get(key)
+                if (
+                    prev is not None
+                    and prev.get("path") == meta["path"]
+                    and prev.get("mtime_ns") == st.st_mtime_ns
+                    and prev.get("size") == st.st_size
+                ):
+                    datasets[key] = prev
+                    continue
+                try:
+                    name, rows = _dataset_rows(Path(meta["path"]))
+                except (OSError, ValueError, TypeError):
+                    # Half-written index: keep the previous rows, retry later.
+                    self.stats["errors"] += 1
+                    if prev is not None:
+                        datasets[key] = prev
+                    continue
+                datasets[key] = {**meta, "name": name, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "rows": rows}
+                self.stats["parsed"] += 1
+                changed = True
+            changed = changed or set(datasets) != set(old)
+
+            if changed or self._gen is None:
+                self._gen = _Generation(datasets)
+            if changed:
+                try:
+                    self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                    write_json_atomic(self.index_path, {"version": INDEX_VERSION, "datasets": datasets})
+                except OSError:
+                    self.stats["errors"] += 1
+                self.stats["refreshes"] += 1
+            self._checked_at = time.monotonic()
+            self.stats["last_refresh_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            return changed
+
+    def _generation(self) -> _Generation:
+        self.refresh()
+        assert self._gen is not None
+        return self._gen
+
+    def lookup(
+        self,
+        char: str,
+        *,
+        offset: int = 0,
+        limit: int = 50,
+        sources: Tuple[str, ...] = ("public",),
+        stele: Optional[str] = None,
+        dataset: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Glyph crops of one char, paginated, with per-stele counts."""
+
+        ch = parse_char(char)
+        gen = self._generation()
+        hits = []
+        for key, i in gen.by_char.get(ch, ()):
+            ds = gen.datasets[key]
+            if ds["source"] not in sources:
+                continue
+            if stele and ds["stele"] != stele and not ds["stele"].endswith(f"/{stele}"):
+                continue
+            if dataset and ds["dataset"] != dataset:
+                continue
+            hits.append((ds, ds["rows"][i]))
+
+        by_stele: Dict[str, int] = {}
+        for ds, _row in hits:
+            by_stele[ds["stele"]] = by_stele.get(ds["stele"], 0) + 1
+
+        offset, limit = max(0, int(offset)), max(1, min(500, int(limit)))
+        items = [
+            {
+                "source": ds["source"],
+                "stele": ds["stele"],
+                "dataset": ds["dataset"],
+                "dataset_name": ds.get("name") or "",
+                "index": row[1],
+                "file": row[2],
+                "url": ds["url_base"] + row[2],
+                "page": row[3],
+                "crop_box": row[4],
+            }
+            for ds, row in hits[offset : offset + limit]
+        ]
+        return {
+            "char": ch,
+            "codepoint": f"U+{ord(ch):04X}",
+            "total": len(hits),
+            "offset": offset,
+            "limit": limit,
+            "by_stele": by_stele,
+            "items": items,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        gen = self._generation()
+        return {
+            "datasets": {
+                k: {"source": d["source"], "glyphs": len(d["rows"]), "path": d["path"]}
+                for k, d in sorted(gen.datasets.items())
+            },
+            "chars": len(gen.by_char),
+            "index_path": str(self.index_path),
+            **self.stats,
+        }
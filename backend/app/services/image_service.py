@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from PIL import Image, features
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+# Derivative widths; a request is served from the smallest tier >= `w`.
+WIDTH_TIERS = (320, 640, 1200, 2048)
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff", ".bmp"}
+
+# fmt -> (PIL format, suffix, media type, save options)
+_FORMATS = {
+    "jpeg": ("JPEG", ".jpg", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", ".webp", "image/webp", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", ".avif", "image/avif", {"quality": 60}),
+}
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "public, no-cache"
+
+
+class ImageService:
+    """Serve page images as resized, re-encoded derivatives with a disk cache.
+
+    `?w=<px>` picks a width tier, `?fmt=auto|webp|avif|jpeg` the encoding
+    (`auto` negotiates on `Accept`), `?v=<version>` marks a hashed URL that
+    may be cached forever. Derivatives keep the stored pixel orientation
+    (like the crop pipeline), so page coordinates scale by the width ratio.
+
+    Cache entries live at `<cache_dir>/<key[:2]>/<key><suffix>`, keyed by the
+    source path, size and mtime plus the tier and format; an edited page gets
+    new keys and stale entries are simply never read again.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self.formats = ["jpeg"] + [f for f in ("webp", "avif") if features.check(f)]
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {"renders": 0, "hits": 0, "originals": 0, "not_modified": 0}
+
+    @staticmethod
+    def version(path: Path) -> str:
+        """Content version of a source file (path, size, mtime)."""
+
+        st = path.stat()
+        raw = f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def versioned_query(self, path: Path, *, width: int | None = None) -> str:
+        """Query string for an immutable URL of `path` (`?w=..&v=..`)."""
+
+        q = f"v={self.version(path)}"
+        return f"w={int(width)}&{q}" if width else q
+
+    @staticmethod
+    def tier_for(width: int, source_width: int) -> int | None:
+        """Smallest tier >= `width`; None when the original is small enough."""
+
+        for tier in WIDTH_TIERS:
+            if tier >= width:
+                return tier if tier < source_width else None
+        return WIDTH_TIERS[-1] if WIDTH_TIERS[-1] < source_width else None
+
+    def negotiate(self, fmt: str | None, accept: str | None) -> str:
+        fmt = str(fmt or "auto").strip().lower()
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt != "auto":
+            if fmt not in self.formats:
+                raise ValueError(f"Unsupported image format: {fmt} (available: {', '.join(self.formats)})")
+            return fmt
+        accept = str(accept or "").lower()
+        for cand in ("avif", "webp"):
+            if cand in self.formats and f"image/{cand}" in accept:
+                return cand
+        return "jpeg"
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def derivative(self, source: Path, width: int, fmt: str) -> tuple[Path, str] | None:
+        """(cached file, etag) of `source` at tier `width` in `fmt`.
+
+        Returns None when the source is not wider than the tier (serve the
+        original instead). Blocking: decodes the page on a cache miss.
+        """
+
+        version = self.version(source)
+        pil_format, suffix, _media, options = _FORMATS[fmt]
+        key = hashlib.sha1(f"{version}|{int(width)}|{fmt}".encode("utf-8")).hexdigest()
+        out = self.cache_dir / key[:2] / f"{key}{suffix}"
+        etag = f'"{key[:32]}"'
+        if out.exists():
+            self.stats["hits"] += 1
+            return out, etag
+
+        try:
+            with self._lock(key):
+                if out.exists():
+                    self.stats["hits"] += 1
+                    return out, etag
+                with Image.open(source) as im:
+                    src_w, src_h = im.size
+                    tier = self.tier_for(width, src_w)
+                    if tier is None:
+                        return None
+                    dst = (tier, max(1, round(src_h * tier / src_w)))
+                    # JPEG: decode at the smallest 1/2^n scale that still covers `dst`.
+                    im.draft("RGB", dst)
+                    has_alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+                    img = im.convert("RGBA" if has_alpha and fmt != "jpeg" else "RGB")
+                img = img.resize(dst, Image.LANCZOS)
+                out.parent.mkdir(parents=True, exist_ok=True)
+                tmp = out.with_name(f".{out.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                img.save(tmp, format=pil_format, **options)
+                tmp.replace(out)
+                self.stats["renders"] += 1
+        finally:
+            # Every outcome (render, small source, error) forgets the key's lock.
+            with self._locks_guard:
+                self._locks.pop(key, None)
+        return out, etag
+
+    def response(
+        self,
+        request: Request,
+        source: Path,
+        *,
+        w: int | None = None,
+        fmt: str | None = None,
+        v: str | None = None,
+    ) -> Response:
+        """Original or derivative file with ETag/304, Range and cache headers.
+
+        Blocking (may render a derivative); call it from a worker thread.
+        """
+
+        version = self.version(source)
+        path, etag, media_type = source, f'"{version}"', None
+        headers = {}
+        if w is not None and source.suffix.lower() in IMAGE_EXTS:
+            if int(w) <= 0:
+                raise ValueError("w must be a positive width")
+            chosen = self.negotiate(fmt, request.headers.get("accept"))
+            if str(fmt or "auto").strip().lower() == "auto":
+                headers["Vary"] = "Accept"
+            hit = self.derivative(source, int(w), chosen)
+            if hit is not None:
+                path, etag = hit
+                media_type = _FORMATS[chosen][2]
+        if path == source:
+            self.stats["originals"] += 1
+
+        headers["ETag"] = etag
+        headers["Cache-Control"] = CACHE_IMMUTABLE if v and v == version else CACHE_REVALIDATE
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return FileResponse(str(path), media_type=media_type, headers=headers)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
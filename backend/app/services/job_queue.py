@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import itertools
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+class JobCanceled(Exception):
+    """Raised inside a job runner once its job has been canceled."""
+
+
+@dataclass
+class _QueuedJob:
+    key: str
+    group: str
+    priority: int
+    seq: int
+    fn: Callable[[], None] = field(repr=False)
+
+
+class JobScheduler:
+    """Bounded worker pool for long-running workbench jobs.
+
+    - at most `max_workers` jobs run at the same time
+    - jobs sharing a `group` (one workbench project) never run concurrently
+    - lower `priority` runs first; FIFO within the same priority
+    - `cancel()` drops queued jobs and terminates the subprocess of a running one
+
+    Job state itself is persisted by the caller (workbench/jobs/*.json); the
+    scheduler only tracks what is queued/running in this process.
+    """
+
+    def __init__(self, *, max_workers: int = 2, name: str = "inkgrid-job"):
+        self.max_workers = max(1, int(max_workers))
+        self.name = str(name)
+
+        self._cond = threading.Condition()
+        self._queue: list[_QueuedJob] = []
+        self._running: Dict[str, str] = {}  # key -> group
+        self._canceled: set[str] = set()
+        self._procs: Dict[str, subprocess.Popen] = {}
+        self._seq = itertools.count()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.max_workers):
+                t = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+                self._threads.append(t)
+                t.start()
+
+    def submit(self, key: str, *, group: str, priority: int, fn: Callable[[], None]) -> None:
+        self.start()
+        with self._cond:
+            if key in self._running or any(j.key == key for j in self._queue):
+                return
+            self._canceled.discard(key)
+            self._queue.append(
+                _QueuedJob(key=key, group=str(group), priority=int(priority), seq=next(self._seq), fn=fn)
+            )
+            self._cond.notify_all()
+
+    def cancel(self, key: str) -> Optional[str]:
+        """Cancel a job. Returns "queued"/"running" (its state before) or None."""
+
+        with self._cond:
+            for i, j in enumerate(self._queue):
+                if j.key == key:
+                    del self._queue[i]
+                    return "queued"
+            if key not in self._running:
+                return None
+            self._canceled.add(key)
+            proc = self._procs.get(key)
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        return "running"
+
+    def is_canceled(self, key: str) -> bool:
+        with self._cond:
+            return key in self._canceled
+
+    def check_canceled(self, key: str) -> None:
+        if self.is_canceled(key):
+            raise JobCanceled(key)
+
+    def register_process(self, key: str, proc: subprocess.Popen) -> None:
+        with self._cond:
+            self._procs[key] = proc
+            canceled = key in self._canceled
+        if canceled and proc.poll() is None:
+            proc.terminate()
+
+    def unregister_process(self, key: str) -> None:
+        with self._cond:
+            self._procs.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_workers": self.max_workers,
+                "running": sorted(self._running),
+                "queued": [j.key for j in sorted(self._queue, key=lambda j: (j.priority, j.seq))],
+            }
+
+    def _next_runnable(self) -> Optional[_QueuedJob]:
+        busy_groups = set(self._running.values())
+        best: Optional[_QueuedJob] = None
+        for j in self._queue:
+            if j.group in busy_groups:
+                continue
+            if best is None or (j.priority, j.seq) < (best.priority, best.seq):
+                best = j
+        return best
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_runnable()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_runnable()
+                self._queue.remove(job)
+                self._running[job.key] = job.group
+
+            try:
+                job.fn()
+            except Exception:
+                # Runners persist their own failure state.
+                pass
+            finally:
+                with self._cond:
+                    self._running.pop(job.key, None)
+                    self._procs.pop(job.key, None)
+                    self._canceled.discard(job.key)
+                    self._cond.notify_all()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+JOB_TERMINAL_STATUSES = {"success", "fail", "canceled"}
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON via temp file + rename so readers never see a torn file."""
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class JobStore:
+    """In-memory job documents with coalesced, atomic flushes to disk.
+
+    Active jobs live in memory; `update()` only marks them dirty and a
+    background thread writes each dirty document at most once per
+    `flush_interval`. Status changes to a terminal state are flushed
+    immediately and the document is dropped from memory.
+
+    Subprocess output goes to an append-only `<job_id>.log` next to the job
+    JSON; the JSON only keeps a short `log_tail`. Each change bumps an
+    in-memory revision so long-poll readers can tell that something changed.
+    """
+
+    def __init__(self, *, flush_interval: float = 1.0, tail_lines: int = 120):
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.tail_lines = max(1, int(tail_lines))
+
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._dirty: set[str] = set()
+        self._rev: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def log_path(job_path: Path) -> Path:
+        return job_path.with_suffix(".log")
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._flusher, name="job-store-flush", daemon=True)
+        self._thread.start()
+
+    def _bump(self, key: str) -> None:
+        self._rev[key] = self._rev.get(key, 0) + 1
+
+    def create(self, job_path: Path, doc: Dict[str, Any]) -> None:
+        key = str(job_path)
+        with self._lock:
+            self._docs[key] = dict(doc)
+            self._dirty.discard(key)
+            self._bump(key)
+            write_json_atomic(job_path, doc)
+
+    def get(self, job_path: Path) -> Dict[str, Any]:
+        key = str(job_path)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                return json.loads(json.dumps(doc))
+        if not job_path.exists():
+            raise FileNotFoundError("Job not found")
+        return json.loads(job_path.read_text(encoding="utf-8"))
+
+    def revision(self, job_path: Path) -> int:
+        with self._lock:
+            return int(self._rev.get(str(job_path), 0))
+
+    def update(self, job_path: Path, **fields: Any) -> Dict[str, Any]:
+        key = str(job_path)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is None:
+                doc = json.loads(job_path.read_text(encoding="utf-8")) if job_path.exists() else {}
+                self._docs[key] = doc
+            for k, v in fields.items():
+                if v is not None:
+                    doc[k] = v
+            doc["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self._bump(key)
+            if str(doc.get("status") or "") in JOB_TERMINAL_STATUSES:
+                self._dirty.discard(key)
+                write_json_atomic(job_path, doc)
+                self._docs.pop(key, None)
+            else:
+                self._dirty.add(key)
+                self._start()
+            return dict(doc)
+
+    def append_log(self, job_path: Path, lines: list[str]) -> None:
+        if not lines:
+            return
+        with open(self.log_path(job_path), "a", encoding="utf-8") as f:
+            f.write("".join(line.rstrip("\n") + "\n" for line in lines))
+
+        key = str(job_path)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is None:
+                doc = json.loads(job_path.read_text(encoding="utf-8")) if job_path.exists() else {}
+                self._docs[key] = doc
+            tail = str(doc.get("log_tail") or "").split("\n") if doc.get("log_tail") else []
+            tail.extend(line.rstrip("\n") for line in lines)
+            doc["log_tail"] = "\n".join(tail[-self.tail_lines :])
+            self._bump(key)
+            self._dirty.add(key)
+            self._start()
+
+    def read_log(self, job_path: Path, offset: int = 0, limit: int = 65536) -> tuple[str, int]:
+        """Return (text, next_offset) from the append-only log, starting at byte `offset`."""
+
+        p = self.log_path(job_path)
+        if not p.exists():
+            return "", 0
+        with open(p, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            start = max(0, min(int(offset), size))
+            f.seek(start)
+            raw = f.read(max(1, int(limit)))
+        # Don't split a UTF-8 sequence; the next read picks up the rest.
+        for trim in range(4):
+            try:
+                text = raw[: len(raw) - trim].decode("utf-8")
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            text, trim = raw.decode("utf-8", errors="replace"), 0
+        return text, start + len(raw) - trim
+
+    def flush(self) -> None:
+        # Writes happen under the lock so a stale snapshot can never land
+        # after a terminal write for the same job.
+        with self._lock:
+            for key in list(self._dirty):
+                doc = self._docs.get(key)
+                if doc is None:
+                    self._dirty.discard(key)
+                    continue
+                try:
+                    write_json_atomic(Path(key), doc)
+                    self._dirty.discard(key)
+                except Exception:
+                    pass
+
+    def _flusher(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
@@ -5,7 +5,6 @@ import os
 import re
 import threading
 import time
-import zipfile
 from html.parser import HTMLParser
 from dataclasses import dataclass
 from pathlib import Path
@@ -15,6 +14,9 @@ import subprocess
 from pypinyin import lazy_pinyin
 import httpx
 
+from app.services.job_queue import JobCanceled, JobScheduler
+from app.services.job_store import JobStore
+
 
 def _slugify_pinyin(name: str) -> str:
     raw = "".join(lazy_pinyin(str(name or "").strip()))
@@ -34,6 +36,33 @@ def _slugify_pinyin(name: str) -> str:
     return slug or "stele"
 
 
+JOB_TYPES = {
+    "auto_annotate",
+    "export_dataset",
+    "preview_page",
+    "ml_refine_dataset",
+    "ml_align_and_split",
+    "apply_crop_overrides",
+}
+
+# Lower runs first. Preview recomputes are interactive (mouse-up in the UI), so
+# they jump ahead of full dataset builds queued by other annotators.
+JOB_PRIORITY = {
+    "preview_page": 0,
+    "apply_crop_overrides": 10,
+    "auto_annotate": 20,
+    "export_dataset": 20,
+    "ml_refine_dataset": 30,
+    "ml_align_and_split": 30,
+}
+
+JOB_ACTIVE_STATUSES = {"queued", "running"}
+
+# Child scripts report stage/progress as stdout lines with this prefix (see
+# scripts/job_progress.py) instead of rewriting the job JSON themselves.
+JOB_PROGRESS_PREFIX = "@@inkgrid-job "
+
+
 @dataclass(frozen=True)
 class ProjectPaths:
     stele_dir: Path
@@ -65,6 +94,45 @@ class WorkbenchService:
 
         self.search_endpoint = str(os.environ.get("INKGRID_SEARCH_ENDPOINT") or "").strip()
 
+        # Jobs run on a bounded pool (INKGRID_JOB_WORKERS, default 2), one job
+        # per project at a time.
+        try:
+            max_workers = int(os.environ.get("INKGRID_JOB_WORKERS") or 2)
+        except ValueError:
+            max_workers = 2
+        self.jobs = JobScheduler(max_workers=max_workers, name="workbench-job")
+
+        # Job JSON is owned by an in-memory store and flushed at most once per
+        # INKGRID_JOB_FLUSH_INTERVAL seconds (default 1.0) while a job runs.
+        try:
+            flush_interval = float(os.environ.get("INKGRID_JOB_FLUSH_INTERVAL") or 1.0)
+        except ValueError:
+            flush_interval = 1.0
+        self.job_store = JobStore(flush_interval=flush_interval)
+
+        # Render processes per dataset build (INKGRID_BUILD_WORKERS; 0 = all CPUs).
+        try:
+            self.build_workers = max(0, int(os.environ.get("INKGRID_BUILD_WORKERS") or 1))
+        except ValueError:
+            self.build_workers = 1
+
+        # Resident YOLO worker (scripts/yolo_worker.py), started on the first
+        # ML job and shared by all later ones: INKGRID_YOLO_WORKER=0 disables,
+        # INKGRID_YOLO_WORKER_PORT (default 8765), INKGRID_YOLO_DEVICE (default cpu).
+        self.yolo_worker_enabled = str(os.environ.get("INKGRID_YOLO_WORKER") or "1").strip().lower() not in (
+            "0",
+            "false",
+            "no",
+        )
+        try:
+            self.yolo_worker_port = int(os.environ.get("INKGRID_YOLO_WORKER_PORT") or 8765)
+        except ValueError:
+            self.yolo_worker_port = 8765
+        self.yolo_device = str(os.environ.get("INKGRID_YOLO_DEVICE") or "cpu").strip() or "cpu"
+        self._yolo_worker: subprocess.Popen | None = None
+        self._yolo_worker_url: str | None = None
+        self._yolo_worker_lock = threading.Lock()
+
     def _http_client(self) -> httpx.Client:
         return httpx.Client(
             timeout=30.0,
@@ -294,7 +362,7 @@ class WorkbenchService:
         if paths.jobs_dir.exists():
             for p in sorted(paths.jobs_dir.glob("*.json"), key=lambda x: x.name, reverse=True):
                 try:
-                    jobs.append(json.loads(p.read_text(encoding="utf-8")))
+                    jobs.append(self.job_store.get(p))
                 except Exception:
                     continue
 
@@ -528,6 +596,58 @@ class WorkbenchService:
         )
         return {"pages": cur}
 
+    def save_uploaded_pages(self, stele_slug: str, uploads: list[tuple[str, bytes]]) -> Dict[str, Any]:
+        """Store uploaded page images as `page_XX.<ext>` and append them to pages.json."""
+
+        paths = self._resolve_project_dir(stele_slug)
+        paths.pages_raw_dir.mkdir(parents=True, exist_ok=True)
+        saved: list[str] = []
+        # Determine next index based on existing files.
+        existing = sorted(
+            [p for p in paths.pages_raw_dir.iterdir() if p.is_file()], key=lambda p: p.name
+        )
+        next_i = len(existing) + 1
+        for filename, content in uploads:
+            ext = os.path.splitext(filename or "")[1].lower() or ".jpg"
+            out_name = f"page_{next_i:02d}{ext}"
+            next_i += 1
+            (paths.pages_raw_dir / out_name).write_bytes(content)
+            saved.append(out_name)
+        self.add_pages(stele_slug, saved)
+        return {"saved": saved}
+
+    def _dataset_path(self, stele_slug: str, dataset_dir: str) -> Path:
+        paths = self._resolve_project_dir(stele_slug)
+        ds = str(dataset_dir or "").strip().lstrip("/")
+        target = (paths.stele_dir / "datasets" / ds).resolve()
+        if not str(target).startswith(str(paths.stele_dir.resolve()) + os.sep):
+            raise ValueError("Invalid dataset_dir")
+        return target
+
+    def get_crop_overrides(self, stele_slug: str, dataset_dir: str) -> Dict[str, Any]:
+        overrides_path = self._dataset_path(stele_slug, dataset_dir) / "crop_overrides.json"
+        if not overrides_path.exists():
+            return {"version": 1, "crop_overrides": {}}
+        return json.loads(overrides_path.read_text(encoding="utf-8"))
+
+    def save_crop_overrides(self, stele_slug: str, dataset_dir: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        crop_overrides = payload.get("crop_overrides")
+        if crop_overrides is None:
+            crop_overrides = {}
+        if not isinstance(crop_overrides, dict):
+            raise ValueError("crop_overrides must be an object")
+        target_dir = self._dataset_path(stele_slug, dataset_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        out = {
+            "version": 1,
+            "crop_overrides": crop_overrides,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        (target_dir / "crop_overrides.json").write_text(
+            json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        )
+        return out
+
     def delete_page(self, stele_slug: str, image_name: str) -> Dict[str, Any]:
         paths = self._resolve_project_dir(stele_slug)
         name = str(image_name or "").strip()
@@ -625,14 +745,7 @@ class WorkbenchService:
 
     def create_job(self, stele_slug: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         job_type = str(payload.get("type") or "").strip()
-        if job_type not in {
-            "auto_annotate",
-            "export_dataset",
-            "preview_page",
-            "ml_refine_dataset",
-            "ml_align_and_split",
-            "apply_crop_overrides",
-        }:
+        if job_type not in JOB_TYPES:
             raise ValueError("Unsupported job type")
 
         paths = self._resolve_project_dir(stele_slug)
@@ -667,7 +780,13 @@ class WorkbenchService:
             out_dir = (paths.stele_dir / "datasets" / dataset_dir).resolve()
             out_dir.mkdir(parents=True, exist_ok=True)
 
+        paths.jobs_dir.mkdir(parents=True, exist_ok=True)
         job_id = time.strftime("%Y%m%d_%H%M%S")
+        # Several annotators can submit within the same second.
+        suffix = 2
+        while (paths.jobs_dir / f"{job_id}.json").exists():
+            job_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{suffix}"
+            suffix += 1
         job_path = paths.jobs_dir / f"{job_id}.json"
         job = {
             "id": job_id,
@@ -675,81 +794,190 @@ class WorkbenchService:
             "status": "queued",
             "stage": "queued",
             "progress": 0,
+            "priority": int(JOB_PRIORITY.get(job_type, 50)),
             "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
             "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
             "stele_slug": stele_slug,
+            # Everything needed to (re)run the job after a backend restart.
+            "params": {
+                "cols": cols,
+                "rows": rows,
+                "direction": direction,
+                "payload": payload,
+            },
             "outputs": {
                 "dataset_dir": dataset_dir,
                 "dataset_path": str(out_dir),
-                "zip_path": None,
                 "zip_url": None,
             },
             "log_tail": "",
         }
-        job_path.write_text(json.dumps(job, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        self.job_store.create(job_path, job)
 
-        def run() -> None:
-            try:
-                if job_type == "preview_page":
-                    self._run_job_preview_page(
-                        stele_slug,
-                        job_path=job_path,
-                        out_dir=out_dir,
-                        page=str(payload.get("page") or ""),
-                        cols=cols,
-                        rows=rows,
-                        direction=direction,
-                    )
-                elif job_type in {"auto_annotate", "export_dataset"}:
-                    self._run_job_build_dataset(
-                        stele_slug,
-                        job_path=job_path,
-                        out_dir=out_dir,
-                        cols=cols,
-                        rows=rows,
-                        direction=direction,
-                    )
-                elif job_type == "ml_refine_dataset":
-                    self._run_job_ml_refine_dataset(
-                        stele_slug,
-                        job_path=job_path,
-                        out_dir=out_dir,
-                        cols=cols,
-                        rows=rows,
-                        direction=direction,
-                        payload=payload,
-                    )
-                elif job_type == "ml_align_and_split":
-                    self._run_job_ml_align_and_split(
-                        stele_slug,
-                        job_path=job_path,
-                        out_dir=out_dir,
-                        cols=cols,
-                        rows=rows,
-                        direction=direction,
-                        payload=payload,
-                    )
-                elif job_type == "apply_crop_overrides":
-                    self._run_job_apply_crop_overrides(
-                        stele_slug,
-                        job_path=job_path,
-                        dataset_dir=dataset_dir,
-                        dataset_path=out_dir,
-                    )
-            except Exception as e:
-                self._update_job(job_path, status="fail", stage="fail", log_tail=str(e))
+        self._submit_job(stele_slug, job_path, job)
+        return {"job": job}
 
-        t = threading.Thread(target=run, daemon=True)
-        t.start()
+    def _submit_job(self, stele_slug: str, job_path: Path, job: Dict[str, Any]) -> None:
+        job_type = str(job.get("type") or "")
+        self.jobs.submit(
+            str(job_path),
+            group=stele_slug,
+            priority=int(job.get("priority", JOB_PRIORITY.get(job_type, 50))),
+            fn=lambda: self._execute_job(stele_slug, job_path),
+        )
 
-        return {"job": job}
+    def _execute_job(self, stele_slug: str, job_path: Path) -> None:
+        key = str(job_path)
+        try:
+            job = self.job_store.get(job_path)
+            job_type = str(job.get("type") or "")
+            params = job.get("params") or {}
+            payload = params.get("payload") or {}
+            cols = int(params.get("cols") or 0)
+            rows = int(params.get("rows") or 0)
+            direction = str(params.get("direction") or "vertical_rtl")
+            outputs = job.get("outputs") or {}
+            dataset_dir = str(outputs.get("dataset_dir") or "")
+            out_dir = Path(str(outputs.get("dataset_path") or ""))
+            if cols <= 0 or rows <= 0 or not dataset_dir or not str(out_dir):
+                raise ValueError("Job is missing params; cannot run")
+
+            self.jobs.check_canceled(key)
+            if job_type == "preview_page":
+                self._run_job_preview_page(
+                    stele_slug,
+                    job_path=job_path,
+                    out_dir=out_dir,
+                    page=str(payload.get("page") or ""),
+                    cols=cols,
+                    rows=rows,
+                    direction=direction,
+                )
+            elif job_type in {"auto_annotate", "export_dataset"}:
+                self._run_job_build_dataset(
+                    stele_slug,
+                    job_path=job_path,
+                    out_dir=out_dir,
+                    cols=cols,
+                    rows=rows,
+                    direction=direction,
+                )
+            elif job_type == "ml_refine_dataset":
+                self._run_job_ml_refine_dataset(
+                    stele_slug,
+                    job_path=job_path,
+                    out_dir=out_dir,
+                    cols=cols,
+                    rows=rows,
+                    direction=direction,
+                    payload=payload,
+                )
+            elif job_type == "ml_align_and_split":
+                self._run_job_ml_align_and_split(
+                    stele_slug,
+                    job_path=job_path,
+                    out_dir=out_dir,
+                    cols=cols,
+                    rows=rows,
+                    direction=direction,
+                    payload=payload,
+                )
+            elif job_type == "apply_crop_overrides":
+                self._run_job_apply_crop_overrides(
+                    stele_slug,
+                    job_path=job_path,
+                    dataset_dir=dataset_dir,
+                    dataset_path=out_dir,
+                )
+            else:
+                raise ValueError(f"Unsupported job type: {job_type}")
+        except Exception as e:
+            if isinstance(e, JobCanceled) or self.jobs.is_canceled(key):
+                self._update_job(job_path, status="canceled", stage="canceled")
+            else:
+                self.job_store.append_log(job_path, [str(e)])
+                self._update_job(job_path, status="fail", stage="fail")
+
+    def cancel_job(self, stele_slug: str, job_id: str) -> Dict[str, Any]:
+        paths = self._resolve_project_dir(stele_slug)
+        job_path = paths.jobs_dir / f"{job_id}.json"
+        if not job_path.exists():
+            raise FileNotFoundError("Job not found")
+
+        job = self.job_store.get(job_path)
+        if str(job.get("status") or "") not in JOB_ACTIVE_STATUSES:
+            raise ValueError(f"Job is not active (status={job.get('status')})")
+
+        was = self.jobs.cancel(str(job_path))
+        if was != "running":
+            # Queued (or orphaned by a restart): nothing is executing it.
+            self._update_job(job_path, status="canceled", stage="canceled")
+        return {"job": self.job_store.get(job_path), "was": was}
+
+    def resume_jobs(self) -> Dict[str, Any]:
+        """Requeue jobs left `queued`/`running` by a previous backend process.
+
+        Called once on startup. Running jobs restart from scratch; their
+        output dir is reused. Jobs created before `params` was persisted can't
+        be rebuilt and are marked failed.
+        """
+
+        resumed: list[str] = []
+        failed: list[str] = []
+        if not self.projects_root.exists():
+            return {"resumed": resumed, "failed": failed}
+
+        for proj_dir in sorted(self.projects_root.iterdir()):
+            jobs_dir = proj_dir / "workbench" / "jobs"
+            if not proj_dir.is_dir() or not jobs_dir.exists():
+                continue
+            for job_path in sorted(jobs_dir.glob("*.json"), key=lambda x: x.name):
+                try:
+                    job = self.job_store.get(job_path)
+                except Exception:
+                    continue
+                if str(job.get("status") or "") not in JOB_ACTIVE_STATUSES:
+                    continue
+                if not isinstance(job.get("params"), dict):
+                    self._update_job(
+                        job_path,
+                        status="fail",
+                        stage="fail",
+                        log_tail="Interrupted by backend restart (job has no params to resume)",
+                    )
+                    failed.append(f"{proj_dir.name}/{job_path.stem}")
+                    continue
+                self._update_job(job_path, status="queued", stage="queued", progress=0)
+                self._submit_job(proj_dir.name, job_path, job)
+                resumed.append(f"{proj_dir.name}/{job_path.stem}")
+        return {"resumed": resumed, "failed": failed}
 
     def get_job(self, stele_slug: str, job_id: str) -> Dict[str, Any]:
         paths = self._resolve_project_dir(stele_slug)
         job_path = paths.jobs_dir / f"{job_id}.json"
         if not job_path.exists():
             raise FileNotFoundError("Job not found")
-        return json.loads(job_path.read_text(encoding="utf-8"))
+        return self.job_store.get(job_path)
+
+    def get_job_log(self, stele_slug: str, job_id: str, offset: int = 0) -> Dict[str, Any]:
+        """Incremental read of a job's append-only log plus its small status fields."""
+
+        paths = self._resolve_project_dir(stele_slug)
+        job_path = paths.jobs_dir / f"{job_id}.json"
+        job = self.job_store.get(job_path)
+        data, next_offset = self.job_store.read_log(job_path, offset=int(offset))
+        status = str(job.get("status") or "")
+        return {
+            "id": job.get("id"),
+            "status": status,
+            "stage": job.get("stage"),
+            "progress": job.get("progress"),
+            "updated_at": job.get("updated_at"),
+            "rev": self.job_store.revision(job_path),
+            "done": status not in JOB_ACTIVE_STATUSES,
+            "offset": int(next_offset),
+            "data": data,
+        }
 
     def list_jobs(self, stele_slug: str) -> Dict[str, Any]:
         paths = self._resolve_project_dir(stele_slug)
@@ -757,7 +985,7 @@ class WorkbenchService:
         if paths.jobs_dir.exists():
             for p in sorted(paths.jobs_dir.glob("*.json"), key=lambda x: x.name, reverse=True):
                 try:
-                    jobs.append(json.loads(p.read_text(encoding="utf-8")))
+                    jobs.append(self.job_store.get(p))
                 except Exception:
                     continue
         return {"jobs": jobs}
@@ -772,21 +1000,14 @@ class WorkbenchService:
         log_tail: Optional[str] = None,
         outputs: Optional[dict] = None,
     ) -> None:
-        cur = {}
-        if job_path.exists():
-            cur = json.loads(job_path.read_text(encoding="utf-8"))
-        if status is not None:
-            cur["status"] = status
-        if stage is not None:
-            cur["stage"] = stage
-        if progress is not None:
-            cur["progress"] = int(progress)
-        if log_tail is not None:
-            cur["log_tail"] = str(log_tail)
-        if outputs is not None:
-            cur["outputs"] = outputs
-        cur["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
-        job_path.write_text(json.dumps(cur, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        self.job_store.update(
+            job_path,
+            status=status,
+            stage=stage,
+            progress=int(progress) if progress is not None else None,
+            log_tail=str(log_tail) if log_tail is not None else None,
+            outputs=outputs,
+        )
 
     def _run_job_build_dataset(
         self,
@@ -803,7 +1024,7 @@ class WorkbenchService:
         # V1 auto-annotate: fetch text candidates and auto-fill alignment.json
         # if it is currently empty. This keeps the one-click flow smooth.
         try:
-            cur_job = json.loads(job_path.read_text(encoding="utf-8"))
+            cur_job = self.job_store.get(job_path)
             job_type = str(cur_job.get("type") or "")
         except Exception:
             job_type = ""
@@ -860,13 +1081,9 @@ class WorkbenchService:
                         pass
 
                     if len(filtered) != total_cells:
-                        self._update_job(
+                        self.job_store.append_log(
                             job_path,
-                            log_tail=(
-                                str(json.loads(job_path.read_text(encoding="utf-8")).get("log_tail") or "")
-                                + "\n"
-                                + f"[text] filtered_len={len(filtered)} total_cells={total_cells} (mismatch)"
-                            ).strip()[-6000:],
+                            [f"[text] filtered_len={len(filtered)} total_cells={total_cells} (mismatch)"],
                         )
             except Exception:
                 # Don't block dataset build.
@@ -897,40 +1114,21 @@ class WorkbenchService:
             str(int(cols)),
             "--rows",
             str(int(rows)),
+            "--workers",
+            str(self.build_workers),
+            "--cache-dir",
+            str(paths.workbench_dir / "cache" / "build"),
             "--job-file",
             str(job_path),
         ]
 
-        p = subprocess.Popen(
-            cmd,
-            cwd=str(self.base_dir),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        tail_lines: list[str] = []
-        assert p.stdout is not None
-        for line in p.stdout:
-            tail_lines.append(line.rstrip("\n"))
-            tail_lines = tail_lines[-80:]
-            self._update_job(job_path, log_tail="\n".join(tail_lines))
-
-        rc = p.wait()
+        rc = self._run_cmd(job_path, cmd, check=False)
         if rc != 0:
             raise RuntimeError(f"workbench_build_dataset failed with rc={rc}")
 
-        # Zip for download.
-        zip_path = out_dir.parent / f"{out_dir.name}.zip"
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-            for fp in sorted(out_dir.rglob("*")):
-                if fp.is_dir():
-                    continue
-                z.write(fp, arcname=str(out_dir.name + "/" + str(fp.relative_to(out_dir))))
-
-        outputs = json.loads(job_path.read_text(encoding="utf-8")).get("outputs") or {}
-        outputs["zip_path"] = str(zip_path)
-
-        outputs["zip_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}.zip")
+        # Download: streamed ZIP, available as soon as the job is done.
+        outputs = self.job_store.get(job_path).get("outputs") or {}
+        outputs["zip_url"] = self._dataset_zip_url(stele_slug, out_dir.name)
         outputs["dataset_url"] = f"/api/workbench/projects/{stele_slug}/list?path=datasets/{out_dir.name}"
         outputs["index_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}/index.json")
         outputs["qa_summary_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}/qa_summary.md")
@@ -952,6 +1150,10 @@ class WorkbenchService:
 
         self._update_job(job_path, status="success", stage="done", progress=100, outputs=outputs)
 
+    def _dataset_zip_url(self, stele_slug: str, dataset_name: str) -> str:
+        # Streamed by the export endpoint (app.services.zip_export); no zip on disk.
+        return f"/api/workbench/projects/{stele_slug}/datasets/{dataset_name}/export.zip"
+
     def _workbench_file_url(self, stele_slug: str, rel_path: str) -> str:
         p = str(rel_path or "").lstrip("/")
         return f"/api/workbench/projects/{stele_slug}/files/{p}"
@@ -979,6 +1181,7 @@ class WorkbenchService:
             raise ValueError("Missing detector_model (configure project.models.detector_best or pass in payload)")
 
         self._ensure_ultralytics(job_path)
+        self._ensure_yolo_worker(job_path)
 
         exports_dir = (paths.workbench_dir / "ml" / "exports").resolve()
         exports_dir.mkdir(parents=True, exist_ok=True)
@@ -1044,18 +1247,8 @@ class WorkbenchService:
             ]
             self._run_cmd(job_path, cmd_pick)
 
-        # zip
-        self._update_job(job_path, stage="zip", progress=92)
-        zip_path = out_dir.parent / f"{out_dir.name}.zip"
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-            for fp in sorted(out_dir.rglob("*")):
-                if fp.is_dir():
-                    continue
-                z.write(fp, arcname=str(out_dir.name + "/" + str(fp.relative_to(out_dir))))
-
-        outputs = json.loads(job_path.read_text(encoding="utf-8")).get("outputs") or {}
-        outputs["zip_path"] = str(zip_path)
-        outputs["zip_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}.zip")
+        outputs = self.job_store.get(job_path).get("outputs") or {}
+        outputs["zip_url"] = self._dataset_zip_url(stele_slug, out_dir.name)
         outputs["dataset_dir"] = out_dir.name
         outputs["dataset_url"] = f"/api/workbench/projects/{stele_slug}/list?path=datasets/{out_dir.name}"
         outputs["index_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}/index.json")
@@ -1100,78 +1293,16 @@ class WorkbenchService:
             raise ValueError("Missing detector_model")
 
         self._ensure_ultralytics(job_path)
+        self._ensure_yolo_worker(job_path)
 
         classifier = str(payload.get("classifier_model") or models.get("classifier_best") or "").strip()
         classes_json = str(payload.get("classifier_classes_json") or models.get("classifier_classes_json") or "").strip()
 
         exports_dir = (paths.workbench_dir / "ml" / "exports").resolve()
         exports_dir.mkdir(parents=True, exist_ok=True)
-        dets_path = exports_dir / f"dets_{job_path.stem}.json"
-        seq_path = exports_dir / f"seq_{job_path.stem}.json"
-        preds_path = exports_dir / f"preds_{job_path.stem}.json"
         aligned_path = exports_dir / f"aligned_{job_path.stem}.json"
+        timings_path = exports_dir / f"timings_{job_path.stem}.json"
 
-        # predict
-        self._update_job(job_path, stage="align_predict", progress=10)
-        cmd_pred = [
-            "python3",
-            str((self.base_dir / "scripts" / "ml_yolo_predict_pages.py").resolve()),
-            "--model",
-            detector,
-            "--pages-dir",
-            str(paths.pages_raw_dir),
-            "--glob",
-            "page_*.{jpg,jpeg,png,webp}",
-            "--out",
-            str(dets_path),
-        ]
-        self._run_cmd(job_path, cmd_pred)
-
-        # build seq + filter
-        self._update_job(job_path, stage="align_sequence", progress=25)
-        cmd_seq = [
-            "python3",
-            str((self.base_dir / "scripts" / "ml_build_detection_sequence.py").resolve()),
-            "--stele-dir",
-            str(paths.stele_dir),
-            "--pages-dir",
-            str(paths.pages_raw_dir),
-            "--detections-json",
-            str(dets_path),
-            "--out",
-            str(seq_path),
-            "--direction",
-            str(direction),
-            "--cols",
-            str(int(cols)),
-            "--rows",
-            str(int(rows)),
-        ]
-        self._run_cmd(job_path, cmd_seq)
-
-        # classify (optional)
-        pred_arg: list[str] = []
-        if classifier and classes_json:
-            self._update_job(job_path, stage="align_classify", progress=40)
-            cmd_cls = [
-                "python3",
-                str((self.base_dir / "scripts" / "ml_yolo_classify_detections.py").resolve()),
-                "--model",
-                classifier,
-                "--detections-seq",
-                str(seq_path),
-                "--stele-dir",
-                str(paths.pages_raw_dir),
-                "--classes-json",
-                classes_json,
-                "--out",
-                str(preds_path),
-            ]
-            self._run_cmd(job_path, cmd_cls)
-            pred_arg = ["--pred-json", str(preds_path)]
-
-        # align
-        self._update_job(job_path, stage="align_dp", progress=60)
         text = ""
         if paths.alignment_json.exists():
             try:
@@ -1179,68 +1310,55 @@ class WorkbenchService:
                 text = str(a.get("text_trad") or "").strip()
             except Exception:
                 text = ""
-        cmd_align = [
-            "python3",
-            str((self.base_dir / "scripts" / "ml_align_sequence.py").resolve()),
-            "--text",
-            text,
-            "--detections-json",
-            str(seq_path),
-            "--out",
-            str(aligned_path),
-        ] + pred_arg
-        self._run_cmd(job_path, cmd_align)
 
-        # split-build
-        self._update_job(job_path, stage="align_build", progress=78)
-        cmd_build = [
+        # det -> sequence -> (cls) -> align -> split-build -> QA in one process,
+        # sharing decoded pages and ink masks; stages report progress themselves.
+        cmd = [
             "python3",
-            str((self.base_dir / "scripts" / "ml_split_and_build_dataset.py").resolve()),
+            str((self.base_dir / "scripts" / "ml_align_pipeline.py").resolve()),
+            "--detector-model",
+            detector,
             "--stele-dir",
+            str(paths.stele_dir),
+            "--pages-dir",
             str(paths.pages_raw_dir),
             "--stele-slug",
             stele_slug,
-            "--detections-seq",
-            str(seq_path),
-            "--alignment-json",
-            str(aligned_path),
+            "--text",
+            text,
+            "--exports-dir",
+            str(exports_dir),
+            "--tag",
+            job_path.stem,
             "--out-dir",
             str(out_dir),
             "--direction",
             str(direction),
+            "--cols",
+            str(int(cols)),
+            "--rows",
+            str(int(rows)),
+            "--timings-out",
+            str(timings_path),
+            "--job-file",
+            str(job_path),
         ]
-        self._run_cmd(job_path, cmd_build)
+        if classifier and classes_json:
+            cmd += ["--classifier-model", classifier, "--classes-json", classes_json]
+        self._run_cmd(job_path, cmd)
 
-        # QA
-        self._update_job(job_path, stage="qa", progress=90)
+        timings: Dict[str, Any] = {}
         try:
-            qa_script = (self.base_dir / "scripts" / "qa_char_crops.py").resolve()
-            subprocess.check_call(
-                [
-                    "python3",
-                    str(qa_script),
-                    "--dataset-dir",
-                    str(out_dir),
-                    "--source-dir",
-                    str(paths.pages_raw_dir),
-                    "--top",
-                    "120",
-                ]
-            )
+            timings = json.loads(timings_path.read_text(encoding="utf-8"))
         except Exception:
-            pass
-
-        # zip
-        zip_path = out_dir.parent / f"{out_dir.name}.zip"
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-            for fp in sorted(out_dir.rglob("*")):
-                if fp.is_dir():
-                    continue
-                z.write(fp, arcname=str(out_dir.name + "/" + str(fp.relative_to(out_dir))))
+            timings = {}
 
-        outputs = json.loads(job_path.read_text(encoding="utf-8")).get("outputs") or {}
-        outputs["zip_path"] = str(zip_path)
-        outputs["zip_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}.zip")
+        outputs = self.job_store.get(job_path).get("outputs") or {}
+        outputs["timings"] = timings or None
+        outputs["timings_url"] = (
+            self._workbench_file_url(stele_slug, str(timings_path.relative_to(paths.stele_dir))) if timings else None
+        )
+        outputs["zip_url"] = self._dataset_zip_url(stele_slug, out_dir.name)
         outputs["dataset_dir"] = out_dir.name
         outputs["dataset_url"] = f"/api/workbench/projects/{stele_slug}/list?path=datasets/{out_dir.name}"
         outputs["index_url"] = self._workbench_file_url(stele_slug, f"datasets/{out_dir.name}/index.json")
@@ -1256,24 +1374,58 @@ class WorkbenchService:
 
         self._update_job(job_path, status="success", stage="done", progress=100, outputs=outputs)
 
-    def _run_cmd(self, job_path: Path, cmd: list[str]) -> None:
-        """Run a subprocess and stream stdout into job log_tail."""
+    def _run_cmd(self, job_path: Path, cmd: list[str], *, check: bool = True) -> int:
+        """Run a subprocess and stream stdout into the job log.
+
+        Output lines are appended to `<job_id>.log` (the job JSON keeps a short
+        `log_tail`); progress lines from `scripts/job_progress.py` update
+        stage/progress instead.
+
+        The process is registered with the scheduler so `cancel_job` can
+        terminate it; a canceled job raises `JobCanceled` instead of a failure.
+        """
+        key = str(job_path)
+        self.jobs.check_canceled(key)
+        env = dict(os.environ)
+        env["INKGRID_JOB_PROGRESS"] = "stdout"
+        if self._yolo_worker_url:
+            env["INKGRID_YOLO_WORKER_URL"] = self._yolo_worker_url
         p = subprocess.Popen(
             cmd,
             cwd=str(self.base_dir),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
+            env=env,
         )
-        tail_lines: list[str] = []
-        assert p.stdout is not None
-        for line in p.stdout:
-            tail_lines.append(line.rstrip("\n"))
-            tail_lines = tail_lines[-120:]
-            self._update_job(job_path, log_tail="\n".join(tail_lines))
-        rc = p.wait()
-        if rc != 0:
+        self.jobs.register_process(key, p)
+        try:
+            assert p.stdout is not None
+            for line in p.stdout:
+                line = line.rstrip("\n")
+                if line.startswith(JOB_PROGRESS_PREFIX):
+                    try:
+                        msg = json.loads(line[len(JOB_PROGRESS_PREFIX) :])
+                    except Exception:
+                        msg = {}
+                    if isinstance(msg, dict) and msg:
+                        self._update_job(
+                            job_path,
+                            status="running",
+                            stage=str(msg.get("stage") or "") or None,
+                            progress=msg.get("progress"),
+                        )
+                        if msg.get("note"):
+                            self.job_store.append_log(job_path, [str(msg["note"])])
+                        continue
+                self.job_store.append_log(job_path, [line])
+            rc = p.wait()
+        finally:
+            self.jobs.unregister_process(key)
+        self.jobs.check_canceled(key)
+        if check and rc != 0:
             raise RuntimeError(f"Command failed rc={rc}: {' '.join(cmd[:3])}")
+        return int(rc)
 
     def _run_job_apply_crop_overrides(
         self,
@@ -1308,7 +1460,8 @@ class WorkbenchService:
         self._update_job(job_path, stage="qa", progress=70)
         try:
             qa_script = (self.base_dir / "scripts" / "qa_char_crops.py").resolve()
-            subprocess.check_call(
+            self._run_cmd(
+                job_path,
                 [
                     "python3",
                     str(qa_script),
@@ -1318,8 +1471,15 @@ class WorkbenchService:
                     str(paths.stele_dir),
                     "--top",
                     "120",
-                ]
+                    # Only crops whose box/page/PNG changed are re-measured.
+                    "--metrics-cache",
+                    str(dataset_path / ".qa" / "metrics.json"),
+                    "--workers",
+                    "0",
+                ],
             )
+        except JobCanceled:
+            raise
         except Exception:
             pass
 
@@ -1340,19 +1500,9 @@ class WorkbenchService:
             ]
             self._run_cmd(job_path, cmd_pick)
 
-        # zip
-        self._update_job(job_path, stage="zip", progress=92)
-        zip_path = dataset_path.parent / f"{dataset_path.name}.zip"
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-            for fp in sorted(dataset_path.rglob("*")):
-                if fp.is_dir():
-                    continue
-                z.write(fp, arcname=str(dataset_path.name + "/" + str(fp.relative_to(dataset_path))))
-
-        outputs = json.loads(job_path.read_text(encoding="utf-8")).get("outputs") or {}
+        outputs = self.job_store.get(job_path).get("outputs") or {}
         outputs["dataset_dir"] = str(dataset_dir)
-        outputs["zip_path"] = str(zip_path)
-        outputs["zip_url"] = self._workbench_file_url(stele_slug, f"datasets/{dataset_path.name}.zip")
+        outputs["zip_url"] = self._dataset_zip_url(stele_slug, dataset_path.name)
         outputs["index_url"] = self._workbench_file_url(stele_slug, f"datasets/{dataset_path.name}/index.json")
         outputs["qa_summary_url"] = self._workbench_file_url(stele_slug, f"datasets/{dataset_path.name}/qa_summary.md")
         outputs["overlays_url"] = f"/api/workbench/projects/{stele_slug}/list?path=datasets/{dataset_path.name}/overlays"
@@ -1369,17 +1519,89 @@ class WorkbenchService:
             _ = ultralytics
             return
         except Exception as e:
-            self._update_job(
+            self.job_store.append_log(
                 job_path,
-                log_tail=(
-                    "Missing dependency: ultralytics.\n"
-                    "Install on this machine (venv) with:\n"
-                    "  python3 -m pip install -U ultralytics\n"
-                    f"Import error: {e}"
-                ),
+                [
+                    "Missing dependency: ultralytics.",
+                    "Install on this machine (venv) with:",
+                    "  python3 -m pip install -U ultralytics",
+                    f"Import error: {e}",
+                ],
             )
             raise
 
+    def _ping_yolo_worker(self, url: str, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        try:
+            r = httpx.get(f"{url}/stats", timeout=timeout)
+            r.raise_for_status()
+            data = r.json()
+            return data if isinstance(data, dict) else None
+        except Exception:
+            return None
+
+    def _ensure_yolo_worker(self, job_path: Path) -> Optional[str]:
+        """Start (or reuse) the resident YOLO worker; None = run in-process."""
+        if not self.yolo_worker_enabled:
+            return None
+        url = f"http://127.0.0.1:{self.yolo_worker_port}"
+        with self._yolo_worker_lock:
+            if self._ping_yolo_worker(url) is not None:
+                # Ours, or one left running by a previous backend process.
+                self._yolo_worker_url = url
+                return url
+            if self._yolo_worker is not None and self._yolo_worker.poll() is None:
+                self._yolo_worker.terminate()
+            self._yolo_worker_url = None
+
+            log_path = self.workbench_root / "yolo_worker.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            with log_path.open("a", encoding="utf-8") as log:
+                self._yolo_worker = subprocess.Popen(
+                    [
+                        "python3",
+                        str((self.base_dir / "scripts" / "yolo_worker.py").resolve()),
+                        "--port",
+                        str(self.yolo_worker_port),
+                        "--device",
+                        self.yolo_device,
+                    ],
+                    cwd=str(self.base_dir),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            # First start imports torch/ultralytics; give it a while.
+            deadline = time.monotonic() + 60.0
+            while time.monotonic() < deadline and self._yolo_worker.poll() is None:
+                if self._ping_yolo_worker(url) is not None:
+                    self._yolo_worker_url = url
+                    self.job_store.append_log(job_path, [f"yolo worker: {url} (device={self.yolo_device})"])
+                    return url
+                time.sleep(0.5)
+
+            if self._yolo_worker.poll() is None:
+                self._yolo_worker.terminate()
+            self._yolo_worker = None
+            self.job_store.append_log(
+                job_path, [f"yolo worker failed to start (see {log_path}); running inference in-process"]
+            )
+            return None
+
+    def yolo_worker_stats(self) -> Dict[str, Any]:
+        url = self._yolo_worker_url
+        stats = self._ping_yolo_worker(url) if url else None
+        return {"running": stats is not None, "url": url if stats is not None else None, "stats": stats}
+
+    def stop_yolo_worker(self) -> None:
+        with self._yolo_worker_lock:
+            proc, self._yolo_worker = self._yolo_worker, None
+            self._yolo_worker_url = None
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
     def _run_job_preview_page(
         self,
         stele_slug: str,
@@ -1421,25 +1643,11 @@ class WorkbenchService:
             str(job_path),
         ]
 
-        p = subprocess.Popen(
-            cmd,
-            cwd=str(self.base_dir),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        tail_lines: list[str] = []
-        assert p.stdout is not None
-        for line in p.stdout:
-            tail_lines.append(line.rstrip("\n"))
-            tail_lines = tail_lines[-80:]
-            self._update_job(job_path, log_tail="\n".join(tail_lines))
-
-        rc = p.wait()
+        rc = self._run_cmd(job_path, cmd, check=False)
         if rc != 0:
             raise RuntimeError(f"workbench_preview_page failed with rc={rc}")
 
-        outputs = json.loads(job_path.read_text(encoding="utf-8")).get("outputs") or {}
+        outputs = self.job_store.get(job_path).get("outputs") or {}
         # Under workbench dir: workbench/preview/<page>/...
         rel_base = f"workbench/preview/{out_dir.name}"
         outputs["preview_url"] = f"/api/workbench/projects/{stele_slug}/list?path={rel_base}"
@@ -0,0 +1,303 @@
+import hashlib
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from app.services.image_service import _etag_matches
+
+# Deflated members; everything else (PNG/WebP/JPEG crops, npz) is stored:
+# already-compressed images do not shrink and would only cost CPU.
+DEFLATE_EXTS = {".json", ".jsonl", ".md", ".txt", ".csv", ".tsv", ".yaml", ".yml", ".svg", ".log"}
+
+CHUNK = 256 * 1024
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT = 0xFFFF
+
+
+def _dos_time(mtime: float) -> Tuple[int, int]:
+    t = time.localtime(max(mtime, 315532800))  # 1980-01-01, the DOS epoch
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class _Member:
+    __slots__ = ("name", "path", "size", "mtime", "deflate", "crc", "csize", "data", "offset", "header")
+
+    def __init__(self, name: str, path: Path, size: int, mtime: float):
+        self.name = name.encode("utf-8")
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.deflate = path.suffix.lower() in DEFLATE_EXTS
+        self.crc = 0
+        self.csize = size
+        self.data: Optional[bytes] = None  # deflated bytes (small text files only)
+        self.offset = 0
+        self.header = b""
+
+
+def _prepare(m: _Member) -> None:
+    # CRC (and deflate) one member; zlib releases the GIL, so this runs in threads.
+    if m.deflate:
+        raw = m.path.read_bytes()
+        if len(raw) != m.size:
+            raise OSError(f"{m.path} changed while exporting")
+        co = zlib.compressobj(6, zlib.DEFLATED, -15)
+        m.data = co.compress(raw) + co.flush()
+        m.crc = zlib.crc32(raw)
+        m.csize = len(m.data)
+        return
+    crc = 0
+    with open(m.path, "rb") as f:
+        while True:
+            buf = f.read(CHUNK)
+            if not buf:
+                break
+            crc = zlib.crc32(buf, crc)
+    m.crc = crc
+
+
+class _Plan:
+    """Byte layout of one dataset ZIP; any byte range can be produced from it."""
+
+    def __init__(self, dataset_dir: Path, fingerprint: str, members: List[_Member]):
+        self.dataset_dir = dataset_dir
+        self.etag = f'"{fingerprint[:32]}"'
+        self.members = members
+        offset = 0
+        central = []
+        for m in members:
+            dtime, ddate = _dos_time(m.mtime)
+            method = 8 if m.deflate else 0
+            m.offset = offset
+            m.header = struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, 20, 0x0800, method, dtime, ddate, m.crc, m.csize, m.size, len(m.name), 0
+            ) + m.name
+            offset += len(m.header) + m.csize
+
+            extra = b""
+            rel_offset = m.offset
+            if m.offset >= _ZIP64_LIMIT:
+                extra = struct.pack("<HHQ", 0x0001, 8, m.offset)
+                rel_offset = _ZIP64_LIMIT
+            central.append(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,
+                    (3 << 8) | 45,
+                    45 if extra else 20,
+                    0x0800,
+                    method,
+                    dtime,
+                    ddate,
+                    m.crc,
+                    m.csize,
+                    m.size,
+                    len(m.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    0o100644 << 16,
+                    rel_offset,
+                )
+                + m.name
+                + extra
+            )
+
+        cd = b"".join(central)
+        cd_offset, cd_size, count = offset, len(cd), len(members)
+        tail = b""
+        if count >= _ZIP64_COUNT or cd_offset >= _ZIP64_LIMIT or cd_size >= _ZIP64_LIMIT:
+            eocd64_offset = cd_offset + cd_size
+            tail += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset)
+            tail += struct.pack("<IIQI", 0x07064B50, 0, eocd64_offset, 1)
+            count, cd_offset, cd_size = min(count, _ZIP64_COUNT), min(cd_offset, _ZIP64_LIMIT), min(cd_size, _ZIP64_LIMIT)
+        tail += struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count, cd_size, cd_offset, 0)
+        self.tail = cd + tail
+        self.tail_offset = offset
+        self.total = offset + len(self.tail)
+
+    def _segments(self) -> Iterator[Tuple[int, int, object]]:
+        # (start, length, bytes | _Member) in archive order.
+        for m in self.members:
+            yield m.offset, len(m.header), m.header
+            yield m.offset + len(m.header), m.csize, m
+        yield self.tail_offset, len(self.tail), self.tail
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Archive bytes [start, end) (end exclusive; default: to the end)."""
+
+        end = self.total if end is None else min(int(end), self.total)
+        for seg_start, length, payload in self._segments():
+            seg_end = seg_start + length
+            if seg_end <= start or length == 0:
+                continue
+            if seg_start >= end:
+                break
+            lo, hi = max(start, seg_start) - seg_start, min(end, seg_end) - seg_start
+            if isinstance(payload, bytes):
+                yield payload[lo:hi]
+            elif payload.data is not None:
+                yield payload.data[lo:hi]
+            else:
+                with open(payload.path, "rb") as f:
+                    f.seek(lo)
+                    left = hi - lo
+                    while left > 0:
+                        buf = f.read(min(CHUNK, left))
+                        if not buf:
+                            raise OSError(f"{payload.path} changed while exporting")
+                        left -= len(buf)
+                        yield buf
+
+
+def _parse_range(value: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """Single `bytes=` range -> (start, end exclusive); None = whole body.
+
+    Raises ValueError for a well-formed but unsatisfiable range. Malformed
+    specs (`bytes=abc`, `bytes=5-2`) and multi-range requests are ignored
+    and answered with the whole body (RFC 9110).
+    """
+
+    if not value or not value.strip().lower().startswith("bytes=") or "," in value:
+        return None
+    first, sep, last = value.strip()[6:].strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep or not (first or last):
+        return None
+    if any(part and not (part.isascii() and part.isdigit()) for part in (first, last)):
+        return None
+    if not first:
+        n = int(last)
+        if n <= 0 or total <= 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, total - n), total
+    start = int(first)
+    end = int(last) + 1 if last else total
+    if last and end <= start:
+        return None
+    if start >= total:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, total)
+
+
+class ZipExportService:
+    """Stream dataset directories as ZIP archives, built on the fly.
+
+    No archive is written to disk: the member layout (headers, CRCs, and the
+    deflated bytes of small text files) is computed once per dataset state,
+    in parallel, and cached; the body streams files straight from the
+    dataset. Images are stored, JSON/MD/text deflated. The layout is
+    deterministic for unchanged files, so `Range`/`If-Range` requests resume
+    an interrupted download.
+
+    Dot-directories (e.g. `.features/`) are local caches and not exported.
+    """
+
+    PLAN_CACHE_SIZE = 8
+
+    def __init__(self, *, workers: int = 4):
+        self.workers = max(1, int(workers))
+        self._plans: "OrderedDict[str, _Plan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._building: dict = {}
+        self.stats = {"plans": 0, "plan_hits": 0, "plan_ms": 0.0, "ranges": 0, "not_modified": 0}
+
+    @staticmethod
+    def _scan(dataset_dir: Path) -> Tuple[str, List[_Member]]:
+        members: List[_Member] = []
+        h = hashlib.sha1(str(dataset_dir).encode("utf-8"))
+        for fp in sorted(dataset_dir.rglob("*")):
+            rel = fp.relative_to(dataset_dir)
+            if any(part.startswith(".") for part in rel.parts) or not fp.is_file():
+                continue
+            st = fp.stat()
+            members.append(_Member(f"{dataset_dir.name}/{rel.as_posix()}", fp, st.st_size, st.st_mtime))
+            h.update(f"{rel.as_posix()}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+        return h.hexdigest(), members
+
+    def plan(self, dataset_dir: Path) -> _Plan:
+        """Current layout of `dataset_dir` (rebuilt when any file changed). Blocking."""
+
+        dataset_dir = Path(dataset_dir).resolve()
+        key = str(dataset_dir)
+        fingerprint, members = self._scan(dataset_dir)
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None and cached.etag == f'"{fingerprint[:32]}"':
+                self._plans.move_to_end(key)
+                self.stats["plan_hits"] += 1
+                return cached
+            lock = self._building.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._lock:
+                cached = self._plans.get(key)
+                if cached is not None and cached.etag == f'"{fingerprint[:32]}"':
+                    return cached
+            t0 = time.perf_counter()
+            if self.workers > 1 and len(members) > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    list(pool.map(_prepare, members))
+            else:
+                for m in members:
+                    _prepare(m)
+            plan = _Plan(dataset_dir, fingerprint, members)
+            with self._lock:
+                self._plans[key] = plan
+                self._plans.move_to_end(key)
+                while len(self._plans) > self.PLAN_CACHE_SIZE:
+                    self._plans.popitem(last=False)
+                self._building.pop(key, None)
+                self.stats["plans"] += 1
+                self.stats["plan_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return plan
+
+    def response(self, request: Request, dataset_dir: Path) -> Response:
+        """Streaming ZIP of `dataset_dir` with ETag/304 and single-range support.
+
+        Blocking (may scan/deflate the dataset); call it from a worker thread.
+        """
+
+        plan = self.plan(dataset_dir)
+        name = f"{Path(dataset_dir).name}.zip"
+        headers = {
+            "ETag": plan.etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(name)}",
+        }
+        if _etag_matches(request.headers.get("if-none-match"), plan.etag):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        status, start, end = 200, 0, plan.total
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range.strip() == plan.etag:
+            try:
+                rng = _parse_range(request.headers.get("range"), plan.total)
+            except ValueError:
+                headers["Content-Range"] = f"bytes */{plan.total}"
+                return Response(status_code=416, headers=headers)
+            if rng is not None:
+                status, (start, end) = 206, rng
+                headers["Content-Range"] = f"bytes {start}-{end - 1}/{plan.total}"
+                self.stats["ranges"] += 1
+
+        headers["Content-Length"] = str(end - start)
+        if request.method == "HEAD":
+            return Response(status_code=status, headers=headers, media_type="application/zip")
+        return StreamingResponse(
+            plan.iter_bytes(start, end), status_code=status, headers=headers, media_type="application/zip"
+        )
+
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.services.alignment_service import AlignmentService, _variant_key
+
+T2S_PATH = Path(__file__).resolve().parents[1] / "app" / "data" / "hanzi_t2s.json"
+
+
+def _table():
+    return json.loads(T2S_PATH.read_text(encoding="utf-8"))["t2s"]
+
+
+def test_table_is_a_per_character_fold():
+    t2s = _table()
+    assert t2s
+    for trad, simp in t2s.items():
+        assert len(trad) == 1 and len(simp) == 1, (trad, simp)
+        assert trad != simp, trad
+        # Simplified forms are fixed points, so folding twice changes nothing.
+        assert simp not in t2s, (trad, simp)
+
+
+def test_table_matches_zhconv():
+    zhconv = pytest.importorskip("zhconv")
+    wrong = {t: (s, zhconv.convert(t, "zh-cn")) for t, s in _table().items() if zhconv.convert(t, "zh-cn") != s}
+    assert not wrong
+
+
+def test_variant_key_folds_only_variants():
+    assert _variant_key("嶧山刻石") == "峄山刻石"
+    assert _variant_key("顏勤禮碑") == "颜勤礼碑"
+    # Same pinyin is not a variant.
+    assert _variant_key("易山刻石") != "峄山刻石"
+
+
+def test_resolve_by_variant():
+    svc = AlignmentService()
+    row = svc.resolve("峄山刻石")
+    assert row is not None
+    assert svc.resolve("嶧山刻石") == row
+    assert svc.resolve("《嶧山刻石》") == row
+    assert svc.resolve("易山刻石") is None
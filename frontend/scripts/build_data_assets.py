@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""Post-build step for the catalog JSON under `dist/data/`.
+
+- Per-stele shards: `data/steles/<id>.json` with the stele plus its
+  appreciation, famous line and interpretation, so a masterpiece page can
+  fetch ~10 KB instead of every catalog file.
+- Precompressed siblings: `<file>.json.gz` (and `<file>.json.br` when the
+  optional `brotli` module is installed) for every JSON file >= 1 KB; the
+  backend serves them by `Accept-Encoding` (`backend/app/precompressed.py`).
+- `data/manifest.json`: content hash and sizes per file, for `?v=<hash>`
+  cache busting.
+
+Output is deterministic (gzip mtime 0, sorted keys in the manifest), so
+rerunning on unchanged data rewrites nothing.
+
+Usage:
+
+  python3 scripts/build_data_assets.py                  # frontend/dist/data
+  python3 scripts/build_data_assets.py --data-dir public/data --no-compress
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional
+    brotli = None
+
+
+FRONTEND = Path(__file__).resolve().parents[1]
+MIN_BYTES = 1024
+SHARD_DIR = "steles"
+MANIFEST = "manifest.json"
+
+
+def _load(data_dir: Path, name: str) -> dict:
+    p = data_dir / name
+    if not p.exists():
+        return {}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+
+def build_shards(data_dir: Path) -> int:
+    steles = _load(data_dir, "steles.json").get("steles") or []
+    appreciations = {
+        str(x.get("id")): x for x in (_load(data_dir, "stele_appreciations.json").get("items") or [])
+    }
+    famous = _load(data_dir, "stele_famous_lines.json").get("lines") or {}
+    interpretations = _load(data_dir, "steles_interpretations.json").get("steles") or {}
+
+    out_dir = data_dir / SHARD_DIR
+    keep: set[str] = set()
+    for s in steles:
+        sid = str(s.get("id") or "").strip()
+        if not sid:
+            continue
+        shard = {
+            "id": sid,
+            "stele": s,
+            "appreciation": appreciations.get(sid),
+            "famous_line": famous.get(sid),
+            "interpretation": interpretations.get(sid),
+        }
+        name = f"{sid}.json"
+        keep.add(name)
+        body = json.dumps(shard, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        _write_if_changed(out_dir / name, body)
+
+    # Drop shards (and their compressed siblings) of removed steles.
+    if out_dir.exists():
+        for p in out_dir.glob("*.json*"):
+            if p.name.split(".json", 1)[0] + ".json" not in keep:
+                p.unlink()
+    return len(keep)
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build_assets(data_dir: Path, *, compress: bool = True) -> dict:
+    files: dict[str, dict] = {}
+    for p in sorted(data_dir.rglob("*.json")):
+        rel = p.relative_to(data_dir).as_posix()
+        if rel == MANIFEST:
+            continue
+        raw = p.read_bytes()
+        entry = {"hash": hashlib.sha256(raw).hexdigest()[:16], "bytes": len(raw)}
+        encoded = []
+        if compress and len(raw) >= MIN_BYTES:
+            encoded.append(("gz", _gzip))
+            if brotli is not None:
+                encoded.append(("br", lambda d: brotli.compress(d, quality=11)))
+        for suffix, fn in encoded:
+            sib = p.with_name(f"{p.name}.{suffix}")
+            if not sib.exists() or sib.stat().st_mtime < p.stat().st_mtime:
+                _write_if_changed(sib, fn(raw))
+                # Keep the sibling at least as new as the source (see backend).
+                sib.touch()
+            entry[suffix] = sib.stat().st_size
+        for suffix in ("gz", "br"):
+            if suffix not in entry:
+                p.with_name(f"{p.name}.{suffix}").unlink(missing_ok=True)
+        files[rel] = entry
+
+    manifest = {"version": 1, "files": files}
+    body = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8")
+    _write_if_changed(data_dir / MANIFEST, body)
+    return manifest
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data-dir", default=str(FRONTEND / "dist" / "data"))
+    ap.add_argument("--no-shards", action="store_true")
+    ap.add_argument("--no-compress", action="store_true")
+    args = ap.parse_args()
+
+    data_dir = Path(args.data_dir).resolve()
+    if not data_dir.is_dir():
+        raise SystemExit(f"missing data dir: {data_dir} (run `vite build` first)")
+
+    if not args.no_shards:
+        print(f"shards: {build_shards(data_dir)} -> {data_dir / SHARD_DIR}")
+    manifest = build_assets(data_dir, compress=not args.no_compress)
+    files = manifest["files"]
+    raw = sum(f["bytes"] for f in files.values())
+    gz = sum(f.get("gz", f["bytes"]) for f in files.values())
+    br = sum(f.get("br", f.get("gz", f["bytes"])) for f in files.values())
+    print(
+        f"{len(files)} files, {raw / 1024:.0f} KB raw, {gz / 1024:.0f} KB gzip"
+        + (f", {br / 1024:.0f} KB brotli" if brotli is not None else " (brotli not installed)")
+    )
+
+
+if __name__ == "__main__":
+    main()
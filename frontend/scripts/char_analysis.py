@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+"""Offline similarity + clustering shared by the per-stele analysis builders.
+
+`build_analysis(index_path)` returns the `analysis.json` payload for one
+dataset (`index.json` with `{index, file, char}` entries):
+
+- Features: 24x24 normalized grayscale, read through a persisted feature
+  store (`scripts/glyph_index.py`) under `<repo>/.cache/features/<dataset>`,
+  so only new or changed crops are decoded on a rebuild. It is kept out of
+  the dataset dir because `frontend/public/` is copied verbatim into builds.
+- Per char: one distance matrix, stable nearest-first orders, k-means with
+  evenly spaced init and medoid representatives.
+
+Output is deterministic and identical to the original per-pair Python loops.
+
+Usage (regenerate several datasets in one go):
+
+  python3 frontend/scripts/char_analysis.py
+  python3 frontend/scripts/char_analysis.py --index <dataset>/index.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from glyph_index import FeatureStore, gray_zscore, l2_order, pairwise_l2  # noqa: E402
+
+
+SIZE = 24
+FEATURE_NAME = "analysis_gray24"
+FEATURE_CACHE = ROOT / ".cache" / "features"
+
+DATASETS = [
+    ROOT / "frontend/public/steles/2-lishu/1-caoquanbei/chars_yang/index.json",
+    ROOT
+    / "frontend/public/steles/4-xingshu/1-lantingjixu/lanting-HCCG-CycleGAN/index.json",
+]
+
+
+def feature_dir(base_dir: Path) -> Path:
+    # Mirrors the dataset path under FEATURE_CACHE (hashed outside the repo).
+    base_dir = base_dir.resolve()
+    try:
+        return FEATURE_CACHE / base_dir.relative_to(ROOT)
+    except ValueError:
+        return FEATURE_CACHE / "_ext" / hashlib.sha1(str(base_dir).encode("utf-8")).hexdigest()[:16]
+
+
+def clamp(n: int, lo: int, hi: int) -> int:
+    return max(lo, min(hi, n))
+
+
+def kmeans(feats: np.ndarray, k: int) -> list[int]:
+    n = int(feats.shape[0])
+    if n == 0:
+        return []
+    k = clamp(k, 2, 5)
+    k = min(k, n)
+
+    # deterministic init (evenly spaced)
+    centroids = np.stack(
+        [feats[int(math.floor((c * (n - 1)) / max(1, k - 1)))] for c in range(k)]
+    )
+
+    assign = np.zeros(n, dtype=np.int64)
+    for _ in range(10):
+        # assign (argmin keeps the lowest centroid on ties)
+        assign = pairwise_l2(feats, centroids).argmin(axis=1)
+
+        # recompute centroids; members are accumulated in row order
+        for c in range(k):
+            members = feats[assign == c]
+            if members.shape[0] == 0:
+                continue
+            acc = np.zeros(feats.shape[1], dtype=np.float64)
+            for row in members:
+                acc += row
+            centroids[c] = acc * (1.0 / members.shape[0])
+
+    return [int(c) for c in assign]
+
+
+def build_analysis(index_path: Path) -> dict:
+    raw = json.loads(index_path.read_text(encoding="utf-8"))
+    files = raw.get("files") or []
+
+    occs_by_char: dict[str, list[tuple[int, str]]] = defaultdict(list)
+    for f in files:
+        ch = str(f.get("char") or "").strip()
+        if not ch:
+            continue
+        occs_by_char[ch].append((int(f.get("index")), str(f.get("file"))))
+
+    # stable order
+    for occs in occs_by_char.values():
+        occs.sort(key=lambda o: o[0])
+
+    # compute features once, for the whole dataset
+    base_dir = index_path.parent
+    row_by_glyph: dict[int, int] = {}
+    feat_files: list[str] = []
+    for occs in occs_by_char.values():
+        for gid, file_name in occs:
+            if gid in row_by_glyph:
+                continue
+            if not (base_dir / file_name).exists():
+                raise SystemExit(f"missing image: {base_dir / file_name}")
+            row_by_glyph[gid] = len(feat_files)
+            feat_files.append(file_name)
+    store = FeatureStore(
+        base_dir,
+        FEATURE_NAME,
+        featurize=lambda p: gray_zscore(p, SIZE),
+        dim=SIZE * SIZE,
+        dtype=np.float64,
+        store_dir=feature_dir(base_dir),
+    )
+    feats_all = store.get(feat_files)
+
+    by_char = {}
+    for ch, occs in occs_by_char.items():
+        m = len(occs)
+        if m <= 1:
+            continue
+
+        glyph_ids = [gid for gid, _file in occs]
+        feats = np.asarray(feats_all[[row_by_glyph[g] for g in glyph_ids]])
+        dist = pairwise_l2(feats)
+
+        # similarity orders per anchor glyph
+        order = l2_order(dist)
+        similar = {
+            str(a_gid): [glyph_ids[j] for j in order[a_idx]]
+            for a_idx, a_gid in enumerate(glyph_ids)
+        }
+
+        # clusters
+        k = clamp(int(round(math.sqrt(m / 2.0))), 2, 5)
+        assign = kmeans(feats, k)
+        groups: dict[int, list[int]] = defaultdict(list)
+        for i, c in enumerate(assign):
+            groups[c].append(i)
+
+        clusters = []
+        for cid, rows in groups.items():
+            # representative = medoid (min pairwise distance sum, first wins)
+            sums = [sum(dist[i, rows].tolist()) for i in rows]
+            rep = rows[int(np.argmin(sums))]
+            clusters.append(
+                {
+                    "id": int(cid),
+                    "members": [glyph_ids[i] for i in rows],
+                    "rep": int(glyph_ids[rep]),
+                }
+            )
+
+        clusters.sort(key=lambda g: (-len(g["members"]), g["rep"]))
+
+        by_char[ch] = {
+            "count": m,
+            "glyphIds": glyph_ids,
+            "similar": similar,
+            "clusters": clusters,
+        }
+
+    print(f"{index_path.parent.name}: features {store.stats}")
+    return {
+        "name": raw.get("name") or "",
+        "version": 1,
+        "feature": {"size": SIZE, "kind": "24x24_gray_zscore"},
+        "by_char": by_char,
+    }
+
+
+def write_analysis(index_path: Path, out_path: Path | None = None) -> None:
+    if not index_path.exists():
+        raise SystemExit(f"missing index.json: {index_path}")
+    out_path = out_path or index_path.with_name("analysis.json")
+    out = build_analysis(index_path)
+    out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"wrote {out_path} chars={len(out['by_char'])}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--index",
+        action="append",
+        default=None,
+        help="dataset index.json (repeatable; default: all known datasets)",
+    )
+    args = ap.parse_args()
+    for p in args.index or DATASETS:
+        write_analysis(Path(p).resolve())
+
+
+if __name__ == "__main__":
+    main()
@@ -358,17 +358,26 @@ function CaoquanKnowledgeCard({
         const idxUrlWithCache = IS_NATIVE_ANDROID
           ? charIndexUrl
           : charIndexUrl + (charIndexUrl.includes('?') ? '&' : '?') + '_t=' + Date.now();
-        const [appRes, evRes, idxRes] = await Promise.all([
-          fetch('/data/stele_appreciations.json'),
+        const loadAppreciation = async () => {
+          // Per-stele shard (built by scripts/build_data_assets.py); the dev server only has the full file.
+          const shardRes = await fetch(`/data/steles/${encodeURIComponent(String(stele.id))}.json`);
+          if (shardRes.ok && (shardRes.headers.get('content-type') || '').includes('json')) {
+            const shard = await shardRes.json();
+            return shard?.appreciation || null;
+          }
+          const appRes = await fetch('/data/stele_appreciations.json');
+          if (!appRes.ok) throw new Error(`appreciations HTTP ${appRes.status}`);
+          const appJson = await appRes.json();
+          const items = appJson?.items || [];
+          return items.find((x: any) => String(x?.id) === String(stele.id)) || null;
+        };
+        const [found, evRes, idxRes] = await Promise.all([
+          loadAppreciation(),
           fetch(evidenceUrl),
           fetch(idxUrlWithCache, { cache: 'no-store' }),
         ]);
-        if (!appRes.ok) throw new Error(`appreciations HTTP ${appRes.status}`);
         if (!evRes.ok) throw new Error(`evidence HTTP ${evRes.status}`);
         if (!idxRes.ok) throw new Error(`index HTTP ${idxRes.status}`);
-        const appJson = await appRes.json();
-        const items = appJson?.items || [];
-        const found = items.find((x: any) => String(x?.id) === String(stele.id)) || null;
         const evJson = (await evRes.json()) as CaoquanPointEvidence;
         const idxJson = await idxRes.json();
         if (cancelled) return;
@@ -18,6 +18,7 @@ type Project = {
 
 type PageEntry = {
   image: string;
+  thumb_url?: string;
   override?: { direction?: string; cols?: number; rows?: number } | null;
 };
 
@@ -28,7 +29,6 @@ type Job = {
   progress: number;
   outputs?: {
     dataset_dir?: string;
-    zip_path?: string;
     zip_url?: string;
     dataset_url?: string;
     qa_summary_url?: string;
@@ -184,6 +184,72 @@ async function apiFetch(path: string, opts: RequestInit = {}) {
   return fetch(path, { ...opts, headers });
 }
 
+type JobLogEvent = {
+  id: string;
+  status: string;
+  stage: string;
+  progress: number;
+  rev: number;
+  done: boolean;
+  offset: number;
+  data: string;
+};
+
+const JOB_LOG_TAIL_LINES = 120;
+
+function isJobDone(status: string) {
+  return status === 'success' || status === 'fail' || status === 'canceled';
+}
+
+// Follow a job via the long-poll log endpoint: each response carries the new
+// log bytes since `offset` plus status/stage/progress, and only returns early
+// when the job changed. Resolves with the final job document once done.
+async function followJob(
+  slug: string,
+  jobId: string,
+  onEvent: (ev: JobLogEvent) => void,
+  isCancelled: () => boolean,
+): Promise<Job | null> {
+  let offset = 0;
+  let rev: number | null = null;
+  while (!isCancelled()) {
+    const qs = rev === null ? `offset=${offset}` : `offset=${offset}&rev=${rev}&wait=20`;
+    let ev: JobLogEvent | null = null;
+    try {
+      const r = await apiFetch(`/api/workbench/projects/${slug}/jobs/${jobId}/log?${qs}`);
+      if (r.ok) ev = (await r.json()) as JobLogEvent;
+    } catch {
+      // ignore
+    }
+    if (isCancelled()) return null;
+    if (!ev) {
+      await new Promise((res) => window.setTimeout(res, 2000));
+      continue;
+    }
+    const more = ev.offset > offset && ev.data.length > 0;
+    offset = ev.offset;
+    rev = ev.rev;
+    onEvent(ev);
+    if (ev.done && !more) {
+      const r = await apiFetch(`/api/workbench/projects/${slug}/jobs/${jobId}`);
+      return r.ok ? ((await r.json()) as Job) : null;
+    }
+    if (more) rev = null; // drain the rest of the log without waiting
+  }
+  return null;
+}
+
+function appendJobLog(log: string[], data: string) {
+  if (!data) return;
+  log.push(...data.replace(/\n$/, '').split('\n'));
+  log.splice(0, Math.max(0, log.length - JOB_LOG_TAIL_LINES));
+}
+
+function mergeJobEvent(prev: Job | null, ev: JobLogEvent, logTail: string): Job | null {
+  if (!prev || prev.id !== ev.id) return prev;
+  return { ...prev, status: ev.status, stage: ev.stage, progress: ev.progress, log_tail: logTail || prev.log_tail };
+}
+
 export function Workbench() {
   const isAppActive = useAppActive();
   const [token, setTokenState] = useState(getToken());
@@ -478,32 +544,36 @@ export function Workbench() {
     }
   }
 
+  const previewJobId = previewJob?.id;
+  const previewJobDone = previewJob ? isJobDone(previewJob.status) : true;
   useEffect(() => {
-    if (!selected || !previewJob) return;
-    if (previewJob.status === 'success' || previewJob.status === 'fail') return;
+    if (!selected || !previewJobId) return;
+    if (previewJobDone) return;
     if (!isAppActive) return;
     let cancelled = false;
-    const tick = async () => {
-      try {
-        const r = await apiFetch(`/api/workbench/projects/${selected.slug}/jobs/${previewJob.id}`);
-        if (!r.ok) return;
-        const json = (await r.json()) as Job;
-        if (cancelled) return;
-        setPreviewJob(json);
-        if (json.status === 'success') {
-          await loadProjectDetail(selected.slug);
-        }
-      } catch {
-        // ignore
+    const slug = selected.slug;
+    const log: string[] = [];
+    void (async () => {
+      const final = await followJob(
+        slug,
+        previewJobId,
+        (ev) => {
+          appendJobLog(log, ev.data);
+          const tail = log.join('\n');
+          setPreviewJob((prev) => mergeJobEvent(prev, ev, tail));
+        },
+        () => cancelled,
+      );
+      if (cancelled || !final) return;
+      setPreviewJob(final);
+      if (final.status === 'success') {
+        await loadProjectDetail(slug);
       }
-    };
-    const t = window.setInterval(() => void tick(), 900);
-    void tick();
+    })();
     return () => {
       cancelled = true;
-      window.clearInterval(t);
     };
-  }, [selected, previewJob, isAppActive]);
+  }, [selected, previewJobId, previewJobDone, isAppActive]);
 
   function openEditor(p: PageEntry) {
     setEditorPage(p);
@@ -794,29 +864,47 @@ export function Workbench() {
     }
   }
 
-  useEffect(() => {
+  async function cancelJob() {
     if (!selected || !job) return;
-    if (job.status === 'success' || job.status === 'fail') return;
+    setErr(null);
+    try {
+      const r = await apiFetch(`/api/workbench/projects/${selected.slug}/jobs/${job.id}/cancel`, {
+        method: 'POST',
+      });
+      if (!r.ok) throw new Error(`Cancel job failed: ${r.status}`);
+      const json = (await r.json()) as { job?: Job };
+      if (json.job) setJob(json.job);
+    } catch (e) {
+      setErr(String(e));
+    }
+  }
+
+  const jobId = job?.id;
+  const jobDone = job ? isJobDone(job.status) : true;
+  useEffect(() => {
+    if (!selected || !jobId) return;
+    if (jobDone) return;
     if (!isAppActive) return;
     let cancelled = false;
-    const tick = async () => {
-      try {
-        const r = await apiFetch(`/api/workbench/projects/${selected.slug}/jobs/${job.id}`);
-        if (!r.ok) return;
-        const json = (await r.json()) as Job;
-        if (cancelled) return;
-        setJob(json);
-      } catch {
-        // ignore
-      }
-    };
-    const t = window.setInterval(() => void tick(), 900);
-    void tick();
+    const log: string[] = [];
+    void (async () => {
+      const final = await followJob(
+        selected.slug,
+        jobId,
+        (ev) => {
+          appendJobLog(log, ev.data);
+          const tail = log.join('\n');
+          setJob((prev) => mergeJobEvent(prev, ev, tail));
+        },
+        () => cancelled,
+      );
+      if (cancelled || !final) return;
+      setJob(final);
+    })();
     return () => {
       cancelled = true;
-      window.clearInterval(t);
     };
-  }, [selected, job, isAppActive]);
+  }, [selected, jobId, jobDone, isAppActive]);
 
   useEffect(() => {
     if (!selected) return;
@@ -1257,7 +1345,8 @@ export function Workbench() {
                 </div>
                 <div className="mt-3 grid grid-cols-2 gap-3">
                   {pages.map((p, i) => {
-                    const src = `/steles/unknown/${selected.slug}/pages_raw/${p.image}`;
+                    // Thumbnail: resized derivative; the editor keeps the original (page coordinates).
+                    const src = p.thumb_url || `/steles/unknown/${selected.slug}/pages_raw/${p.image}?w=640`;
                     return (
                       <div key={p.image} className="rounded border border-white/10 bg-black/40 p-3">
                         <div className="flex items-center justify-between gap-2">
@@ -1824,6 +1913,14 @@ export function Workbench() {
                           {job.status} · {job.stage} · {job.progress}%
                         </div>
                       </div>
+                      {job.status === 'queued' || job.status === 'running' ? (
+                        <button
+                          onClick={() => void cancelJob()}
+                          className="rounded bg-white/10 border border-white/10 px-3 py-2 text-sm"
+                        >
+                          Cancel
+                        </button>
+                      ) : null}
                       {job.outputs?.zip_url ? (
                         <a
                           href={job.outputs.zip_url}
@@ -27,7 +27,9 @@ import importlib.util
 import sys
 from pathlib import Path
 
-from PIL import Image
+from dataset_index import write_index
+from page_reader import PageReader
+from render_metrics import RenderMetrics
 
 
 def _load_render_square(repo_root: Path):
@@ -64,6 +66,17 @@ def main() -> int:
         default=30,
         help="Inner padding (must match dataset)",
     )
+    parser.add_argument(
+        "--max-page-mb",
+        type=int,
+        default=2048,
+        help="Resident decoded pages budget (LRU by page)",
+    )
+    parser.add_argument(
+        "--raw-cache-dir",
+        default=None,
+        help="Decode pages once into memory-mapped raw RGB files here",
+    )
     args = parser.parse_args()
 
     dataset_dir = Path(args.dataset_dir)
@@ -104,25 +117,32 @@ def main() -> int:
     repo_root = Path(__file__).resolve().parent.parent
     render_square = _load_render_square(repo_root)
 
-    page_cache: dict[str, Image.Image] = {}
+    # Pages are read through an LRU-bounded reader; only the override
+    # regions are copied out (see scripts/page_reader.py).
+    reader = PageReader(
+        source_dir,
+        max_bytes=int(args.max_page_mb) * 1024 * 1024,
+        raw_cache_dir=Path(args.raw_cache_dir) if args.raw_cache_dir else None,
+    )
+    page_names: dict[str, str] = {}
 
-    def load_page(name: str) -> Image.Image:
-        if name not in page_cache:
-            cand = [source_dir / name]
+    def page_name_in(name: str) -> str:
+        if name not in page_names:
+            cand = [str(name)]
             # Common prefix in index.json.
             if str(name).startswith("pages_raw/"):
-                cand.append(source_dir / str(name).split("/", 1)[1])
-            cand.append(source_dir / "pages_raw" / name)
-            p = None
+                cand.append(str(name).split("/", 1)[1])
+            cand.append(f"pages_raw/{name}")
             for c in cand:
-                if c.exists():
-                    p = c
+                if (source_dir / c).exists():
+                    page_names[name] = c
                     break
-            if p is None:
+            else:
                 raise FileNotFoundError(f"Missing source image: {source_dir / name}")
-            page_cache[name] = Image.open(p).convert("RGB")
-        return page_cache[name]
+        return page_names[name]
 
+    # QA stats of the re-rendered crops, stored for qa_char_crops.
+    crop_metrics = RenderMetrics(dataset_dir)
     updated = 0
     for fn, spec in crop_overrides.items():
         if only is not None and fn not in only:
@@ -147,13 +167,14 @@ def main() -> int:
             continue
 
         x0, y0, x1, y1 = [int(round(float(v))) for v in crop_box]
-        page = load_page(page_name)
-        x0 = max(0, min(x0, page.width - 1))
-        x1 = max(x0 + 1, min(x1, page.width))
-        y0 = max(0, min(y0, page.height - 1))
-        y1 = max(y0 + 1, min(y1, page.height))
+        page = page_name_in(page_name)
+        page_w, page_h = reader.size(page)
+        x0 = max(0, min(x0, page_w - 1))
+        x1 = max(x0 + 1, min(x1, page_w))
+        y0 = max(0, min(y0, page_h - 1))
+        y1 = max(y0 + 1, min(y1, page_h))
 
-        crop = page.crop((x0, y0, x1, y1))
+        crop = reader.crop(page, (x0, y0, x1, y1))
 
         exp_cx = ((cell_box[0] + cell_box[2]) / 2.0) - float(x0)
         exp_cy = ((cell_box[1] + cell_box[3]) / 2.0) - float(y0)
@@ -169,9 +190,9 @@ def main() -> int:
         fmt = output_format or ("webp" if ext == ".webp" else "png")
         if fmt == "webp" or ext == ".webp":
             q = int(output_quality or 82)
-            out.save(out_path, format="WEBP", quality=q, method=6)
+            crop_metrics.save(out, out_path, format="WEBP", quality=q, method=6)
         else:
-            out.save(out_path, format="PNG", optimize=True)
+            crop_metrics.save(out, out_path, format="PNG", optimize=True)
 
         # Update index.json crop_box.
         src["crop_box"] = [int(x0), int(y0), int(x1), int(y1)]
@@ -179,9 +200,8 @@ def main() -> int:
         updated += 1
 
     if updated:
-        index_path.write_text(
-            json.dumps(index, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
-        )
+        write_index(dataset_dir, index)
+    crop_metrics.flush()
 
     print(f"Applied overrides to {updated} files")
     return 0
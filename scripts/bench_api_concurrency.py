@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""`/health` latency while an annotator apply runs.
+
+Polls `GET /health` through the real app (in-process ASGI, same event loop)
+every `--interval-ms` and reports p50/p99/max latency in three phases:
+
+- `idle`: nothing else running;
+- `legacy`: the pre-change handler body, i.e. the apply commands run with
+  `subprocess.check_call` directly on the event loop;
+- `async`: `POST /api/annotator/apply/...` as served now (subprocesses
+  awaited via asyncio; file work in the thread pool).
+
+The apply is real when `--dataset-dir` / `--source-dir` are given (the
+dataset is copied to a temp stele dir, pages symlinked, and an overrides
+file shifting `--overrides` crops by 1px is written; `--source-dir` is
+the stele dir the dataset's page names are relative to); otherwise each step
+is a `--sleep`-second child process. Exits non-zero when the `async` p99
+exceeds `--max-ms`.
+
+Usage:
+
+  python3 scripts/bench_api_concurrency.py
+  python3 scripts/bench_api_concurrency.py --dataset-dir <ds> --source-dir <pages> --overrides 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+import httpx  # noqa: E402
+
+import app.main as main  # noqa: E402
+from app.services.annotator_service import AnnotatorService  # noqa: E402
+
+
+class _SleepAnnotator(AnnotatorService):
+    # Same request path, but every step is a child process sleeping `seconds`.
+    def __init__(self, *args, seconds: float, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seconds = seconds
+
+    def _apply_plan(self, stele_rel_path, *, dataset_dir, only_files=None, run_qa=True):
+        cmds, result = super()._apply_plan(
+            stele_rel_path, dataset_dir=dataset_dir, only_files=only_files, run_qa=run_qa
+        )
+        sleep = [sys.executable, "-c", f"import time; time.sleep({float(self.seconds)})"]
+        return [sleep for _ in cmds], result
+
+
+def _stele(tmp: Path, args) -> Path:
+    stele = tmp / "steles" / "bench"
+    ds = stele / "ds"
+    (stele / "annotator").mkdir(parents=True)
+    overrides = {}
+    if args.dataset_dir:
+        shutil.copytree(args.dataset_dir, ds, ignore=shutil.ignore_patterns(".*"))
+        # Pages keep their layout relative to the stele dir (e.g. `pages_raw/`).
+        for p in Path(args.source_dir).iterdir():
+            if not (stele / p.name).exists():
+                (stele / p.name).symlink_to(p.resolve())
+        index = json.loads((ds / "index.json").read_text(encoding="utf-8"))
+        for e in index.get("files") or []:
+            box = (e.get("source") or {}).get("crop_box")
+            if e.get("file") and isinstance(box, list) and len(box) == 4 and (e["source"].get("cell_box")):
+                overrides[e["file"]] = {"crop_box": [box[0] + 1, box[1] + 1, box[2] + 1, box[3] + 1]}
+            if len(overrides) >= args.overrides:
+                break
+    else:
+        ds.mkdir()
+        (ds / "index.json").write_text('{"files": []}\n', encoding="utf-8")
+    (stele / "annotator" / "overrides.json").write_text(
+        json.dumps({"version": 1, "crop_overrides": overrides}) + "\n", encoding="utf-8"
+    )
+    return stele
+
+
+def _summary(name: str, lat: list[float], seconds: float) -> float:
+    lat = sorted(lat)
+    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))] if lat else float("nan")
+    print(
+        f"{name:7} {len(lat):5d} polls  p50 {statistics.median(lat) if lat else float('nan'):7.1f} ms"
+        f"  p99 {p99:7.1f} ms  max {max(lat) if lat else float('nan'):7.1f} ms  (apply {seconds:.1f}s)"
+    )
+    return p99
+
+
+async def _poll(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list[float]:
+    # Latency counts from when the poll was due, so time spent waiting for a
+    # blocked event loop shows up (a client would see exactly that delay).
+    out: list[float] = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        r = await client.get("/health")
+        r.raise_for_status()
+        out.append((time.perf_counter() - due) * 1000)
+        due = max(due + interval, time.perf_counter())
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+    return out
+
+
+async def _phase(client, interval: float, work) -> tuple[list[float], float]:
+    stop = asyncio.Event()
+    poller = asyncio.create_task(_poll(client, stop, interval))
+    await asyncio.sleep(interval * 5)
+    t0 = time.perf_counter()
+    try:
+        await work()
+        took = time.perf_counter() - t0
+        # Let a poll that was due during `work` complete and be counted.
+        await asyncio.sleep(interval * 5)
+    finally:
+        stop.set()
+    return await poller, took
+
+
+async def run(args) -> int:
+    interval = args.interval_ms / 1000.0
+    with tempfile.TemporaryDirectory() as tmp:
+        stele = _stele(Path(tmp), args)
+        steles_dir = str(stele.parent)
+        if args.dataset_dir:
+            svc = AnnotatorService(str(ROOT), steles_dir)
+        else:
+            svc = _SleepAnnotator(str(ROOT), steles_dir, seconds=args.sleep)
+        main.annotator_service = svc
+        payload = {"dataset_dir": "ds", "run_qa": not args.no_qa}
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+
+            async def idle():
+                await asyncio.sleep(args.idle_s)
+
+            async def legacy():
+                cmds, _result = svc._apply_plan("bench", dataset_dir="ds", run_qa=not args.no_qa)
+                for cmd in cmds:
+                    subprocess.check_call(cmd, stdout=subprocess.DEVNULL)
+
+            async def current():
+                r = await client.post("/api/annotator/apply/bench", json=payload)
+                r.raise_for_status()
+
+            lat, took = await _phase(client, interval, idle)
+            _summary("idle", lat, took)
+            lat, took = await _phase(client, interval, legacy)
+            _summary("legacy", lat, took)
+            lat, took = await _phase(client, interval, current)
+            p99 = _summary("async", lat, took)
+
+    if p99 > args.max_ms:
+        print(f"FAIL: async p99 {p99:.1f} ms > {args.max_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main_() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset-dir", default="")
+    ap.add_argument("--source-dir", default="")
+    ap.add_argument("--overrides", type=int, default=200, help="Crops to re-render (real apply)")
+    ap.add_argument("--no-qa", action="store_true")
+    ap.add_argument("--sleep", type=float, default=3.0, help="Seconds per step without a dataset")
+    ap.add_argument("--idle-s", type=float, default=2.0)
+    ap.add_argument("--interval-ms", type=float, default=20.0)
+    ap.add_argument("--max-ms", type=float, default=100.0)
+    args = ap.parse_args()
+    if bool(args.dataset_dir) != bool(args.source_dir):
+        ap.error("--dataset-dir and --source-dir go together")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Parity check + load test for `/api/masterpieces` search.
+
+- parity: `CatalogService.list_masterpieces` vs the legacy per-request scan
+  (kept verbatim below) for every 1..4-char substring of the searchable
+  fields; the indexed search must return the same rows (pinyin may only
+  add rows, and only for ASCII queries). Exits non-zero on any difference.
+- pinyin: a few full-pinyin / initials / prefix queries must hit.
+- load: `--requests` GETs through the ASGI app with `--concurrency` in
+  flight, from a mixed query set; reports p50/p99 latency and req/s, and
+  the same for the legacy scan served as a plain JSONResponse.
+
+Usage:
+
+  python3 scripts/bench_catalog_search.py
+  python3 scripts/bench_catalog_search.py --requests 20000 --concurrency 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+
+from app.services.catalog_service import CatalogService  # noqa: E402
+
+
+def legacy_list(steles: list[dict], script_type: str | None, q: str | None) -> list[dict]:
+    # Reference implementation (pre search index).
+    script_type = (script_type or "").strip()
+    qn = (q or "").strip().lower()
+    out = []
+    for s in steles:
+        if script_type and str(s.get("script_type") or "") != script_type:
+            continue
+        if qn:
+            hay = " ".join(
+                [
+                    str(s.get("name") or ""),
+                    str(s.get("author") or ""),
+                    str(s.get("dynasty") or ""),
+                    str(s.get("script_type") or ""),
+                    str(s.get("location") or ""),
+                ]
+            ).lower()
+            if qn not in hay:
+                continue
+        out.append(
+            {
+                "id": s.get("id"),
+                "name": s.get("name"),
+                "aliases": s.get("aliases") or [],
+                "script_type": s.get("script_type"),
+                "author": s.get("author"),
+                "dynasty": s.get("dynasty"),
+                "year": s.get("year"),
+                "type": s.get("type"),
+                "location": s.get("location"),
+                "total_chars": s.get("total_chars"),
+                "description": s.get("description"),
+                "knowledge_id": s.get("knowledge_id"),
+                "assets": s.get("assets"),
+            }
+        )
+    return out
+
+
+def parity(svc: CatalogService) -> int:
+    steles = svc._snap.steles
+    queries: set[str] = set()
+    for s in steles:
+        for f in ("name", "author", "dynasty", "script_type", "location"):
+            v = str(s.get(f) or "")
+            for n in range(1, 5):
+                queries.update(v[i : i + n] for i in range(len(v) - n + 1))
+    queries.update(["", " ", "zz", "Tang", "碑 ", "唐 陕"])
+    script_types = [None] + sorted({str(s.get("script_type") or "") for s in steles})
+    bad = 0
+    for st in script_types:
+        for q in sorted(queries):
+            ref = legacy_list(steles, st, q)
+            got = svc.list_masterpieces(st, q)
+            ids_ref = [r["id"] for r in ref]
+            ids_got = [r["id"] for r in got]
+            if ids_got == ids_ref and got == ref:
+                continue
+            extra_only = set(ids_ref) <= set(ids_got) and q.strip().isascii()
+            if not extra_only or [r for r in got if r["id"] in set(ids_ref)] != ref:
+                print(f"[mismatch] script_type={st!r} q={q!r}: {ids_ref} vs {ids_got}")
+                bad += 1
+    print(f"parity: {len(queries) * len(script_types)} queries, {bad} mismatches")
+    return bad
+
+
+def pinyin_check(svc: CatalogService) -> int:
+    bad = 0
+    for q in ("jiuchenggong", "jiu cheng", "jcg", "ouyang", "oyx", "lanting", "kaishu"):
+        n = len(svc.list_masterpieces(None, q))
+        print(f"  q={q!r}: {n} hits")
+        bad += int(n == 0 and q in ("jiuchenggong", "jcg", "ouyang", "kaishu"))
+    return bad
+
+
+async def load(app: FastAPI, queries: list[tuple[str | None, str]], n: int, conc: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    lat: list[float] = []
+    sem = asyncio.Semaphore(conc)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(i: int) -> None:
+            st, q = queries[i % len(queries)]
+            params = {"q": q}
+            if st:
+                params["script_type"] = st
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.get("/api/masterpieces", params=params)
+                lat.append(time.perf_counter() - t0)
+                r.raise_for_status()
+
+        await asyncio.gather(*(one(i) for i in range(n)))
+    return lat
+
+
+def report(label: str, lat: list[float], wall: float) -> None:
+    lat = sorted(lat)
+    p = lambda x: lat[min(len(lat) - 1, int(x * len(lat)))] * 1000  # noqa: E731
+    print(f"{label}: p50 {p(0.50):.2f} ms  p99 {p(0.99):.2f} ms  max {lat[-1] * 1000:.2f} ms  {len(lat) / wall:.0f} req/s")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    svc = CatalogService(str(ROOT), str(ROOT / "frontend" / "dist"))
+    bad = parity(svc) + pinyin_check(svc)
+
+    rng = random.Random(int(args.seed))
+    names = [str(s.get("name") or "") for s in svc._snap.steles]
+    queries: list[tuple[str | None, str]] = [(None, ""), (None, "唐"), ("楷书", ""), (None, "ouyang"), (None, "jcg")]
+    for _ in range(200):
+        name = rng.choice(names)
+        i = rng.randrange(max(1, len(name)))
+        queries.append((rng.choice([None, None, "楷书", "行书"]), name[i : i + rng.randint(1, 3)]))
+
+    indexed = FastAPI()
+
+    @indexed.get("/api/masterpieces")
+    async def _indexed(script_type: str | None = None, q: str | None = None):
+        return Response(content=svc.list_masterpieces_json(script_type=script_type, q=q), media_type="application/json")
+
+    legacy = FastAPI()
+
+    @legacy.get("/api/masterpieces")
+    async def _legacy(script_type: str | None = None, q: str | None = None):
+        return {"masterpieces": legacy_list(svc._snap.steles, script_type, q)}
+
+    for label, app in (("legacy ", legacy), ("indexed", indexed)):
+        t0 = time.perf_counter()
+        lat = asyncio.run(load(app, queries, int(args.requests), int(args.concurrency)))
+        report(f"{label} n={args.requests} c={args.concurrency}", lat, time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for st, q in queries * 20:
+        svc._search(svc._snap, (st or "").strip(), q.strip().lower())
+    dt = time.perf_counter() - t0
+    print(f"search only (uncached): {dt / (len(queries) * 20) * 1e6:.1f} us/query")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
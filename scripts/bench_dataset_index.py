@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Size / load-time comparison of `index.json` vs `index.cols.npz`.
+
+For every dataset dir (default: all datasets under frontend/public/steles)
+the script copies `index.json` into a temp dir, writes the companion and:
+
+- parity: `load_index().to_json()` must equal the parsed JSON (same key
+  order, so the re-serialized text is identical); exits non-zero otherwise.
+- size: bytes of `index.json` and of the companion.
+- time (best of `--repeat`), per dataset:
+  - `json`: `json.loads` + reading the fields QA uses from every entry;
+  - `npz`: `load_index` + the same per-entry reads (lazy entries);
+  - `npz-col`: `load_index` + `column("source.crop_box")` (vectorized use).
+
+`--tile N` repeats every dataset N times (file and page names prefixed) to
+look at multi-MB indexes.
+
+Usage:
+
+  python3 scripts/bench_dataset_index.py
+  python3 scripts/bench_dataset_index.py --tile 10
+  python3 scripts/bench_dataset_index.py path/to/dataset --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dataset_index import COMPANION_NAME, INDEX_NAME, load_index, write_companion
+
+ROOT = Path(__file__).resolve().parents[1]
+
+QA_FIELDS = ("crop_box", "image", "safe_column_box", "safe_row_box", "line_index", "pos_in_line")
+
+
+def _touch_fields(files) -> int:
+    n = 0
+    for e in files:
+        e.get("file"), e.get("char"), e.get("index")
+        src = e.get("source") or {}
+        for k in QA_FIELDS:
+            n += src.get(k) is not None
+    return n
+
+
+def _tiled(data: dict, n: int) -> dict:
+    files = []
+    for r in range(n):
+        for e in data.get("files") or []:
+            e = copy.deepcopy(e)
+            e["file"] = f"t{r}_{e.get('file')}"
+            src = e.get("source")
+            if isinstance(src, dict) and src.get("image"):
+                src["image"] = f"t{r}_{src['image']}"
+            files.append(e)
+    return {**data, "files": files}
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dataset_dirs", nargs="*")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--tile", type=int, default=1)
+    args = ap.parse_args()
+
+    dirs = [Path(d) for d in args.dataset_dirs] or sorted(
+        p.parent for p in (ROOT / "frontend" / "public" / "steles").glob("*/*/*/index.json")
+    )
+    if not dirs:
+        print("no datasets found", file=sys.stderr)
+        return 2
+
+    bad = 0
+    tot = {"json_kb": 0.0, "npz_kb": 0.0, "json": 0.0, "npz": 0.0, "npz-col": 0.0}
+    print(f"{'dataset':44} {'n':>6} {'json KB':>8} {'npz KB':>7} {'json ms':>8} {'npz ms':>7} {'col ms':>7}  parity")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, d in enumerate(dirs):
+            work = Path(tmp) / str(i)
+            work.mkdir()
+            if args.tile > 1:
+                tiled = _tiled(json.loads((d / INDEX_NAME).read_text(encoding="utf-8")), args.tile)
+                (work / INDEX_NAME).write_text(json.dumps(tiled, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            else:
+                shutil.copy2(d / INDEX_NAME, work / INDEX_NAME)
+            text = (work / INDEX_NAME).read_bytes()
+            data = json.loads(text)
+            write_companion(work, data, text=text)
+
+            idx = load_index(work)
+            ok = idx.path is not None and idx.path.name == COMPANION_NAME
+            back = idx.to_json()
+            ok = ok and back == data and json.dumps(back, ensure_ascii=False, indent=2) == json.dumps(data, ensure_ascii=False, indent=2)
+            ok = ok and _touch_fields(idx) == _touch_fields(data["files"])
+            bad += int(not ok)
+
+            t_json = _best(lambda: _touch_fields(json.loads((work / INDEX_NAME).read_bytes())["files"]), args.repeat)
+            t_npz = _best(lambda: _touch_fields(load_index(work)), args.repeat)
+            t_col = _best(lambda: load_index(work).column("source.crop_box"), args.repeat)
+            kb_json = len(text) / 1024
+            kb_npz = (work / COMPANION_NAME).stat().st_size / 1024
+            for k, v in (("json_kb", kb_json), ("npz_kb", kb_npz), ("json", t_json), ("npz", t_npz), ("npz-col", t_col)):
+                tot[k] += v
+
+            try:
+                name = d.resolve().relative_to(ROOT).as_posix()
+            except ValueError:
+                name = str(d)
+            print(
+                f"{name[-44:]:44} {len(idx):6d} {kb_json:8.0f} {kb_npz:7.0f} {t_json:8.1f} {t_npz:7.1f} {t_col:7.1f}  {'ok' if ok else 'MISMATCH'}"
+            )
+
+    print(
+        f"{'total':44} {'':6} {tot['json_kb']:8.0f} {tot['npz_kb']:7.0f} {tot['json']:8.1f} {tot['npz']:7.1f} {tot['npz-col']:7.1f}"
+    )
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Parity check + benchmark for `scripts/glyph_index.py`.
+
+- parity: `ExactIndex.neighbours()` vs the dense `F @ F.T` argmax that QA
+  used before (on `--parity-n` rows); exits non-zero on any difference.
+- scale: exact blocked top-1 and LSH on `--n` synthetic glyph features with
+  planted near-duplicates; reports time, peak block size and LSH recall of
+  pairs above `--sim-thr`.
+- `--dataset-dir`: same comparison on a real dataset's QA features (read
+  through the persisted FeatureStore).
+
+Usage:
+
+  python3 scripts/bench_glyph_index.py
+  python3 scripts/bench_glyph_index.py --n 100000
+  python3 scripts/bench_glyph_index.py --dataset-dir <dataset>
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from glyph_index import ExactIndex, FeatureStore, LSHIndex
+
+
+def dense_neighbours(F: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Reference (pre glyph_index): full n x n similarity matrix.
+    sim = F @ F.T
+    np.fill_diagonal(sim, -1.0)
+    j = sim.argmax(axis=1)
+    return j, sim[np.arange(F.shape[0]), j]
+
+
+def synthetic(n: int, dim: int, dup_frac: float, seed: int) -> np.ndarray:
+    """Unit rows: smooth random "glyphs" + noisy copies of some of them."""
+
+    rng = np.random.default_rng(seed)
+    side = int(round(dim**0.5))
+    base = rng.standard_normal((n, side // 4, side // 4)).astype(np.float32)
+    F = np.repeat(np.repeat(base, 4, axis=1), 4, axis=2).reshape(n, -1)[:, :dim]
+    n_dup = int(n * dup_frac)
+    src = rng.integers(0, n - n_dup, size=n_dup)
+    F[n - n_dup :] = F[src] + rng.normal(0.0, 0.08, size=(n_dup, dim)).astype(np.float32)
+    F -= F.mean(axis=1, keepdims=True)
+    F /= np.maximum(1e-6, np.linalg.norm(F, axis=1, keepdims=True))
+    return F
+
+
+def compare(F: np.ndarray, sim_thr: float, *, block_mb: int, dense: bool) -> int:
+    n = int(F.shape[0])
+    mismatches = 0
+    if dense:
+        t0 = time.perf_counter()
+        dj, ds = dense_neighbours(F)
+        t_dense = time.perf_counter() - t0
+        print(f"dense:  {t_dense:.2f}s  matrix={n * n * 4 / 2**20:.0f} MB")
+
+    t0 = time.perf_counter()
+    ej, es = ExactIndex(F, max_block_bytes=block_mb * 2**20).neighbours(1)
+    t_exact = time.perf_counter() - t0
+    print(f"exact:  {t_exact:.2f}s  block<={block_mb} MB")
+    if dense:
+        mismatches = int((ej[:, 0] != dj).sum())
+        print(f"parity exact vs dense: {n - mismatches}/{n} identical neighbours")
+
+    t0 = time.perf_counter()
+    lj, ls = LSHIndex(F, max_block_bytes=block_mb * 2**20).neighbours(1)
+    t_lsh = time.perf_counter() - t0
+    want = es[:, 0] >= sim_thr
+    got = want & (lj[:, 0] == ej[:, 0])
+    print(
+        f"lsh:    {t_lsh:.2f}s  recall@{sim_thr}: {int(got.sum())}/{int(want.sum())}"
+        f"  ({t_exact / max(1e-9, t_lsh):.1f}x faster than exact)"
+    )
+    return mismatches
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000, help="synthetic rows for the scale run")
+    ap.add_argument("--parity-n", type=int, default=3000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--dup-frac", type=float, default=0.05)
+    ap.add_argument("--sim-thr", type=float, default=0.985)
+    ap.add_argument("--block-mb", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--dataset-dir", default=None)
+    args = ap.parse_args()
+
+    mismatches = 0
+    print(f"== parity (synthetic n={args.parity_n})")
+    mismatches += compare(
+        synthetic(int(args.parity_n), int(args.dim), float(args.dup_frac), int(args.seed)),
+        float(args.sim_thr),
+        block_mb=int(args.block_mb),
+        dense=True,
+    )
+
+    print(f"== scale (synthetic n={args.n})")
+    compare(
+        synthetic(int(args.n), int(args.dim), float(args.dup_frac), int(args.seed) + 1),
+        float(args.sim_thr),
+        block_mb=int(args.block_mb),
+        dense=False,
+    )
+
+    if args.dataset_dir:
+        from qa_char_crops import _feat_32x32
+
+        dataset_dir = Path(args.dataset_dir)
+        index = json.loads((dataset_dir / "index.json").read_text(encoding="utf-8"))
+        files = [str(e.get("file")) for e in index.get("files") or [] if (dataset_dir / str(e.get("file"))).exists()]
+        store = FeatureStore(dataset_dir, "qa_gray32", featurize=_feat_32x32, dim=32 * 32)
+        t0 = time.perf_counter()
+        F = store.get(files)
+        print(f"== dataset {dataset_dir} n={len(files)} features {time.perf_counter() - t0:.2f}s {store.stats}")
+        mismatches += compare(F, float(args.sim_thr), block_mb=int(args.block_mb), dense=len(files) <= 20000)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
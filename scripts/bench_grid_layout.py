@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Parity check + micro-benchmark for `scripts/grid_layout.py`.
+
+Compares the vectorized `split_axis` against the legacy pure-Python DP (kept
+verbatim below as the reference) on synthetic ink projections and, optionally,
+on real page images. Exits non-zero if any boundary differs.
+
+Usage:
+
+  python3 scripts/bench_grid_layout.py
+  python3 scripts/bench_grid_layout.py --pages-dir <dir> --cols 8 --rows 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from grid_layout import split_axis
+
+
+def legacy_split_axis(proj: Any, expected_count: int) -> list[int]:
+    # Reference implementation (pre grid_layout), O(N * W^2) Python loops.
+    n = int(proj.shape[0])
+    if expected_count <= 0:
+        return [0, n]
+    if expected_count == 1:
+        return [0, n]
+
+    step = n / float(expected_count)
+    min_cell = max(12, int(round(step * 0.35)))
+    win = max(10, int(round(step * 0.60)))
+    dev_lambda = 0.55
+    size_lambda = 0.90
+
+    proj = proj.astype("float32")
+    proj_max = float(max(1.0, float(proj.max())))
+
+    cand_y: list[list[int]] = []
+    cand_cost: list[list[float]] = []
+    for i in range(1, expected_count):
+        remaining = expected_count - i
+        y_expect = int(round(step * i))
+        lo = int(max(min_cell, y_expect - win))
+        hi = int(min(n - remaining * min_cell, y_expect + win))
+        if hi <= lo:
+            lo = int(max(min_cell, min(y_expect, n - remaining * min_cell - 1)))
+            hi = lo + 1
+        ys = list(range(lo, hi))
+        costs = []
+        for y in ys:
+            dev = (float(y) - float(y_expect)) / max(1.0, float(step))
+            costs.append(float(proj[y]) / proj_max + dev_lambda * dev * dev)
+        cand_y.append(ys)
+        cand_cost.append(costs)
+
+    INF = 1e18
+    dp = [[INF] * len(c) for c in cand_y]
+    prev = [[-1] * len(c) for c in cand_y]
+    for j, y in enumerate(cand_y[0]):
+        cell = float(y) / max(1.0, float(step))
+        dp[0][j] = cand_cost[0][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
+
+    for i in range(1, len(cand_y)):
+        for j, y in enumerate(cand_y[i]):
+            best = INF
+            best_k = -1
+            for k, y_prev in enumerate(cand_y[i - 1]):
+                if y - y_prev < min_cell:
+                    continue
+                cell = (float(y) - float(y_prev)) / max(1.0, float(step))
+                v = dp[i - 1][k] + cand_cost[i][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
+                if v < best:
+                    best = v
+                    best_k = k
+            dp[i][j] = best
+            prev[i][j] = best_k
+
+    boundaries = [0]
+    last_i = len(cand_y) - 1
+    best_j = min(range(len(dp[last_i])), key=lambda j: dp[last_i][j])
+    chosen = [0] * len(cand_y)
+    chosen[last_i] = best_j
+    for i in range(last_i, 0, -1):
+        chosen[i - 1] = prev[i][chosen[i]]
+    for i, j in enumerate(chosen):
+        boundaries.append(int(cand_y[i][j]))
+    boundaries.append(n)
+    return boundaries
+
+
+def synthetic_projection(rng: np.random.Generator, n: int, count: int) -> np.ndarray:
+    """Ink-like projection: `count` bumps with jittered centers + noise."""
+
+    x = np.arange(n, dtype=np.float32)
+    step = n / float(max(1, count))
+    proj = np.zeros(n, dtype=np.float32)
+    for i in range(count):
+        c = (i + 0.5) * step + rng.normal(0.0, step * 0.12)
+        width = step * rng.uniform(0.25, 0.45)
+        proj += rng.uniform(40, 220) * np.exp(-0.5 * ((x - c) / max(1.0, width)) ** 2)
+    proj += rng.integers(0, 6, size=n).astype(np.float32)
+    # Integer sums like the real `ink.sum(axis=...)` projections.
+    return np.round(proj).astype(np.float32)
+
+
+def page_projections(pages_dir: Path, cols: int, rows: int, thr: int) -> list[tuple[np.ndarray, int]]:
+    from PIL import Image
+
+    out: list[tuple[np.ndarray, int]] = []
+    for p in sorted(pages_dir.iterdir()):
+        if not p.is_file() or p.suffix.lower() not in {".jpg", ".jpeg", ".png", ".webp"}:
+            continue
+        arr = np.asarray(Image.open(p).convert("RGB"))
+        gray = 0.299 * arr[..., 0] + 0.587 * arr[..., 1] + 0.114 * arr[..., 2]
+        ink = gray < float(thr)
+        out.append((ink.sum(axis=0).astype("float32"), cols))
+        out.append((ink.sum(axis=1).astype("float32"), rows))
+        w = ink.shape[1]
+        for c in range(cols):
+            x0 = int(round(c * w / cols))
+            x1 = int(round((c + 1) * w / cols))
+            out.append((ink[:, x0:x1].sum(axis=1).astype("float32"), rows))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cases", type=int, default=60, help="random synthetic cases")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--pages-dir", default=None, help="optional real pages for parity/timing")
+    ap.add_argument("--cols", type=int, default=8)
+    ap.add_argument("--rows", type=int, default=24)
+    ap.add_argument("--ink-thr", type=int, default=115)
+    ap.add_argument("--skip-legacy-timing", action="store_true")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(int(args.seed))
+    cases: list[tuple[np.ndarray, int]] = []
+    for _ in range(int(args.cases)):
+        count = int(rng.integers(1, 32))
+        n = int(rng.integers(max(40, count * 30), max(41, count * 260)))
+        cases.append((synthetic_projection(rng, n, count), count))
+    # Edge cases: flat / empty projections and tight windows.
+    cases.append((np.zeros(600, dtype=np.float32), 20))
+    cases.append((np.ones(480, dtype=np.float32), 24))
+    cases.append((synthetic_projection(rng, 14000, 26), 26))
+
+    if args.pages_dir:
+        cases.extend(page_projections(Path(args.pages_dir), int(args.cols), int(args.rows), int(args.ink_thr)))
+
+    mismatches = 0
+    for proj, count in cases:
+        a = split_axis(proj, count)
+        b = legacy_split_axis(proj, count)
+        if a != b:
+            mismatches += 1
+            print(f"[mismatch] n={proj.shape[0]} count={count}\n  new={a}\n  old={b}")
+    print(f"parity: {len(cases) - mismatches}/{len(cases)} identical")
+
+    t0 = time.perf_counter()
+    for proj, count in cases:
+        split_axis(proj, count)
+    t_new = time.perf_counter() - t0
+    print(f"vectorized: {t_new * 1000.0:.1f} ms total, {t_new * 1000.0 / len(cases):.2f} ms/axis")
+
+    if not args.skip_legacy_timing:
+        t0 = time.perf_counter()
+        for proj, count in cases:
+            legacy_split_axis(proj, count)
+        t_old = time.perf_counter() - t0
+        print(f"legacy:     {t_old * 1000.0:.1f} ms total, {t_old * 1000.0 / len(cases):.2f} ms/axis")
+        print(f"speedup:    {t_old / max(1e-9, t_new):.1f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Parity check + benchmark for `scripts/ink_engine.py`.
+
+Compares the integer engine against the legacy float `ink_mask` (kept
+verbatim below as the reference) on a full page, then times:
+
+- one mask per call (legacy vs engine)
+- several thresholds per page (legacy: one float pass each; engine: one
+  luminance pass + one compare per threshold)
+- per-crop masks (legacy: `ink_mask(page.crop(box))`; engine: slices of the
+  page-level mask)
+
+`--exhaustive` additionally checks every 2^24 RGB value. Exits non-zero on
+any mismatch.
+
+Usage:
+
+  python3 scripts/bench_ink_engine.py --page steles/.../page.jpg
+  python3 scripts/bench_ink_engine.py --page <page> --exhaustive
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from ink_engine import InkPlanes, ink_mask
+
+
+def legacy_ink_mask(arr: np.ndarray, ink_threshold: int) -> np.ndarray:
+    # Reference implementation (pre ink_engine).
+    r = arr[..., 0].astype(np.int16)
+    g = arr[..., 1].astype(np.int16)
+    b = arr[..., 2].astype(np.int16)
+
+    gray = (0.299 * r + 0.587 * g + 0.114 * b).astype(np.float32)
+
+    redish = (r > 120) & ((r - g) > 40) & ((r - b) > 40)
+    seal = redish & (gray > 82)
+
+    ink = gray < float(ink_threshold)
+    return ink & (~seal)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def exhaustive_mismatches(thresholds: list[int]) -> int:
+    v = np.arange(256, dtype=np.uint8)
+    g, b = np.meshgrid(v, v, indexing="ij")
+    bad = 0
+    for r in range(256):
+        arr = np.stack([np.full_like(g, r), g, b], axis=-1)
+        planes = InkPlanes.from_rgb(arr)
+        for t in thresholds:
+            bad += int((planes.compute(t) != legacy_ink_mask(arr, t)).sum())
+    return bad
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--page", required=True, help="page image (jpg/png/webp)")
+    ap.add_argument("--thresholds", default="115,120,125,150,155,160,185,190")
+    ap.add_argument("--crops", type=int, default=192, help="random crops for the per-crop timing")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--exhaustive", action="store_true", help="also check all 2^24 RGB values")
+    args = ap.parse_args()
+
+    img = Image.open(Path(args.page)).convert("RGB")
+    arr = np.asarray(img)
+    h, w = arr.shape[0], arr.shape[1]
+    thresholds = [int(t) for t in str(args.thresholds).split(",") if t.strip()]
+    print(f"page: {w}x{h} ({w * h / 1e6:.1f} MP), thresholds={thresholds}")
+
+    mismatches = 0
+    planes = InkPlanes.from_rgb(arr)
+    for t in thresholds:
+        diff = int((planes.mask(t) != legacy_ink_mask(arr, t)).sum())
+        if diff:
+            print(f"[mismatch] threshold={t} pixels={diff}")
+        mismatches += diff
+
+    rng = np.random.default_rng(int(args.seed))
+    boxes: list[tuple[int, int, int, int]] = []
+    for _ in range(int(args.crops)):
+        cw = int(rng.integers(40, max(41, w // 6)))
+        ch = int(rng.integers(40, max(41, h // 10)))
+        x0 = int(rng.integers(-10, max(-9, w - cw + 10)))
+        y0 = int(rng.integers(-10, max(-9, h - ch + 10)))
+        boxes.append((x0, y0, x0 + cw, y0 + ch))
+    for box in boxes:
+        ref = legacy_ink_mask(np.array(img.crop(box)), thresholds[0])
+        if not np.array_equal(planes.crop(box).mask(thresholds[0]), ref):
+            print(f"[mismatch] crop={box}")
+            mismatches += 1
+
+    rep = int(args.repeat)
+    t0 = thresholds[0]
+    t_old = timed(lambda: legacy_ink_mask(arr, t0), rep)
+    t_new = timed(lambda: ink_mask(arr, t0), rep)
+    print(f"single mask:  legacy {t_old * 1000:.1f} ms  engine {t_new * 1000:.1f} ms  ({t_old / t_new:.1f}x)")
+
+    t_old = timed(lambda: [legacy_ink_mask(arr, t) for t in thresholds], rep)
+    t_new = timed(lambda: InkPlanes.from_rgb(arr).masks(thresholds), rep)
+    print(
+        f"{len(thresholds)} thresholds: legacy {t_old * 1000:.1f} ms  engine {t_new * 1000:.1f} ms  ({t_old / t_new:.1f}x)"
+    )
+
+    def legacy_crops() -> None:
+        for box in boxes:
+            legacy_ink_mask(np.array(img.crop(box)), t0)
+
+    def engine_crops() -> None:
+        page_planes = InkPlanes.from_rgb(arr)
+        for box in boxes:
+            page_planes.crop(box).mask(t0)
+
+    def engine_slices() -> None:
+        for box in boxes:
+            planes.crop(box).compute(t0)
+
+    t_old = timed(legacy_crops, rep)
+    t_new = timed(engine_crops, rep)
+    t_slice = timed(engine_slices, rep)
+    print(
+        f"{len(boxes)} crops:    legacy {t_old * 1000:.1f} ms  engine {t_new * 1000:.1f} ms incl. page pass"
+        f" ({t_old / t_new:.1f}x), {t_slice * 1000:.1f} ms from cached page planes ({t_old / t_slice:.1f}x)"
+    )
+
+    if args.exhaustive:
+        bad = exhaustive_mismatches(sorted(set(thresholds + [1, 82, 83, 255, 256])))
+        print(f"exhaustive: {bad} mismatching (color, threshold) pairs")
+        mismatches += bad
+
+    print(f"parity: {'OK' if mismatches == 0 else f'{mismatches} mismatches'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Peak RSS + time of page access patterns used by the QA/crop scripts.
+
+Each mode runs in a fresh subprocess over the same pages and reads
+`--crops` random crop boxes per page (plus a QA-style ring window):
+
+- legacy: `Image.open(p).convert("RGB")` kept for every page (old dict cache)
+- reader: `PageReader` with `--max-page-mb`
+- raw:    `PageReader` with a raw memmap cache (first run writes it, second
+          run reuses it)
+
+Crops are checked for equality against the legacy path.
+
+Usage:
+
+  python3 scripts/bench_page_reader.py steles/.../source/*.jpg
+  python3 scripts/bench_page_reader.py --max-page-mb 256 page_a.jpg page_b.jpg
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def boxes_for(w: int, h: int, n: int, seed: int) -> list[tuple[int, int, int, int]]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        bw, bh = rng.randint(32, max(33, w // 8)), rng.randint(32, max(33, h // 8))
+        x0, y0 = rng.randint(-16, max(0, w - bw)), rng.randint(-16, max(0, h - bh))
+        out.append((x0, y0, x0 + bw, y0 + bh))
+    return out
+
+
+def run_mode(mode: str, pages: list[str], crops: int, max_page_mb: int, raw_cache_dir: str) -> dict:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from PIL import Image
+
+    from page_reader import PageReader, image_size
+
+    digest = hashlib.sha1()
+    t0 = time.perf_counter()
+    reader = None
+    legacy: dict[str, Image.Image] = {}
+    if mode != "legacy":
+        reader = PageReader(
+            Path("/"),
+            max_bytes=max_page_mb * 1024 * 1024,
+            raw_cache_dir=Path(raw_cache_dir) if mode == "raw" else None,
+        )
+    for i, page in enumerate(pages):
+        w, h = image_size(Path(page))
+        for box in boxes_for(w, h, crops, seed=i):
+            if reader is None:
+                if page not in legacy:
+                    legacy[page] = Image.open(page).convert("RGB")
+                crop = legacy[page].crop(box)
+            else:
+                crop = reader.crop(str(Path(page).resolve()).lstrip("/"), box)
+            digest.update(crop.tobytes())
+    return {
+        "mode": mode,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "digest": digest.hexdigest(),
+        "reader": reader.report() if reader else None,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pages", nargs="+")
+    ap.add_argument("--crops", type=int, default=200)
+    ap.add_argument("--max-page-mb", type=int, default=512)
+    ap.add_argument("--raw-cache-dir", default=None)
+    ap.add_argument("--mode", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.pages, args.crops, args.max_page_mb, args.raw_cache_dir)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = args.raw_cache_dir or tmp
+        results = []
+        for mode in ("legacy", "reader", "raw", "raw"):
+            cmd = [sys.executable, __file__, *args.pages, "--mode", mode, "--crops", str(args.crops)]
+            cmd += ["--max-page-mb", str(args.max_page_mb), "--raw-cache-dir", raw_dir]
+            res = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+            results.append(res)
+            print(
+                f"{res['mode']:>6}: {res['seconds']:7.2f} s  peak RSS {res['peak_rss_mb']:8.1f} MB"
+                + (f"  {res['reader']}" if res["reader"] else "")
+            )
+    bad = len({r["digest"] for r in results}) != 1
+    print("crops identical" if not bad else "[mismatch] crops differ between modes")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
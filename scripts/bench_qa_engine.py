@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Parity + timing of the page-level QA engine against per-crop measurement.
+
+For one dataset:
+
+- metrics: every crop box is measured with `qa_char_crops.measure_entry`
+  (per-crop masks, ring slice, 3x3 dilation) and with
+  `qa_engine.measure_boxes` (one region per page, prefix sums); all fields
+  except `center` (taken from the output image, not the page) must be
+  equal. `--random N` adds N random in-page boxes
+  per page (edges and corners included) to the comparison.
+- report: `qa_char_crops.main()` is run with `--engine crop` and
+  `--engine page`; the two `qa_report.json` files must be identical. With
+  `--reference <qa_report.json>` (e.g. one written before this change, for
+  the same dataset/source dirs) the page report must also equal it.
+
+Exits non-zero on any mismatch.
+
+Usage:
+
+  python3 scripts/bench_qa_engine.py --dataset-dir <ds> --source-dir <pages>
+  python3 scripts/bench_qa_engine.py --dataset-dir <ds> --source-dir <pages> --reference <ds>/qa_report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import qa_char_crops
+from dataset_index import load_index
+from page_cache import PageCache
+from qa_engine import measure_boxes
+
+
+def _boxes_by_page(dataset_dir: Path) -> dict[str, list[tuple[int, int, int, int]]]:
+    out: dict[str, list[tuple[int, int, int, int]]] = {}
+    for e in load_index(dataset_dir):
+        src = e.get("source") or {}
+        box = src.get("crop_box")
+        if src.get("image") and box:
+            out.setdefault(src["image"], []).append(tuple(int(v) for v in box))
+    return out
+
+
+def _random_boxes(rnd: random.Random, w: int, h: int, n: int) -> list[tuple[int, int, int, int]]:
+    out = []
+    for _ in range(n):
+        bw, bh = rnd.randint(3, min(w, 200)), rnd.randint(3, min(h, 200))
+        x0 = rnd.choice([0, 1, w - bw, w - bw - 1, rnd.randint(0, w - bw)])
+        y0 = rnd.choice([0, 1, h - bh, h - bh - 1, rnd.randint(0, h - bh)])
+        x0, y0 = max(0, x0), max(0, y0)
+        out.append((x0, y0, x0 + bw, y0 + bh))
+    return out
+
+
+def _report(dataset_dir: Path, source_dir: Path, out: Path, engine: str) -> tuple[dict, float]:
+    t0 = time.perf_counter()
+    qa_char_crops.main(
+        [
+            "--dataset-dir", str(dataset_dir),
+            "--source-dir", str(source_dir),
+            "--out-report", str(out),
+            "--out-summary", str(out.with_suffix(".md")),
+            "--engine", engine,
+        ]
+    )
+    return json.loads(out.read_text(encoding="utf-8")), time.perf_counter() - t0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset-dir", required=True)
+    ap.add_argument("--source-dir", required=True)
+    ap.add_argument("--reference", default="", help="qa_report.json to compare the page-engine report with")
+    ap.add_argument("--random", type=int, default=0, help="Extra random boxes per page")
+    ap.add_argument("--ring-px", type=int, default=8)
+    ap.add_argument("--strict-ink-thr", type=int, default=135)
+    ap.add_argument("--loose-ink-thr", type=int, default=155)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    dataset_dir, source_dir = Path(args.dataset_dir), Path(args.source_dir)
+    params = dict(ring_px=args.ring_px, strict_ink_thr=args.strict_ink_thr, loose_ink_thr=args.loose_ink_thr)
+    pages = PageCache(source_dir)
+    rnd = random.Random(args.seed)
+    by_page = _boxes_by_page(dataset_dir)
+    png = next(dataset_dir.glob("*.png"), None)
+    if png is None:
+        print("no crops found", file=sys.stderr)
+        return 2
+
+    bad = n = fallback = 0
+    t_crop = t_page = t_center = 0.0
+    for page, boxes in by_page.items():
+        w, h = pages.size(page)
+        pages.planes(page)  # decode outside the timed sections
+        boxes = boxes + _random_boxes(rnd, w, h, args.random)
+
+        t0 = time.perf_counter()
+        measured = measure_boxes(pages, page, boxes, **params)
+        t_page += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for box, m in zip(boxes, measured):
+            ref = qa_char_crops.measure_entry(pages, page, box, png, **params)
+            t1 = time.perf_counter()
+            qa_char_crops.compute_center_offset(png)
+            t_center += time.perf_counter() - t1
+            ref.pop("center")
+            if m is None:
+                fallback += 1
+                continue
+            n += 1
+            if m != ref:
+                bad += 1
+                if bad <= 5:
+                    print(f"MISMATCH {page} {box}: crop={ref} page={m}", file=sys.stderr)
+        t_crop += time.perf_counter() - t0
+
+    print(f"metrics: {n} boxes on {len(by_page)} pages, {fallback} per-crop fallbacks, {bad} mismatches")
+    # measure_entry also decodes the output image for the center offset;
+    # that part is timed separately and left out of both numbers.
+    print(f"  per-crop {(t_crop - 2 * t_center) * 1000:8.1f} ms  page engine {t_page * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crop, s_crop = _report(dataset_dir, source_dir, Path(tmp) / "crop.json", "crop")
+        page, s_page = _report(dataset_dir, source_dir, Path(tmp) / "page.json", "page")
+    same = crop == page
+    print(f"report: crop {s_crop:.2f}s  page {s_page:.2f}s  {'identical' if same else 'MISMATCH'}")
+    bad += int(not same)
+    if args.reference:
+        ref = json.loads(Path(args.reference).read_text(encoding="utf-8"))
+        same = ref == page
+        print(f"reference {args.reference}: {'identical' if same else 'MISMATCH'}")
+        bad += int(not same)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Time a QA rerun after a small crop fix, and check it against a full run.
+
+Copies the dataset to a temp dir, then (all as subprocesses, like the
+annotator/workbench apply jobs):
+
+1. `cold`: QA with an empty `--metrics-cache` (every crop measured);
+2. shrinks `--fix N` crop boxes by 1px on every side (inward, so boxes on
+   the page edge change too) through `apply_crop_overrides.py
+   --only-files`, then `warm`: QA again with the same cache (only the
+   re-rendered crops are measured);
+3. `full`: QA of the fixed dataset without a cache; its report must equal
+   the `warm` one.
+
+Only entries with `source.cell_box` are fixed (apply_crop_overrides.py skips
+the rest). Exits non-zero when a targeted crop did not change (its PNG, or
+its `crop_box` vs the override clamped to the page like
+apply_crop_overrides.py does), when `warm` measured a different number of crops than were fixed, on
+a report mismatch, or when `warm` takes longer than `--max-s`.
+
+Usage:
+
+  python3 scripts/bench_qa_incremental.py --dataset-dir <ds> --source-dir <pages>
+  python3 scripts/bench_qa_incremental.py --dataset-dir <ds> --source-dir <pages> --fix 3 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+HERE = Path(__file__).resolve().parent
+
+
+def _qa(ds: Path, source_dir: Path, report: Path, *extra: str) -> tuple[float, int]:
+    """Run QA; returns (seconds, metrics-cache misses)."""
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [
+            sys.executable,
+            str(HERE / "qa_char_crops.py"),
+            "--dataset-dir", str(ds),
+            "--source-dir", str(source_dir),
+            "--out-report", str(report),
+            "--out-summary", str(report.with_suffix(".md")),
+            "--top", "120",
+            *extra,
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        check=True,
+    ).stdout
+    dt = time.perf_counter() - t0
+    # "QA metrics cache: hits=.. misses=.." is printed only when the cache
+    # was written, i.e. when something was measured.
+    m = re.search(r"QA metrics cache: hits=\d+ misses=(\d+)", out)
+    return dt, int(m.group(1)) if m else 0
+
+
+def _sha1(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _clamped(box: list[int], source_dir: Path, image: str) -> list[int]:
+    # The crop_box apply_crop_overrides.py writes for `box` (same page lookup).
+    name = str(image)
+    for cand in (name, name.split("/", 1)[1] if name.startswith("pages_raw/") else None, f"pages_raw/{name}"):
+        if cand and (source_dir / cand).exists():
+            with Image.open(source_dir / cand) as im:
+                page_w, page_h = im.size
+            break
+    else:
+        return box
+    x0, y0, x1, y1 = box
+    x0 = max(0, min(x0, page_w - 1))
+    x1 = max(x0 + 1, min(x1, page_w))
+    y0 = max(0, min(y0, page_h - 1))
+    y1 = max(y0 + 1, min(y1, page_h))
+    return [x0, y0, x1, y1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset-dir", required=True)
+    ap.add_argument("--source-dir", required=True)
+    ap.add_argument("--fix", type=int, default=3, help="Crops to shrink by 1px per side")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--max-s", type=float, default=1.0)
+    args = ap.parse_args()
+
+    source_dir = Path(args.source_dir).resolve()
+    with tempfile.TemporaryDirectory() as tmp:
+        ds = Path(tmp) / "ds"
+        shutil.copytree(args.dataset_dir, ds, ignore=shutil.ignore_patterns(".*", "qa_*"))
+        cache = ["--metrics-cache", str(ds / ".qa" / "metrics.json"), "--workers", str(args.workers)]
+
+        index = json.loads((ds / "index.json").read_text(encoding="utf-8"))
+        overrides = {}
+        expected = {}
+        for e in index.get("files") or []:
+            src = e.get("source") or {}
+            box = src.get("crop_box")
+            # apply_crop_overrides.py re-renders only entries with a cell_box.
+            if not (e.get("file") and isinstance(box, list) and len(box) == 4 and src.get("cell_box")):
+                continue
+            x0, y0, x1, y1 = [int(round(float(v))) for v in box]
+            if x1 - x0 <= 2 or y1 - y0 <= 2:
+                continue
+            fixed_box = [x0 + 1, y0 + 1, x1 - 1, y1 - 1]
+            overrides[e["file"]] = {"crop_box": fixed_box}
+            expected[e["file"]] = _clamped(fixed_box, source_dir, str(src.get("image") or ""))
+            if len(overrides) >= args.fix:
+                break
+        if not overrides:
+            print("FAIL: no entry has source.crop_box and source.cell_box; nothing to fix", file=sys.stderr)
+            return 1
+        before = {fn: _sha1(ds / fn) for fn in overrides}
+
+        t_cold, _ = _qa(ds, source_dir, Path(tmp) / "cold.json", *cache)
+
+        ov = Path(tmp) / "overrides.json"
+        ov.write_text(json.dumps({"version": 1, "crop_overrides": overrides}) + "\n", encoding="utf-8")
+        t0 = time.perf_counter()
+        subprocess.check_call(
+            [
+                sys.executable,
+                str(HERE / "apply_crop_overrides.py"),
+                "--dataset-dir", str(ds),
+                "--source-dir", str(source_dir),
+                "--overrides", str(ov),
+                "--only-files", ",".join(overrides),
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+        t_apply = time.perf_counter() - t0
+
+        # The fix must really have happened, or the warm run measures a no-op.
+        fixed = json.loads((ds / "index.json").read_text(encoding="utf-8"))
+        boxes = {e.get("file"): (e.get("source") or {}).get("crop_box") for e in fixed.get("files") or []}
+        unchanged = [
+            fn for fn in overrides if boxes.get(fn) != expected[fn] or _sha1(ds / fn) == before[fn]
+        ]
+        if unchanged:
+            print(f"FAIL: apply_crop_overrides left {len(unchanged)} crops unchanged: {unchanged[:5]}", file=sys.stderr)
+            return 1
+
+        t_warm, warm_misses = _qa(ds, source_dir, Path(tmp) / "warm.json", *cache)
+        t_full, _ = _qa(ds, source_dir, Path(tmp) / "full.json")
+
+        warm = json.loads((Path(tmp) / "warm.json").read_text(encoding="utf-8"))
+        full = json.loads((Path(tmp) / "full.json").read_text(encoding="utf-8"))
+        same = warm == full
+
+    print(f"{len(index.get('files') or [])} crops, {len(overrides)} fixed (apply {t_apply:.2f}s)")
+    print(
+        f"cold {t_cold:6.2f}s  warm {t_warm:6.2f}s ({warm_misses} measured)  full {t_full:6.2f}s  "
+        f"{'identical' if same else 'MISMATCH'}"
+    )
+    if not same:
+        return 1
+    if warm_misses != len(overrides):
+        print(f"FAIL: warm QA measured {warm_misses} crops, expected {len(overrides)}", file=sys.stderr)
+        return 1
+    if t_warm > args.max_s:
+        print(f"FAIL: warm QA {t_warm:.2f}s > {args.max_s}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""QA with render-time crop stats vs decoding every output crop.
+
+Copies the dataset to a temp dir and re-renders every crop through
+`apply_crop_overrides.py` (crop boxes unchanged), which records center
+offset / ink stats and the 32x32 feature of each crop (render_metrics.py).
+Then QA runs twice:
+
+- `render`: with those rows (no output crop is decoded);
+- `decode`: after deleting them from `.features/` (every crop is decoded,
+  as before).
+
+Both `qa_report.json` files must be identical; exits non-zero otherwise.
+`--webp` writes the crops as WebP (lossy; stats come from the encoded
+bytes decoded in memory).
+
+Usage:
+
+  python3 scripts/bench_render_metrics.py --dataset-dir <ds> --source-dir <pages>
+  python3 scripts/bench_render_metrics.py --dataset-dir <ds> --source-dir <pages> --webp
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dataset_index import write_index
+from glyph_index import FEATURE_DIR
+from render_metrics import FEATURE_NAME, STATS_NAME
+
+HERE = Path(__file__).resolve().parent
+
+
+def _run(script: str, *args: str) -> float:
+    t0 = time.perf_counter()
+    subprocess.check_call([sys.executable, str(HERE / script), *args], stdout=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset-dir", required=True)
+    ap.add_argument("--source-dir", required=True)
+    ap.add_argument("--webp", action="store_true")
+    args = ap.parse_args()
+
+    source_dir = Path(args.source_dir).resolve()
+    with tempfile.TemporaryDirectory() as tmp:
+        ds = Path(tmp) / "ds"
+        shutil.copytree(args.dataset_dir, ds, ignore=shutil.ignore_patterns(".*", "qa_*"))
+        index = json.loads((ds / "index.json").read_text(encoding="utf-8"))
+        if args.webp:
+            index.setdefault("meta", {})["output"] = {**(index["meta"].get("output") or {}), "format": "webp", "quality": 82}
+            write_index(ds, index)
+        overrides = {
+            e["file"]: {"crop_box": e["source"]["crop_box"]}
+            for e in index.get("files") or []
+            if e.get("file") and (e.get("source") or {}).get("crop_box") and (e.get("source") or {}).get("cell_box")
+        }
+        ov = Path(tmp) / "overrides.json"
+        ov.write_text(json.dumps({"version": 1, "crop_overrides": overrides}) + "\n", encoding="utf-8")
+        t_apply = _run("apply_crop_overrides.py", "--dataset-dir", str(ds), "--source-dir", str(source_dir), "--overrides", str(ov))
+
+        def qa(name: str) -> tuple[float, dict]:
+            report = Path(tmp) / f"{name}.json"
+            t = _run(
+                "qa_char_crops.py",
+                "--dataset-dir", str(ds),
+                "--source-dir", str(source_dir),
+                "--out-report", str(report),
+                "--out-summary", str(report.with_suffix(".md")),
+            )
+            return t, json.loads(report.read_text(encoding="utf-8"))
+
+        t_render, rep_render = qa("render")
+        for name in (FEATURE_NAME, STATS_NAME):
+            for p in (ds / FEATURE_DIR).glob(f"{name}.*"):
+                p.unlink()
+        t_decode, rep_decode = qa("decode")
+
+    same = rep_render == rep_decode
+    print(f"{len(overrides)} crops re-rendered{' (webp)' if args.webp else ''} in {t_apply:.2f}s")
+    print(f"QA render {t_render:6.2f}s  decode {t_decode:6.2f}s  {'identical' if same else 'MISMATCH'}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Parity check + benchmark for `scripts/seq_align.py`.
+
+Builds a synthetic stele: a text over a small vocabulary and a detection
+sequence derived from it with dropped chars, merged boxes (take=2), noise
+detections (seals) and optional classifier top-k predictions. Then aligns it
+with:
+
+- `legacy`: the old list-of-lists DP (kept verbatim below as the reference,
+  only for sizes where it fits in time);
+- `full`:   `seq_align.align(band=0)`;
+- `band`:   `seq_align.align(band=--band)`.
+
+Reports seconds and peak traced memory (tracemalloc, second run) for each,
+and exits non-zero if `full` differs from `legacy` (path, best end and cost)
+or `band` differs from `full`.
+
+`--anchored` also runs `seq_align.align_anchored` (serial and on all CPUs)
+and reports how many of the full DP's matches it keeps and the cost gap. The
+synthetic data includes spurious detections that confidently claim a char
+from elsewhere in the text (`--spurious`); the bench fails if the anchored
+cost exceeds the full DP's by more than ANCHOR_COST_TOL, i.e. a wrong anchor
+survived.
+
+Usage:
+
+  python3 scripts/bench_seq_align.py
+  python3 scripts/bench_seq_align.py --chars 6000 --band 64 --no-legacy
+  python3 scripts/bench_seq_align.py --chars 10000 --no-legacy --anchored
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from seq_align import AlignCosts, align, align_anchored
+
+# Anchored cost may exceed the full DP by this fraction (equal-cost ties aside,
+# verified anchors should not cost anything).
+ANCHOR_COST_TOL = 1e-3
+
+
+@dataclass(frozen=True)
+class Step:
+    op: str
+    i: int
+    j: int
+    take: int
+
+
+def legacy_align(scores, ids, text, preds, costs: AlignCosts):
+    # Reference implementation (pre seq_align), O(n * m) Python objects.
+    n = len(ids)
+    m = len(text)
+    INF = 1e18
+    dp = [[INF] * (m + 1) for _ in range(n + 1)]
+    prev = [[None] * (m + 1) for _ in range(n + 1)]
+    dp[0][0] = 0.0
+
+    def match_cost(i):
+        return -math.log(scores[i])
+
+    def cls_penalty(det_id, gold):
+        if not preds:
+            return 0.0
+        cand = preds.get(det_id)
+        if not cand:
+            return 0.0
+        for ch, p in cand:
+            if ch == gold:
+                return costs.cls_weight * (-math.log(max(1e-6, min(1.0, float(p)))))
+        return costs.cls_miss_pen
+
+    for i in range(n + 1):
+        for j in range(m + 1):
+            cur = dp[i][j]
+            if cur >= INF:
+                continue
+            if i < n:
+                v = cur + costs.skip_det_pen + 0.25 * match_cost(i)
+                if v < dp[i + 1][j]:
+                    dp[i + 1][j] = v
+                    prev[i + 1][j] = Step("skip_det", i, j, 0)
+            if j < m:
+                v = cur + costs.skip_char_pen
+                if v < dp[i][j + 1]:
+                    dp[i][j + 1] = v
+                    prev[i][j + 1] = Step("skip_char", i, j, 0)
+            if i < n and j < m:
+                v = cur + match_cost(i) + cls_penalty(ids[i], text[j])
+                if v < dp[i + 1][j + 1]:
+                    dp[i + 1][j + 1] = v
+                    prev[i + 1][j + 1] = Step("match1", i, j, 1)
+            if i < n and j + 1 < m:
+                v = (
+                    cur
+                    + match_cost(i)
+                    + costs.match2_pen
+                    + cls_penalty(ids[i], text[j])
+                    + cls_penalty(ids[i], text[j + 1])
+                )
+                if v < dp[i + 1][j + 2]:
+                    dp[i + 1][j + 2] = v
+                    prev[i + 1][j + 2] = Step("match2", i, j, 2)
+
+    best_j = min(range(m + 1), key=lambda jj: dp[n][jj])
+    i, j = n, best_j
+    steps = []
+    while i > 0 or j > 0:
+        st = prev[i][j]
+        if st is None:
+            break
+        steps.append(st)
+        i, j = st.i, st.j
+    steps.reverse()
+    matches = [(st.op, st.i, st.j) for st in steps if st.op in ("match1", "match2")]
+    return matches, best_j, dp[n][best_j]
+
+
+def synth(chars: int, vocab: int, with_preds: bool, seed: int, spurious: float = 0.0):
+    rng = random.Random(seed)
+    alphabet = [chr(0x4E00 + k) for k in range(vocab)]
+    # Zipf-like char frequencies: a few very common chars, many hapaxes.
+    text = "".join(rng.choices(alphabet, weights=[1.0 / (k + 1) for k in range(vocab)], k=chars))
+    ids: list[str] = []
+    scores: list[float] = []
+    preds: dict[str, list[tuple[str, float]]] = {}
+    j = 0
+    while j < len(text):
+        r = rng.random()
+        if r < 0.03:
+            j += 1  # missing glyph
+            continue
+        if with_preds and rng.random() < spurious:
+            # Spurious detection confidently claiming a char from elsewhere in
+            # the text (a wrong anchor candidate if that char is rare).
+            det_id = f"d{len(ids)}"
+            ids.append(det_id)
+            scores.append(round(rng.uniform(0.3, 1.0), 3))
+            preds[det_id] = [(rng.choice(text), round(rng.uniform(0.9, 0.99), 3))]
+        det_id = f"d{len(ids)}"
+        if r < 0.06:
+            # seal / noise
+            gold = rng.choice(alphabet)
+        elif r < 0.09 and j + 1 < len(text):
+            gold = text[j]
+            j += 2
+        else:
+            gold = text[j]
+            j += 1
+        ids.append(det_id)
+        scores.append(round(rng.uniform(0.3, 1.0), 3))
+        if with_preds and rng.random() < 0.9:
+            # Gold usually top-1 with a high probability, then distractors.
+            top = [(gold, round(rng.uniform(0.5, 0.99), 3))] if rng.random() < 0.85 else []
+            while len(top) < 5:
+                top.append((rng.choice(alphabet), round(rng.uniform(0.01, 0.3), 3)))
+            if rng.random() < 0.2:
+                rng.shuffle(top)
+            preds[det_id] = top
+    return text, ids, scores, preds
+
+
+def _measure(fn):
+    # Time untraced (tracemalloc slows NumPy-heavy loops a lot), then rerun
+    # traced for the peak.
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, dt, peak / 2**20
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, default=400)
+    ap.add_argument("--vocab", type=int, default=3000)
+    ap.add_argument("--band", type=int, default=48)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-preds", action="store_true")
+    ap.add_argument("--spurious", type=float, default=0.02, help="Rate of spurious confident detections")
+    ap.add_argument("--no-legacy", action="store_true")
+    ap.add_argument("--anchored", action="store_true", help="Also run align_anchored and compare with full")
+    ap.add_argument("--workers", type=int, default=0, help="Processes for --anchored (0 = all CPUs)")
+    args = ap.parse_args()
+
+    text, ids, scores, preds = synth(args.chars, args.vocab, not args.no_preds, args.seed, args.spurious)
+    costs = AlignCosts()
+    print(f"text={len(text)} dets={len(ids)} preds={len(preds)}")
+
+    ok = True
+    full, dt, mb = _measure(lambda: align(scores, ids, text, preds, costs, band=0))
+    print(f"  full: {dt:8.2f} s  peak {mb:8.1f} MB  cells={full.stats['cells']}")
+    banded, dt, mb = _measure(lambda: align(scores, ids, text, preds, costs, band=args.band))
+    print(f"  band: {dt:8.2f} s  peak {mb:8.1f} MB  cells={banded.stats['cells']} (band={args.band})")
+    slope = len(text) / max(1, len(ids))
+    drift = max((abs(j - i * slope) for _, i, j in full.matches), default=0.0)
+    print(f"        full path max |j - i*m/n| = {drift:.1f}")
+    if (banded.matches, banded.best_j, banded.cost) != (full.matches, full.best_j, full.cost):
+        print(f"MISMATCH band vs full (band {args.band} < drift {drift:.0f}?)", file=sys.stderr)
+        ok = False
+
+    if args.anchored:
+        workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+        for w in sorted({1, workers}):
+            t0 = time.perf_counter()
+            anch = align_anchored(scores, ids, text, preds, costs, workers=w)
+            dt = time.perf_counter() - t0
+            st = anch.stats
+            print(
+                f"anchor: {dt:8.2f} s  workers={st['workers']} anchors={st['anchors']} "
+                f"segments={st['segments']} max_segment={st.get('max_segment')} cells={st['cells']}"
+            )
+        same = len(set(anch.matches) & set(full.matches))
+        print(
+            f"        {same}/{len(full.matches)} full matches kept, "
+            f"cost {anch.cost:.3f} vs {full.cost:.3f} ({anch.cost - full.cost:+.3f}), "
+            f"anchors dropped={st['anchors_dropped']} rounds={st['rounds']}"
+        )
+        if anch.cost - full.cost > ANCHOR_COST_TOL * abs(full.cost):
+            print("ANCHORED WORSE than full: a wrong anchor was kept", file=sys.stderr)
+            ok = False
+
+    if not args.no_legacy:
+        (matches, best_j, cost), dt, mb = _measure(lambda: legacy_align(scores, ids, text, preds, costs))
+        print(f"legacy: {dt:8.2f} s  peak {mb:8.1f} MB")
+        if (matches, best_j, cost) != (full.matches, full.best_j, full.cost):
+            print(f"MISMATCH full vs legacy cost={full.cost!r} vs {cost!r}", file=sys.stderr)
+            ok = False
+
+    print("parity ok" if ok else "parity FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""Columnar companion of a dataset's `index.json` (`index.cols.npz`).
+
+`index.json` stays the export format (frontend, zips); builders write both
+through `write_index()` and readers go through `load_index()`, which uses
+the companion when it matches the JSON next to it and falls back to
+parsing the JSON otherwise (also when numpy is missing). The fallback is a
+plain view over the parsed JSON: the columnar layout is only built when a
+companion is written, never on load.
+
+Layout (one uncompressed `.npz`, members read on first access):
+
+- `meta`: JSON with the top-level fields, the column schema, string tables
+  and per-page values, plus size/mtime/sha1 of the `index.json` it mirrors.
+- `shape`: per entry, which key order it has (entries keep their exact keys).
+- `page`: per entry, id of `source.image` in the interned page list.
+- one column per entry key (`file`, `char`, `source.crop_box`, ...):
+  boxes as (n, 4) int32, ints as int64, strings as int32 codes into a
+  table, anything else as interned JSON; `None` via a mask. Source fields
+  that are constant within a page (`page_override`, `image_index`, ...) are
+  stored once per page.
+
+Entries materialize lazily: `idx[i]` / iteration yield read-only mappings
+that decode a field when it is read; `column()` gives whole arrays for
+vectorized use and `to_json()` rebuilds the exact `index.json` document.
+
+Usage (convert existing datasets / check round trip):
+
+  python3 scripts/dataset_index.py <dataset_dir> [<dataset_dir> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Iterator
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+INDEX_NAME = "index.json"
+COMPANION_NAME = "index.cols.npz"
+FORMAT_VERSION = 1
+
+
+def _is_int(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _is_box(v: Any) -> bool:
+    return isinstance(v, list) and len(v) == 4 and all(_is_int(x) and -(2**31) <= x < 2**31 for x in v)
+
+
+def _dumps_value(v: Any) -> str:
+    return json.dumps(v, ensure_ascii=False, separators=(",", ":"))
+
+
+def _column_kind(values: list[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if present and all(_is_box(v) for v in present):
+        return "box"
+    if present and all(_is_int(v) and -(2**63) <= v < 2**63 for v in present):
+        return "int"
+    if all(isinstance(v, str) for v in present):
+        return "str"
+    return "json"
+
+
+def _index_json_text(index: dict) -> str:
+    return json.dumps(index, ensure_ascii=False, indent=2) + "\n"
+
+
+def _encode(index: dict) -> tuple[dict, dict[str, np.ndarray]]:
+    files = index.get("files") or []
+    if not isinstance(files, list) or not all(isinstance(e, dict) for e in files):
+        raise ValueError("index.json: 'files' must be a list of objects")
+    n = len(files)
+
+    # Key orders ("shapes") and the flat column paths.
+    shapes: list[list] = []
+    shape_ids: dict[str, int] = {}
+    shape_of = np.zeros(n, dtype=np.int32)
+    paths: list[str] = []
+    seen_paths: set[str] = set()
+    for i, e in enumerate(files):
+        src = e.get("source")
+        shape = [list(e.keys()), list(src.keys()) if isinstance(src, dict) else None]
+        key = _dumps_value(shape)
+        if key not in shape_ids:
+            shape_ids[key] = len(shapes)
+            shapes.append(shape)
+        shape_of[i] = shape_ids[key]
+        for k in e:
+            p = k if not (k == "source" and isinstance(src, dict)) else None
+            if p is not None and p not in seen_paths:
+                seen_paths.add(p)
+                paths.append(p)
+        if isinstance(src, dict):
+            for k in src:
+                p = f"source.{k}"
+                if p not in seen_paths:
+                    seen_paths.add(p)
+                    paths.append(p)
+
+    def value(e: dict, path: str) -> Any:
+        if path.startswith("source."):
+            src = e.get("source")
+            return src.get(path[7:]) if isinstance(src, dict) else None
+        return e.get(path)
+
+    # Pages (interned `source.image`).
+    pages: list[str] = []
+    page_ids: dict[str, int] = {}
+    page_of = np.full(n, -1, dtype=np.int32)
+    for i, e in enumerate(files):
+        img = value(e, "source.image")
+        if isinstance(img, str):
+            if img not in page_ids:
+                page_ids[img] = len(pages)
+                pages.append(img)
+            page_of[i] = page_ids[img]
+
+    columns: list[dict] = []
+    arrays: dict[str, np.ndarray] = {"shape": shape_of, "page": page_of}
+    for c, path in enumerate(paths):
+        values = [value(e, path) for e in files]
+        spec: dict[str, Any] = {"path": path}
+
+        # Constant within every page (and every entry has a page)?
+        if path.startswith("source.") and path != "source.image" and n and (page_of >= 0).all():
+            per_page: dict[int, str] = {}
+            for pid, v in zip(page_of.tolist(), values):
+                enc = _dumps_value(v)
+                if per_page.setdefault(pid, enc) != enc:
+                    break
+            else:
+                spec["kind"] = "page"
+                spec["values"] = [per_page.get(pid, "null") for pid in range(len(pages))]
+                columns.append(spec)
+                continue
+
+        kind = _column_kind(values)
+        spec["kind"] = kind
+        none = np.array([v is None for v in values], dtype=bool)
+        if none.any():
+            arrays[f"c{c}_none"] = none
+        if kind == "box":
+            arrays[f"c{c}"] = np.array([v if v is not None else [0, 0, 0, 0] for v in values], dtype=np.int32).reshape(n, 4)
+        elif kind == "int":
+            arrays[f"c{c}"] = np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+        else:
+            table: list[str] = []
+            ids: dict[str, int] = {}
+            codes = np.full(n, -1, dtype=np.int32)
+            for i, v in enumerate(values):
+                if v is None:
+                    continue
+                s = v if kind == "str" else _dumps_value(v)
+                if s not in ids:
+                    ids[s] = len(table)
+                    table.append(s)
+                codes[i] = ids[s]
+            spec["table"] = table
+            arrays[f"c{c}"] = codes
+        columns.append(spec)
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "top_keys": list(index.keys()),
+        "top": {k: v for k, v in index.items() if k != "files"},
+        "count": n,
+        "shapes": shapes,
+        "pages": pages,
+        "columns": columns,
+    }
+    return meta, arrays
+
+
+def _source_stamp(index_path: Path, text: bytes | None = None) -> dict:
+    st = index_path.stat()
+    data = text if text is not None else index_path.read_bytes()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": hashlib.sha1(data).hexdigest()}
+
+
+def write_companion(dataset_dir: Path, index: dict, *, text: bytes | None = None) -> Path:
+    """Write `index.cols.npz` mirroring the current `index.json`."""
+
+    dataset_dir = Path(dataset_dir)
+    meta, arrays = _encode(index)
+    meta["source"] = _source_stamp(dataset_dir / INDEX_NAME, text)
+    out = dataset_dir / COMPANION_NAME
+    tmp = out.with_name(f".{out.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8), **arrays)
+    tmp.replace(out)
+    return out
+
+
+def write_index(dataset_dir: Path, index: dict) -> Path:
+    """Write `index.json` (indent=2, as before) and its columnar companion.
+
+    Without numpy only `index.json` is written (and a stale companion
+    removed); readers then fall back to the JSON.
+    """
+
+    dataset_dir = Path(dataset_dir)
+    text = _index_json_text(index).encode("utf-8")
+    path = dataset_dir / INDEX_NAME
+    path.write_bytes(text)
+    if np is not None:
+        write_companion(dataset_dir, index, text=text)
+    else:
+        (dataset_dir / COMPANION_NAME).unlink(missing_ok=True)
+    return path
+
+
+class _Entry(Mapping):
+    """Read-only, lazily decoded view of one `files[i]` (or its `source`)."""
+
+    __slots__ = ("_idx", "_i", "_fields")
+
+    def __init__(self, idx: "DatasetIndex", i: int, fields: dict[str, str | None]):
+        # key -> column path (None: the nested `source` object).
+        self._idx = idx
+        self._i = i
+        self._fields = fields
+
+    def __getitem__(self, key: str) -> Any:
+        path = self._fields[key]
+        if path is None:
+            return _Entry(self._idx, self._i, self._idx._shape_fields[self._idx._shape[self._i]][1])
+        return self._idx._value(path, self._i)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._fields:
+            return default
+        return self[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def to_dict(self) -> dict:
+        return {k: (v.to_dict() if isinstance(v, _Entry) else v) for k, v in self.items()}
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+class DatasetIndex:
+    """Entries of one dataset index, backed by the companion or parsed JSON."""
+
+    def __init__(self, meta: dict, arrays: Any, *, path: Path | None = None):
+        self.path = path
+        self.meta = {k: meta["top"][k] for k in meta["top_keys"] if k != "files"}
+        self._m = meta
+        self._arrays = arrays
+        self._loaded: dict[str, np.ndarray | None] = {}
+        self._columns_py: dict[str, list] = {}
+        self._shapes = meta["shapes"]
+        self._shape_fields = [
+            (
+                {k: (None if k == "source" and src is not None else k) for k in top},
+                {k: f"source.{k}" for k in src} if src is not None else None,
+            )
+            for top, src in self._shapes
+        ]
+        self._shape = self._array("shape").tolist()
+        self._cols = {c["path"]: (n, c) for n, c in enumerate(meta["columns"])}
+        self.pages: list[str] = list(meta["pages"])
+        self._page_list = self._array("page").tolist()
+
+    def _array(self, name: str) -> np.ndarray | None:
+        if name not in self._loaded:
+            files = getattr(self._arrays, "files", None)
+            has = name in files if files is not None else name in self._arrays
+            self._loaded[name] = np.asarray(self._arrays[name]) if has else None
+        return self._loaded[name]
+
+    def __len__(self) -> int:
+        return int(self._m["count"])
+
+    def __getitem__(self, i: int) -> _Entry:
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return _Entry(self, i, self._shape_fields[self._shape[i]][0])
+
+    def __iter__(self) -> Iterator[_Entry]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def page_ids(self) -> np.ndarray:
+        """Per entry index into `pages` (-1 without `source.image`)."""
+
+        return self._array("page")
+
+    def _decoded(self, path: str) -> list:
+        # Whole column as Python values, decoded on first access.
+        col = self._columns_py.get(path)
+        if col is None:
+            n, spec = self._cols[path]
+            kind = spec["kind"]
+            if kind == "page":
+                col = self._page_list
+            else:
+                col = self._array(f"c{n}").tolist()
+                if kind == "str":
+                    table = spec["table"]
+                    col = [table[c] if c >= 0 else None for c in col]
+                none = self._array(f"c{n}_none")
+                if none is not None:
+                    for i in np.flatnonzero(none).tolist():
+                        col[i] = None
+            self._columns_py[path] = col
+        return col
+
+    def _value(self, path: str, i: int) -> Any:
+        _n, spec = self._cols[path]
+        kind = spec["kind"]
+        v = self._decoded(path)[i]
+        if kind == "page":
+            return json.loads(spec["values"][v])
+        if v is None:
+            return None
+        if kind == "box":
+            return list(v)
+        if kind == "json":
+            return json.loads(spec["table"][v]) if v >= 0 else None
+        return v
+
+    def column(self, path: str) -> Any:
+        """Whole column: (n, 4) int32 for boxes, int64 for ints, else a list.
+
+        Missing / None values are zeros in numeric arrays; see `none_mask()`.
+        """
+
+        n, spec = self._cols[path]
+        if spec["kind"] in ("box", "int"):
+            return self._array(f"c{n}")
+        return [self._value(path, i) for i in range(len(self))]
+
+    def none_mask(self, path: str) -> np.ndarray:
+        n, _spec = self._cols[path]
+        none = self._array(f"c{n}_none")
+        return none if none is not None else np.zeros(len(self), dtype=bool)
+
+    def to_json(self) -> dict:
+        """The full `index.json` document (same key order and values)."""
+
+        files = [e.to_dict() for e in self]
+        top = self._m["top"]
+        return {k: (files if k == "files" else top[k]) for k in self._m["top_keys"]}
+
+
+class _JsonIndex(DatasetIndex):
+    """Same interface over the parsed JSON (no current companion, or no numpy).
+
+    Entries are the read-only views of the parsed dicts. `column()`,
+    `none_mask()` and `page_ids` build their arrays on request (box and int
+    columns as in the companion), or return plain lists without numpy.
+    """
+
+    def __init__(self, index: dict, *, path: Path | None = None):
+        files = index.get("files") or []
+        if not isinstance(files, list) or not all(isinstance(e, dict) for e in files):
+            raise ValueError("index.json: 'files' must be a list of objects")
+        self.path = path
+        self.meta = {k: v for k, v in index.items() if k != "files"}
+        self._index = index
+        self._files = files
+        self.pages = []
+        self._page_list: list[int] = []
+        page_ids: dict[str, int] = {}
+        for e in files:
+            src = e.get("source")
+            img = src.get("image") if isinstance(src, dict) else None
+            if isinstance(img, str):
+                if img not in page_ids:
+                    page_ids[img] = len(self.pages)
+                    self.pages.append(img)
+                self._page_list.append(page_ids[img])
+            else:
+                self._page_list.append(-1)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __getitem__(self, i: int) -> Mapping:
+        return MappingProxyType(self._files[int(i)])
+
+    @property
+    def page_ids(self) -> Any:
+        return np.array(self._page_list, dtype=np.int32) if np is not None else self._page_list
+
+    def _value(self, path: str, i: int) -> Any:
+        e = self._files[i]
+        if path.startswith("source."):
+            src = e.get("source")
+            return src.get(path[7:]) if isinstance(src, dict) else None
+        return e.get(path)
+
+    def column(self, path: str) -> Any:
+        values = [self._value(path, i) for i in range(len(self))]
+        kind = _column_kind(values) if np is not None else "json"
+        if kind == "box":
+            return np.array([v if v is not None else [0, 0, 0, 0] for v in values], dtype=np.int32).reshape(-1, 4)
+        if kind == "int":
+            return np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+        return values
+
+    def none_mask(self, path: str) -> Any:
+        mask = [self._value(path, i) is None for i in range(len(self))]
+        return np.array(mask, dtype=bool) if np is not None else mask
+
+    def to_json(self) -> dict:
+        return self._index
+
+
+def _companion_matches(dataset_dir: Path, meta: dict) -> bool:
+    index_path = dataset_dir / INDEX_NAME
+    src = meta.get("source") or {}
+    try:
+        st = index_path.stat()
+    except OSError:
+        # Companion only (index.json not exported here).
+        return True
+    if st.st_size != src.get("size"):
+        return False
+    if st.st_mtime_ns == src.get("mtime_ns"):
+        return True
+    return hashlib.sha1(index_path.read_bytes()).hexdigest() == src.get("sha1")
+
+
+def load_index(dataset_dir: Path, *, use_companion: bool = True) -> DatasetIndex:
+    """Dataset index from `index.cols.npz` if current, else from `index.json`."""
+
+    dataset_dir = Path(dataset_dir)
+    comp = dataset_dir / COMPANION_NAME
+    if use_companion and np is not None and comp.exists():
+        try:
+            arrays = np.load(comp, allow_pickle=False)
+            meta = json.loads(bytes(arrays["meta"]).decode("utf-8"))
+            if meta.get("version") == FORMAT_VERSION and _companion_matches(dataset_dir, meta):
+                return DatasetIndex(meta, arrays, path=comp)
+        except (OSError, ValueError, KeyError):
+            pass
+    index_path = dataset_dir / INDEX_NAME
+    if not index_path.exists():
+        raise FileNotFoundError(f"Missing index.json: {index_path}")
+    data = json.loads(index_path.read_text(encoding="utf-8"))
+    if not isinstance(data.get("files"), list):
+        raise ValueError(f"Invalid index.json: missing 'files' list: {index_path}")
+    return _JsonIndex(data, path=index_path)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dataset_dirs", nargs="+")
+    args = ap.parse_args()
+    bad = 0
+    for d in args.dataset_dirs:
+        d = Path(d)
+        text = (d / INDEX_NAME).read_bytes()
+        data = json.loads(text)
+        out = write_companion(d, data, text=text)
+        back = load_index(d).to_json()
+        same = back == data and json.dumps(back, ensure_ascii=False) == json.dumps(data, ensure_ascii=False)
+        bad += int(not same)
+        print(f"{d}: {len(text) / 1024:.0f} KB json -> {out.stat().st_size / 1024:.0f} KB {out.name}; round trip {'ok' if same else 'MISMATCH'}")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
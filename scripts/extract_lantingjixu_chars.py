@@ -29,6 +29,9 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageEnhance
 
+from grid_layout import INF, backtrack, boundary_dp
+from ink_engine import InkPlanes, ink_mask
+
 
 WIKISOURCE_RAW_URL = (
     "https://zh.wikisource.org/wiki/%E8%98%AD%E4%BA%AD%E9%9B%86%E5%BA%8F?action=raw"
@@ -329,10 +332,11 @@ def main() -> int:
     ):
         img = Image.open(img_path).convert("RGB")
         arr = np.array(img)
-        ink = ink_mask(arr, ink_threshold=int(args.ink_threshold))
+        planes = InkPlanes.from_rgb(arr)
+        ink = planes.compute(int(args.ink_threshold))
 
         loose_thr = min(255, int(args.bbox_ink_threshold) + 35)
-        page_ink_loose = ink_mask(arr, ink_threshold=int(loose_thr))
+        page_ink_loose = planes.compute(int(loose_thr))
 
         # Debug overlay
         overlay: Image.Image | None = None
@@ -705,23 +709,6 @@ def extract_lanting_vertical_lines(raw: str) -> list[str]:
     return lines
 
 
-def ink_mask(arr: np.ndarray, ink_threshold: int) -> np.ndarray:
-    # arr is RGB uint8.
-    r = arr[..., 0].astype(np.int16)
-    g = arr[..., 1].astype(np.int16)
-    b = arr[..., 2].astype(np.int16)
-
-    gray = (0.299 * r + 0.587 * g + 0.114 * b).astype(np.float32)
-
-    # Red seal heuristic.
-    # Important: keep *dark* red pixels (ink under seal), only suppress seal-like reds.
-    redish = (r > 120) & ((r - g) > 40) & ((r - b) > 40)
-    seal = redish & (gray > 82)
-
-    ink = gray < float(ink_threshold)
-    return ink & (~seal)
-
-
 def contact_ring_ink(
     page_ink: np.ndarray,
     *,
@@ -1054,8 +1041,10 @@ def split_column_into_chars(
     # column edge attracts the boundary too strongly.
     size_lambda = 0.85
 
-    cand_y: list[list[int]] = []
-    cand_cost: list[list[float]] = []
+    cand_lo: list[int] = []
+    cand_hi: list[int] = []
+    cand_cost: list[np.ndarray] = []
+    proj64 = proj.astype(np.float64)
     for i in range(1, expected_count):
         remaining = expected_count - i
         y_expect = int(y_top + round(step * i))
@@ -1070,57 +1059,27 @@ def split_column_into_chars(
             lo = int(max(y_top + min_cell, min(y_expect, y_bottom - remaining * min_cell - 1)))
             hi = lo + 1
 
-        ys = list(range(int(lo), int(hi)))
-        costs: list[float] = []
-        for y in ys:
-            dev = (float(y) - float(y_expect)) / max(1.0, float(step))
-            costs.append(float(proj[y]) / proj_max + dev_lambda * dev * dev)
-        cand_y.append(ys)
-        cand_cost.append(costs)
+        dev = (np.arange(lo, hi, dtype=np.float64) - float(y_expect)) / max(1.0, float(step))
+        cand_lo.append(lo)
+        cand_hi.append(hi)
+        cand_cost.append(proj64[lo:hi] / proj_max + dev_lambda * dev * dev)
 
-    # DP: dp[i][j] = min cost up to boundary i (0-based), choosing candidate j.
+    # DP over boundaries (vectorized, see scripts/grid_layout.py).
     # Transition allowed if spacing >= min_cell.
-    INF = 1e18
-    dp: list[list[float]] = []
-    prev_idx: list[list[int]] = []
-    for i in range(len(cand_y)):
-        m = len(cand_y[i])
-        dp.append([INF] * m)
-        prev_idx.append([-1] * m)
-
-    if cand_y:
-        for j in range(len(cand_y[0])):
-            y = cand_y[0][j]
-            cell = (float(y) - float(y_top)) / max(1.0, float(step))
-            dp[0][j] = cand_cost[0][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-
-        for i in range(1, len(cand_y)):
-            for j, y in enumerate(cand_y[i]):
-                best = INF
-                best_k = -1
-                for k, y_prev in enumerate(cand_y[i - 1]):
-                    if y - y_prev < min_cell:
-                        continue
-                    cell = (float(y) - float(y_prev)) / max(1.0, float(step))
-                    v = (
-                        dp[i - 1][k]
-                        + cand_cost[i][j]
-                        + size_lambda * (cell - 1.0) * (cell - 1.0)
-                    )
-                    if v < best:
-                        best = v
-                        best_k = k
-                dp[i][j] = best
-                prev_idx[i][j] = best_k
-
-    # Backtrack.
     boundaries: list[int] = [int(y_top)]
-    if not cand_y:
+    if not cand_lo:
         boundaries.append(int(y_bottom))
     else:
-        last_i = len(cand_y) - 1
-        best_j = min(range(len(dp[last_i])), key=lambda j: dp[last_i][j])
-        if dp[last_i][best_j] >= INF / 2:
+        dp_last, prev_idx = boundary_dp(
+            cand_lo,
+            cand_hi,
+            cand_cost,
+            step=step,
+            min_cell=min_cell,
+            size_lambda=size_lambda,
+            origin=y_top,
+        )
+        if float(np.min(dp_last)) >= INF / 2:
             # Fallback: greedy with a deviation penalty.
             cur = int(y_top)
             for i in range(1, expected_count):
@@ -1146,16 +1105,13 @@ def split_column_into_chars(
                 boundaries.append(int(best_y))
                 cur = int(best_y)
         else:
-            chosen: list[int] = [0] * (len(cand_y))
-            chosen[last_i] = best_j
-            for i in range(last_i, 0, -1):
-                chosen[i - 1] = prev_idx[i][chosen[i]]
+            chosen = backtrack(dp_last, prev_idx)
             for i, j in enumerate(chosen):
                 if j < 0:
                     # Shouldn't happen, but keep things monotonic.
                     boundaries.append(int(min(boundaries[-1] + min_cell, y_bottom - 1)))
                 else:
-                    boundaries.append(int(cand_y[i][j]))
+                    boundaries.append(int(cand_lo[i] + j))
 
         boundaries.append(int(y_bottom))
 
@@ -1188,8 +1144,9 @@ def trim_glyph(
     strict_thr = int(ink_threshold)
     loose_thr = min(255, strict_thr + 35)
 
-    ink_strict = ink_mask(arr, ink_threshold=strict_thr)
-    ink_loose = ink_mask(arr, ink_threshold=loose_thr)
+    planes = InkPlanes.from_rgb(arr)
+    ink_strict = planes.compute(strict_thr)
+    ink_loose = planes.compute(loose_thr)
     h, w = ink_strict.shape
 
     # Reject huge solid blocks (occlusion) inside this context crop.
@@ -1419,13 +1376,14 @@ def render_square(
 
     # 2) Find the main ink bbox, crop tightly around it, then re-scale and center.
     arr8 = np.array(work.convert("RGB"))
+    planes = InkPlanes.from_rgb(arr8)
     strict_thr = 125
-    ink = ink_mask(arr8, ink_threshold=int(strict_thr))
+    ink = planes.compute(int(strict_thr))
     if int(ink.sum()) < 80:
         strict_thr = 155
-        ink = ink_mask(arr8, ink_threshold=int(strict_thr))
+        ink = planes.compute(int(strict_thr))
     loose_thr = min(255, int(strict_thr) + 35)
-    loose_ink = ink_mask(arr8, ink_threshold=int(loose_thr))
+    loose_ink = planes.compute(int(loose_thr))
 
     m = ink.astype(np.uint8)
     num, labels, stats, centroids = cv2.connectedComponentsWithStats(m, connectivity=8)
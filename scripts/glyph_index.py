@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""Glyph feature vectors: a persisted per-dataset store + neighbour search.
+
+`FeatureStore` keeps one matrix per feature kind (float32 unless the caller
+asks for another dtype) next to a dataset's `index.json`:
+
+  <dataset>/.features/<name>.npy    rows = features (memory-mapped on load)
+  <dataset>/.features/<name>.json   {file: {row, mtime_ns, size, sha1}} manifest
+
+(`store_dir` moves both elsewhere, e.g. for datasets under a web root.)
+
+`get(files)` returns rows aligned with `files`, featurizing only files that
+are new or whose content changed (mtime/size first, sha1 when those moved),
+and rewrites the store when anything changed. `put(rows)` stores rows that
+were computed elsewhere (renderers, see render_metrics.py) and `peek(files)`
+reads current rows without featurizing. Dot-directories are left out of
+dataset ZIP exports.
+
+Similarity indexes work on L2-normalized rows (dot product = cosine):
+
+- `ExactIndex`: blocked matmul top-k. Memory is bounded by `max_block_bytes`
+  (one query block x all rows), so 100k x 100k never materializes.
+- `LSHIndex`: random-hyperplane buckets (`tables` x `bits`); candidates that
+  share a bucket are rescored exactly. Approximate, meant for thresholded
+  near-duplicate search (high similarity => high collision probability).
+
+`make_index("auto", F)` picks exact below `AUTO_LSH_MIN_ROWS` rows.
+
+Euclidean helpers for un-normalized features (the frontend char analysis):
+`pairwise_l2` (blocked, exact differences rather than the |a|^2 + |b|^2 - 2ab
+expansion, so tiny distances do not cancel), `l2_order` (stable per-row
+nearest-first order) and `gray_zscore` (S x S z-scored luminance).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+FEATURE_DIR = ".features"
+AUTO_LSH_MIN_ROWS = 20_000
+
+
+class FeatureStore:
+    def __init__(
+        self,
+        root: Path,
+        name: str,
+        *,
+        featurize: Callable[[Path], np.ndarray],
+        dim: int,
+        version: int = 1,
+        dtype: np.dtype | type = np.float32,
+        store_dir: Path | None = None,
+    ):
+        self.root = Path(root)
+        self.store_dir = Path(store_dir) if store_dir is not None else self.root / FEATURE_DIR
+        self.name = str(name)
+        self.featurize = featurize
+        self.dim = int(dim)
+        self.version = int(version)
+        self.dtype = np.dtype(dtype)
+        self.stats = {"reused": 0, "computed": 0}
+
+    @property
+    def npy_path(self) -> Path:
+        return self.store_dir / f"{self.name}.npy"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.store_dir / f"{self.name}.json"
+
+    def _load(self) -> tuple[np.ndarray | None, dict]:
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("version") != self.version or int(manifest.get("dim") or 0) != self.dim:
+                return None, {}
+            arr = np.load(self.npy_path, mmap_mode="r")
+            if arr.ndim != 2 or arr.shape[1] != self.dim or arr.dtype != self.dtype:
+                return None, {}
+            return arr, dict(manifest.get("files") or {})
+        except Exception:
+            return None, {}
+
+    def _signature(self, fn: str, prev: dict | None) -> tuple[dict, bool]:
+        # (manifest entry without row, whether `prev`'s row still matches the file).
+        path = self.root / fn
+        st = path.stat()
+        sig = {"mtime_ns": int(st.st_mtime_ns), "size": int(st.st_size)}
+        if prev is not None and (prev.get("mtime_ns"), prev.get("size")) == (sig["mtime_ns"], sig["size"]):
+            sig["sha1"] = prev.get("sha1")
+            return sig, True
+        # Rewritten (e.g. copied from a build cache) but maybe same bytes.
+        sig["sha1"] = hashlib.sha1(path.read_bytes()).hexdigest()
+        return sig, prev is not None and prev.get("sha1") == sig["sha1"]
+
+    def get(self, files: list[str]) -> np.ndarray:
+        """Feature rows for `files` (relative to root), in the same order."""
+
+        cached, known = self._load()
+        out = np.empty((len(files), self.dim), dtype=self.dtype)
+        manifest: dict[str, dict] = {}
+        changed = cached is None or len(known) != len(files)
+        for i, fn in enumerate(files):
+            path = self.root / fn
+            st = path.stat()
+            sig = {"mtime_ns": int(st.st_mtime_ns), "size": int(st.st_size)}
+            prev = known.get(fn)
+            row = int(prev.get("row", -1)) if (cached is not None and prev is not None) else -1
+            reuse = 0 <= row < (cached.shape[0] if cached is not None else 0)
+            if reuse and (prev.get("mtime_ns"), prev.get("size")) == (sig["mtime_ns"], sig["size"]):
+                sig["sha1"] = prev.get("sha1")
+            else:
+                # Rewritten (e.g. copied from a build cache) but maybe same bytes.
+                sig["sha1"] = hashlib.sha1(path.read_bytes()).hexdigest()
+                reuse = reuse and prev.get("sha1") == sig["sha1"]
+                changed = True
+            if reuse:
+                out[i] = cached[row]
+                self.stats["reused"] += 1
+                changed = changed or row != i
+            else:
+                out[i] = self.featurize(path)
+                self.stats["computed"] += 1
+                changed = True
+            manifest[fn] = {"row": i, **sig}
+        del cached
+        if changed:
+            self._save(out, manifest)
+        return out
+
+    def peek(self, files: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, found) for `files` without featurizing or rewriting the store.
+
+        `found[i]` is False where no current row exists; those rows are zero.
+        """
+
+        cached, known = self._load()
+        out = np.zeros((len(files), self.dim), dtype=self.dtype)
+        found = np.zeros(len(files), dtype=bool)
+        if cached is None:
+            return out, found
+        for i, fn in enumerate(files):
+            prev = known.get(fn)
+            row = int(prev.get("row", -1)) if prev is not None else -1
+            if not 0 <= row < cached.shape[0]:
+                continue
+            try:
+                _sig, same = self._signature(fn, prev)
+            except OSError:
+                continue
+            if same:
+                out[i] = cached[row]
+                found[i] = True
+        return out, found
+
+    def put(self, rows: dict[str, np.ndarray]) -> None:
+        """Store rows computed elsewhere (e.g. at render time) for `rows` files.
+
+        Rows of other files are kept; each new row is signed with its file's
+        current size/mtime/sha1, so write the files first.
+        """
+
+        if not rows:
+            return
+        cached, known = self._load()
+        keep = [
+            (fn, info)
+            for fn, info in known.items()
+            if fn not in rows and cached is not None and 0 <= int(info.get("row", -1)) < cached.shape[0]
+        ]
+        out = np.empty((len(keep) + len(rows), self.dim), dtype=self.dtype)
+        manifest: dict[str, dict] = {}
+        for i, (fn, info) in enumerate(keep):
+            out[i] = cached[int(info["row"])]
+            manifest[fn] = {**info, "row": i}
+        for i, (fn, vec) in enumerate(rows.items(), start=len(keep)):
+            out[i] = np.asarray(vec, dtype=self.dtype).reshape(-1)
+            sig, _same = self._signature(fn, None)
+            manifest[fn] = {"row": i, **sig}
+        del cached
+        self._save(out, manifest)
+
+    def _save(self, arr: np.ndarray, files: dict[str, dict]) -> None:
+        d = self.npy_path.parent
+        d.mkdir(parents=True, exist_ok=True)
+        tmp_npy = d / f".{self.name}.{os.getpid()}.npy.tmp"
+        tmp_json = d / f".{self.name}.{os.getpid()}.json.tmp"
+        with open(tmp_npy, "wb") as f:
+            np.save(f, np.ascontiguousarray(arr, dtype=self.dtype))
+        tmp_json.write_text(
+            json.dumps({"version": self.version, "name": self.name, "dim": self.dim, "files": files}, ensure_ascii=False)
+            + "\n",
+            encoding="utf-8",
+        )
+        # Array first: a manifest never points at rows of an older array
+        # with a different length (rows are bounds-checked on load).
+        tmp_npy.replace(self.npy_path)
+        tmp_json.replace(self.manifest_path)
+
+
+def _block_rows(n: int, max_block_bytes: int) -> int:
+    return max(1, min(max(1, n), int(max_block_bytes) // max(1, 4 * n)))
+
+
+def blocked_topk(
+    queries: np.ndarray,
+    base: np.ndarray,
+    k: int,
+    *,
+    self_offset: int | None = None,
+    max_block_bytes: int = 64 * 1024 * 1024,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k rows of `base` by dot product for each query row.
+
+    Returns (idx, sim), both (len(queries), k), best first; ties keep the
+    lower index. With `self_offset`, query row r is base row `self_offset + r`
+    and is excluded. Missing neighbours are idx -1 / sim -inf.
+    """
+
+    nq, nb = int(queries.shape[0]), int(base.shape[0])
+    k = max(1, int(k))
+    idx = np.full((nq, k), -1, dtype=np.int64)
+    sim = np.full((nq, k), -np.inf, dtype=np.float32)
+    if nq == 0 or nb == 0:
+        return idx, sim
+    bt = np.ascontiguousarray(base, dtype=np.float32).T
+    step = _block_rows(nb, max_block_bytes)
+    kk = min(k, nb)
+    for q0 in range(0, nq, step):
+        q1 = min(nq, q0 + step)
+        s = np.asarray(queries[q0:q1], dtype=np.float32) @ bt
+        if self_offset is not None:
+            rows = np.arange(q1 - q0)
+            cols = rows + int(self_offset) + q0
+            ok = (cols >= 0) & (cols < nb)
+            s[rows[ok], cols[ok]] = -np.inf
+        if kk == 1:
+            j = s.argmax(axis=1)
+            idx[q0:q1, 0] = j
+            sim[q0:q1, 0] = s[np.arange(q1 - q0), j]
+        else:
+            part = np.argpartition(-s, kk - 1, axis=1)[:, :kk]
+            ps = np.take_along_axis(s, part, axis=1)
+            order = np.lexsort((part, -ps), axis=1)
+            idx[q0:q1, :kk] = np.take_along_axis(part, order, axis=1)
+            sim[q0:q1, :kk] = np.take_along_axis(ps, order, axis=1)
+    idx[~np.isfinite(sim)] = -1
+    return idx, sim
+
+
+class ExactIndex:
+    kind = "exact"
+
+    def __init__(self, feats: np.ndarray, *, max_block_bytes: int = 64 * 1024 * 1024):
+        self.feats = np.ascontiguousarray(feats, dtype=np.float32)
+        self.max_block_bytes = int(max_block_bytes)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        return blocked_topk(queries, self.feats, k, max_block_bytes=self.max_block_bytes)
+
+    def neighbours(self, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k other rows for every row (self excluded)."""
+
+        return blocked_topk(self.feats, self.feats, k, self_offset=0, max_block_bytes=self.max_block_bytes)
+
+
+class LSHIndex:
+    """Random-hyperplane LSH; `neighbours()` rescored exactly within buckets.
+
+    Buckets larger than `max_bucket` (e.g. many blank crops) are searched
+    with `blocked_topk` among their members instead of pairwise.
+    """
+
+    kind = "lsh"
+
+    def __init__(
+        self,
+        feats: np.ndarray,
+        *,
+        tables: int = 8,
+        bits: int = 16,
+        seed: int = 0,
+        max_bucket: int = 64,
+        max_block_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.feats = np.ascontiguousarray(feats, dtype=np.float32)
+        self.tables = max(1, int(tables))
+        self.bits = max(1, min(62, int(bits)))
+        self.max_bucket = max(2, int(max_bucket))
+        self.max_block_bytes = int(max_block_bytes)
+        rng = np.random.default_rng(int(seed))
+        self.planes = rng.standard_normal((self.feats.shape[1], self.tables * self.bits)).astype(np.float32)
+        self.keys = self._hash(self.feats)
+
+    def _hash(self, x: np.ndarray) -> np.ndarray:
+        n = int(x.shape[0])
+        keys = np.empty((n, self.tables), dtype=np.int64)
+        weights = (np.int64(1) << np.arange(self.bits, dtype=np.int64))
+        step = _block_rows(self.planes.shape[1], self.max_block_bytes)
+        for r0 in range(0, n, step):
+            bits = (np.asarray(x[r0 : r0 + step], dtype=np.float32) @ self.planes) > 0
+            bits = bits.reshape(-1, self.tables, self.bits)
+            keys[r0 : r0 + step] = (bits.astype(np.int64) * weights).sum(axis=2)
+        return keys
+
+    def neighbours(self, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Best candidate per row (k=1; larger k is not supported)."""
+
+        if int(k) != 1:
+            raise ValueError("LSHIndex.neighbours supports k=1 only")
+        n = int(self.feats.shape[0])
+        best_j = np.full(n, -1, dtype=np.int64)
+        best_s = np.full(n, -np.inf, dtype=np.float32)
+
+        def offer(a: np.ndarray, b: np.ndarray, s: np.ndarray) -> None:
+            # Keep the best (highest sim, then lowest j) per source row.
+            order = np.lexsort((b, -s, a))
+            a, b, s = a[order], b[order], s[order]
+            first = np.ones(a.shape[0], dtype=bool)
+            first[1:] = a[1:] != a[:-1]
+            a, b, s = a[first], b[first], s[first]
+            better = (s > best_s[a]) | ((s == best_s[a]) & ((best_j[a] < 0) | (b < best_j[a])))
+            best_j[a[better]] = b[better]
+            best_s[a[better]] = s[better]
+
+        for t in range(self.tables):
+            key = self.keys[:, t]
+            order = np.argsort(key, kind="stable")
+            sk = key[order]
+            starts = np.flatnonzero(np.r_[True, sk[1:] != sk[:-1]])
+            sizes = np.diff(np.r_[starts, n])
+
+            # Small buckets: compare each member with the next d members.
+            small = np.repeat(sizes <= self.max_bucket, sizes)
+            for d in range(1, int(min(self.max_bucket, sizes.max(initial=1)))):
+                same = (sk[d:] == sk[:-d]) & small[d:] & small[:-d]
+                if not same.any():
+                    break
+                a = order[:-d][same]
+                b = order[d:][same]
+                for p0 in range(0, a.shape[0], 65536):
+                    pa, pb = a[p0 : p0 + 65536], b[p0 : p0 + 65536]
+                    s = np.einsum("ij,ij->i", self.feats[pa], self.feats[pb])
+                    offer(np.r_[pa, pb], np.r_[pb, pa], np.r_[s, s])
+
+            # Large buckets: exact top-1 among members.
+            for st, sz in zip(starts[sizes > self.max_bucket], sizes[sizes > self.max_bucket]):
+                members = np.sort(order[st : st + sz])
+                sub = self.feats[members]
+                j, s = blocked_topk(sub, sub, 1, self_offset=0, max_block_bytes=self.max_block_bytes)
+                ok = j[:, 0] >= 0
+                offer(members[ok], members[j[ok, 0]], s[ok, 0])
+
+        return best_j[:, None], best_s[:, None]
+
+
+def make_index(kind: str, feats: np.ndarray, **kw) -> ExactIndex | LSHIndex:
+    kind = str(kind or "auto")
+    if kind == "auto":
+        kind = "lsh" if int(feats.shape[0]) >= AUTO_LSH_MIN_ROWS else "exact"
+    if kind == "exact":
+        return ExactIndex(feats, **{k: v for k, v in kw.items() if k == "max_block_bytes"})
+    if kind == "lsh":
+        return LSHIndex(feats, **kw)
+    raise ValueError(f"unknown index kind: {kind}")
+
+
+def gray_zscore(path: Path, size: int = 24) -> np.ndarray:
+    """`size` x `size` BILINEAR luminance in [0, 1], z-scored (float64).
+
+    Mean/variance are summed left to right like the original per-pixel
+    Python loop, so stored features are bit-identical to it.
+    """
+
+    from PIL import Image
+
+    im = Image.open(path).convert("RGB").resize((int(size), int(size)), Image.Resampling.BILINEAR)
+    rgb = np.asarray(im, dtype=np.float64).reshape(-1, 3)
+    v = (0.299 * rgb[:, 0] + 0.587 * rgb[:, 1] + 0.114 * rgb[:, 2]) / 255.0
+    n = int(v.shape[0])
+    mean = sum(v.tolist()) / n
+    std = math.sqrt(sum(((v - mean) ** 2).tolist()) / n) or 1.0
+    return (v - mean) / std
+
+
+def pairwise_l2(
+    a: np.ndarray,
+    b: np.ndarray | None = None,
+    *,
+    max_block_bytes: int = 64 * 1024 * 1024,
+) -> np.ndarray:
+    """Euclidean distance matrix (len(a), len(b)) in float64; `b` defaults to `a`."""
+
+    a = np.asarray(a, dtype=np.float64)
+    b = a if b is None else np.asarray(b, dtype=np.float64)
+    na, nb = int(a.shape[0]), int(b.shape[0])
+    out = np.empty((na, nb), dtype=np.float64)
+    if na == 0 or nb == 0:
+        return out
+    # One block holds (rows x nb x dim) float64 differences.
+    step = _block_rows(nb * int(a.shape[1]) * 2, max_block_bytes)
+    for r0 in range(0, na, step):
+        d = a[r0 : r0 + step, None, :] - b[None, :, :]
+        out[r0 : r0 + step] = np.sqrt(np.einsum("ijk,ijk->ij", d, d))
+    return out
+
+
+def l2_order(dist: np.ndarray, k: int | None = None) -> np.ndarray:
+    """Column indices per row, nearest first; ties keep the lower index."""
+
+    order = np.argsort(dist, axis=1, kind="stable")
+    return order if k is None else order[:, : max(0, int(k))]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Grid boundary search shared by the workbench layout scripts.
+
+`split_axis` places `expected_count - 1` cuts along a 1D ink projection so that
+cuts land in low-ink valleys while cell sizes stay close to the expected step.
+It used to be copy-pasted (as a pure-Python triple loop) into:
+
+- `scripts/workbench_build_dataset.py`
+- `scripts/workbench_preview_page.py`
+- `scripts/ml_build_detection_sequence.py`
+- `scripts/ml_refine_crops_with_detector.py`
+
+and `split_column_into_chars` in `scripts/extract_lantingjixu_chars.py` runs the
+same DP with its own candidate windows and weights.
+
+The DP here is vectorized per boundary: each transition is a
+(candidates_i x candidates_{i-1}) NumPy matrix instead of a Python loop, using
+the same float64 operation order and first-minimum tie breaking, so the chosen
+boundaries are identical to the old implementation (see
+`scripts/bench_grid_layout.py` for the parity check + micro-benchmark).
+
+scripts/ isn't a Python package; the scripts above run with scripts/ on
+sys.path, so `from grid_layout import split_axis` works directly.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+
+# Sentinel used by the DP for "no valid transition". Kept identical to the
+# previous implementation (not np.inf) so INF-chains resolve the same way.
+INF = 1e18
+
+# Default weights for the workbench grid layout.
+DEV_LAMBDA = 0.55
+SIZE_LAMBDA = 0.90
+
+
+def boundary_dp(
+    cand_lo: list[int],
+    cand_hi: list[int],
+    cand_cost: list[np.ndarray],
+    *,
+    step: float,
+    min_cell: int,
+    size_lambda: float,
+    origin: int = 0,
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Run the boundary DP over contiguous candidate windows.
+
+    Boundary i may be placed at any y in `range(cand_lo[i], cand_hi[i])` with
+    unary cost `cand_cost[i]` (float64, shape (hi-lo,)). Transitions require
+    `y - y_prev >= min_cell` and pay `size_lambda * (cell - 1)^2` where
+    `cell = (y - y_prev) / step`. The first boundary measures its cell from
+    `origin`.
+
+    Returns:
+      - dp of the last boundary, shape (W_last,)
+      - prev index arrays per boundary (prev[0] is all -1); -1 marks "no valid
+        predecessor", matching the legacy list-of-lists DP.
+    """
+
+    denom = max(1.0, float(step))
+    ys0 = np.arange(int(cand_lo[0]), int(cand_hi[0]), dtype=np.float64)
+    cell0 = (ys0 - float(origin)) / denom
+    dp = cand_cost[0] + size_lambda * (cell0 - 1.0) * (cell0 - 1.0)
+    prev: list[np.ndarray] = [np.full(dp.shape[0], -1, dtype=np.int64)]
+
+    ys_prev = ys0
+    for i in range(1, len(cand_lo)):
+        ys = np.arange(int(cand_lo[i]), int(cand_hi[i]), dtype=np.float64)
+        diff = ys[:, None] - ys_prev[None, :]
+        cell = diff / denom
+        # Same association order as the scalar loop:
+        # (dp[k] + cost[j]) + size_lambda * (cell - 1) * (cell - 1)
+        v = (dp[None, :] + cand_cost[i][:, None]) + size_lambda * (cell - 1.0) * (cell - 1.0)
+        v = np.where(diff >= float(min_cell), v, INF)
+
+        best_k = np.argmin(v, axis=1)
+        best = v[np.arange(v.shape[0]), best_k]
+        ok = best < INF
+        dp = np.where(ok, best, INF)
+        prev.append(np.where(ok, best_k, -1).astype(np.int64))
+        ys_prev = ys
+
+    return dp, prev
+
+
+def backtrack(dp_last: np.ndarray, prev: list[np.ndarray]) -> list[int]:
+    """Pick the best final candidate and walk `prev` back to boundary 0.
+
+    Negative indices are resolved Python-style (from the end), exactly like the
+    legacy list indexing did.
+    """
+
+    last_i = len(prev) - 1
+    chosen = [0] * len(prev)
+    chosen[last_i] = int(np.argmin(dp_last))
+    for i in range(last_i, 0, -1):
+        chosen[i - 1] = int(prev[i][chosen[i]])
+    return chosen
+
+
+def split_axis(
+    proj: Any,
+    expected_count: int,
+    *,
+    dev_lambda: float = DEV_LAMBDA,
+    size_lambda: float = SIZE_LAMBDA,
+) -> list[int]:
+    """Return boundaries (len expected_count+1) from 0..len(proj)."""
+
+    n = int(proj.shape[0])
+    if expected_count <= 0:
+        return [0, n]
+    if expected_count == 1:
+        return [0, n]
+
+    step = n / float(expected_count)
+    min_cell = max(12, int(round(step * 0.35)))
+    win = max(10, int(round(step * 0.60)))
+
+    proj = np.asarray(proj).astype("float32")
+    proj_max = float(max(1.0, float(proj.max())))
+    proj64 = proj.astype(np.float64)
+    denom = max(1.0, float(step))
+
+    cand_lo: list[int] = []
+    cand_hi: list[int] = []
+    cand_cost: list[np.ndarray] = []
+    for i in range(1, expected_count):
+        remaining = expected_count - i
+        y_expect = int(round(step * i))
+        lo = int(max(min_cell, y_expect - win))
+        hi = int(min(n - remaining * min_cell, y_expect + win))
+        if hi <= lo:
+            lo = int(max(min_cell, min(y_expect, n - remaining * min_cell - 1)))
+            hi = lo + 1
+        ys = np.arange(lo, hi, dtype=np.float64)
+        dev = (ys - float(y_expect)) / denom
+        cand_lo.append(lo)
+        cand_hi.append(hi)
+        cand_cost.append(proj64[lo:hi] / proj_max + dev_lambda * dev * dev)
+
+    dp_last, prev = boundary_dp(
+        cand_lo,
+        cand_hi,
+        cand_cost,
+        step=step,
+        min_cell=min_cell,
+        size_lambda=size_lambda,
+    )
+    chosen = backtrack(dp_last, prev)
+
+    boundaries = [0]
+    for i, j in enumerate(chosen):
+        width = cand_hi[i] - cand_lo[i]
+        boundaries.append(int(cand_lo[i] + (j % width)))
+    boundaries.append(n)
+    return boundaries
+
+
+def split_ink_grid(
+    ink: np.ndarray,
+    *,
+    direction: str,
+    cols: int,
+    rows: int,
+) -> dict:
+    """Adaptive grid layout for one page ink mask.
+
+    Returns the same keys the workbench stores in `pages.json` layouts:
+    - vertical_rtl: `col_bounds` + `row_bounds_by_col`
+    - horizontal_ltr: `row_bounds` + `col_bounds_by_row`
+    """
+
+    if direction == "vertical_rtl":
+        x_bounds = split_axis(ink.sum(axis=0).astype("float32"), cols)
+        y_bounds_by_col: list[list[int]] = []
+        for col in range(cols):
+            cx0 = int(x_bounds[col])
+            cx1 = int(x_bounds[col + 1])
+            y_bounds_by_col.append(split_axis(ink[:, cx0:cx1].sum(axis=1).astype("float32"), rows))
+        return {"col_bounds": x_bounds, "row_bounds_by_col": y_bounds_by_col}
+
+    y_bounds = split_axis(ink.sum(axis=1).astype("float32"), rows)
+    x_bounds_by_row: list[list[int]] = []
+    for row in range(rows):
+        ry0 = int(y_bounds[row])
+        ry1 = int(y_bounds[row + 1])
+        x_bounds_by_row.append(split_axis(ink[ry0:ry1, :].sum(axis=0).astype("float32"), cols))
+    return {"row_bounds": y_bounds, "col_bounds_by_row": x_bounds_by_row}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Integer ink-mask engine shared by the extraction, layout and QA scripts.
+
+The historical definition (kept bit-for-bit):
+
+  gray = 0.299 * R + 0.587 * G + 0.114 * B          (float32)
+  seal = (R > 120) & (R - G > 40) & (R - B > 40) & (gray > 82)
+  ink  = (gray < threshold) & ~seal
+
+Here luminance is computed once per image in fixed point,
+`Y = 299 R + 587 G + 114 B` (exact int32), and stored as
+`gray8 = Y // 1000` (uint8). For an integer threshold `t`,
+`gray < t  <=>  Y < 1000 t  <=>  gray8 < t`, and `gray > 82 <=> Y > 82000`,
+so masks are identical to the float formula for every RGB value
+(`scripts/bench_ink_engine.py --exhaustive` checks all 2^24 colors).
+
+`InkPlanes` keeps `level` (gray8 with seal pixels forced to 255) and the seal
+mask for one image, so a mask for any threshold <= 255 is a single uint8
+compare, `level < t`. Crops are slices of the page planes (ink masks are
+pixel-wise):
+
+  planes = InkPlanes.from_rgb(np.asarray(page))
+  strict, loose = planes.mask(125), planes.mask(160)
+  crop = planes.crop((x0, y0, x1, y1)).mask(125)
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+
+SEAL_MIN_Y = 82 * 1000
+
+
+def luminance(arr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return (level, seal) for an RGB uint8 array (see module docstring)."""
+
+    shape = arr.shape[:2]
+    # Channel planes as contiguous rows: every op below streams memory.
+    r, g, b = np.ascontiguousarray(arr.reshape(-1, 3).T)
+    y = np.multiply(r, 299, dtype=np.int32)
+    y += np.multiply(g, 587, dtype=np.int32)
+    y += np.multiply(b, 114, dtype=np.int32)
+
+    # Seal heuristic: keep *dark* red pixels (ink under seal), only suppress
+    # seal-like reds. `R - G > 40` is `R - 40 > G` in uint8 (wraps only when
+    # R <= 40, where `R > 120` is already false).
+    r40 = r - np.uint8(40)
+    seal = r > 120
+    seal &= r40 > g
+    seal &= r40 > b
+    seal &= y > SEAL_MIN_Y
+
+    y //= 1000
+    level = y.astype(np.uint8)
+    level[seal] = 255
+    return level.reshape(shape), seal.reshape(shape)
+
+
+class InkPlanes:
+    """Level + seal planes of one image, with per-threshold mask cache."""
+
+    __slots__ = ("level", "seal", "_masks")
+
+    def __init__(self, level: np.ndarray, seal: np.ndarray):
+        self.level = level
+        self.seal = seal
+        self._masks: dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_rgb(cls, arr: np.ndarray) -> "InkPlanes":
+        level, seal = luminance(arr)
+        return cls(level, seal)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (int(self.level.shape[0]), int(self.level.shape[1]))
+
+    def nbytes(self) -> int:
+        return int(self.level.nbytes) + int(self.seal.nbytes) + sum(int(m.nbytes) for m in self._masks.values())
+
+    def compute(self, threshold: int) -> np.ndarray:
+        """Fresh (writable, uncached) mask for `threshold`."""
+
+        t = int(threshold)
+        if t > 255:
+            return ~self.seal
+        if t <= 0:
+            return np.zeros(self.shape, dtype=bool)
+        return self.level < np.uint8(t)
+
+    def mask(self, threshold: int) -> np.ndarray:
+        """Cached mask for `threshold` (read-only; shared between callers)."""
+
+        t = int(threshold)
+        m = self._masks.get(t)
+        if m is None:
+            m = self.compute(t)
+            m.flags.writeable = False
+            self._masks[t] = m
+        return m
+
+    def thresholds(self) -> list[int]:
+        return list(self._masks)
+
+    def masks(self, thresholds: Iterable[int]) -> dict[int, np.ndarray]:
+        return {int(t): self.mask(int(t)) for t in thresholds}
+
+    def crop(self, box: tuple[int, int, int, int] | list[int]) -> "InkPlanes":
+        """Planes of `PIL.Image.crop(box)`; out-of-image area is black (ink)."""
+
+        x0, y0, x1, y1 = (int(box[0]), int(box[1]), int(box[2]), int(box[3]))
+        h, w = self.shape
+        if 0 <= x0 <= x1 <= w and 0 <= y0 <= y1 <= h:
+            return InkPlanes(self.level[y0:y1, x0:x1], self.seal[y0:y1, x0:x1])
+        level = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=np.uint8)
+        seal = np.zeros(level.shape, dtype=bool)
+        sx0, sy0, sx1, sy1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+        if sx1 > sx0 and sy1 > sy0:
+            level[sy0 - y0 : sy1 - y0, sx0 - x0 : sx1 - x0] = self.level[sy0:sy1, sx0:sx1]
+            seal[sy0 - y0 : sy1 - y0, sx0 - x0 : sx1 - x0] = self.seal[sy0:sy1, sx0:sx1]
+        return InkPlanes(level, seal)
+
+
+def ink_mask(arr: np.ndarray, ink_threshold: int) -> np.ndarray:
+    """Boolean ink mask of an RGB uint8 array (see module docstring)."""
+
+    return InkPlanes.from_rgb(arr).compute(int(ink_threshold))
+
+
+def ink_masks(arr: np.ndarray, thresholds: Iterable[int]) -> dict[int, np.ndarray]:
+    """Masks for several thresholds from a single luminance pass."""
+
+    planes = InkPlanes.from_rgb(arr)
+    return {int(t): planes.compute(int(t)) for t in thresholds}
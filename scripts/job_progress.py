@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Job progress reporting for scripts launched by the workbench backend.
+
+When the backend runs a script it sets `INKGRID_JOB_PROGRESS=stdout` and owns
+the job JSON (in-memory store, coalesced atomic flushes). In that mode
+`update_job` prints one machine-readable line that the backend parses instead
+of rewriting the job file from the child.
+
+Standalone runs (`--job-file` without the env var) still update the job JSON
+directly, via write-temp-then-rename so readers never see a torn file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+# Keep in sync with backend/app/services/workbench_service.py.
+PROGRESS_PREFIX = "@@inkgrid-job "
+PROGRESS_ENV = "INKGRID_JOB_PROGRESS"
+
+
+def update_job(job_file: Path | None, *, stage: str, progress: int, note: str | None = None) -> None:
+    if not job_file:
+        return
+
+    if os.environ.get(PROGRESS_ENV) == "stdout":
+        msg: dict = {"stage": str(stage), "progress": int(progress)}
+        if note:
+            msg["note"] = str(note)
+        print(PROGRESS_PREFIX + json.dumps(msg, ensure_ascii=False), flush=True)
+        return
+
+    try:
+        cur = json.loads(job_file.read_text(encoding="utf-8"))
+    except Exception:
+        return
+    cur["status"] = "running"
+    cur["stage"] = str(stage)
+    cur["progress"] = int(progress)
+    cur["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    if note:
+        cur["log_tail"] = (str(cur.get("log_tail") or "") + "\n" + str(note)).strip()[-6000:]
+    tmp = job_file.with_name(f".{job_file.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(cur, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, job_file)
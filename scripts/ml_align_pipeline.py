@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+"""Run the workbench `ml_align_and_split` stages in one process.
+
+Stages (same scripts, same outputs as running them one by one):
+
+  detect   -> scripts/ml_yolo_predict_pages.py
+  sequence -> scripts/ml_build_detection_sequence.py
+  classify -> scripts/ml_yolo_classify_detections.py (optional)
+  align    -> scripts/ml_align_sequence.py
+  build    -> scripts/ml_split_and_build_dataset.py
+  qa       -> scripts/qa_char_crops.py (failures are reported, not fatal)
+
+All image stages share one `page_cache.PageCache`, so each page is decoded
+once per job and each ink-mask threshold is computed once per page.
+
+Writes a timing report (per-stage seconds + cache counters) to
+`--timings-out` (default: <out-dir>/pipeline_timings.json).
+
+Example:
+
+  python3 scripts/ml_align_pipeline.py \
+    --detector-model runs/detect/train/weights/best.pt \
+    --stele-dir <project> --pages-dir <project>/pages_raw \
+    --stele-slug demo --exports-dir <project>/workbench/ml/exports --tag run1 \
+    --out-dir <project>/datasets/ml_v1 --direction vertical_rtl --cols 8 --rows 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from job_progress import update_job
+from page_cache import PageCache
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--detector-model", required=True)
+    ap.add_argument("--classifier-model", default="")
+    ap.add_argument("--classes-json", default="")
+    ap.add_argument("--stele-dir", required=True, help="workbench project dir (reads workbench/pages.json)")
+    ap.add_argument("--pages-dir", required=True)
+    ap.add_argument("--stele-slug", required=True)
+    ap.add_argument("--glob", default="page_*.{jpg,jpeg,png,webp}")
+    ap.add_argument("--text", default="", help="full text for alignment")
+    ap.add_argument("--align-band", type=int, default=0, help="DP band half-width for alignment (0 = full)")
+    ap.add_argument(
+        "--align-anchored",
+        action="store_true",
+        help="anchor alignment on confident classifier hits and align the gaps in parallel",
+    )
+    ap.add_argument("--exports-dir", required=True, help="where dets/seq/preds/aligned JSON go")
+    ap.add_argument("--tag", required=True, help="suffix for export file names")
+    ap.add_argument("--out-dir", required=True)
+    ap.add_argument("--direction", required=True, choices=["vertical_rtl", "horizontal_ltr"])
+    ap.add_argument("--cols", type=int, required=True)
+    ap.add_argument("--rows", type=int, required=True)
+    ap.add_argument("--qa-top", type=int, default=120)
+    ap.add_argument("--skip-qa", action="store_true")
+    ap.add_argument("--cache-mb", type=int, default=2048, help="page/ink-mask cache budget")
+    ap.add_argument("--timings-out", default=None)
+    ap.add_argument("--job-file", default=None)
+    args = ap.parse_args(argv)
+
+    job_file = Path(args.job_file).resolve() if args.job_file else None
+    pages_dir = Path(args.pages_dir).resolve()
+    out_dir = Path(args.out_dir).resolve()
+    exports_dir = Path(args.exports_dir).resolve()
+    exports_dir.mkdir(parents=True, exist_ok=True)
+    tag = str(args.tag)
+    dets_path = exports_dir / f"dets_{tag}.json"
+    seq_path = exports_dir / f"seq_{tag}.json"
+    preds_path = exports_dir / f"preds_{tag}.json"
+    aligned_path = exports_dir / f"aligned_{tag}.json"
+    timings_path = Path(args.timings_out).resolve() if args.timings_out else out_dir / "pipeline_timings.json"
+
+    pages = PageCache(pages_dir, max_bytes=int(args.cache_mb) * 1024 * 1024)
+    stages: list[dict] = []
+    t_start = time.perf_counter()
+
+    def run(name: str, job_stage: str, progress: int, entry, stage_argv: list[str], **kw) -> None:
+        update_job(job_file, stage=job_stage, progress=progress)
+        t0 = time.perf_counter()
+        decodes0 = pages.stats["decodes"]
+        masks0 = pages.stats["mask_computes"]
+        rc = entry(stage_argv, **kw)
+        stages.append(
+            {
+                "stage": name,
+                "seconds": round(time.perf_counter() - t0, 3),
+                "page_decodes": pages.stats["decodes"] - decodes0,
+                "mask_computes": pages.stats["mask_computes"] - masks0,
+            }
+        )
+        if rc:
+            raise SystemExit(f"stage {name} failed rc={rc}")
+
+    import ml_align_sequence
+    import ml_build_detection_sequence
+    import ml_split_and_build_dataset
+    import ml_yolo_classify_detections
+    import ml_yolo_predict_pages
+    import qa_char_crops
+
+    run(
+        "detect",
+        "align_predict",
+        10,
+        ml_yolo_predict_pages.main,
+        ["--model", args.detector_model, "--pages-dir", str(pages_dir), "--glob", args.glob, "--out", str(dets_path)],
+        pages=pages,
+    )
+    run(
+        "sequence",
+        "align_sequence",
+        25,
+        ml_build_detection_sequence.main,
+        [
+            "--stele-dir", str(Path(args.stele_dir).resolve()),
+            "--pages-dir", str(pages_dir),
+            "--detections-json", str(dets_path),
+            "--out", str(seq_path),
+            "--direction", args.direction,
+            "--cols", str(int(args.cols)),
+            "--rows", str(int(args.rows)),
+        ],
+        pages=pages,
+    )
+
+    pred_arg: list[str] = []
+    if args.classifier_model and args.classes_json:
+        run(
+            "classify",
+            "align_classify",
+            40,
+            ml_yolo_classify_detections.main,
+            [
+                "--model", args.classifier_model,
+                "--detections-seq", str(seq_path),
+                "--stele-dir", str(pages_dir),
+                "--classes-json", args.classes_json,
+                "--out", str(preds_path),
+            ],
+            pages=pages,
+        )
+        pred_arg = ["--pred-json", str(preds_path)]
+        if args.align_anchored:
+            pred_arg += ["--anchored"]
+
+    run(
+        "align",
+        "align_dp",
+        60,
+        ml_align_sequence.main,
+        [
+            "--text", args.text,
+            "--detections-json", str(seq_path),
+            "--out", str(aligned_path),
+            "--band", str(int(args.align_band)),
+        ]
+        + pred_arg,
+    )
+    run(
+        "build",
+        "align_build",
+        78,
+        ml_split_and_build_dataset.main,
+        [
+            "--stele-dir", str(pages_dir),
+            "--stele-slug", args.stele_slug,
+            "--detections-seq", str(seq_path),
+            "--alignment-json", str(aligned_path),
+            "--out-dir", str(out_dir),
+            "--direction", args.direction,
+        ],
+        pages=pages,
+    )
+
+    if not args.skip_qa:
+        try:
+            run(
+                "qa",
+                "qa",
+                90,
+                qa_char_crops.main,
+                ["--dataset-dir", str(out_dir), "--source-dir", str(pages_dir), "--top", str(int(args.qa_top))],
+                pages=pages,
+            )
+        except (Exception, SystemExit) as e:
+            print(f"QA failed (ignored): {e}", file=sys.stderr)
+
+    report = {
+        "total_seconds": round(time.perf_counter() - t_start, 3),
+        "stages": stages,
+        "page_cache": pages.report(),
+        "exports": {
+            "dets": str(dets_path),
+            "seq": str(seq_path),
+            "preds": str(preds_path) if pred_arg else None,
+            "aligned": str(aligned_path),
+        },
+    }
+    timings_path.parent.mkdir(parents=True, exist_ok=True)
+    timings_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(
+        "timings: "
+        + " ".join(f"{s['stage']}={s['seconds']:.2f}s" for s in stages)
+        + f" decodes={pages.stats['decodes']} out={timings_path}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
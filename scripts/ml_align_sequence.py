@@ -22,27 +22,34 @@ Input JSON format (detections-json):
 
 Output:
 
-{ "aligned": [ { "id": "...", "text": "字" or "两个", "text_index": i }, ... ] }
+{ "aligned": [ { "id": "...", "text": "字" or "两个", "text_index": i }, ... ],
+  "stats": { "seconds": ..., "cells": ..., "traceback_mb": ..., "peak_rss_mb": ... } }
+
+The DP itself lives in `scripts/seq_align.py` (NumPy rows + int8 traceback).
+`--band W` only evaluates cells within W columns of the diagonal; for long
+texts this bounds time and memory to O(n * W).
+
+`--anchored` (with `--pred-json`) first fixes confident anchors: detections
+whose top-1 prediction (p >= `--anchor-min-p`) is a rare char of the text,
+claimed by exactly as many confident detections as it occurs (paired in
+reading order) and not far off the line through neighbouring anchors.
+The gaps between anchors are aligned independently on `--workers` processes
+and stitched back; an anchor is dropped when the window around it aligns
+cheaper without it. The output format is unchanged, `stats` adds
+anchor/segment counts.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
-import math
-from dataclasses import dataclass
+import os
 from pathlib import Path
 
+from seq_align import ANCHOR_MIN_P, AlignCosts, align, align_anchored
 
-@dataclass(frozen=True)
-class Step:
-    op: str
-    i: int
-    j: int
-    take: int
 
-
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--text", required=True, help="Gold transcription (no spaces)")
     ap.add_argument("--detections-json", required=True)
@@ -54,7 +61,20 @@ def main() -> int:
     ap.add_argument("--cls-topk", type=int, default=5)
     ap.add_argument("--cls-miss-pen", type=float, default=1.4)
     ap.add_argument("--cls-weight", type=float, default=0.7)
-    args = ap.parse_args()
+    ap.add_argument(
+        "--band",
+        type=int,
+        default=0,
+        help="Half-width of the DP band around the diagonal (0 = full DP, exact)",
+    )
+    ap.add_argument(
+        "--anchored",
+        action="store_true",
+        help="Force confident unique classifier hits to match and align the gaps in parallel (needs --pred-json)",
+    )
+    ap.add_argument("--anchor-min-p", type=float, default=ANCHOR_MIN_P, help="Top-1 probability for an anchor")
+    ap.add_argument("--workers", type=int, default=0, help="Segment processes for --anchored (0 = all CPUs)")
+    args = ap.parse_args(argv)
 
     text = str(args.text).strip()
     det_path = Path(args.detections_json)
@@ -72,7 +92,6 @@ def main() -> int:
         s = float(d.get("score") or 0.0)
         scores.append(max(1e-6, min(1.0, s)))
     n = len(ids)
-    m = len(text)
 
     preds: dict[str, list[tuple[str, float]]] = {}
     if args.pred_json:
@@ -102,116 +121,35 @@ def main() -> int:
                 if out:
                     preds[str(k)] = out
 
-    # DP: dp[i][j] best (min) cost for first i dets aligned to first j chars.
-    INF = 1e18
-    dp = [[INF] * (m + 1) for _ in range(n + 1)]
-    prev: list[list[Step | None]] = [[None] * (m + 1) for _ in range(n + 1)]
-    dp[0][0] = 0.0
-
-    skip_det_pen = float(args.skip_det_pen)
-    skip_char_pen = float(args.skip_char_pen)
-    match2_pen = float(args.match2_pen)
-    cls_miss_pen = float(args.cls_miss_pen)
-    cls_weight = float(args.cls_weight)
-
-    def match_cost(i: int) -> float:
-        # Prefer high-score detections.
-        return -math.log(scores[i])
-
-    def cls_penalty(det_id: str, gold: str) -> float:
-        if not preds:
-            return 0.0
-        cand = preds.get(det_id)
-        if not cand:
-            return 0.0
-        for ch, p in cand:
-            if ch == gold:
-                # Lower penalty when classifier is confident.
-                return cls_weight * (-math.log(max(1e-6, min(1.0, float(p)))))
-        return cls_miss_pen
-
-    for i in range(n + 1):
-        for j in range(m + 1):
-            cur = dp[i][j]
-            if cur >= INF:
-                continue
-            # skip detection
-            if i < n:
-                # skipping a high-confidence det should cost more
-                v = cur + skip_det_pen + 0.25 * match_cost(i)
-                if v < dp[i + 1][j]:
-                    dp[i + 1][j] = v
-                    prev[i + 1][j] = Step("skip_det", i, j, 0)
-
-            # skip char (missing)
-            if j < m:
-                v = cur + skip_char_pen
-                if v < dp[i][j + 1]:
-                    dp[i][j + 1] = v
-                    prev[i][j + 1] = Step("skip_char", i, j, 0)
-
-            # match 1
-            if i < n and j < m:
-                v = cur + match_cost(i) + cls_penalty(ids[i], text[j])
-                if v < dp[i + 1][j + 1]:
-                    dp[i + 1][j + 1] = v
-                    prev[i + 1][j + 1] = Step("match1", i, j, 1)
-
-            # match 2 (merged bbox)
-            if i < n and j + 1 < m:
-                v = (
-                    cur
-                    + match_cost(i)
-                    + match2_pen
-                    + cls_penalty(ids[i], text[j])
-                    + cls_penalty(ids[i], text[j + 1])
-                )
-                if v < dp[i + 1][j + 2]:
-                    dp[i + 1][j + 2] = v
-                    prev[i + 1][j + 2] = Step("match2", i, j, 2)
-
-    # Pick best end state: allow some trailing skips.
-    best_j = min(range(m + 1), key=lambda jj: dp[n][jj])
-    i, j = n, best_j
-    steps: list[Step] = []
-    while i > 0 or j > 0:
-        st = prev[i][j]
-        if st is None:
-            break
-        steps.append(st)
-        if st.op == "skip_det":
-            i = st.i
-            j = st.j
-        elif st.op == "skip_char":
-            i = st.i
-            j = st.j
-        else:
-            i = st.i
-            j = st.j
-    steps.reverse()
+    costs = AlignCosts(
+        skip_det_pen=float(args.skip_det_pen),
+        skip_char_pen=float(args.skip_char_pen),
+        match2_pen=float(args.match2_pen),
+        cls_miss_pen=float(args.cls_miss_pen),
+        cls_weight=float(args.cls_weight),
+    )
+    if args.anchored:
+        workers = int(args.workers) if int(args.workers) > 0 else (os.cpu_count() or 1)
+        res = align_anchored(
+            scores,
+            ids,
+            text,
+            preds,
+            costs,
+            band=int(args.band),
+            min_p=float(args.anchor_min_p),
+            workers=workers,
+        )
+    else:
+        res = align(scores, ids, text, preds, costs, band=int(args.band))
 
     aligned: list[dict] = []
-    ti = 0
-    di = 0
-    for st in steps:
-        if st.op == "skip_det":
-            di += 1
-            continue
-        if st.op == "skip_char":
-            ti += 1
-            continue
-        if st.op == "match1":
-            ch = text[ti]
-            aligned.append({"id": ids[di], "text": ch, "text_index": ti, "take": 1, "score": scores[di]})
-            di += 1
-            ti += 1
-            continue
-        if st.op == "match2":
-            ch2 = text[ti : ti + 2]
-            aligned.append({"id": ids[di], "text": ch2, "text_index": ti, "take": 2, "score": scores[di]})
-            di += 1
-            ti += 2
-            continue
+    for op, di, ti in res.matches:
+        take = 2 if op == "match2" else 1
+        aligned.append(
+            {"id": ids[di], "text": text[ti : ti + take], "text_index": ti, "take": take, "score": scores[di]}
+        )
+    best_j = res.best_j
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -220,11 +158,21 @@ def main() -> int:
         "det_len": n,
         "aligned_len": len(aligned),
         "best_end_text_index": best_j,
-        "cost": dp[n][best_j],
+        "cost": res.cost,
+        "stats": res.stats,
         "aligned": aligned,
     }
     out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    print(f"done aligned={len(aligned)} out={out_path}")
+    if args.anchored:
+        print(
+            f"anchors={res.stats['anchors']} dropped={res.stats['anchors_dropped']} segments={res.stats['segments']} "
+            f"max_segment={res.stats.get('max_segment', len(text))} workers={res.stats['workers']}"
+        )
+    print(
+        f"done aligned={len(aligned)} out={out_path} "
+        f"align={res.stats['seconds']:.2f}s traceback={res.stats['traceback_mb']:.1f}MB "
+        f"peak_rss={res.stats['peak_rss_mb']:.0f}MB cells={res.stats['cells']}"
+    )
     return 0
 
 
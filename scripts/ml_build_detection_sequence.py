@@ -23,105 +23,27 @@ Output format:
 from __future__ import annotations
 
 import argparse
-import importlib.util
 import json
-import sys
 from pathlib import Path
 from typing import Any
 
-from PIL import Image
-
 try:
     import numpy as np  # type: ignore
+    from grid_layout import split_ink_grid
+    from page_cache import PageCache
 except Exception:  # pragma: no cover
     np = None
-
-
-def _load_extractor(repo_root: Path):
-    extract_path = (repo_root / "scripts" / "extract_lantingjixu_chars.py").resolve()
-    spec = importlib.util.spec_from_file_location("extract_lantingjixu_chars", extract_path)
-    if spec is None or spec.loader is None:
-        raise SystemExit("cannot import extractor")
-    mod = importlib.util.module_from_spec(spec)
-    sys.modules[str(spec.name)] = mod
-    spec.loader.exec_module(mod)
-    return mod
-
-
-def split_axis(proj: Any, expected_count: int) -> list[int]:
-    n = int(proj.shape[0])
-    if expected_count <= 0:
-        return [0, n]
-    if expected_count == 1:
-        return [0, n]
-
-    step = n / float(expected_count)
-    min_cell = max(12, int(round(step * 0.35)))
-    win = max(10, int(round(step * 0.60)))
-    dev_lambda = 0.55
-    size_lambda = 0.90
-
-    proj = proj.astype("float32")
-    proj_max = float(max(1.0, float(proj.max())))
-
-    cand_y: list[list[int]] = []
-    cand_cost: list[list[float]] = []
-    for i in range(1, expected_count):
-        remaining = expected_count - i
-        y_expect = int(round(step * i))
-        lo = int(max(min_cell, y_expect - win))
-        hi = int(min(n - remaining * min_cell, y_expect + win))
-        if hi <= lo:
-            lo = int(max(min_cell, min(y_expect, n - remaining * min_cell - 1)))
-            hi = lo + 1
-        ys = list(range(lo, hi))
-        costs = []
-        for y in ys:
-            dev = (float(y) - float(y_expect)) / max(1.0, float(step))
-            costs.append(float(proj[y]) / proj_max + dev_lambda * dev * dev)
-        cand_y.append(ys)
-        cand_cost.append(costs)
-
-    INF = 1e18
-    dp = [[INF] * len(c) for c in cand_y]
-    prev = [[-1] * len(c) for c in cand_y]
-    for j, y in enumerate(cand_y[0]):
-        cell = float(y) / max(1.0, float(step))
-        dp[0][j] = cand_cost[0][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-
-    for i in range(1, len(cand_y)):
-        for j, y in enumerate(cand_y[i]):
-            best = INF
-            best_k = -1
-            for k, y_prev in enumerate(cand_y[i - 1]):
-                if y - y_prev < min_cell:
-                    continue
-                cell = (float(y) - float(y_prev)) / max(1.0, float(step))
-                v = dp[i - 1][k] + cand_cost[i][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-                if v < best:
-                    best = v
-                    best_k = k
-            dp[i][j] = best
-            prev[i][j] = best_k
-
-    boundaries = [0]
-    last_i = len(cand_y) - 1
-    best_j = min(range(len(dp[last_i])), key=lambda j: dp[last_i][j])
-    chosen = [0] * len(cand_y)
-    chosen[last_i] = best_j
-    for i in range(last_i, 0, -1):
-        chosen[i - 1] = prev[i][chosen[i]]
-    for i, j in enumerate(chosen):
-        boundaries.append(int(cand_y[i][j]))
-    boundaries.append(n)
-    return boundaries
+    split_ink_grid = None
+    PageCache = None
 
 
 def clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, v))
 
 
-def main() -> int:
+def main(argv: list[str] | None = None, *, pages: Any = None) -> int:
+    # `pages`: optional page_cache.PageCache shared by the in-process pipeline
+    # (scripts/ml_align_pipeline.py).
     ap = argparse.ArgumentParser()
     ap.add_argument("--stele-dir", required=True)
     ap.add_argument("--pages-dir", default=None, help="defaults to stele-dir")
@@ -138,7 +60,7 @@ def main() -> int:
     ap.add_argument("--min-box-size", type=int, default=10)
     ap.add_argument("--max-box-area-ratio", type=float, default=0.35)
     ap.add_argument("--keep-duplicates", action="store_true")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     stele_dir = Path(args.stele_dir).resolve()
     pages_dir = Path(args.pages_dir).resolve() if args.pages_dir else stele_dir
@@ -147,10 +69,6 @@ def main() -> int:
     if not isinstance(det_pages, dict):
         raise SystemExit("detections-json must contain {pages:{...}}")
 
-    repo_root = Path(__file__).resolve().parent.parent
-    mod = _load_extractor(repo_root)
-    ink_mask = getattr(mod, "ink_mask")
-
     # Optional workbench layout.
     workbench_pages: list[dict] = []
     wb_path = stele_dir / "workbench" / "pages.json"
@@ -175,22 +93,18 @@ def main() -> int:
 
     if not ordered:
         raise SystemExit("No pages matched detections")
+    if np is None:
+        raise SystemExit("numpy required")
+    if pages is None or not pages.serves(pages_dir):
+        pages = PageCache(pages_dir)
 
     out_dets: list[dict] = []
     for page_i, page_name in enumerate(ordered, start=1):
-        page_path = existing[page_name]
-        img = Image.open(page_path).convert("RGB")
-        w, h = img.size
-        if np is None:
-            raise SystemExit("numpy required")
-        arr = np.asarray(img)
-        ink = ink_mask(arr, ink_threshold=int(args.strict_ink_thr))
+        w, h = pages.size(page_name)
+        ink = pages.ink(page_name, int(args.strict_ink_thr))
 
         # red-ish pixels (seal)
-        r = arr[..., 0].astype(np.int16)
-        g = arr[..., 1].astype(np.int16)
-        b = arr[..., 2].astype(np.int16)
-        redish = (r > 120) & ((r - g) > 40) & ((r - b) > 40)
+        redish = pages.redish(page_name)
 
         # layout: try stored bounds first
         page_override: dict | None = None
@@ -225,20 +139,13 @@ def main() -> int:
                     x_bounds_by_row = [[int(v) for v in r] for r in cb]
 
         if x_bounds is None and y_bounds is None:
+            layout = split_ink_grid(ink, direction=direction, cols=cols, rows=rows)
             if direction == "vertical_rtl":
-                x_bounds = split_axis(ink.sum(axis=0).astype("float32"), cols)
-                y_bounds_by_col = []
-                for col in range(cols):
-                    cx0 = int(x_bounds[col])
-                    cx1 = int(x_bounds[col + 1])
-                    y_bounds_by_col.append(split_axis(ink[:, cx0:cx1].sum(axis=1).astype("float32"), rows))
+                x_bounds = layout["col_bounds"]
+                y_bounds_by_col = layout["row_bounds_by_col"]
             else:
-                y_bounds = split_axis(ink.sum(axis=1).astype("float32"), rows)
-                x_bounds_by_row = []
-                for row in range(rows):
-                    ry0 = int(y_bounds[row])
-                    ry1 = int(y_bounds[row + 1])
-                    x_bounds_by_row.append(split_axis(ink[ry0:ry1, :].sum(axis=0).astype("float32"), cols))
+                y_bounds = layout["row_bounds"]
+                x_bounds_by_row = layout["col_bounds_by_row"]
 
         def find_bin(bounds: list[int], v: float) -> int:
             # bounds is len n+1
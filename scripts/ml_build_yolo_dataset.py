@@ -23,12 +23,15 @@ import json
 import os
 import random
 import shutil
+from collections.abc import Mapping
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable
 
 from PIL import Image
 
+from dataset_index import load_index
+
 
 @dataclass(frozen=True)
 class PageRef:
@@ -180,17 +183,16 @@ def main() -> int:
     ann_by_page: dict[str, list[dict[str, Any]]] = {}
 
     for d in dataset_dirs:
-        idx_path = d / "index.json"
-        data = json.loads(idx_path.read_text(encoding="utf-8"))
-        files = data.get("files")
-        if not isinstance(files, list):
-            raise SystemExit(f"Invalid index.json (missing files): {idx_path}")
+        try:
+            files = load_index(d)
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"Invalid dataset index: {exc}")
 
         stele_dir = d.parent
         stele_slug = stele_dir.name
 
         for e in files:
-            if not isinstance(e, dict):
+            if not isinstance(e, Mapping):
                 continue
             src = e.get("source") or {}
             page_name = str(src.get("image") or "").strip()
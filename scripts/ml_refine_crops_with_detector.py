@@ -37,10 +37,16 @@ from typing import Any
 
 from PIL import Image, ImageDraw, ImageFont
 
+from dataset_index import write_index
+
 try:
     import numpy as np  # type: ignore
+    from grid_layout import split_ink_grid
+    from render_metrics import RenderMetrics
 except Exception:  # pragma: no cover
     np = None
+    split_ink_grid = None
+    RenderMetrics = None
 
 
 def _load_extractor(repo_root: Path):
@@ -55,80 +61,6 @@ def _load_extractor(repo_root: Path):
     return mod
 
 
-def split_axis(proj: Any, expected_count: int) -> list[int]:
-    # Copied from scripts/workbench_preview_page.py for consistency.
-    n = int(proj.shape[0])
-    if expected_count <= 0:
-        return [0, n]
-    if expected_count == 1:
-        return [0, n]
-
-    step = n / float(expected_count)
-    min_cell = max(12, int(round(step * 0.35)))
-    win = max(10, int(round(step * 0.60)))
-    dev_lambda = 0.55
-    size_lambda = 0.90
-
-    proj = proj.astype("float32")
-    proj_max = float(max(1.0, float(proj.max())))
-
-    cand_y: list[list[int]] = []
-    cand_cost: list[list[float]] = []
-    for i in range(1, expected_count):
-        remaining = expected_count - i
-        y_expect = int(round(step * i))
-        lo = int(max(min_cell, y_expect - win))
-        hi = int(min(n - remaining * min_cell, y_expect + win))
-        if hi <= lo:
-            lo = int(max(min_cell, min(y_expect, n - remaining * min_cell - 1)))
-            hi = lo + 1
-        ys = list(range(lo, hi))
-        costs = []
-        for y in ys:
-            dev = (float(y) - float(y_expect)) / max(1.0, float(step))
-            costs.append(float(proj[y]) / proj_max + dev_lambda * dev * dev)
-        cand_y.append(ys)
-        cand_cost.append(costs)
-
-    INF = 1e18
-    dp = [[INF] * len(c) for c in cand_y]
-    prev = [[-1] * len(c) for c in cand_y]
-    for j, y in enumerate(cand_y[0]):
-        cell = float(y) / max(1.0, float(step))
-        dp[0][j] = cand_cost[0][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-
-    for i in range(1, len(cand_y)):
-        for j, y in enumerate(cand_y[i]):
-            best = INF
-            best_k = -1
-            for k, y_prev in enumerate(cand_y[i - 1]):
-                if y - y_prev < min_cell:
-                    continue
-                cell = (float(y) - float(y_prev)) / max(1.0, float(step))
-                v = (
-                    dp[i - 1][k]
-                    + cand_cost[i][j]
-                    + size_lambda * (cell - 1.0) * (cell - 1.0)
-                )
-                if v < best:
-                    best = v
-                    best_k = k
-            dp[i][j] = best
-            prev[i][j] = best_k
-
-    boundaries = [0]
-    last_i = len(cand_y) - 1
-    best_j = min(range(len(dp[last_i])), key=lambda j: dp[last_i][j])
-    chosen = [0] * len(cand_y)
-    chosen[last_i] = best_j
-    for i in range(last_i, 0, -1):
-        chosen[i - 1] = prev[i][chosen[i]]
-    for i, j in enumerate(chosen):
-        boundaries.append(int(cand_y[i][j]))
-    boundaries.append(n)
-    return boundaries
-
-
 def cp_tag(ch: str) -> str:
     if not ch:
         return "U003F"
@@ -294,10 +226,12 @@ def main() -> int:
     out_dir = Path(args.out_dir).resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
     (out_dir / "overlays").mkdir(parents=True, exist_ok=True)
+    # QA stats of rendered crops, stored for qa_char_crops (no re-decode there).
+    crop_metrics = RenderMetrics(out_dir) if RenderMetrics is not None else None
 
     repo_root = Path(__file__).resolve().parent.parent
     mod = _load_extractor(repo_root)
-    ink_mask = getattr(mod, "ink_mask")
+    InkPlanes = getattr(mod, "InkPlanes")
     trim_glyph = getattr(mod, "trim_glyph")
     render_square = getattr(mod, "render_square")
 
@@ -365,12 +299,10 @@ def main() -> int:
         img = Image.open(page_path).convert("RGB")
         w, h = img.width, img.height
         arr = np.asarray(img) if np is not None else None
-        strict_ink = (
-            ink_mask(arr, ink_threshold=int(args.strict_ink_thr)) if (arr is not None) else None
-        )
-        loose_ink = (
-            ink_mask(arr, ink_threshold=int(args.loose_ink_thr)) if (arr is not None) else None
-        )
+        # Both thresholds from one luminance pass.
+        planes = InkPlanes.from_rgb(arr) if (arr is not None) else None
+        strict_ink = planes.compute(int(args.strict_ink_thr)) if planes is not None else None
+        loose_ink = planes.compute(int(args.loose_ink_thr)) if planes is not None else None
 
         page_override: dict | None = None
         page_layout: dict | None = None
@@ -409,24 +341,13 @@ def main() -> int:
 
         # Compute layout if missing.
         if (x_bounds is None and y_bounds is None) and (strict_ink is not None):
+            layout = split_ink_grid(strict_ink, direction=page_direction, cols=page_cols, rows=page_rows)
             if page_direction == "vertical_rtl":
-                proj_x = strict_ink.sum(axis=0).astype("float32")
-                x_bounds = split_axis(proj_x, page_cols)
-                y_bounds_by_col = []
-                for col in range(page_cols):
-                    cx0 = int(x_bounds[col])
-                    cx1 = int(x_bounds[col + 1])
-                    proj_y = strict_ink[:, cx0:cx1].sum(axis=1).astype("float32")
-                    y_bounds_by_col.append(split_axis(proj_y, page_rows))
+                x_bounds = layout["col_bounds"]
+                y_bounds_by_col = layout["row_bounds_by_col"]
             else:
-                proj_y = strict_ink.sum(axis=1).astype("float32")
-                y_bounds = split_axis(proj_y, page_rows)
-                x_bounds_by_row = []
-                for row in range(page_rows):
-                    ry0 = int(y_bounds[row])
-                    ry1 = int(y_bounds[row + 1])
-                    proj_x = strict_ink[ry0:ry1, :].sum(axis=0).astype("float32")
-                    x_bounds_by_row.append(split_axis(proj_x, page_cols))
+                y_bounds = layout["row_bounds"]
+                x_bounds_by_row = layout["col_bounds_by_row"]
 
         cell_w = w / float(page_cols)
         cell_h = h / float(page_rows)
@@ -629,14 +550,13 @@ def main() -> int:
 
                 out_path = out_dir / filename
                 if file_ext == "webp":
-                    out_img.save(
-                        out_path,
-                        format="WEBP",
-                        quality=int(max(1, min(100, int(args.quality)))),
-                        method=6,
-                    )
+                    params = {"format": "WEBP", "quality": int(max(1, min(100, int(args.quality)))), "method": 6}
+                else:
+                    params = {"format": "PNG", "optimize": True}
+                if crop_metrics is not None:
+                    crop_metrics.save(out_img, out_path, **params)
                 else:
-                    out_img.save(out_path, format="PNG", optimize=True)
+                    out_img.save(out_path, **params)
 
                 if font:
                     draw.text((x0 + 4, y0 + 4), f"{global_idx:04d}", fill=(255, 255, 255), font=font)
@@ -705,7 +625,9 @@ def main() -> int:
         },
         "files": index_entries,
     }
-    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    write_index(out_dir, index)
+    if crop_metrics is not None:
+        crop_metrics.flush()
 
     if args.run_qa:
         try:
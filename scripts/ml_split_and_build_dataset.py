@@ -32,10 +32,16 @@ from typing import Any
 
 from PIL import Image
 
+from dataset_index import write_index
+
 try:
     import numpy as np  # type: ignore
+    from page_cache import PageCache
+    from render_metrics import RenderMetrics
 except Exception:  # pragma: no cover
     np = None
+    PageCache = None
+    RenderMetrics = None
 
 
 def _load_extractor(repo_root: Path):
@@ -88,7 +94,9 @@ def pick_split(mask: Any, *, axis: str) -> int | None:
     return int(best_i)
 
 
-def main() -> int:
+def main(argv: list[str] | None = None, *, pages: Any = None) -> int:
+    # `pages`: optional page_cache.PageCache shared by the in-process pipeline
+    # (scripts/ml_align_pipeline.py).
     ap = argparse.ArgumentParser()
     ap.add_argument("--stele-dir", required=True)
     ap.add_argument("--stele-slug", required=True)
@@ -102,7 +110,7 @@ def main() -> int:
     ap.add_argument("--quality", type=int, default=82)
     ap.add_argument("--split-min-gap", type=int, default=8)
     ap.add_argument("--split-min-ink", type=int, default=10)
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     stele_dir = Path(args.stele_dir).resolve()
     seq = json.loads(Path(args.detections_seq).read_text(encoding="utf-8"))
@@ -118,25 +126,28 @@ def main() -> int:
 
     repo_root = Path(__file__).resolve().parent.parent
     mod = _load_extractor(repo_root)
-    ink_mask = getattr(mod, "ink_mask")
     render_square = getattr(mod, "render_square")
 
     out_dir = Path(args.out_dir).resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
     (out_dir / "overlays").mkdir(parents=True, exist_ok=True)
+    # QA stats of rendered crops, stored for qa_char_crops (no re-decode there).
+    crop_metrics = RenderMetrics(out_dir) if RenderMetrics is not None else None
+
+    if PageCache is not None and (pages is None or not pages.serves(stele_dir)):
+        pages = PageCache(stele_dir)
 
-    page_cache: dict[str, tuple[Image.Image, Any]] = {}
+    fallback_pages: dict[str, Image.Image] = {}
 
-    def load_page(name: str):
-        if name not in page_cache:
+    def load_page(name: str) -> Image.Image:
+        if pages is not None:
+            return pages.image(name)
+        if name not in fallback_pages:
             p = stele_dir / name
             if not p.exists():
                 raise FileNotFoundError(f"Missing page: {p}")
-            img = Image.open(p).convert("RGB")
-            arr = np.asarray(img) if np is not None else None
-            mask = ink_mask(arr, ink_threshold=150) if arr is not None else None
-            page_cache[name] = (img, mask)
-        return page_cache[name]
+            fallback_pages[name] = Image.open(p).convert("RGB")
+        return fallback_pages[name]
 
     entries: list[dict] = []
     out_idx = 0
@@ -157,7 +168,7 @@ def main() -> int:
         if not page:
             continue
         page_index = int(det.get("page_index") or 0)
-        img, mask = load_page(page)
+        img = load_page(page)
         w, h = img.size
         bb = det.get("xyxy")
         if not (isinstance(bb, list) and len(bb) == 4):
@@ -182,9 +193,13 @@ def main() -> int:
             )
             out_path = out_dir / filename
             if ext == "webp":
-                out.save(out_path, format="WEBP", quality=int(args.quality), method=6)
+                params = {"format": "WEBP", "quality": int(args.quality), "method": 6}
+            else:
+                params = {"format": "PNG", "optimize": True}
+            if crop_metrics is not None:
+                crop_metrics.save(out, out_path, **params)
             else:
-                out.save(out_path, format="PNG", optimize=True)
+                out.save(out_path, **params)
             entries.append(
                 {
                     "index": out_idx,
@@ -211,6 +226,8 @@ def main() -> int:
 
         # split into two
         axis = "y" if args.direction == "vertical_rtl" else "x"
+        # Only split items need the ink mask; computed once per page.
+        mask = pages.ink(page, 150) if pages is not None else None
         if mask is None:
             # fallback: geometric split
             if axis == "y":
@@ -264,7 +281,9 @@ def main() -> int:
         },
         "files": entries,
     }
-    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    write_index(out_dir, index)
+    if crop_metrics is not None:
+        crop_metrics.flush()
     print(f"done chars={len(entries)} out={out_dir}")
     return 0
 
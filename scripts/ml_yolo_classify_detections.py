@@ -11,6 +11,10 @@ Inputs:
 - stele-dir: directory containing the page images referenced by detections
 - classes-json: JSON mapping class tags (e.g. U6C49) to char
 
+Inference goes through `scripts/yolo_worker.py` (the backend's resident worker
+when `INKGRID_YOLO_WORKER_URL` is set, else in-process), in batches of
+`--batch` crops.
+
 Install dependency:
 
   python3 -m pip install -U ultralytics
@@ -21,11 +25,14 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
+from typing import Any
 
-from PIL import Image
+from page_cache import PageCache
 
 
-def main() -> int:
+def main(argv: list[str] | None = None, *, pages: Any = None) -> int:
+    # `pages`: optional page_cache.PageCache shared by the in-process pipeline
+    # (scripts/ml_align_pipeline.py).
     ap = argparse.ArgumentParser()
     ap.add_argument("--model", required=True, help="Ultralytics classify weights (.pt)")
     ap.add_argument("--detections-seq", required=True)
@@ -34,16 +41,13 @@ def main() -> int:
     ap.add_argument("--out", required=True)
     ap.add_argument("--imgsz", type=int, default=224)
     ap.add_argument("--topk", type=int, default=5)
-    ap.add_argument("--device", default="mps")
-    args = ap.parse_args()
+    ap.add_argument("--device", default="mps", help="in-process device (the worker has its own)")
+    ap.add_argument("--batch", type=int, default=64, help="crops per predict call")
+    args = ap.parse_args(argv)
+
+    from yolo_worker import yolo_engine
 
-    try:
-        from ultralytics import YOLO  # type: ignore
-    except Exception as e:
-        raise SystemExit(
-            "Missing dependency: ultralytics. Install with `python3 -m pip install -U ultralytics`.\n"
-            + f"Import error: {e}"
-        )
+    engine = yolo_engine(str(args.device))
 
     seq = json.loads(Path(args.detections_seq).read_text(encoding="utf-8"))
     dets = seq.get("detections")
@@ -57,20 +61,13 @@ def main() -> int:
 
     stele_dir = Path(args.stele_dir).resolve()
 
-    # Prepare crops in memory.
-    crop_imgs: list[Image.Image] = []
+    # Prepare crops in memory (or as page boxes for the worker).
+    crop_imgs: list[Any] = []
     crop_ids: list[str] = []
     crop_meta: list[dict] = []
 
-    page_cache: dict[str, Image.Image] = {}
-
-    def load_page(name: str) -> Image.Image:
-        if name not in page_cache:
-            p = stele_dir / name
-            if not p.exists():
-                raise FileNotFoundError(f"Missing page image: {p}")
-            page_cache[name] = Image.open(p).convert("RGB")
-        return page_cache[name]
+    if pages is None or not pages.serves(stele_dir):
+        pages = PageCache(stele_dir)
 
     for d in dets:
         if not isinstance(d, dict):
@@ -85,51 +82,38 @@ def main() -> int:
         bb = d.get("xyxy")
         if not page or not (isinstance(bb, list) and len(bb) == 4):
             continue
-        img = load_page(page)
+        w, h = pages.size(page)
         x0, y0, x1, y1 = [int(bb[0]), int(bb[1]), int(bb[2]), int(bb[3])]
-        x0 = max(0, min(x0, img.width - 1))
-        y0 = max(0, min(y0, img.height - 1))
-        x1 = max(x0 + 1, min(x1, img.width))
-        y1 = max(y0 + 1, min(y1, img.height))
-        crop = img.crop((x0, y0, x1, y1))
-        crop_imgs.append(crop)
+        x0 = max(0, min(x0, w - 1))
+        y0 = max(0, min(y0, h - 1))
+        x1 = max(x0 + 1, min(x1, w))
+        y1 = max(y0 + 1, min(y1, h))
+        if engine.remote:
+            crop_imgs.append((pages.path(page), (x0, y0, x1, y1)))
+        else:
+            crop_imgs.append(pages.crop(page, (x0, y0, x1, y1)))
         crop_ids.append(det_id)
         crop_meta.append({"page": page, "xyxy": [x0, y0, x1, y1], "score": float(d.get("score") or 0.0)})
 
     if not crop_imgs:
         raise SystemExit("No crops to classify")
 
-    model = YOLO(str(Path(args.model).resolve()))
-    res = model.predict(
-        source=crop_imgs,
+    res = engine.classify(
+        str(Path(args.model).resolve()),
+        crop_imgs,
         imgsz=int(args.imgsz),
-        device=str(args.device),
-        verbose=False,
+        batch=int(args.batch),
     )
 
     preds: dict[str, list[dict]] = {}
-    for det_id, r in zip(crop_ids, res):
-        probs = getattr(r, "probs", None)
-        names = getattr(r, "names", None) or {}
-        if probs is None:
-            continue
-
-        # `top5` yields indices. Use `data` to get probabilities.
-        topk = int(max(1, min(50, int(args.topk))))
-        idxs = list(getattr(probs, "top5", []))[:topk]
+    topk = int(max(1, min(50, int(args.topk))))
+    for det_id, top in zip(crop_ids, res):
         out: list[dict] = []
-        for idx in idxs:
-            try:
-                idx_int = int(idx)
-            except Exception:
-                continue
-            label = str(names.get(idx_int, ""))
+        for t in top[:topk]:
+            label = str(t.get("label") or "")
             # Ultralytics classification labels are directory names.
             ch = str(mapping.get(label) or "").strip()
-            try:
-                p = float(probs.data[idx_int])  # type: ignore
-            except Exception:
-                p = 0.0
+            p = float(t.get("p") or 0.0)
             if not ch or p <= 0:
                 continue
             out.append({"char": ch, "tag": label, "p": p})
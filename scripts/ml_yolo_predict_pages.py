@@ -4,6 +4,10 @@
 
 This is a thin wrapper around `ultralytics.YOLO(...).predict(...)` that outputs a
 stable JSON format consumed by `scripts/ml_refine_crops_with_detector.py`.
+Inference goes through `scripts/yolo_worker.py`: the backend's resident
+worker when `INKGRID_YOLO_WORKER_URL` is set (model stays loaded across jobs),
+else in-process. Pages are predicted in same-size batches (`--batch`);
+`--tile` cuts very large scans into overlapping tiles.
 
 Install dependency (local venv):
 
@@ -24,9 +28,12 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
+from typing import Any
 
 
-def main() -> int:
+def main(argv: list[str] | None = None, *, pages: Any = None) -> int:
+    # `pages`: optional page_cache.PageCache shared by the in-process pipeline
+    # (scripts/ml_align_pipeline.py); pages are then fed as decoded images.
     ap = argparse.ArgumentParser()
     ap.add_argument("--model", required=True, help="YOLO weights (pt)")
     ap.add_argument("--pages-dir", required=True)
@@ -34,16 +41,13 @@ def main() -> int:
     ap.add_argument("--out", required=True)
     ap.add_argument("--imgsz", type=int, default=1280)
     ap.add_argument("--conf", type=float, default=0.15)
-    ap.add_argument("--device", default="mps")
-    args = ap.parse_args()
+    ap.add_argument("--device", default="mps", help="in-process device (the worker has its own)")
+    ap.add_argument("--batch", type=int, default=4, help="pages per predict call")
+    ap.add_argument("--tile", type=int, default=0, help="tile pages whose long side exceeds this (0 = off)")
+    ap.add_argument("--tile-overlap", type=int, default=256)
+    args = ap.parse_args(argv)
 
-    try:
-        from ultralytics import YOLO  # type: ignore
-    except Exception as e:
-        raise SystemExit(
-            "Missing dependency: ultralytics. Install with `python3 -m pip install -U ultralytics`.\n"
-            + f"Import error: {e}"
-        )
+    from yolo_worker import yolo_engine
 
     pages_dir = Path(args.pages_dir).resolve()
     if not pages_dir.exists():
@@ -67,35 +71,28 @@ def main() -> int:
     if not imgs:
         raise SystemExit(f"No images matched in {pages_dir} with glob={args.glob}")
 
-    model = YOLO(str(Path(args.model).resolve()))
+    engine = yolo_engine(str(args.device))
+    if pages is not None and not pages.serves(pages_dir):
+        pages = None
+    if engine.remote or pages is None:
+        sources: list[Any] = [str(p) for p in imgs]
+    else:
+        sources = [pages.image(p.name) for p in imgs]
+
+    results = engine.detect(
+        str(Path(args.model).resolve()),
+        sources,
+        imgsz=int(args.imgsz),
+        conf=float(args.conf),
+        batch=int(args.batch),
+        tile=int(args.tile),
+        tile_overlap=int(args.tile_overlap),
+    )
 
     out_pages: dict[str, list[dict]] = {}
-    for p in imgs:
-        res = model.predict(
-            source=str(p),
-            imgsz=int(args.imgsz),
-            conf=float(args.conf),
-            device=str(args.device),
-            verbose=False,
-        )
-        if not res:
-            out_pages[p.name] = []
-            continue
-        r0 = res[0]
-        dets: list[dict] = []
-        boxes = getattr(r0, "boxes", None)
-        if boxes is not None:
-            xyxy = boxes.xyxy.cpu().numpy().tolist()  # type: ignore
-            confs = boxes.conf.cpu().numpy().tolist()  # type: ignore
-            for b, c in zip(xyxy, confs):
-                dets.append(
-                    {
-                        "xyxy": [float(b[0]), float(b[1]), float(b[2]), float(b[3])],
-                        "score": float(c),
-                    }
-                )
+    for p, dets in zip(imgs, results):
         # Sort left-to-right for stable output (reading order handled later).
-        dets.sort(key=lambda d: (d["xyxy"][0], d["xyxy"][1]))
+        dets = sorted(dets, key=lambda d: (d["xyxy"][0], d["xyxy"][1]))
         out_pages[p.name] = dets
 
     out_path = Path(args.out).resolve()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Decode-once cache for page images and their ink masks.
+
+A workbench ML job touches the same page images in several stages (detect,
+sequence, classify, split, QA). `PageCache` decodes each page once and keeps:
+
+- the page's uint8 RGB array (`page_reader.load_rgb`; a memmap of the raw
+  cache with `raw_cache_dir`) and, only if a stage asks for it, a `PIL.Image`
+- its `ink_engine.InkPlanes` (integer luminance + seal mask, computed once)
+  and one boolean ink mask per requested threshold
+- the red-ish (seal) mask
+
+Ink masks are pixel-wise, so a crop's mask equals the same slice of the page
+mask; stages slice cached page masks instead of recomputing per crop. Cached
+masks are read-only.
+
+Entries are evicted LRU by page once the cache exceeds `max_bytes` (memmapped
+arrays are file-backed and not counted). Region helpers (`size`, `crop`,
+`region_planes`) avoid building page-level images or planes, which is what
+large scans need (see `scripts/page_reader.py` for the memory budget). Usage:
+
+  pages = PageCache(pages_dir)
+  img = pages.image("page_01.jpg")
+  ink = pages.ink("page_01.jpg", 150)[y0:y1, x0:x1]
+  planes = pages.region_planes("page_01.jpg", (x0, y0, x1, y1))
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from ink_engine import InkPlanes
+from page_reader import image_size, load_rgb, region_of
+
+
+@dataclass
+class _PageEntry:
+    rgb: np.ndarray
+    image: Image.Image | None = None
+    planes: InkPlanes | None = None
+    masks: dict[Any, np.ndarray] = field(default_factory=dict)
+
+    def nbytes(self) -> int:
+        n = 0 if isinstance(self.rgb, np.memmap) else int(self.rgb.nbytes)
+        if self.image is not None:
+            n += 4 * int(self.image.width) * int(self.image.height)
+        n += sum(int(m.nbytes) for m in self.masks.values())
+        return n + (self.planes.nbytes() if self.planes is not None else 0)
+
+
+class PageCache:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = 2048 * 1024 * 1024,
+        raw_cache_dir: Path | None = None,
+    ):
+        self.root = Path(root).resolve()
+        self.max_bytes = max(0, int(max_bytes))
+        self.raw_cache_dir = Path(raw_cache_dir).resolve() if raw_cache_dir else None
+        self._pages: OrderedDict[str, _PageEntry] = OrderedDict()
+        self._sizes: dict[str, tuple[int, int]] = {}
+        self.stats = {
+            "decodes": 0,
+            "raw_hits": 0,
+            "page_hits": 0,
+            "mask_computes": 0,
+            "mask_hits": 0,
+            "evictions": 0,
+        }
+
+    def serves(self, root: Path) -> bool:
+        return Path(root).resolve() == self.root
+
+    def path(self, name: str) -> Path:
+        return self.root / name
+
+    def _entry(self, name: str) -> _PageEntry:
+        e = self._pages.get(name)
+        if e is not None:
+            self._pages.move_to_end(name)
+            self.stats["page_hits"] += 1
+            return e
+        p = self.path(name)
+        if not p.exists():
+            raise FileNotFoundError(f"Missing page image: {p}")
+        rgb, hit = load_rgb(p, raw_cache_dir=self.raw_cache_dir)
+        e = _PageEntry(rgb=rgb)
+        self.stats["raw_hits" if hit else "decodes"] += 1
+        self._pages[name] = e
+        self._evict()
+        return e
+
+    def _evict(self) -> None:
+        total = sum(e.nbytes() for e in self._pages.values())
+        # Always keep the most recently used page.
+        while total > self.max_bytes and len(self._pages) > 1:
+            _, old = self._pages.popitem(last=False)
+            total -= old.nbytes()
+            self.stats["evictions"] += 1
+
+    def image(self, name: str) -> Image.Image:
+        e = self._entry(name)
+        if e.image is None:
+            e.image = Image.fromarray(np.asarray(e.rgb), mode="RGB")
+            self._evict()
+        return e.image
+
+    def rgb(self, name: str) -> np.ndarray:
+        return self._entry(name).rgb
+
+    def size(self, name: str) -> tuple[int, int]:
+        """(width, height); reads only the header when the page isn't resident."""
+
+        s = self._sizes.get(name)
+        if s is None:
+            e = self._pages.get(name)
+            if e is not None:
+                s = (int(e.rgb.shape[1]), int(e.rgb.shape[0]))
+            else:
+                p = self.path(name)
+                if not p.exists():
+                    raise FileNotFoundError(f"Missing page image: {p}")
+                s = image_size(p)
+            self._sizes[name] = s
+        return s
+
+    def crop(self, name: str, box: tuple[int, int, int, int]) -> Image.Image:
+        """`image(name).crop(box)` without building the page image."""
+
+        return Image.fromarray(region_of(self._entry(name).rgb, box), mode="RGB")
+
+    def region_planes(self, name: str, box: tuple[int, int, int, int]) -> InkPlanes:
+        """Ink planes of `box` (black outside the page, like `Image.crop`).
+
+        Slices the page planes when a stage already built them; otherwise only
+        the region is converted, so large pages never get page-level planes.
+        """
+
+        e = self._entry(name)
+        if e.planes is not None:
+            return e.planes.crop(box)
+        return InkPlanes.from_rgb(region_of(e.rgb, box))
+
+    def planes(self, name: str) -> InkPlanes:
+        e = self._entry(name)
+        if e.planes is None:
+            e.planes = InkPlanes.from_rgb(e.rgb)
+            self._evict()
+        return e.planes
+
+    def ink(self, name: str, threshold: int) -> np.ndarray:
+        planes = self.planes(name)
+        known = int(threshold) in planes.thresholds()
+        m = planes.mask(int(threshold))
+        if known:
+            self.stats["mask_hits"] += 1
+        else:
+            self.stats["mask_computes"] += 1
+            self._evict()
+        return m
+
+    def redish(self, name: str) -> np.ndarray:
+        e = self._entry(name)
+        m = e.masks.get("redish")
+        if m is None:
+            r = e.rgb[..., 0].astype(np.int16)
+            g = e.rgb[..., 1].astype(np.int16)
+            b = e.rgb[..., 2].astype(np.int16)
+            m = (r > 120) & ((r - g) > 40) & ((r - b) > 40)
+            m.flags.writeable = False
+            e.masks["redish"] = m
+            self.stats["mask_computes"] += 1
+            self._evict()
+        else:
+            self.stats["mask_hits"] += 1
+        return m
+
+    def report(self) -> dict:
+        return {
+            **self.stats,
+            "resident_pages": len(self._pages),
+            "resident_mb": round(sum(e.nbytes() for e in self._pages.values()) / (1024.0 * 1024.0), 1),
+        }
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Memory-bounded page access for very large scans.
+
+A 12000x18000 museum scan is 648 MB as RGB (plus ~864 MB while PIL holds the
+decoded image), so scripts must not keep every page of a stele decoded.
+`PageReader` keeps at most `max_bytes` of decoded pages resident (LRU by
+page) and hands out regions instead of whole pages:
+
+  reader = PageReader(pages_dir, max_bytes=1024 * 2**20, raw_cache_dir=cache)
+  w, h = reader.size("page_01.jpg")          # header only, no decode
+  rgb = reader.region("page_01.jpg", box)    # (h, w, 3) uint8, black outside
+  img = reader.crop("page_01.jpg", box)      # == Image.crop(box) of the page
+  planes = reader.planes("page_01.jpg", box) # InkPlanes of that region
+
+With `raw_cache_dir`, a page is decoded once into
+`<raw_cache_dir>/<key>_<w>x<h>.rgb` (raw RGB, keyed by path/size/mtime) and
+then memory-mapped: regions touch only the rows they cover, mapped pages are
+file-backed (the OS can drop them under pressure) and later runs skip the
+decode. Mapped pages do not count against `max_bytes`; at most `max_mapped`
+stay open.
+
+Peak RSS budget (per process): `max_bytes` of resident pages + one page
+being decoded (~4 B/px in PIL + 3 B/px copy; ~1.5 GB for 12000x18000) +
+the regions in flight. With `raw_cache_dir` the copy is written in strips
+(`STRIP_ROWS`), so decode peaks at ~4 B/px and steady state is just the
+mapped rows in use.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from PIL import Image
+
+from ink_engine import InkPlanes
+
+STRIP_ROWS = 512
+
+
+def region_of(arr: np.ndarray, box: Iterable[int]) -> np.ndarray:
+    """`np.array(Image.crop(box))` of an RGB array (out-of-page area black)."""
+
+    x0, y0, x1, y1 = [int(v) for v in box]
+    h, w = int(arr.shape[0]), int(arr.shape[1])
+    if 0 <= x0 <= x1 <= w and 0 <= y0 <= y1 <= h:
+        return np.array(arr[y0:y1, x0:x1])
+    out = np.zeros((max(0, y1 - y0), max(0, x1 - x0), 3), dtype=np.uint8)
+    sx0, sy0, sx1, sy1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+    if sx1 > sx0 and sy1 > sy0:
+        out[sy0 - y0 : sy1 - y0, sx0 - x0 : sx1 - x0] = arr[sy0:sy1, sx0:sx1]
+    return out
+
+
+def image_size(path: Path) -> tuple[int, int]:
+    with Image.open(path) as im:
+        return (int(im.width), int(im.height))
+
+
+def raw_cache_path(path: Path, raw_cache_dir: Path, w: int, h: int) -> Path:
+    st = Path(path).stat()
+    key = hashlib.sha1(f"{Path(path).resolve()}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8")).hexdigest()[:24]
+    return Path(raw_cache_dir) / f"{key}_{w}x{h}.rgb"
+
+
+def load_rgb(
+    path: Path,
+    *,
+    raw_cache_dir: Path | None = None,
+    size: tuple[int, int] | None = None,
+) -> tuple[np.ndarray, bool]:
+    """Read-only (h, w, 3) page array and whether it came from the raw cache.
+
+    With `raw_cache_dir` the array is a memmap of the raw cache file (written
+    in strips on first use); otherwise an in-memory array.
+    """
+
+    path = Path(path)
+    if raw_cache_dir is None:
+        with Image.open(path) as im:
+            arr = np.asarray(im.convert("RGB"))
+        arr.flags.writeable = False
+        return arr, False
+
+    w, h = size or image_size(path)
+    raw = raw_cache_path(path, raw_cache_dir, w, h)
+    if raw.exists() and raw.stat().st_size == w * h * 3:
+        return np.memmap(raw, dtype=np.uint8, mode="r", shape=(h, w, 3)), True
+    raw.parent.mkdir(parents=True, exist_ok=True)
+    tmp = raw.with_name(f".{raw.name}.{os.getpid()}.tmp")
+    with Image.open(path) as im:
+        img = im.convert("RGB")
+    out = np.memmap(tmp, dtype=np.uint8, mode="w+", shape=(h, w, 3))
+    for y in range(0, h, STRIP_ROWS):
+        out[y : y + STRIP_ROWS] = np.asarray(img.crop((0, y, w, min(h, y + STRIP_ROWS))))
+    out.flush()
+    del out, img
+    tmp.replace(raw)
+    return np.memmap(raw, dtype=np.uint8, mode="r", shape=(h, w, 3)), False
+
+
+class PageReader:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = 2048 * 1024 * 1024,
+        raw_cache_dir: Path | None = None,
+        max_mapped: int = 64,
+    ):
+        self.root = Path(root).resolve()
+        self.max_bytes = max(0, int(max_bytes))
+        self.raw_cache_dir = Path(raw_cache_dir).resolve() if raw_cache_dir else None
+        self.max_mapped = max(1, int(max_mapped))
+        self._pages: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._sizes: dict[str, tuple[int, int]] = {}
+        self.stats = {"decodes": 0, "raw_hits": 0, "page_hits": 0, "evictions": 0, "peak_resident_mb": 0.0}
+
+    def serves(self, root: Path) -> bool:
+        return Path(root).resolve() == self.root
+
+    def path(self, name: str) -> Path:
+        return self.root / name
+
+    def size(self, name: str) -> tuple[int, int]:
+        """(width, height) without decoding pixel data."""
+
+        s = self._sizes.get(name)
+        if s is None:
+            arr = self._pages.get(name)
+            if arr is not None:
+                s = (int(arr.shape[1]), int(arr.shape[0]))
+            else:
+                s = image_size(self._existing(name))
+            self._sizes[name] = s
+        return s
+
+    def _existing(self, name: str) -> Path:
+        p = self.path(name)
+        if not p.exists():
+            raise FileNotFoundError(f"Missing page image: {p}")
+        return p
+
+    def _decode(self, name: str) -> np.ndarray:
+        arr, hit = load_rgb(self._existing(name), raw_cache_dir=self.raw_cache_dir, size=self.size(name))
+        self.stats["raw_hits" if hit else "decodes"] += 1
+        return arr
+
+    @staticmethod
+    def _resident(arr: np.ndarray) -> int:
+        return 0 if isinstance(arr, np.memmap) else int(arr.nbytes)
+
+    def rgb(self, name: str) -> np.ndarray:
+        """Whole page (read-only; a memmap when `raw_cache_dir` is set)."""
+
+        arr = self._pages.get(name)
+        if arr is not None:
+            self._pages.move_to_end(name)
+            self.stats["page_hits"] += 1
+            return arr
+        arr = self._decode(name)
+        self._pages[name] = arr
+        self._evict()
+        return arr
+
+    def resident_bytes(self) -> int:
+        return sum(self._resident(a) for a in self._pages.values())
+
+    def _evict(self) -> None:
+        total = self.resident_bytes()
+        mapped = sum(1 for a in self._pages.values() if isinstance(a, np.memmap))
+        # Always keep the most recently used page.
+        while len(self._pages) > 1 and (total > self.max_bytes or mapped > self.max_mapped):
+            _, old = self._pages.popitem(last=False)
+            total -= self._resident(old)
+            mapped -= int(isinstance(old, np.memmap))
+            self.stats["evictions"] += 1
+        self.stats["peak_resident_mb"] = max(self.stats["peak_resident_mb"], round(total / 2**20, 1))
+
+    def region(self, name: str, box: Iterable[int]) -> np.ndarray:
+        return region_of(self.rgb(name), box)
+
+    def crop(self, name: str, box: Iterable[int]) -> Image.Image:
+        return Image.fromarray(self.region(name, box), mode="RGB")
+
+    def planes(self, name: str, box: Iterable[int]) -> InkPlanes:
+        return InkPlanes.from_rgb(self.region(name, box))
+
+    def report(self) -> dict:
+        return {
+            **self.stats,
+            "resident_pages": len(self._pages),
+            "resident_mb": round(self.resident_bytes() / 2**20, 1),
+        }
@@ -20,23 +20,40 @@ Design goals:
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
-import math
-from dataclasses import dataclass
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Any
 
 import numpy as np
-from PIL import Image
+
+from dataset_index import load_index
+from glyph_index import make_index
+from page_cache import PageCache
+from qa_engine import measure_boxes
+from render_metrics import center_of, feature_store, file_gray32, file_stats, stats_store
 
 
-BG_RGB = (10, 10, 12)
 
 
 OVERLAP_Y_THR = 0.35
 NEAR_DUP_SIM_THR = 0.985
 
+# Bump when per-entry measurements change meaning (invalidates --metrics-cache).
+QA_METRICS_VERSION = 2
+
+# Uncached crops below this are measured in-process (pool start-up costs more).
+POOL_MIN_CROPS = 64
+# Crops per pool task.
+POOL_BATCH = 48
+
 
-def main() -> int:
+def main(argv: list[str] | None = None, *, pages: Any = None) -> int:
+    # `pages`: optional page_cache.PageCache shared by the in-process pipeline
+    # (scripts/ml_align_pipeline.py).
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--dataset-dir",
@@ -94,7 +111,41 @@ def main() -> int:
         default=True,
         help="Enable strict QA flags (default true)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--near-dup-index",
+        choices=["auto", "exact", "lsh"],
+        default="auto",
+        help="Neighbour search for near-duplicate checks (auto = exact below 20k crops)",
+    )
+    parser.add_argument(
+        "--max-page-mb",
+        type=int,
+        default=2048,
+        help="Resident decoded pages budget (LRU by page)",
+    )
+    parser.add_argument(
+        "--raw-cache-dir",
+        default=None,
+        help="Decode pages once into memory-mapped raw RGB files here",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["page", "crop"],
+        default="page",
+        help="Measure all crops of a page from prefix sums (page) or each crop separately (crop)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Measurement processes (0 = all CPUs; used from {POOL_MIN_CROPS} uncached crops)",
+    )
+    parser.add_argument(
+        "--metrics-cache",
+        default=None,
+        help="JSON cache of per-crop measurements keyed by page/crop/output content",
+    )
+    args = parser.parse_args(argv)
 
     dataset_dir = Path(args.dataset_dir)
     source_dir = Path(args.source_dir)
@@ -106,26 +157,45 @@ def main() -> int:
     out_report = Path(args.out_report) if args.out_report else (dataset_dir / "qa_report.json")
     out_summary = Path(args.out_summary) if args.out_summary else (dataset_dir / "qa_summary.md")
 
-    data = json.loads(index_path.read_text(encoding="utf-8"))
-    files = data.get("files")
-    if not isinstance(files, list):
-        raise SystemExit("Invalid index.json: missing 'files' list")
+    # Columnar companion when current (entries decode lazily), else JSON.
+    try:
+        files = load_index(dataset_dir)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+    # Pages are decoded once and kept LRU-bounded; per-crop masks come from
+    # the crop + ring window only (or slices of page masks another pipeline
+    # stage already built). See scripts/page_reader.py for the memory budget.
+    if pages is None or not pages.serves(source_dir):
+        pages = PageCache(
+            source_dir,
+            max_bytes=int(args.max_page_mb) * 1024 * 1024,
+            raw_cache_dir=Path(args.raw_cache_dir) if args.raw_cache_dir else None,
+        )
 
-    page_cache: dict[str, Image.Image] = {}
+    metrics_cache = MetricsCache(
+        Path(args.metrics_cache) if args.metrics_cache else None,
+        params={
+            "ring_px": int(args.ring_px),
+            "strict_ink_thr": int(args.strict_ink_thr),
+            "loose_ink_thr": int(args.loose_ink_thr),
+        },
+    )
+    page_digests: dict[str, str] = {}
 
-    def load_page(name: str) -> Image.Image:
-        if name not in page_cache:
-            p = source_dir / name
-            if not p.exists():
-                raise FileNotFoundError(f"Missing source image: {p}")
-            page_cache[name] = Image.open(p).convert("RGB")
-        return page_cache[name]
+    def page_digest(name: str) -> str:
+        if name not in page_digests:
+            page_digests[name] = metrics_cache.digest(pages.path(name))
+        return page_digests[name]
 
     report_entries: list[dict] = []
 
     regression_cases = load_regression_cases(source_dir)
     regression_set = set(regression_cases)
 
+    # Pass 1: cached measurements; the rest is measured per page below.
+    rows: list[tuple] = []
+    pending: dict[str, list[int]] = {}
     for e in files:
         filename = e.get("file")
         ch = e.get("char")
@@ -137,6 +207,73 @@ def main() -> int:
 
         png_path = dataset_dir / filename
         if not png_path.exists():
+            rows.append((e, None, None, None))
+            continue
+
+        box = (int(crop_box[0]), int(crop_box[1]), int(crop_box[2]), int(crop_box[3]))
+        cache_key = None
+        m = None
+        if metrics_cache.enabled:
+            cache_key = metrics_cache.key(page_digest(page_name), box, png_path)
+            m = metrics_cache.get(cache_key)
+        if m is None:
+            pending.setdefault(page_name, []).append(len(rows))
+        rows.append((e, box, cache_key, m))
+
+    # Pass 2: measure the rest page by page; on a process pool when there is
+    # enough work to pay for starting it (incremental reruns stay in-process).
+    params = {
+        "engine": args.engine,
+        "ring_px": int(args.ring_px),
+        "strict_ink_thr": int(args.strict_ink_thr),
+        "loose_ink_thr": int(args.loose_ink_thr),
+    }
+    n_pending = sum(len(slots) for slots in pending.values())
+    workers = int(args.workers) if int(args.workers) > 0 else (os.cpu_count() or 1)
+
+    # Center offsets the renderer recorded for these exact files (see
+    # render_metrics.py); only the rest are decoded.
+    pending_files = [rows[i][0].get("file") for slots in pending.values() for i in slots]
+    known, found = stats_store(dataset_dir).peek(pending_files) if pending_files else (None, [])
+    render_stats = {fn: known[k] for k, fn in enumerate(pending_files) if found[k]}
+
+    def crops(slots: list[int]) -> list[tuple]:
+        return [
+            (rows[i][1], dataset_dir / rows[i][0].get("file"), render_stats.get(rows[i][0].get("file")))
+            for i in slots
+        ]
+
+    def store(slots: list[int], measured: list[dict]) -> None:
+        for i, m in zip(slots, measured):
+            e, box, cache_key, _m = rows[i]
+            if cache_key:
+                metrics_cache.put(cache_key, m)
+            rows[i] = (e, box, cache_key, m)
+
+    if workers > 1 and n_pending >= POOL_MIN_CROPS:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(str(source_dir), int(args.max_page_mb) * 1024 * 1024, args.raw_cache_dir),
+        ) as pool:
+            futures = [
+                (batch, pool.submit(_measure_batch, page_name, crops(batch), params))
+                for page_name, slots in pending.items()
+                for batch in (slots[i : i + POOL_BATCH] for i in range(0, len(slots), POOL_BATCH))
+            ]
+            for batch, fut in futures:
+                store(batch, fut.result())
+    else:
+        for page_name, slots in pending.items():
+            store(slots, measure_page(pages, page_name, crops(slots), **params))
+
+    for e, box, _key, m in rows:
+        filename = e.get("file")
+        ch = e.get("char")
+        src = e.get("source") or {}
+        page_name = src.get("image")
+        crop_box = src.get("crop_box")
+        if m is None:
             # Still record missing output.
             report_entries.append(
                 {
@@ -149,37 +286,9 @@ def main() -> int:
             )
             continue
 
-        page = load_page(page_name)
-        crop = page.crop(
-            (
-                int(crop_box[0]),
-                int(crop_box[1]),
-                int(crop_box[2]),
-                int(crop_box[3]),
-            )
-        )
-        crop_arr = np.array(crop)
-
-        strict_mask = ink_mask(crop_arr, ink_threshold=int(args.strict_ink_thr))
-        loose_mask = ink_mask(crop_arr, ink_threshold=int(args.loose_ink_thr))
-
-        edge_touch_strict = edge_touch(strict_mask, margin=2)
-        edge_touch_loose = edge_touch(loose_mask, margin=2)
-
-        # Outer ring ink: evidence of cropping too tight.
-        ring = compute_outer_ring_ink(
-            page,
-            crop_box=(
-                int(crop_box[0]),
-                int(crop_box[1]),
-                int(crop_box[2]),
-                int(crop_box[3]),
-            ),
-            ring_px=int(args.ring_px),
-            ink_threshold=int(args.loose_ink_thr),
-        )
-
-        center = compute_center_offset(png_path)
+        edge_touch_loose = int(m["edge_touch_loose"])
+        ring = OuterRingInk(**m["ring"])
+        center = CenterOffset(dx=m["center"][0], dy=m["center"][1]) if m["center"] else None
         flags: list[str] = []
 
         if ring.contact_ink_pixels >= 40:
@@ -245,10 +354,10 @@ def main() -> int:
                     "pos_in_line": src.get("pos_in_line"),
                 },
                 "metrics": {
-                    "crop_wh": [int(crop.width), int(crop.height)],
-                    "strict_ink": int(strict_mask.sum()),
-                    "loose_ink": int(loose_mask.sum()),
-                    "edge_touch_strict": int(edge_touch_strict),
+                    "crop_wh": [int(m["crop_wh"][0]), int(m["crop_wh"][1])],
+                    "strict_ink": int(m["strict_ink"]),
+                    "loose_ink": int(m["loose_ink"]),
+                    "edge_touch_strict": int(m["edge_touch_strict"]),
                     "edge_touch_loose": int(edge_touch_loose),
                     "outer_ring_px": int(args.ring_px),
                     "outer_ring_ink": int(ring.ring_ink_pixels),
@@ -268,10 +377,12 @@ def main() -> int:
             }
         )
 
+    metrics_cache.save()
+
     # Post-pass: cross-cell overlap detection and near-duplicate mismatch.
     overlap_pairs = add_overlap_adjacent_cell_flags(report_entries, thr=OVERLAP_Y_THR)
     dup_pairs = add_near_duplicate_mismatch_flags(
-        report_entries, dataset_dir=dataset_dir, sim_thr=NEAR_DUP_SIM_THR
+        report_entries, dataset_dir=dataset_dir, sim_thr=NEAR_DUP_SIM_THR, index_kind=args.near_dup_index
     )
 
     # Re-sort after adding flags/score bumps.
@@ -490,22 +601,15 @@ def add_overlap_adjacent_cell_flags(entries: list[dict], *, thr: float) -> list[
 
 
 def _feat_32x32(png_path: Path) -> np.ndarray:
-    resampling = getattr(Image, "Resampling", None)
-    resample = getattr(resampling, "BILINEAR", 2)
-    img = Image.open(png_path).convert("L").resize((32, 32), resample)
-    a = np.asarray(img, dtype=np.float32) / 255.0
-    a = 1.0 - a
-    a = a - float(a.mean())
-    n = float(np.linalg.norm(a))
-    if n > 1e-6:
-        a = a / n
-    return a.reshape(-1)
+    return file_gray32(png_path)
 
 
 def add_near_duplicate_mismatch_flags(
-    entries: list[dict], *, dataset_dir: Path, sim_thr: float
+    entries: list[dict], *, dataset_dir: Path, sim_thr: float, index_kind: str = "auto"
 ) -> list[dict]:
-    # Small dataset; O(n^2) is acceptable.
+    # Features persist under <dataset>/.features (only new/changed crops are
+    # featurized; renderers store theirs at render time); best neighbours come
+    # from a blocked or LSH index, so memory stays bounded for merged datasets.
     items: list[tuple[str, Path, dict]] = []
     for r in entries:
         fn = str(r.get("file") or "")
@@ -519,20 +623,17 @@ def add_near_duplicate_mismatch_flags(
     if len(items) < 3:
         return []
 
-    feats = []
-    for _, p, _ in items:
-        feats.append(_feat_32x32(p))
-    F = np.stack(feats, axis=0)
-    sim = F @ F.T
-    np.fill_diagonal(sim, -1.0)
+    store = feature_store(dataset_dir)
+    F = store.get([fn for fn, _, _ in items])
+    nn_idx, nn_sim = make_index(index_kind, F).neighbours(1)
 
     pairs: list[dict] = []
     seen: set[tuple[str, str]] = set()
 
-    for i in range(sim.shape[0]):
-        j = int(sim[i].argmax())
-        s = float(sim[i, j])
-        if s < float(sim_thr):
+    for i in range(F.shape[0]):
+        j = int(nn_idx[i, 0])
+        s = float(nn_sim[i, 0])
+        if j < 0 or s < float(sim_thr):
             continue
 
         a_fn, _, a_r = items[i]
@@ -575,6 +676,195 @@ def add_near_duplicate_mismatch_flags(
     return pairs
 
 
+class MetricsCache:
+    """Per-crop measurements keyed by (page bytes, crop box, output bytes).
+
+    Lets a rebuilt dataset skip page decoding and mask work for crops whose
+    inputs did not change. Flags/scores are always re-derived from the cached
+    measurements, so cross-entry passes stay correct.
+
+    File digests are memoized by (size, mtime_ns), so a rerun after a few
+    crops were re-rendered only reads those files, not every page and PNG.
+    """
+
+    MAX_ENTRIES = 200_000
+
+    def __init__(self, path: Path | None, *, params: dict):
+        self.path = path
+        self.params = dict(params)
+        self.entries: dict[str, dict] = {}
+        self.digests: dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if path is None or not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if data.get("version") == QA_METRICS_VERSION and data.get("params") == self.params:
+            self.entries = dict(data.get("entries") or {})
+            self.digests = dict(data.get("digests") or {})
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def digest(self, path: Path) -> str:
+        """sha256 of `path`, re-read only when its size or mtime changed."""
+
+        st = path.stat()
+        name = str(path.resolve())
+        memo = self.digests.pop(name, None)
+        if memo is None or memo[0] != st.st_size or memo[1] != st.st_mtime_ns:
+            memo = [st.st_size, st.st_mtime_ns, hashlib.sha256(path.read_bytes()).hexdigest()]
+            self._dirty = True
+        # Re-inserted so recently used digests survive the cap in save().
+        self.digests[name] = memo
+        return memo[2]
+
+    def key(self, page_sha: str, box: tuple[int, int, int, int], png_path: Path) -> str:
+        h = hashlib.sha256()
+        h.update(page_sha.encode("ascii"))
+        h.update(json.dumps(list(box)).encode("ascii"))
+        h.update(self.digest(png_path).encode("ascii"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        m = self.entries.get(key)
+        if m is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return m
+
+    def put(self, key: str, m: dict) -> None:
+        self.entries[key] = m
+        self._dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        # Dicts keep insertion order: drop the oldest entries past the cap.
+        items = list(self.entries.items())[-self.MAX_ENTRIES :]
+        digests = list(self.digests.items())[-self.MAX_ENTRIES :]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "version": QA_METRICS_VERSION,
+                    "params": self.params,
+                    "entries": dict(items),
+                    "digests": dict(digests),
+                },
+                ensure_ascii=False,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+        print(f"QA metrics cache: hits={self.hits} misses={self.misses}")
+
+
+_worker: dict = {}
+
+
+def _init_worker(source_dir: str, max_bytes: int, raw_cache_dir: str | None) -> None:
+    _worker["pages"] = PageCache(
+        Path(source_dir),
+        max_bytes=max_bytes,
+        raw_cache_dir=Path(raw_cache_dir) if raw_cache_dir else None,
+    )
+
+
+def _measure_batch(page_name: str, items: list, params: dict) -> list[dict]:
+    return measure_page(_worker["pages"], page_name, items, **params)
+
+
+def measure_page(
+    pages: Any,
+    page_name: str,
+    items: list[tuple],
+    *,
+    engine: str,
+    ring_px: int,
+    strict_ink_thr: int,
+    loose_ink_thr: int,
+) -> list[dict]:
+    """`measure_entry` for several (box, png_path, render_stats) crops of one page.
+
+    engine="page" answers all boxes from one page region (scripts/qa_engine.py);
+    boxes it does not cover (past the page edge, under 3px) and engine="crop"
+    use `measure_entry`. `render_stats` (a render_metrics.center_stats row
+    recorded at render time, or None) saves decoding the output image.
+    """
+
+    params = dict(ring_px=int(ring_px), strict_ink_thr=int(strict_ink_thr), loose_ink_thr=int(loose_ink_thr))
+    if engine == "page":
+        measured = measure_boxes(pages, page_name, [it[0] for it in items], **params)
+    else:
+        measured = [None] * len(items)
+    out: list[dict] = []
+    for (box, png_path, stats), m in zip(items, measured):
+        if m is None:
+            m = measure_entry(pages, page_name, box, png_path, center_stats=stats, **params)
+        else:
+            m["center"] = center_of(stats if stats is not None else file_stats(png_path))
+        out.append(m)
+    return out
+
+
+def measure_entry(
+    pages: Any,
+    page_name: str,
+    box: tuple[int, int, int, int],
+    png_path: Path,
+    *,
+    ring_px: int,
+    strict_ink_thr: int,
+    loose_ink_thr: int,
+    center_stats: np.ndarray | None = None,
+) -> dict:
+    """Per-crop measurements (everything flags/score are derived from).
+
+    `center_stats`: the output's render_metrics.center_stats row when the
+    renderer recorded it; otherwise the output image is decoded.
+    """
+
+    # Only the crop and its outer ring are converted (masks are pixel-wise),
+    # so large pages never need page-level planes here.
+    w, h = pages.size(page_name)
+    r = int(max(1, ring_px))
+    win = (max(0, box[0] - r), max(0, box[1] - r), min(w, box[2] + r), min(h, box[3] + r))
+    win = (win[0], win[1], max(win[0], win[2]), max(win[1], win[3]))
+    planes = pages.region_planes(page_name, win)
+    inner = (box[0] - win[0], box[1] - win[1], box[2] - win[0], box[3] - win[1])
+    strict_mask = crop_mask(planes.mask(int(strict_ink_thr)), inner)
+    loose_window = planes.mask(int(loose_ink_thr))
+    loose_mask = crop_mask(loose_window, inner)
+
+    # Outer ring ink: evidence of cropping too tight.
+    ring = compute_outer_ring_ink(
+        (w, h),
+        crop_box=box,
+        ring_px=int(ring_px),
+        ink=loose_window,
+        ink_origin=(win[0], win[1]),
+    )
+    center = center_of(center_stats if center_stats is not None else file_stats(png_path))
+    return {
+        "crop_wh": [int(box[2] - box[0]), int(box[3] - box[1])],
+        "strict_ink": int(strict_mask.sum()),
+        "loose_ink": int(loose_mask.sum()),
+        "edge_touch_strict": int(edge_touch(strict_mask, margin=2)),
+        "edge_touch_loose": int(edge_touch(loose_mask, margin=2)),
+        "ring": asdict(ring),
+        "center": center,
+    }
+
+
 def fmt(v) -> str:
     if v is None:
         return "-"
@@ -597,18 +887,21 @@ def edge_touch(mask: np.ndarray, margin: int) -> int:
     )
 
 
-def ink_mask(arr: np.ndarray, *, ink_threshold: int) -> np.ndarray:
-    r = arr[..., 0].astype(np.int16)
-    g = arr[..., 1].astype(np.int16)
-    b = arr[..., 2].astype(np.int16)
-    gray = (0.299 * r + 0.587 * g + 0.114 * b).astype(np.float32)
-
-    # Heuristic: seals are red-ish and not too dark.
-    redish = (r > 120) & ((r - g) > 40) & ((r - b) > 40)
-    seal = redish & (gray > 82)
+def crop_mask(mask: np.ndarray, box: tuple[int, int, int, int]) -> np.ndarray:
+    """`ink_mask(np.array(page.crop(box)))` computed from a page (or window) mask.
 
-    ink = gray < float(int(ink_threshold))
-    return ink & (~seal)
+    PIL pads out-of-page regions with black, which counts as ink.
+    """
+    x0, y0, x1, y1 = box
+    h, w = mask.shape
+    if 0 <= x0 <= x1 <= w and 0 <= y0 <= y1 <= h:
+        return mask[y0:y1, x0:x1]
+    out = np.ones((max(0, y1 - y0), max(0, x1 - x0)), dtype=bool)
+    sx0, sy0 = max(0, x0), max(0, y0)
+    sx1, sy1 = min(w, x1), min(h, y1)
+    if sx1 > sx0 and sy1 > sy0:
+        out[sy0 - y0 : sy1 - y0, sx0 - x0 : sx1 - x0] = mask[sy0:sy1, sx0:sx1]
+    return out
 
 
 @dataclass(frozen=True)
@@ -624,14 +917,22 @@ class OuterRingInk:
 
 
 def compute_outer_ring_ink(
-    page: Image.Image,
+    page_size: tuple[int, int],
     *,
     crop_box: tuple[int, int, int, int],
     ring_px: int,
-    ink_threshold: int,
+    ink: np.ndarray,
+    ink_origin: tuple[int, int] = (0, 0),
 ) -> OuterRingInk:
+    """Ring/contact ink around `crop_box` (page coordinates).
+
+    `ink` is the loose ink mask of the page, or of any window at `ink_origin`
+    that covers the crop plus its ring within the page.
+    """
+
     x0, y0, x1, y1 = crop_box
-    w, h = page.size
+    w, h = page_size
+    ox, oy = int(ink_origin[0]), int(ink_origin[1])
     r = int(max(1, ring_px))
 
     ex0 = max(0, x0 - r)
@@ -650,9 +951,7 @@ def compute_outer_ring_ink(
             contact_bottom=0,
         )
 
-    outer = page.crop((ex0, ey0, ex1, ey1))
-    arr = np.array(outer)
-    mask = ink_mask(arr, ink_threshold=int(ink_threshold))
+    mask = ink[ey0 - oy : ey1 - oy, ex0 - ox : ex1 - ox]
 
     # Remove the inner region.
     ix0 = x0 - ex0
@@ -673,7 +972,7 @@ def compute_outer_ring_ink(
     # clipping signal than "any ring ink" because it reduces false positives
     # from neighbor-column noise.
     inner = np.zeros_like(mask, dtype=bool)
-    inner_mask = ink_mask(np.array(page.crop((x0, y0, x1, y1))), ink_threshold=int(ink_threshold))
+    inner_mask = crop_mask(ink, (x0 - ox, y0 - oy, x1 - ox, y1 - oy))
     ih, iw = inner_mask.shape
     inner[iy0 : iy0 + ih, ix0 : ix0 + iw] = inner_mask
     inner_d = dilate_3x3(inner)
@@ -738,46 +1037,8 @@ class CenterOffset:
 
 
 def compute_center_offset(png_path: Path) -> CenterOffset | None:
-    try:
-        img = Image.open(png_path).convert("RGB")
-    except Exception:
-        return None
-
-    arr = np.array(img).astype(np.int16)
-    bg = np.array(BG_RGB, dtype=np.int16)
-    diff = np.max(np.abs(arr - bg[None, None, :]), axis=2)
-    nonbg = diff > 8
-    if int(nonbg.sum()) < 80:
-        return None
-
-    ys, xs = np.where(nonbg)
-    x0, x1 = int(xs.min()), int(xs.max() + 1)
-    y0, y1 = int(ys.min()), int(ys.max() + 1)
-    patch = arr[y0:y1, x0:x1]
-
-    # adaptive-ish ink threshold inside the patch
-    r = patch[..., 0].astype(np.int16)
-    g = patch[..., 1].astype(np.int16)
-    b = patch[..., 2].astype(np.int16)
-    gray = (0.299 * r + 0.587 * g + 0.114 * b).astype(np.float32)
-    p = float(np.percentile(gray.reshape(-1), 12.0))
-    thr = max(70.0, min(160.0, p + 18.0))
-    ink = gray < thr
-
-    # exclude background-like pixels inside patch
-    diff2 = np.max(np.abs(patch - bg[None, None, :]), axis=2)
-    ink = ink & (diff2 > 8)
-    if int(ink.sum()) < 80:
-        return None
-
-    ys2, xs2 = np.where(ink)
-    cx = float(x0) + float(xs2.mean())
-    cy = float(y0) + float(ys2.mean())
-    dx = cx - (arr.shape[1] / 2.0)
-    dy = cy - (arr.shape[0] / 2.0)
-    if not math.isfinite(dx) or not math.isfinite(dy):
-        return None
-    return CenterOffset(dx=float(dx), dy=float(dy))
+    c = center_of(file_stats(png_path))
+    return CenterOffset(dx=c[0], dy=c[1]) if c else None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""QA stats of rendered crops, taken from the in-memory image at render time.
+
+qa_char_crops.py needs, per output crop, the glyph center offset (ink
+centroid vs image center) and a 32x32 gray feature for near-duplicate
+checks. Both used to come from re-opening and decoding every PNG/WebP the
+renderer had just written. Renderers save through `RenderMetrics.save()`,
+which computes them from the image as a reader will decode it (the image
+itself for PNG; the encoded bytes, decoded in memory, for lossy formats) and
+`flush()` stores them as glyph_index.FeatureStore rows under
+`<dataset>/.features/`:
+
+  qa_gray32   float32 x 1024  the near-duplicate feature QA reads
+  qa_render   float64 x 4     center dx, dy (NaN: no glyph found),
+                              ink px, non-background px
+
+Rows are signed with the file's size/mtime/sha1 like any FeatureStore row,
+so QA decodes only crops that were rewritten by something else.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from glyph_index import FeatureStore
+
+BG_RGB = (10, 10, 12)
+
+FEATURE_NAME = "qa_gray32"
+FEATURE_DIM = 32 * 32
+STATS_NAME = "qa_render"
+STATS_DIM = 4
+
+# Formats that decode to exactly the saved image.
+LOSSLESS_FORMATS = {"PNG"}
+
+
+def center_stats(arr: np.ndarray) -> np.ndarray:
+    """[dx, dy, ink px, non-background px] of an RGB crop (dx/dy NaN: no glyph)."""
+
+    out = np.array([math.nan, math.nan, 0.0, 0.0], dtype=np.float64)
+    arr = arr.astype(np.int16)
+    bg = np.array(BG_RGB, dtype=np.int16)
+    diff = np.max(np.abs(arr - bg[None, None, :]), axis=2)
+    nonbg = diff > 8
+    out[3] = int(nonbg.sum())
+    if int(nonbg.sum()) < 80:
+        return out
+
+    ys, xs = np.where(nonbg)
+    x0, x1 = int(xs.min()), int(xs.max() + 1)
+    y0, y1 = int(ys.min()), int(ys.max() + 1)
+    patch = arr[y0:y1, x0:x1]
+
+    # adaptive-ish ink threshold inside the patch
+    r = patch[..., 0].astype(np.int16)
+    g = patch[..., 1].astype(np.int16)
+    b = patch[..., 2].astype(np.int16)
+    gray = (0.299 * r + 0.587 * g + 0.114 * b).astype(np.float32)
+    p = float(np.percentile(gray.reshape(-1), 12.0))
+    thr = max(70.0, min(160.0, p + 18.0))
+    ink = gray < thr
+
+    # exclude background-like pixels inside patch
+    diff2 = np.max(np.abs(patch - bg[None, None, :]), axis=2)
+    ink = ink & (diff2 > 8)
+    out[2] = int(ink.sum())
+    if int(ink.sum()) < 80:
+        return out
+
+    ys2, xs2 = np.where(ink)
+    cx = float(x0) + float(xs2.mean())
+    cy = float(y0) + float(ys2.mean())
+    dx = cx - (arr.shape[1] / 2.0)
+    dy = cy - (arr.shape[0] / 2.0)
+    if math.isfinite(dx) and math.isfinite(dy):
+        out[0], out[1] = dx, dy
+    return out
+
+
+def center_of(stats: np.ndarray) -> list[float] | None:
+    """[dx, dy] from a `center_stats` row, None when no glyph was found."""
+
+    dx, dy = float(stats[0]), float(stats[1])
+    if math.isnan(dx) or math.isnan(dy):
+        return None
+    return [dx, dy]
+
+
+def gray32(img: Image.Image) -> np.ndarray:
+    """L2-normalized, mean-removed 32x32 inverted gray vector."""
+
+    resampling = getattr(Image, "Resampling", None)
+    resample = getattr(resampling, "BILINEAR", 2)
+    a = np.asarray(img.convert("L").resize((32, 32), resample), dtype=np.float32) / 255.0
+    a = 1.0 - a
+    a = a - float(a.mean())
+    n = float(np.linalg.norm(a))
+    if n > 1e-6:
+        a = a / n
+    return a.reshape(-1)
+
+
+def file_stats(path: Path) -> np.ndarray:
+    """`center_stats` of a crop on disk (the decode fallback)."""
+
+    try:
+        arr = np.array(Image.open(path).convert("RGB"))
+    except Exception:
+        return np.array([math.nan, math.nan, 0.0, 0.0], dtype=np.float64)
+    return center_stats(arr)
+
+
+def file_gray32(path: Path) -> np.ndarray:
+    return gray32(Image.open(path))
+
+
+def feature_store(dataset_dir: Path) -> FeatureStore:
+    return FeatureStore(dataset_dir, FEATURE_NAME, featurize=file_gray32, dim=FEATURE_DIM)
+
+
+def stats_store(dataset_dir: Path) -> FeatureStore:
+    return FeatureStore(dataset_dir, STATS_NAME, featurize=file_stats, dim=STATS_DIM, dtype=np.float64)
+
+
+class RenderMetrics:
+    """Collects QA stats of crops as they are saved into `dataset_dir`."""
+
+    def __init__(self, dataset_dir: Path):
+        self.root = Path(dataset_dir)
+        # file (relative to root) -> (stats, gray32)
+        self.rows: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    def save(self, img: Image.Image, path: Path, *, format: str, **params) -> None:
+        """`img.save(path, format=..., **params)` + record its stats."""
+
+        fmt = format.upper()
+        if fmt in LOSSLESS_FORMATS:
+            img.save(path, format=fmt, **params)
+            decoded = img
+        else:
+            buf = io.BytesIO()
+            img.save(buf, format=fmt, **params)
+            Path(path).write_bytes(buf.getvalue())
+            decoded = Image.open(io.BytesIO(buf.getvalue()))
+        rel = Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+        rgb = decoded.convert("RGB")
+        self.rows[rel] = (center_stats(np.asarray(rgb)), gray32(decoded))
+
+    def merge(self, rows: dict[str, tuple[np.ndarray, np.ndarray]]) -> None:
+        self.rows.update(rows)
+
+    def flush(self) -> None:
+        """Write collected rows to the dataset's FeatureStores (files must be final)."""
+
+        rows = {fn: r for fn, r in self.rows.items() if (self.root / fn).exists()}
+        if rows:
+            stats_store(self.root).put({fn: r[0] for fn, r in rows.items()})
+            feature_store(self.root).put({fn: r[1] for fn, r in rows.items()})
+        self.rows.clear()
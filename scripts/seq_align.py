@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""Banded, NumPy-backed sequence aligner used by `scripts/ml_align_sequence.py`.
+
+Aligns an ordered detection sequence (n items) to a gold text (m chars) with
+the same operations and costs as the original list-of-lists DP:
+
+- skip_det:  `skip_det_pen + 0.25 * match_cost(i)`
+- skip_char: `skip_char_pen`
+- match1:    `match_cost(i) + cls(i, text[j])`
+- match2:    `match_cost(i) + match2_pen + cls(i, text[j]) + cls(i, text[j+1])`
+
+where `match_cost(i) = -log(score_i)` and `cls` is the classifier penalty
+(`cls_weight * -log(p)` for a top-k hit, `cls_miss_pen` otherwise, 0 when the
+detection has no predictions).
+
+The old implementation kept an (n+1) x (m+1) matrix of Python floats plus one
+of `Step` objects, i.e. tens of millions of objects for a full stele. Here only
+two cost rows are alive at a time and the traceback is one int8 per cell, so
+memory is `n * band_width` bytes. Each DP row is a handful of vectorized
+operations:
+
+- skip_det / match1 / match2 come from the previous row (shifted by 0/1/2);
+- skip_char runs inside the row; a running minimum finds the start of each
+  skip run in one pass.
+
+`band=0` computes every cell and reproduces the old DP (path, cost and tie
+breaking): float64 sums are evaluated in the same order and ties keep the
+first candidate in the old loop order. The only difference is that a run of k
+skip_chars is `cost + k * c` rather than k chained additions, which for the
+default integral c is the same float unless the run crosses a power of two
+(never seen in `scripts/bench_seq_align.py`). `band=w` restricts row i to
+columns within `w` of the diagonal `i * m / n`, which is exact whenever the
+optimal path stays in the band.
+
+`align_anchored` first picks confident anchors (rare text chars predicted
+top-1 with high probability by exactly as many detections as they occur,
+close to the line through their neighbours and kept in increasing order),
+forces them to match1 and aligns the gaps between them as independent DPs on
+a process pool. An anchor whose surrounding window aligns cheaper without it
+is dropped. Segments are short, so a 10k-char stele costs about
+sum(segment_n * segment_m) cells instead of n * m.
+
+scripts/ isn't a Python package; callers run with scripts/ on sys.path.
+"""
+
+from __future__ import annotations
+
+import math
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Any
+
+import numpy as np
+
+
+# Traceback codes (int8). 0 marks the origin / unreachable cells.
+NONE = 0
+SKIP_DET = 1
+SKIP_CHAR = 2
+MATCH1 = 3
+MATCH2 = 4
+
+OPS = {SKIP_DET: "skip_det", SKIP_CHAR: "skip_char", MATCH1: "match1", MATCH2: "match2"}
+
+
+@dataclass(frozen=True)
+class AlignCosts:
+    skip_det_pen: float = 1.2
+    skip_char_pen: float = 1.0
+    match2_pen: float = 0.45
+    cls_miss_pen: float = 1.4
+    cls_weight: float = 0.7
+
+
+@dataclass
+class Alignment:
+    # (op, det_index, text_index) in path order, matches only.
+    matches: list[tuple[str, int, int]]
+    best_j: int
+    cost: float
+    stats: dict[str, Any]
+
+
+class ClsTable:
+    """Classifier penalties for every (detection, text char) pair.
+
+    Text chars are mapped to integer codes once; each detection keeps its
+    top-k codes and penalties, so the penalty row over any slice of the text is
+    a vectorized gather instead of a per-cell list scan.
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        text: str,
+        preds: dict[str, list[tuple[str, float]]],
+        costs: AlignCosts,
+    ) -> None:
+        vocab: dict[str, int] = {}
+        self.text_codes = np.fromiter(
+            (vocab.setdefault(ch, len(vocab)) for ch in text), dtype=np.int32, count=len(text)
+        )
+        self.vocab_size = len(vocab)
+        self.has_preds = np.zeros(len(ids), dtype=bool)
+        self.cand_codes: list[np.ndarray] = []
+        self.cand_pens: list[np.ndarray] = []
+        self.miss_pen = float(costs.cls_miss_pen)
+        for i, det_id in enumerate(ids):
+            cand = preds.get(det_id) if preds else None
+            codes: list[int] = []
+            pens: list[float] = []
+            if cand:
+                self.has_preds[i] = True
+                seen: set[str] = set()
+                for ch, p in cand:
+                    # The old scan returned on the first hit, so later
+                    # duplicates of a char never mattered.
+                    if ch in seen:
+                        continue
+                    seen.add(ch)
+                    code = vocab.get(ch)
+                    if code is None:
+                        continue
+                    codes.append(code)
+                    pens.append(float(costs.cls_weight) * (-math.log(max(1e-6, min(1.0, float(p))))))
+            self.cand_codes.append(np.asarray(codes, dtype=np.int32))
+            self.cand_pens.append(np.asarray(pens, dtype=np.float64))
+
+    def row(self, i: int, lo: int, hi: int) -> np.ndarray:
+        """Penalties of detection i against text[lo:hi] (float64)."""
+        hi = max(lo, hi)
+        if not self.has_preds[i]:
+            return np.zeros(hi - lo, dtype=np.float64)
+        lut = np.full(self.vocab_size, self.miss_pen, dtype=np.float64)
+        lut[self.cand_codes[i]] = self.cand_pens[i]
+        return lut[self.text_codes[lo:hi]]
+
+
+def band_limits(n: int, m: int, band: int) -> tuple[np.ndarray, np.ndarray]:
+    """Inclusive column range [lo[i], hi[i]] of DP row i (0..n).
+
+    Both bounds are non-decreasing in i. `band <= 0` means every column. The
+    half-width is widened to the diagonal slope so consecutive rows always
+    overlap (a row can move at most 2 columns via match2 before skip_char).
+    """
+    rows = np.arange(n + 1, dtype=np.float64)
+    if band <= 0 or n == 0:
+        return np.zeros(n + 1, dtype=np.int64), np.full(n + 1, m, dtype=np.int64)
+    slope = m / float(n)
+    w = max(int(band), int(math.ceil(slope)) + 2)
+    center = rows * slope
+    lo = np.clip(np.floor(center - w), 0, m).astype(np.int64)
+    hi = np.clip(np.ceil(center + w), 0, m).astype(np.int64)
+    hi[-1] = m
+    return lo, hi
+
+
+def align(
+    scores: list[float],
+    ids: list[str],
+    text: str,
+    preds: dict[str, list[tuple[str, float]]] | None = None,
+    costs: AlignCosts = AlignCosts(),
+    *,
+    band: int = 0,
+) -> Alignment:
+    """Align detections (`scores`/`ids`, reading order) to `text`.
+
+    The end state is (n, best_j) with free trailing text, as before. Returns the
+    matched steps plus `stats`: seconds, cells computed, traceback size and the
+    process peak RSS after the run.
+    """
+    t0 = time.perf_counter()
+    res = _align(scores, ids, text, preds or {}, costs, band)
+    res.stats["seconds"] = round(time.perf_counter() - t0, 4)
+    res.stats["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return res
+
+
+def _align(
+    scores: list[float],
+    ids: list[str],
+    text: str,
+    preds: dict[str, list[tuple[str, float]]],
+    costs: AlignCosts,
+    band: int,
+    free_end: bool = True,
+) -> Alignment:
+    n = len(ids)
+    m = len(text)
+    skip_det_pen = float(costs.skip_det_pen)
+    skip_char_pen = float(costs.skip_char_pen)
+    match2_pen = float(costs.match2_pen)
+
+    # Per-detection scalars via math.log (not np.log) to match the old costs
+    # bit for bit.
+    mc = [-math.log(s) for s in scores]
+    cls = ClsTable(ids, text, preds, costs)
+
+    lo, hi = band_limits(n, m, band)
+    width = int((hi - lo).max()) + 1
+    back = np.zeros((n + 1, width), dtype=np.int8)
+    idx = np.arange(width, dtype=np.int64)
+
+    # Row 0: only skip_char, chained exactly like the old loop.
+    h0 = int(hi[0])
+    row = np.fromiter(accumulate([0.0] + [skip_char_pen] * h0, lambda a, b: a + b), dtype=np.float64, count=h0 + 1)
+    row = row[int(lo[0]) :]
+    back[0, 1 : h0 + 1 - int(lo[0])] = SKIP_CHAR
+    cells = int(row.size)
+
+    for i in range(n):
+        plo, phi = int(lo[i]), int(hi[i])
+        nlo, nhi = int(lo[i + 1]), int(hi[i + 1])
+        size = nhi - nlo + 1
+        cur = np.full(size, np.inf, dtype=np.float64)
+        code = np.zeros(size, dtype=np.int8)
+
+        # Penalties for text[plo .. min(phi + 1, m - 1)] (match2 needs j + 1).
+        crow = cls.row(i, plo, min(phi + 2, m))
+        base = mc[i]
+
+        # Candidates in the old loop order for a target column J: match2 from
+        # J-2, then match1 from J-1, then skip_det from J; later ones need to
+        # be strictly better.
+        for op, shift in ((MATCH2, 2), (MATCH1, 1), (SKIP_DET, 0)):
+            # Source columns j = J - shift within [plo, phi] and J in [nlo, nhi].
+            j0 = max(plo, nlo - shift)
+            j1 = min(phi, nhi - shift)
+            if op == MATCH2:
+                j1 = min(j1, m - 2)
+            elif op == MATCH1:
+                j1 = min(j1, m - 1)
+            if j1 < j0:
+                continue
+            src = row[j0 - plo : j1 - plo + 1]
+            if op == SKIP_DET:
+                v = src + skip_det_pen + 0.25 * base
+            elif op == MATCH1:
+                v = src + base + crow[j0 - plo : j1 - plo + 1]
+            else:
+                v = src + base + match2_pen + crow[j0 - plo : j1 - plo + 1] + crow[j0 - plo + 1 : j1 - plo + 2]
+            t0 = j0 + shift - nlo
+            dst = cur[t0 : t0 + v.size]
+            better = v < dst
+            dst[better] = v[better]
+            code[t0 : t0 + v.size][better] = op
+
+        # skip_char inside the row: f[j] = min(cur[j], f[j-1] + c), i.e. the
+        # best run start s <= j minimizing cur[s] + (j - s) * c. A running min
+        # of cur[s] - s * c finds the start; the value is then recomputed from
+        # cur[s] so improved cells carry a real path cost. Ties keep cur[j]
+        # (the old strict <).
+        if size > 1:
+            h = cur - idx[:size] * skip_char_pen
+            start = h <= np.minimum.accumulate(h)
+            src = np.maximum.accumulate(np.where(start, idx[:size], 0))
+            better = ~start
+            if better.any():
+                k = idx[:size][better]
+                v = cur[src[better]] + (k - src[better]) * skip_char_pen
+                keep = v < cur[k]
+                cur[k[keep]] = v[keep]
+                code[k[keep]] = SKIP_CHAR
+
+        back[i + 1, :size] = code
+        row = cur
+        cells += size
+
+    last = row
+    # Free end: trailing text may stay unaligned. Fixed end (anchored
+    # segments): the whole text slice is consumed.
+    k = (int(np.argmin(last)) if free_end else last.size - 1) if last.size else 0
+    best_j = int(lo[n]) + k
+    cost = float(last[k]) if last.size else 0.0
+    if not math.isfinite(cost):
+        raise ValueError("alignment band too narrow: no path reaches the last detection")
+
+    matches: list[tuple[str, int, int]] = []
+    i, j = n, best_j
+    while i > 0 or j > 0:
+        op = int(back[i, j - int(lo[i])])
+        if op == NONE:
+            break
+        if op == SKIP_DET:
+            i -= 1
+        elif op == SKIP_CHAR:
+            j -= 1
+        elif op == MATCH1:
+            i -= 1
+            j -= 1
+            matches.append((OPS[op], i, j))
+        else:
+            i -= 1
+            j -= 2
+            matches.append((OPS[op], i, j))
+    matches.reverse()
+
+    stats = {
+        "n": n,
+        "m": m,
+        "band": int(band),
+        "cells": cells,
+        "traceback_mb": round(back.nbytes / 2**20, 2),
+    }
+    return Alignment(matches=matches, best_j=best_j, cost=cost, stats=stats)
+
+
+# Anchored mode ---------------------------------------------------------------
+
+# Top-1 classifier probability for a detection to become an anchor.
+ANCHOR_MIN_P = 0.9
+
+# Chars occurring more often than this in the text never anchor.
+ANCHOR_MAX_COUNT = 3
+
+# A candidate whose offset `j - i * m / n` differs from the median offset of
+# its ANCHOR_NEIGHBOURS candidates on each side by more than this is dropped.
+ANCHOR_NEIGHBOURS = 2
+ANCHOR_MAX_OFFSET = 16.0
+
+# Band half-width of the unforced DP each anchor is checked against.
+ANCHOR_CHECK_BAND = 32
+
+# Below this many DP cells in total, segments are aligned in-process (pool
+# startup costs more than the DP).
+POOL_MIN_CELLS = 4_000_000
+
+# Segments per pool task, roughly: keeps IPC low and workers balanced.
+POOL_TASKS_PER_WORKER = 4
+
+
+def find_anchors(
+    ids: list[str],
+    text: str,
+    preds: dict[str, list[tuple[str, float]]],
+    *,
+    min_p: float = ANCHOR_MIN_P,
+    max_count: int = ANCHOR_MAX_COUNT,
+) -> list[tuple[int, int]]:
+    """Confident, unambiguous (det_index, text_index) pairs, increasing in both.
+
+    A detection is a candidate when its top-1 prediction has `p >= min_p` and
+    the char is rare in `text` (at most `max_count` occurrences). A char is
+    used only when exactly as many confident detections claim it as it has
+    occurrences; they are then paired in reading order. Candidates off the
+    line through their neighbours (see ANCHOR_MAX_OFFSET) are dropped, then
+    the longest chain increasing in both indices is kept, so a stray
+    confident hit can neither cross the others nor sit far from them.
+    """
+    positions: dict[str, list[int]] = {}
+    for j, ch in enumerate(text):
+        positions.setdefault(ch, []).append(j)
+
+    claimed: dict[str, list[int]] = {}
+    for i, det_id in enumerate(ids):
+        top = preds.get(det_id)
+        if not top:
+            continue
+        ch, p = top[0]
+        if p >= min_p and 0 < len(positions.get(ch, ())) <= max_count:
+            claimed.setdefault(ch, []).append(i)
+    pairs = sorted(
+        pair for ch, dets in claimed.items() if len(dets) == len(positions[ch]) for pair in zip(dets, positions[ch])
+    )
+    slope = len(text) / float(max(1, len(ids)))
+    offsets = [j - i * slope for i, j in pairs]
+    kept: list[tuple[int, int]] = []
+    for k, pair in enumerate(pairs):
+        near = offsets[max(0, k - ANCHOR_NEIGHBOURS) : k] + offsets[k + 1 : k + 1 + ANCHOR_NEIGHBOURS]
+        if len(near) >= 2 and abs(offsets[k] - float(np.median(near))) > ANCHOR_MAX_OFFSET:
+            continue
+        kept.append(pair)
+    pairs = kept
+
+    # Longest strictly increasing subsequence on text_index (dets already
+    # increasing), O(k log k).
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    parent = [-1] * len(pairs)
+    for k, (_i, j) in enumerate(pairs):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[lo] = j
+            tail_idx[lo] = k
+        parent[k] = tail_idx[lo - 1] if lo > 0 else -1
+    chain: list[tuple[int, int]] = []
+    k = tail_idx[-1] if tail_idx else -1
+    while k >= 0:
+        chain.append(pairs[k])
+        k = parent[k]
+    chain.reverse()
+    return chain
+
+
+def _align_segments(tasks: list[tuple]) -> list[Alignment]:
+    # Pool entry point: each task is the argument tuple of `_align`.
+    return [_align(*t) for t in tasks]
+
+
+def _segments(anchors: list[tuple[int, int]], n: int, m: int) -> list[tuple[int, int, int, int, bool]]:
+    # (det_start, det_end, text_start, text_end, free_end) of the gaps.
+    bounds: list[tuple[int, int, int, int, bool]] = []
+    prev_i, prev_j = -1, -1
+    for ai, aj in anchors:
+        bounds.append((prev_i + 1, ai, prev_j + 1, aj, False))
+        prev_i, prev_j = ai, aj
+    bounds.append((prev_i + 1, n, prev_j + 1, m, True))
+    return bounds
+
+
+def align_anchored(
+    scores: list[float],
+    ids: list[str],
+    text: str,
+    preds: dict[str, list[tuple[str, float]]] | None = None,
+    costs: AlignCosts = AlignCosts(),
+    *,
+    band: int = 0,
+    min_p: float = ANCHOR_MIN_P,
+    max_count: int = ANCHOR_MAX_COUNT,
+    workers: int = 1,
+) -> Alignment:
+    """Align with confident anchors forced to match1, segments in parallel.
+
+    The sequences are cut at the anchors (`find_anchors`); each gap between two
+    anchors is an independent DP that must consume its whole text slice, and
+    the tail after the last anchor keeps the free end of `align`.
+
+    Each anchor is then checked: the window spanning its two neighbouring gaps
+    is aligned without forcing it (banded, ANCHOR_CHECK_BAND), and if that is
+    cheaper than the forced path the anchor disagrees with the DP and is
+    dropped (the worst one among adjacent disagreeing anchors first). This
+    repeats until every anchor holds; DPs are cached by their bounds, so a
+    round only aligns the merged gaps and their new windows. DPs run on
+    `workers` processes when a round is large enough. The result has the same
+    shape as `align`, with global indices and the summed cost.
+    """
+    started = time.perf_counter()
+    preds = preds or {}
+    anchors = find_anchors(ids, text, preds, min_p=min_p, max_count=max_count)
+    if not anchors:
+        res = align(scores, ids, text, preds, costs, band=band)
+        res.stats.update({"mode": "anchored", "anchors": 0, "anchors_dropped": 0, "segments": 1, "workers": 1})
+        return res
+
+    n = len(ids)
+    m = len(text)
+    workers = max(1, int(workers))
+    used_pool = False
+    pool: ProcessPoolExecutor | None = None
+    check_band = ANCHOR_CHECK_BAND if band <= 0 else band
+    done: dict[tuple[int, int, int, int, bool, int], Alignment] = {}
+
+    def run(keys: list[tuple[int, int, int, int, bool, int]]) -> None:
+        nonlocal pool, used_pool
+        todo = sorted({k for k in keys if k not in done})
+        tasks = []
+        for d0, d1, j0, j1, free_end, w in todo:
+            seg_ids = ids[d0:d1]
+            seg_preds = {k: preds[k] for k in seg_ids if k in preds}
+            tasks.append((scores[d0:d1], seg_ids, text[j0:j1], seg_preds, costs, w, free_end))
+        sizes = [dp_cells(d0, d1, j0, j1, w) for d0, d1, j0, j1, _, w in todo]
+        cells = sum(sizes)
+        if workers > 1 and cells >= POOL_MIN_CELLS:
+            # Contiguous batches of roughly equal DP size.
+            per_task = max(1, cells // (workers * POOL_TASKS_PER_WORKER))
+            batches: list[list[tuple]] = [[]]
+            acc = 0
+            for task, size in zip(tasks, sizes):
+                if acc >= per_task:
+                    batches.append([])
+                    acc = 0
+                batches[-1].append(task)
+                acc += size
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            used_pool = True
+            results = [r for batch in pool.map(_align_segments, batches) for r in batch]
+        else:
+            results = _align_segments(tasks)
+        done.update(zip(todo, results))
+
+    def dp_cells(d0: int, d1: int, j0: int, j1: int, w: int) -> int:
+        return (d1 - d0 + 1) * min(j1 - j0 + 1, 2 * w + 1 if w > 0 else j1 - j0 + 1)
+
+    def anchor_cost(ai: int, aj: int) -> float:
+        return -math.log(scores[ai]) + _cls_penalty(preds.get(ids[ai]), text[aj], costs)
+
+    dropped = 0
+    rounds = 0
+    try:
+        while True:
+            rounds += 1
+            segs = [(*b, band) for b in _segments(anchors, n, m)]
+            # Window around anchor k = the gap it would leave if dropped,
+            # aligned with a band around its own diagonal.
+            windows = [
+                (segs[k][0], segs[k + 1][1], segs[k][2], segs[k + 1][3], segs[k + 1][4], check_band)
+                for k in range(len(anchors))
+            ]
+            run(segs + windows)
+            gaps = []
+            for k, (ai, aj) in enumerate(anchors):
+                forced = done[segs[k]].cost + anchor_cost(ai, aj) + done[segs[k + 1]].cost
+                free = done[windows[k]].cost
+                gaps.append(forced - free if free < forced - 1e-9 * max(1.0, abs(forced)) else 0.0)
+            # Adjacent anchors share windows, so one bad anchor can make its
+            # neighbours look bad too; drop only local maxima per round.
+            bad = {
+                k
+                for k, g in enumerate(gaps)
+                if g > 0.0 and (k == 0 or g >= gaps[k - 1]) and (k + 1 == len(gaps) or g >= gaps[k + 1])
+            }
+            if not bad:
+                break
+            dropped += len(bad)
+            anchors = [a for k, a in enumerate(anchors) if k not in bad]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    matches: list[tuple[str, int, int]] = []
+    cost = 0.0
+    traceback_mb = 0.0
+    for k, key in enumerate(segs):
+        d0, _d1, j0 = key[:3]
+        res = done[key]
+        matches.extend((op, d0 + i, j0 + j) for op, i, j in res.matches)
+        cost += res.cost
+        traceback_mb = max(traceback_mb, res.stats["traceback_mb"])
+        if k < len(anchors):
+            ai, aj = anchors[k]
+            matches.append(("match1", ai, aj))
+            cost += anchor_cost(ai, aj)
+    best_j = segs[-1][2] + done[segs[-1]].best_j
+
+    stats = {
+        "n": n,
+        "m": m,
+        "band": int(band),
+        "mode": "anchored",
+        "anchors": len(anchors),
+        "anchors_dropped": dropped,
+        "rounds": rounds,
+        "segments": len(segs),
+        "max_segment": max(max(d1 - d0, j1 - j0) for d0, d1, j0, j1, _, _ in segs),
+        "workers": workers if used_pool else 1,
+        "cells": sum(r.stats["cells"] for r in done.values()),
+        "traceback_mb": traceback_mb,
+        "seconds": round(time.perf_counter() - started, 4),
+        # Parent process only; pool workers hold one segment traceback each.
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    return Alignment(matches=matches, best_j=best_j, cost=cost, stats=stats)
+
+
+def _cls_penalty(cand: list[tuple[str, float]] | None, gold: str, costs: AlignCosts) -> float:
+    if not cand:
+        return 0.0
+    for ch, p in cand:
+        if ch == gold:
+            return float(costs.cls_weight) * (-math.log(max(1e-6, min(1.0, float(p)))))
+    return float(costs.cls_miss_pen)
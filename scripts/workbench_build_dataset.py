@@ -8,41 +8,338 @@ V1 goal: produce an InkGrid-consumable dataset directory:
 - page overlays (grid/crop/qa)
 
 This script intentionally keeps dependencies minimal.
+
+`--workers N` renders cells on a process pool: each page is decoded once in
+the parent and shared with the workers through `multiprocessing.shared_memory`
+(no pickled page arrays). Pages are finalized (overlays + index entries)
+strictly in order, so `index.json` is identical to a serial run.
+
+`--cache-dir DIR` makes rebuilds incremental. Each page's outputs (layout,
+crop boxes, rendered PNGs, grid overlay) are stored under a key hashed from
+the page bytes, its override/layout, the effective grid and render params,
+and the renderer source. Unchanged pages are copied from the cache instead
+of being decoded, laid out and rendered; QA per-crop measurements and QA
+overlays are cached the same way (see qa_char_crops.py `--metrics-cache`).
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
 import json
 import os
-import time
 import importlib.util
+import shutil
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from pathlib import Path
 from typing import Any
 
 from PIL import Image, ImageDraw, ImageFont
 
+from dataset_index import write_index
+from job_progress import update_job
+
 try:
     import numpy as np  # type: ignore
+    from grid_layout import split_ink_grid
+    from render_metrics import RenderMetrics
 except Exception:  # pragma: no cover
     np = None
+    split_ink_grid = None
+    RenderMetrics = None
+
+
+# Cells per pool task: amortizes IPC while keeping workers balanced.
+CELL_BATCH = 24
 
+# Bump when the cached page entry layout changes.
+BUILD_CACHE_VERSION = 2
+# Cache entries not used by any build for this long are pruned.
+BUILD_CACHE_MAX_AGE_DAYS = 30
 
-def update_job(job_file: Path | None, *, stage: str, progress: int, note: str | None = None) -> None:
-    if not job_file:
-        return
+
+def load_extractor() -> Any:
+    # Reuse helpers from existing extractor when available.
+    # NOTE: scripts/ isn't a Python package, so import via file path.
+    repo_root = Path(__file__).resolve().parent.parent
+    extract_path = (repo_root / "scripts" / "extract_lantingjixu_chars.py").resolve()
     try:
-        cur = json.loads(job_file.read_text(encoding="utf-8"))
+        spec = importlib.util.spec_from_file_location("extract_lantingjixu_chars", extract_path)
+        if spec is None or spec.loader is None:
+            return None
+        mod = importlib.util.module_from_spec(spec)
+        # Python 3.14 dataclasses expects the module to exist in sys.modules.
+        sys.modules[str(spec.name)] = mod
+        spec.loader.exec_module(mod)
+        return mod
     except Exception:
-        return
-    cur["status"] = "running"
-    cur["stage"] = str(stage)
-    cur["progress"] = int(progress)
-    cur["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
-    if note:
-        cur["log_tail"] = (str(cur.get("log_tail") or "") + "\n" + str(note)).strip()[-6000:]
-    job_file.write_text(json.dumps(cur, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        return None
+
+
+def fallback_render_square(img: Image.Image, size: int, inner_pad: int) -> Image.Image:
+    bg = (10, 10, 12)
+    canvas = Image.new("RGB", (size, size), bg)
+    max_w = max(1, size - inner_pad * 2)
+    max_h = max(1, size - inner_pad * 2)
+    scale = min(max_w / img.width, max_h / img.height)
+    w = max(1, int(round(img.width * scale)))
+    h = max(1, int(round(img.height * scale)))
+    work = img.resize((w, h), Image.Resampling.LANCZOS)
+    canvas.paste(work, ((size - w) // 2, (size - h) // 2))
+    return canvas
+
+
+def crop_array(arr: Any, box: list[int]) -> Image.Image:
+    """`Image.crop` on an RGB array (out-of-page area is black, like PIL)."""
+
+    x0, y0, x1, y1 = [int(v) for v in box]
+    h, w = int(arr.shape[0]), int(arr.shape[1])
+    if 0 <= x0 <= x1 <= w and 0 <= y0 <= y1 <= h:
+        return Image.fromarray(np.ascontiguousarray(arr[y0:y1, x0:x1]), mode="RGB")
+    out = np.zeros((max(0, y1 - y0), max(0, x1 - x0), 3), dtype=np.uint8)
+    sx0, sy0, sx1, sy1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+    if sx1 > sx0 and sy1 > sy0:
+        out[sy0 - y0 : sy1 - y0, sx0 - x0 : sx1 - x0] = arr[sy0:sy1, sx0:sx1]
+    return Image.fromarray(out, mode="RGB")
+
+
+def render_cell(
+    crop: Any,
+    cell: dict,
+    *,
+    render_square: Any,
+    trim_glyph: Any,
+    size: int,
+    inner_pad: int,
+    out_dir: Path,
+    metrics: Any = None,
+) -> list[int]:
+    """Trim + render + save one cell; returns its crop box.
+
+    `crop(box)` returns that page region as an RGB image. `metrics`: a
+    render_metrics.RenderMetrics that records the crop's QA stats.
+    """
+
+    x0, y0, x1, y1 = cell["cell_box"]
+    cell_crop = crop([x0, y0, x1, y1])
+
+    # Optional glyph trim (best-effort): find ink bbox inside the cell.
+    crop_box = [x0, y0, x1, y1]
+    if trim_glyph is not None:
+        try:
+            _, bbox, _q = trim_glyph(
+                cell_crop,
+                expected_center=(float((x1 - x0) / 2.0), float((y1 - y0) / 2.0)),
+                ink_threshold=120,
+                pad_px=max(6, int(round(min(x1 - x0, y1 - y0) * 0.10))),
+            )
+            if bbox:
+                crop_box = [x0 + int(bbox[0]), y0 + int(bbox[1]), x0 + int(bbox[2]), y0 + int(bbox[3])]
+        except Exception:
+            crop_box = [x0, y0, x1, y1]
+
+    if render_square is not None:
+        out = render_square(
+            crop(crop_box),
+            size=int(size),
+            inner_pad=int(inner_pad),
+            expected_center=(float((x1 - x0) / 2.0), float((y1 - y0) / 2.0)),
+        )
+    else:
+        out = fallback_render_square(crop(crop_box), size=int(size), inner_pad=int(inner_pad))
+
+    if metrics is not None:
+        metrics.save(out, out_dir / cell["file"], format="PNG", optimize=True)
+    else:
+        out.save(out_dir / cell["file"], format="PNG", optimize=True)
+    return crop_box
+
+
+class BuildCache:
+    """Content-addressed store of rendered pages under `<cache-dir>`.
+
+    pages/<kk>/<key>/page.json     layout + cell geometry + crop boxes
+    pages/<kk>/<key>/c0001.png     rendered crops, in cell order
+    pages/<kk>/<key>/metrics.npz   RenderMetrics rows of the crops (qa_render,
+                                   qa_gray32), in cell order
+    pages/<kk>/<key>/grid_NNNN.png grid overlay (labels start at NNNN)
+    qa_overlays/<key>.png          QA overlay for (page bytes, flagged boxes)
+
+    Outputs are copied (not linked) into the dataset: crop overrides rewrite
+    dataset PNGs in place and must not reach the cache.
+    """
+
+    def __init__(self, root: Path, *, signature: str):
+        self.root = Path(root)
+        self.signature = signature
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def page_key(self, page_sha: str, settings: dict) -> str:
+        payload = json.dumps(
+            {"v": BUILD_CACHE_VERSION, "sig": self.signature, "page": page_sha, "settings": settings},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return self.digest(payload.encode("utf-8"))
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / "pages" / key[:2] / key
+
+    def load(self, key: str) -> dict | None:
+        d = self.entry_dir(key)
+        try:
+            meta = json.loads((d / "page.json").read_text(encoding="utf-8"))
+        except Exception:
+            self.misses += 1
+            return None
+        n = len(meta.get("cells") or [])
+        if any(not self.crop_path(key, k).exists() for k in range(n)):
+            self.misses += 1
+            return None
+        os.utime(d)
+        self.hits += 1
+        return meta
+
+    def crop_path(self, key: str, k: int) -> Path:
+        return self.entry_dir(key) / f"c{k + 1:04d}.png"
+
+    def overlay_path(self, key: str, first_index: int) -> Path:
+        return self.entry_dir(key) / f"grid_{first_index:04d}.png"
+
+    def metrics_path(self, key: str) -> Path:
+        return self.entry_dir(key) / "metrics.npz"
+
+    def load_metrics(self, key: str, n: int) -> tuple[Any, Any] | None:
+        """(qa_render, qa_gray32) rows of an entry's `n` crops, or None."""
+
+        if np is None:
+            return None
+        try:
+            with np.load(self.metrics_path(key)) as z:
+                stats, feats = z["qa_render"], z["qa_gray32"]
+        except Exception:
+            return None
+        if len(stats) != n or len(feats) != n:
+            return None
+        return stats, feats
+
+    def store(self, key: str, meta: dict, crop_files: list[Path], metrics: tuple[Any, Any] | None = None) -> None:
+        d = self.entry_dir(key)
+        tmp = d.with_name(f".{key}.{os.getpid()}.tmp")
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True, exist_ok=True)
+            for k, src in enumerate(crop_files):
+                shutil.copyfile(src, tmp / f"c{k + 1:04d}.png")
+            if metrics is not None:
+                with open(tmp / "metrics.npz", "wb") as f:
+                    np.savez(f, qa_render=metrics[0], qa_gray32=metrics[1])
+            (tmp / "page.json").write_text(json.dumps(meta, ensure_ascii=False) + "\n", encoding="utf-8")
+            shutil.rmtree(d, ignore_errors=True)
+            tmp.replace(d)
+        except Exception:
+            # The cache is best-effort; a failed store only costs a re-render.
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def store_file(self, src: Path, dst: Path) -> None:
+        try:
+            if dst.parent.exists():
+                tmp = dst.with_name(f".{dst.name}.tmp")
+                shutil.copyfile(src, tmp)
+                tmp.replace(dst)
+        except Exception:
+            pass
+
+    def qa_overlay_path(self, page_sha: str, boxes: list) -> Path:
+        key = self.digest(json.dumps({"page": page_sha, "boxes": boxes}).encode("utf-8"))
+        return self.root / "qa_overlays" / f"{key}.png"
+
+    def prune(self, max_age_days: float) -> int:
+        cutoff = time.time() - float(max_age_days) * 86400.0
+        removed = 0
+        for d in list((self.root / "pages").glob("*/*")) + list((self.root / "qa_overlays").glob("*.png")):
+            try:
+                if d.stat().st_mtime >= cutoff:
+                    continue
+                if d.is_dir():
+                    shutil.rmtree(d, ignore_errors=True)
+                else:
+                    d.unlink()
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+def renderer_signature(render_available: bool) -> str:
+    """Hash of the code that determines layout and rendered pixels."""
+
+    h = hashlib.sha256()
+    h.update(b"render" if render_available else b"fallback")
+    scripts_dir = Path(__file__).resolve().parent
+    for name in ("workbench_build_dataset.py", "extract_lantingjixu_chars.py", "grid_layout.py", "ink_engine.py"):
+        try:
+            h.update((scripts_dir / name).read_bytes())
+        except OSError:
+            h.update(name.encode("utf-8"))
+    return h.hexdigest()
+
+
+_worker_helpers: dict = {}
+
+
+def _init_worker() -> None:
+    mod = load_extractor()
+    has_render = mod is not None and hasattr(mod, "render_square")
+    _worker_helpers["render_square"] = getattr(mod, "render_square") if has_render else None
+    _worker_helpers["trim_glyph"] = getattr(mod, "trim_glyph", None) if has_render else None
+
+
+def _render_batch(
+    shm_name: str,
+    shape: tuple[int, ...],
+    cells: list[dict],
+    size: int,
+    inner_pad: int,
+    out_dir: str,
+) -> tuple[list[list[int]], dict]:
+    # (crop boxes, RenderMetrics rows) of `cells`.
+    metrics = RenderMetrics(Path(out_dir)) if RenderMetrics is not None else None
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)  # type: ignore[call-arg]
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arr = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        crop = functools.partial(crop_array, arr)
+        boxes = [
+            render_cell(
+                crop,
+                c,
+                render_square=_worker_helpers.get("render_square"),
+                trim_glyph=_worker_helpers.get("trim_glyph"),
+                size=size,
+                inner_pad=inner_pad,
+                out_dir=Path(out_dir),
+                metrics=metrics,
+            )
+            for c in cells
+        ]
+        # Drop the views on shm.buf before close().
+        del crop, arr
+        return boxes, (metrics.rows if metrics is not None else {})
+    finally:
+        shm.close()
 
 
 def main() -> int:
@@ -56,6 +353,8 @@ def main() -> int:
     ap.add_argument("--rows", type=int, required=True)
     ap.add_argument("--size", type=int, default=512)
     ap.add_argument("--inner-pad", type=int, default=30)
+    ap.add_argument("--workers", type=int, default=1, help="render processes (0 = all CPUs)")
+    ap.add_argument("--cache-dir", default=None, help="content-addressed page cache for incremental rebuilds")
     ap.add_argument("--job-file", default=None)
     args = ap.parse_args()
 
@@ -69,32 +368,8 @@ def main() -> int:
     out_dir.mkdir(parents=True, exist_ok=True)
     (out_dir / "overlays").mkdir(parents=True, exist_ok=True)
 
-    # Reuse helpers from existing extractor when available.
-    # NOTE: scripts/ isn't a Python package, so import via file path.
     repo_root = Path(__file__).resolve().parent.parent
-    extract_path = (repo_root / "scripts" / "extract_lantingjixu_chars.py").resolve()
-    mod = None
-    try:
-        spec = importlib.util.spec_from_file_location("extract_lantingjixu_chars", extract_path)
-        if spec is not None and spec.loader is not None:
-            mod = importlib.util.module_from_spec(spec)
-            # Python 3.14 dataclasses expects the module to exist in sys.modules.
-            sys.modules[str(spec.name)] = mod
-            spec.loader.exec_module(mod)
-    except Exception:
-        mod = None
-
-    def fallback_render_square(img: Image.Image, size: int, inner_pad: int) -> Image.Image:
-        bg = (10, 10, 12)
-        canvas = Image.new("RGB", (size, size), bg)
-        max_w = max(1, size - inner_pad * 2)
-        max_h = max(1, size - inner_pad * 2)
-        scale = min(max_w / img.width, max_h / img.height)
-        w = max(1, int(round(img.width * scale)))
-        h = max(1, int(round(img.height * scale)))
-        work = img.resize((w, h), Image.Resampling.LANCZOS)
-        canvas.paste(work, ((size - w) // 2, (size - h) // 2))
-        return canvas
+    mod = load_extractor()
 
     if mod is not None and hasattr(mod, "render_square"):
         render_square = getattr(mod, "render_square")
@@ -126,6 +401,9 @@ def main() -> int:
     except Exception:
         align_text = ""
 
+    cache = BuildCache(Path(args.cache_dir), signature=renderer_signature(render_square is not None)) if args.cache_dir else None
+    page_shas: dict[str, str] = {}
+
     def cp_tag(ch: str) -> str:
         if not ch:
             return "U003F"
@@ -154,7 +432,11 @@ def main() -> int:
     if not pages:
         raise SystemExit("No page images found")
 
-    update_job(job_file, stage="layout", progress=10, note=f"pages={len(pages)}")
+    workers = int(args.workers) if int(args.workers) > 0 else int(os.cpu_count() or 1)
+    if np is None:
+        workers = 1
+
+    update_job(job_file, stage="layout", progress=10, note=f"pages={len(pages)} workers={workers}")
 
     index_entries: list[dict] = []
     global_idx = 0
@@ -173,92 +455,23 @@ def main() -> int:
             page_rows = int(args.rows)
         expected_cells += int(page_cols * page_rows)
 
-    def split_axis(proj: Any, expected_count: int) -> list[int]:
-        # Return boundaries (len expected_count+1) from 0..len(proj)
-        n = int(proj.shape[0])
-        if expected_count <= 0:
-            return [0, n]
-        if expected_count == 1:
-            return [0, n]
-
-        step = n / float(expected_count)
-        min_cell = max(12, int(round(step * 0.35)))
-        win = max(10, int(round(step * 0.60)))
-        dev_lambda = 0.55
-        size_lambda = 0.90
-
-        proj = proj.astype("float32")
-        proj_max = float(max(1.0, float(proj.max())))
-
-        cand_y: list[list[int]] = []
-        cand_cost: list[list[float]] = []
-        for i in range(1, expected_count):
-            remaining = expected_count - i
-            y_expect = int(round(step * i))
-            lo = int(max(min_cell, y_expect - win))
-            hi = int(min(n - remaining * min_cell, y_expect + win))
-            if hi <= lo:
-                lo = int(max(min_cell, min(y_expect, n - remaining * min_cell - 1)))
-                hi = lo + 1
-            ys = list(range(lo, hi))
-            costs = []
-            for y in ys:
-                dev = (float(y) - float(y_expect)) / max(1.0, float(step))
-                costs.append(float(proj[y]) / proj_max + dev_lambda * dev * dev)
-            cand_y.append(ys)
-            cand_cost.append(costs)
-
-        INF = 1e18
-        dp = [[INF] * len(c) for c in cand_y]
-        prev = [[-1] * len(c) for c in cand_y]
-        for j, y in enumerate(cand_y[0]):
-            cell = float(y) / max(1.0, float(step))
-            dp[0][j] = cand_cost[0][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-
-        for i in range(1, len(cand_y)):
-            for j, y in enumerate(cand_y[i]):
-                best = INF
-                best_k = -1
-                for k, y_prev in enumerate(cand_y[i - 1]):
-                    if y - y_prev < min_cell:
-                        continue
-                    cell = (float(y) - float(y_prev)) / max(1.0, float(step))
-                    v = dp[i - 1][k] + cand_cost[i][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-                    if v < best:
-                        best = v
-                        best_k = k
-                dp[i][j] = best
-                prev[i][j] = best_k
-
-        boundaries = [0]
-        last_i = len(cand_y) - 1
-        best_j = min(range(len(dp[last_i])), key=lambda j: dp[last_i][j])
-        chosen = [0] * len(cand_y)
-        chosen[last_i] = best_j
-        for i in range(last_i, 0, -1):
-            chosen[i - 1] = prev[i][chosen[i]]
-        for i, j in enumerate(chosen):
-            boundaries.append(int(cand_y[i][j]))
-        boundaries.append(n)
-        return boundaries
-
-    for page_i, page_path in enumerate(pages, start=1):
-        img = Image.open(page_path).convert("RGB")
-        w, h = img.width, img.height
+    # minimal font fallback
+    try:
+        font = ImageFont.load_default()
+    except Exception:
+        font = None
+
+    def layout_page(
+        img: Image.Image,
+        *,
+        page_direction: str,
+        page_cols: int,
+        page_rows: int,
+        page_layout: dict | None,
+    ) -> dict:
+        """Grid bounds + cell geometry in reading order (no names yet)."""
 
-        page_override: dict | None = None
-        page_layout: dict | None = None
-        for e in workbench_pages:
-            if str((e or {}).get("image") or "") == page_path.name:
-                page_override = (e or {}).get("override")
-                page_layout = (e or {}).get("layout")
-                break
-        page_direction = str((page_override or {}).get("direction") or args.direction)
-        page_cols = int((page_override or {}).get("cols") or args.cols)
-        page_rows = int((page_override or {}).get("rows") or args.rows)
-        if page_cols <= 0 or page_rows <= 0:
-            page_cols = int(args.cols)
-            page_rows = int(args.rows)
+        w, h = img.width, img.height
 
         # Compute adaptive grid boundaries from projections when numpy is available.
         x_bounds = None
@@ -293,26 +506,13 @@ def main() -> int:
         if x_bounds is None and y_bounds is None and np is not None and ink_mask is not None:
             arr = np.asarray(img)
             ink = ink_mask(arr, ink_threshold=115)
+            layout = split_ink_grid(ink, direction=page_direction, cols=page_cols, rows=page_rows)
             if page_direction == "vertical_rtl":
-                proj_x = ink.sum(axis=0).astype("float32")
-                x_bounds = split_axis(proj_x, page_cols)
-                y_bounds_by_col = []
-                for col in range(page_cols):
-                    cx0 = int(x_bounds[col])
-                    cx1 = int(x_bounds[col + 1])
-                    region = ink[:, cx0:cx1]
-                    proj_y = region.sum(axis=1).astype("float32")
-                    y_bounds_by_col.append(split_axis(proj_y, page_rows))
+                x_bounds = layout["col_bounds"]
+                y_bounds_by_col = layout["row_bounds_by_col"]
             else:
-                proj_y = ink.sum(axis=1).astype("float32")
-                y_bounds = split_axis(proj_y, page_rows)
-                x_bounds_by_row = []
-                for row in range(page_rows):
-                    ry0 = int(y_bounds[row])
-                    ry1 = int(y_bounds[row + 1])
-                    region = ink[ry0:ry1, :]
-                    proj_x = region.sum(axis=0).astype("float32")
-                    x_bounds_by_row.append(split_axis(proj_x, page_cols))
+                y_bounds = layout["row_bounds"]
+                x_bounds_by_row = layout["col_bounds_by_row"]
 
         # Uniform grid fallback.
         cell_w = w / float(page_cols)
@@ -326,38 +526,7 @@ def main() -> int:
             col_order = list(range(page_cols))
             row_order = list(range(page_rows))
 
-        overlay_grid = img.copy()
-        draw = ImageDraw.Draw(overlay_grid)
-
-        # draw grid lines
-        if x_bounds is not None:
-            for c in range(1, page_cols):
-                x = int(x_bounds[c])
-                draw.line([(x, 0), (x, h)], fill=(0, 200, 255), width=2)
-        else:
-            for c in range(1, page_cols):
-                x = int(round(c * cell_w))
-                draw.line([(x, 0), (x, h)], fill=(0, 200, 255), width=2)
-
-        if page_direction == "vertical_rtl" and y_bounds_by_col is not None and x_bounds is not None:
-            for col in range(page_cols):
-                cx0 = int(x_bounds[col])
-                cx1 = int(x_bounds[col + 1])
-                for r in range(1, page_rows):
-                    y = int(y_bounds_by_col[col][r])
-                    draw.line([(cx0, y), (cx1, y)], fill=(0, 200, 255), width=2)
-        else:
-            # horizontal_ltr or fallback
-            for r in range(1, page_rows):
-                y = int(y_bounds[r]) if y_bounds is not None else int(round(r * cell_h))
-                draw.line([(0, y), (w, y)], fill=(0, 200, 255), width=2)
-
-        # minimal font fallback
-        try:
-            font = ImageFont.load_default()
-        except Exception:
-            font = None
-
+        cells: list[dict] = []
         for ci, col in enumerate(col_order):
             for ri, row in enumerate(row_order):
                 if page_direction == "vertical_rtl":
@@ -394,52 +563,6 @@ def main() -> int:
                 x1 = max(x1, x0 + 1)
                 y1 = max(y1, y0 + 1)
 
-                global_idx += 1
-                cell_crop = img.crop((x0, y0, x1, y1))
-
-                # Optional glyph trim (best-effort): find ink bbox inside the cell.
-                crop_box = [x0, y0, x1, y1]
-                if trim_glyph is not None:
-                    try:
-                        _, bbox, _q = trim_glyph(
-                            cell_crop,
-                            expected_center=(float((x1 - x0) / 2.0), float((y1 - y0) / 2.0)),
-                            ink_threshold=120,
-                            pad_px=max(6, int(round(min(x1 - x0, y1 - y0) * 0.10))),
-                        )
-                        if bbox:
-                            crop_box = [x0 + int(bbox[0]), y0 + int(bbox[1]), x0 + int(bbox[2]), y0 + int(bbox[3])]
-                    except Exception:
-                        crop_box = [x0, y0, x1, y1]
-
-                if render_square is not None:
-                    out = render_square(
-                        img.crop((int(crop_box[0]), int(crop_box[1]), int(crop_box[2]), int(crop_box[3]))),
-                        size=int(args.size),
-                        inner_pad=int(args.inner_pad),
-                        expected_center=(float((x1 - x0) / 2.0), float((y1 - y0) / 2.0)),
-                    )
-                else:
-                    out = fallback_render_square(
-                        img.crop((int(crop_box[0]), int(crop_box[1]), int(crop_box[2]), int(crop_box[3]))),
-                        size=int(args.size),
-                        inner_pad=int(args.inner_pad),
-                    )
-
-                ch = align_text[global_idx - 1] if global_idx - 1 < len(align_text) else "?"
-                code = cp_tag(ch)
-                filename = f"{stele_slug}_{global_idx:04d}_{code}.png"
-                out.save(out_dir / filename, format="PNG", optimize=True)
-
-                # label on overlay
-                if font:
-                    draw.text((x0 + 4, y0 + 4), f"{global_idx:04d}", fill=(255, 255, 255), font=font)
-
-                # crop box outline
-                draw.rectangle(crop_box, outline=(80, 255, 170), width=2)
-
-                page_ref = f"pages_raw/{page_path.name}"
-
                 # Safe corridor midlines (prevents cross-cell swallow).
                 # Column safe bounds based on physical neighbor midlines.
                 if page_direction == "vertical_rtl" and x_bounds is not None:
@@ -462,47 +585,333 @@ def main() -> int:
                 else:
                     top_mid, bottom_mid = y0, y1
 
-                safe_column_box = [int(left_mid), 0, int(right_mid), h]
-                safe_row_box = [int(left_mid), int(top_mid), int(right_mid), int(bottom_mid)]
-
-                index_entries.append(
+                cells.append(
                     {
-                        "index": global_idx,
-                        "char": ch,
-                        "char_trad": ch,
-                        "char_simp": ch,
-                        "codepoint": code.replace("U", "U+"),
-                        "file": filename,
-                        "source": {
-                            "image": page_ref,
-                            "image_index": page_i,
-                            "page_override": page_override,
-                            "grid": {"col": int(col), "row": int(row)},
-                            "line_index": int(ci),
-                            "pos_in_line": int(ri),
-                            "cell_box": [x0, y0, x1, y1],
-                            "crop_box": crop_box,
-                            "safe_column_box": safe_column_box,
-                            "safe_row_box": safe_row_box,
-                        },
+                        "col": int(col),
+                        "row": int(row),
+                        "line_index": int(ci),
+                        "pos_in_line": int(ri),
+                        "cell_box": [x0, y0, x1, y1],
+                        "safe_column_box": [int(left_mid), 0, int(right_mid), h],
+                        "safe_row_box": [int(left_mid), int(top_mid), int(right_mid), int(bottom_mid)],
                     }
                 )
 
-        overlay_grid.save(
-            out_dir / "overlays" / f"page_{page_i:02d}_grid.png",
-            format="PNG",
-            optimize=True,
-        )
+        return {
+            "w": w,
+            "h": h,
+            "x_bounds": x_bounds,
+            "y_bounds": y_bounds,
+            "y_bounds_by_col": y_bounds_by_col,
+            "cells": cells,
+        }
+
+    def plan_page(page_i: int, page_path: Path) -> dict:
+        """Layout + named cell list for one page (everything except rendering).
+
+        With a cache hit the page is not decoded: geometry and crop boxes come
+        from the cache entry (`plan["cached_boxes"]`).
+        """
+
+        nonlocal global_idx
+        page_override: dict | None = None
+        page_layout: dict | None = None
+        for e in workbench_pages:
+            if str((e or {}).get("image") or "") == page_path.name:
+                page_override = (e or {}).get("override")
+                page_layout = (e or {}).get("layout")
+                break
+        page_direction = str((page_override or {}).get("direction") or args.direction)
+        page_cols = int((page_override or {}).get("cols") or args.cols)
+        page_rows = int((page_override or {}).get("rows") or args.rows)
+        if page_cols <= 0 or page_rows <= 0:
+            page_cols = int(args.cols)
+            page_rows = int(args.rows)
+
+        cache_key = None
+        geom = None
+        if cache is not None:
+            page_shas[page_path.name] = cache.digest(page_path.read_bytes())
+            cache_key = cache.page_key(
+                page_shas[page_path.name],
+                {
+                    "override": page_override,
+                    "layout": page_layout,
+                    "direction": page_direction,
+                    "cols": page_cols,
+                    "rows": page_rows,
+                    "size": int(args.size),
+                    "inner_pad": int(args.inner_pad),
+                },
+            )
+            geom = cache.load(cache_key)
+
+        img = None
+        if geom is None:
+            img = Image.open(page_path).convert("RGB")
+            geom = layout_page(
+                img,
+                page_direction=page_direction,
+                page_cols=page_cols,
+                page_rows=page_rows,
+                page_layout=page_layout,
+            )
+            cached_boxes = None
+        else:
+            cached_boxes = geom["crop_boxes"]
+
+        cells: list[dict] = []
+        for c in geom["cells"]:
+            global_idx += 1
+            ch = align_text[global_idx - 1] if global_idx - 1 < len(align_text) else "?"
+            code = cp_tag(ch)
+            filename = f"{stele_slug}_{global_idx:04d}_{code}.png"
+            cells.append({"index": global_idx, "char": ch, "code": code, "file": filename, **c})
+
+        return {
+            "page_i": page_i,
+            "page_path": page_path,
+            "img": img,
+            "page_override": page_override,
+            "direction": page_direction,
+            "cols": page_cols,
+            "rows": page_rows,
+            "w": int(geom["w"]),
+            "h": int(geom["h"]),
+            "x_bounds": geom["x_bounds"],
+            "y_bounds": geom["y_bounds"],
+            "y_bounds_by_col": geom["y_bounds_by_col"],
+            "geom": geom,
+            "cells": cells,
+            "cache_key": cache_key,
+            "cached_boxes": cached_boxes,
+        }
+
+    def restore_cached_cells(plan: dict) -> list[list[int]]:
+        for k, cell in enumerate(plan["cells"]):
+            shutil.copyfile(cache.crop_path(plan["cache_key"], k), out_dir / cell["file"])
+        if crop_metrics is not None:
+            # Replay the stats recorded at render time; flush() signs them
+            # with the restored files' size/mtime, so QA skips the decode.
+            cached = cache.load_metrics(plan["cache_key"], len(plan["cells"]))
+            if cached is not None:
+                stats, feats = cached
+                crop_metrics.merge({c["file"]: (stats[k], feats[k]) for k, c in enumerate(plan["cells"])})
+        return [list(b) for b in plan["cached_boxes"]]
+
+    def draw_grid(draw: Any, plan: dict, crop_boxes: list[list[int]]) -> None:
+        """Grid lines, cell labels and crop boxes for one page overlay."""
+
+        page_cols = int(plan["cols"])
+        page_rows = int(plan["rows"])
+        page_direction = str(plan["direction"])
+        x_bounds = plan["x_bounds"]
+        y_bounds = plan["y_bounds"]
+        y_bounds_by_col = plan["y_bounds_by_col"]
+        w, h = int(plan["w"]), int(plan["h"])
+        cell_w = w / float(page_cols)
+        cell_h = h / float(page_rows)
+
+        # draw grid lines
+        if x_bounds is not None:
+            for c in range(1, page_cols):
+                x = int(x_bounds[c])
+                draw.line([(x, 0), (x, h)], fill=(0, 200, 255), width=2)
+        else:
+            for c in range(1, page_cols):
+                x = int(round(c * cell_w))
+                draw.line([(x, 0), (x, h)], fill=(0, 200, 255), width=2)
+
+        if page_direction == "vertical_rtl" and y_bounds_by_col is not None and x_bounds is not None:
+            for col in range(page_cols):
+                cx0 = int(x_bounds[col])
+                cx1 = int(x_bounds[col + 1])
+                for r in range(1, page_rows):
+                    y = int(y_bounds_by_col[col][r])
+                    draw.line([(cx0, y), (cx1, y)], fill=(0, 200, 255), width=2)
+        else:
+            # horizontal_ltr or fallback
+            for r in range(1, page_rows):
+                y = int(y_bounds[r]) if y_bounds is not None else int(round(r * cell_h))
+                draw.line([(0, y), (w, y)], fill=(0, 200, 255), width=2)
+
+        for cell, crop_box in zip(plan["cells"], crop_boxes):
+            x0, y0 = cell["cell_box"][0], cell["cell_box"][1]
+            # label on overlay
+            if font:
+                draw.text((x0 + 4, y0 + 4), f"{cell['index']:04d}", fill=(255, 255, 255), font=font)
+
+            # crop box outline
+            draw.rectangle(crop_box, outline=(80, 255, 170), width=2)
+
+    def finalize_page(plan: dict, crop_boxes: list[list[int]]) -> None:
+        """Draw overlays and append index entries once a page's cells are rendered."""
+
+        page_i = int(plan["page_i"])
+        cache_key = plan["cache_key"]
+        first_index = int(plan["cells"][0]["index"]) if plan["cells"] else 0
+
+        grid_png = out_dir / "overlays" / f"page_{page_i:02d}_grid.png"
+        cached_overlay = cache.overlay_path(cache_key, first_index) if cache_key else None
+        # Overlay labels carry global indices, so cached overlays are keyed by
+        # the page's first index as well.
+        overlay_drawn = False
+        if cached_overlay is not None and cached_overlay.exists():
+            shutil.copyfile(cached_overlay, grid_png)
+        else:
+            img = plan["img"] if plan["img"] is not None else Image.open(plan["page_path"]).convert("RGB")
+            overlay_grid = img.copy()
+            draw_grid(ImageDraw.Draw(overlay_grid), plan, crop_boxes)
+            overlay_grid.save(grid_png, format="PNG", optimize=True)
+            overlay_drawn = True
+
+        page_ref = f"pages_raw/{plan['page_path'].name}"
+        for cell, crop_box in zip(plan["cells"], crop_boxes):
+            index_entries.append(
+                {
+                    "index": cell["index"],
+                    "char": cell["char"],
+                    "char_trad": cell["char"],
+                    "char_simp": cell["char"],
+                    "codepoint": cell["code"].replace("U", "U+"),
+                    "file": cell["file"],
+                    "source": {
+                        "image": page_ref,
+                        "image_index": page_i,
+                        "page_override": plan["page_override"],
+                        "grid": {"col": cell["col"], "row": cell["row"]},
+                        "line_index": cell["line_index"],
+                        "pos_in_line": cell["pos_in_line"],
+                        "cell_box": cell["cell_box"],
+                        "crop_box": crop_box,
+                        "safe_column_box": cell["safe_column_box"],
+                        "safe_row_box": cell["safe_row_box"],
+                    },
+                }
+            )
 
         # V1: crop overlay equals cell overlay (future: draw actual crop boxes).
-        overlay_grid.save(
-            out_dir / "overlays" / f"page_{page_i:02d}_crop.png",
-            format="PNG",
-            optimize=True,
-        )
+        shutil.copyfile(grid_png, out_dir / "overlays" / f"page_{page_i:02d}_crop.png")
+
+        if cache is not None and cache_key:
+            if plan["cached_boxes"] is None:
+                meta = {**plan["geom"], "crop_boxes": crop_boxes}
+                rows = [crop_metrics.rows.get(c["file"]) for c in plan["cells"]] if crop_metrics is not None else []
+                metrics = None
+                if rows and all(r is not None for r in rows):
+                    metrics = (np.stack([r[0] for r in rows]), np.stack([r[1] for r in rows]))
+                cache.store(cache_key, meta, [out_dir / c["file"] for c in plan["cells"]], metrics)
+            if overlay_drawn:
+                cache.store_file(grid_png, cached_overlay)
 
         update_job(job_file, stage="crop_render", progress=10 + int(70 * page_i / max(1, len(pages))))
 
+    t_render = time.perf_counter()
+    n_cells = 0
+    # QA stats of rendered crops, stored for qa_char_crops (no re-decode there).
+    crop_metrics = RenderMetrics(out_dir) if RenderMetrics is not None else None
+    pool: ProcessPoolExecutor | None = None
+    # Pages whose cells are rendering in the pool, finalized strictly in order.
+    # Bounded so only a few decoded pages sit in shared memory at once.
+    # Cache hits queue with shm=None so they still finalize in page order.
+    inflight: deque[tuple[dict, Any, list]] = deque()
+    max_inflight = max(2, workers)
+
+    def finish_oldest() -> None:
+        plan, shm, futures = inflight.popleft()
+        if shm is None:
+            finalize_page(plan, restore_cached_cells(plan))
+            return
+        try:
+            crop_boxes = []
+            for f in futures:
+                boxes, rows = f.result()
+                crop_boxes += boxes
+                if crop_metrics is not None:
+                    crop_metrics.merge(rows)
+        finally:
+            shm.close()
+            shm.unlink()
+        finalize_page(plan, crop_boxes)
+
+    try:
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        for page_i, page_path in enumerate(pages, start=1):
+            plan = plan_page(page_i, page_path)
+            cells = plan["cells"]
+            n_cells += len(cells)
+
+            if plan["cached_boxes"] is not None:
+                if inflight:
+                    inflight.append((plan, None, []))
+                else:
+                    finalize_page(plan, restore_cached_cells(plan))
+                continue
+
+            if pool is None:
+                img = plan["img"]
+                crop_boxes = [
+                    render_cell(
+                        lambda box: img.crop(tuple(int(v) for v in box)),
+                        c,
+                        render_square=render_square,
+                        trim_glyph=trim_glyph,
+                        size=int(args.size),
+                        inner_pad=int(args.inner_pad),
+                        out_dir=out_dir,
+                        metrics=crop_metrics,
+                    )
+                    for c in cells
+                ]
+                finalize_page(plan, crop_boxes)
+                continue
+
+            arr = np.asarray(plan["img"])
+            shm = shared_memory.SharedMemory(create=True, size=max(1, int(arr.nbytes)))
+            np.ndarray(arr.shape, dtype=np.uint8, buffer=shm.buf)[...] = arr
+            futures = [
+                pool.submit(
+                    _render_batch,
+                    shm.name,
+                    tuple(arr.shape),
+                    [{"cell_box": c["cell_box"], "file": c["file"]} for c in cells[i : i + CELL_BATCH]],
+                    int(args.size),
+                    int(args.inner_pad),
+                    str(out_dir),
+                )
+                for i in range(0, len(cells), CELL_BATCH)
+            ]
+            inflight.append((plan, shm, futures))
+            while len(inflight) >= max_inflight:
+                finish_oldest()
+        while inflight:
+            finish_oldest()
+    finally:
+        for _plan, shm, futures in inflight:
+            for f in futures:
+                f.cancel()
+            if shm is None:
+                continue
+            shm.close()
+            shm.unlink()
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - t_render
+    rate = float(n_cells) / max(1e-9, elapsed)
+    cache_note = f", cached pages {cache.hits}/{len(pages)}" if cache is not None else ""
+    print(
+        f"rendered cells={n_cells} pages={len(pages)} workers={workers} seconds={elapsed:.1f} cells_per_sec={rate:.2f}"
+        + (f" cache_hits={cache.hits} cache_misses={cache.misses}" if cache is not None else "")
+    )
+    update_job(
+        job_file,
+        stage="crop_render",
+        progress=80,
+        note=f"rendered {n_cells} cells in {elapsed:.1f}s ({rate:.2f} cells/s, workers={workers}{cache_note})",
+    )
+
     index = {
         "total_chars": len(index_entries),
         "meta": {
@@ -514,7 +923,9 @@ def main() -> int:
         },
         "files": index_entries,
     }
-    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    write_index(out_dir, index)
+    if crop_metrics is not None:
+        crop_metrics.flush()
 
     update_job(job_file, stage="qa", progress=90)
 
@@ -533,7 +944,10 @@ def main() -> int:
                 str(Path(args.stele_dir)),
                 "--top",
                 "80",
+                "--workers",
+                str(workers),
             ]
+            + (["--metrics-cache", str(cache.root / "qa_metrics.json")] if cache is not None else [])
         )
     except Exception:
         # Ignore QA errors for now.
@@ -559,19 +973,29 @@ def main() -> int:
                 )
 
             for page_i, page_path in enumerate(pages, start=1):
+                qa_png = out_dir / "overlays" / f"page_{page_i:02d}_qa.png"
+                boxes = [[int(v) for v in it["box"]] for it in by_page.get(page_path.name, [])]
+                cached_qa = cache.qa_overlay_path(page_shas[page_path.name], boxes) if cache is not None else None
+                if cached_qa is not None and cached_qa.exists():
+                    shutil.copyfile(cached_qa, qa_png)
+                    os.utime(cached_qa)
+                    continue
                 base = Image.open(page_path).convert("RGB")
                 d = ImageDraw.Draw(base)
-                for it in by_page.get(page_path.name, []):
-                    x0, y0, x1, y1 = [int(v) for v in it["box"]]
+                for x0, y0, x1, y1 in boxes:
                     d.rectangle([x0, y0, x1, y1], outline=(255, 80, 90), width=3)
-                base.save(
-                    out_dir / "overlays" / f"page_{page_i:02d}_qa.png",
-                    format="PNG",
-                    optimize=True,
-                )
+                base.save(qa_png, format="PNG", optimize=True)
+                if cached_qa is not None:
+                    cached_qa.parent.mkdir(parents=True, exist_ok=True)
+                    cache.store_file(qa_png, cached_qa)
     except Exception:
         pass
 
+    if cache is not None:
+        removed = cache.prune(BUILD_CACHE_MAX_AGE_DAYS)
+        if removed:
+            print(f"pruned cache entries={removed}")
+
     update_job(job_file, stage="done", progress=100)
     return 0
 
@@ -15,101 +15,18 @@ import argparse
 import importlib.util
 import json
 import sys
-import time
 from pathlib import Path
-from typing import Any
 
 from PIL import Image, ImageDraw, ImageFont
 
+from job_progress import update_job
+
 try:
     import numpy as np  # type: ignore
+    from grid_layout import split_axis
 except Exception:  # pragma: no cover
     np = None
-
-
-def update_job(job_file: Path | None, *, stage: str, progress: int, note: str | None = None) -> None:
-    if not job_file:
-        return
-    try:
-        cur = json.loads(job_file.read_text(encoding="utf-8"))
-    except Exception:
-        return
-    cur["status"] = "running"
-    cur["stage"] = str(stage)
-    cur["progress"] = int(progress)
-    cur["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
-    if note:
-        cur["log_tail"] = (str(cur.get("log_tail") or "") + "\n" + str(note)).strip()[-6000:]
-    job_file.write_text(json.dumps(cur, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-
-
-def split_axis(proj: Any, expected_count: int) -> list[int]:
-    n = int(proj.shape[0])
-    if expected_count <= 0:
-        return [0, n]
-    if expected_count == 1:
-        return [0, n]
-
-    step = n / float(expected_count)
-    min_cell = max(12, int(round(step * 0.35)))
-    win = max(10, int(round(step * 0.60)))
-    dev_lambda = 0.55
-    size_lambda = 0.90
-
-    proj = proj.astype("float32")
-    proj_max = float(max(1.0, float(proj.max())))
-
-    cand_y: list[list[int]] = []
-    cand_cost: list[list[float]] = []
-    for i in range(1, expected_count):
-        remaining = expected_count - i
-        y_expect = int(round(step * i))
-        lo = int(max(min_cell, y_expect - win))
-        hi = int(min(n - remaining * min_cell, y_expect + win))
-        if hi <= lo:
-            lo = int(max(min_cell, min(y_expect, n - remaining * min_cell - 1)))
-            hi = lo + 1
-        ys = list(range(lo, hi))
-        costs = []
-        for y in ys:
-            dev = (float(y) - float(y_expect)) / max(1.0, float(step))
-            costs.append(float(proj[y]) / proj_max + dev_lambda * dev * dev)
-        cand_y.append(ys)
-        cand_cost.append(costs)
-
-    INF = 1e18
-    dp = [[INF] * len(c) for c in cand_y]
-    prev = [[-1] * len(c) for c in cand_y]
-    for j, y in enumerate(cand_y[0]):
-        cell = float(y) / max(1.0, float(step))
-        dp[0][j] = cand_cost[0][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-
-    for i in range(1, len(cand_y)):
-        for j, y in enumerate(cand_y[i]):
-            best = INF
-            best_k = -1
-            for k, y_prev in enumerate(cand_y[i - 1]):
-                if y - y_prev < min_cell:
-                    continue
-                cell = (float(y) - float(y_prev)) / max(1.0, float(step))
-                v = dp[i - 1][k] + cand_cost[i][j] + size_lambda * (cell - 1.0) * (cell - 1.0)
-                if v < best:
-                    best = v
-                    best_k = k
-            dp[i][j] = best
-            prev[i][j] = best_k
-
-    boundaries = [0]
-    last_i = len(cand_y) - 1
-    best_j = min(range(len(dp[last_i])), key=lambda j: dp[last_i][j])
-    chosen = [0] * len(cand_y)
-    chosen[last_i] = best_j
-    for i in range(last_i, 0, -1):
-        chosen[i - 1] = prev[i][chosen[i]]
-    for i, j in enumerate(chosen):
-        boundaries.append(int(cand_y[i][j]))
-    boundaries.append(n)
-    return boundaries
+    split_axis = None
 
 
 def main() -> int:
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Resident YOLO inference: warm models, batched detect/classify, counters.
+
+The detect/classify scripts call `yolo_engine()`:
+
+- `INKGRID_YOLO_WORKER_URL` set and answering `GET /stats` -> `RemoteEngine`
+  (the backend starts one worker per machine, see WorkbenchService);
+- otherwise `LocalEngine`: the same code in-process (model loaded once per
+  process).
+
+Worker (CPU by default; models stay loaded, keyed by weights path + mtime):
+
+  python3 scripts/yolo_worker.py --port 8765 [--device cpu]
+
+  GET  /stats     counters per op: requests, items, batches, seconds,
+                  items/s, latency p50/p99 (last 1024 requests), model loads
+  POST /detect    {model, images: [path], imgsz, conf, batch, tile, tile_overlap}
+                  -> {"results": [[{xyxy, score}, ...] per image]}
+  POST /classify  {model, crops: [{image: path, xyxy}], imgsz, batch}
+                  -> {"results": [[{label, p}, ...] per crop, top5 order]}
+
+Pages are fed to `predict` in batches of up to `batch` same-size images
+(mixed sizes would change ultralytics' letterboxing). With `tile > 0`, pages
+whose long side exceeds `tile` are cut into `tile`-px tiles overlapping by
+`tile_overlap`; tile boxes are shifted back to page coordinates and merged
+with NMS (IoU 0.5). `tile=0` (default) predicts whole pages as before.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+WORKER_URL_ENV = "INKGRID_YOLO_WORKER_URL"
+DEFAULT_PORT = 8765
+NMS_IOU = 0.5
+
+
+def _import_yolo():
+    try:
+        from ultralytics import YOLO  # type: ignore
+    except Exception as e:
+        raise SystemExit(
+            "Missing dependency: ultralytics. Install with `python3 -m pip install -U ultralytics`.\n"
+            + f"Import error: {e}"
+        )
+    return YOLO
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou: float = NMS_IOU) -> list[int]:
+    """Greedy NMS; returns kept indices, best score first."""
+
+    order = np.argsort(-scores, kind="stable")
+    x0, y0, x1, y1 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    area = np.maximum(0.0, x1 - x0) * np.maximum(0.0, y1 - y0)
+    keep: list[int] = []
+    while order.size:
+        i = int(order[0])
+        keep.append(i)
+        rest = order[1:]
+        iw = np.maximum(0.0, np.minimum(x1[i], x1[rest]) - np.maximum(x0[i], x0[rest]))
+        ih = np.maximum(0.0, np.minimum(y1[i], y1[rest]) - np.maximum(y0[i], y0[rest]))
+        inter = iw * ih
+        union = area[i] + area[rest] - inter
+        order = rest[inter <= iou * np.maximum(union, 1e-9)]
+    return keep
+
+
+def tile_boxes(w: int, h: int, tile: int, overlap: int) -> list[tuple[int, int, int, int]]:
+    tile = max(1, int(tile))
+    stride = max(1, tile - max(0, int(overlap)))
+
+    def starts(n: int) -> list[int]:
+        if n <= tile:
+            return [0]
+        out = list(range(0, n - tile, stride))
+        return out + [n - tile]
+
+    return [(x, y, min(w, x + tile), min(h, y + tile)) for y in starts(h) for x in starts(w)]
+
+
+class _Counters:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.ops: dict[str, dict[str, Any]] = {}
+        self.model_loads = 0
+        self.started = time.time()
+
+    def record(self, op: str, items: int, batches: int, seconds: float) -> None:
+        with self.lock:
+            c = self.ops.setdefault(
+                op, {"requests": 0, "items": 0, "batches": 0, "seconds": 0.0, "latency": deque(maxlen=1024)}
+            )
+            c["requests"] += 1
+            c["items"] += int(items)
+            c["batches"] += int(batches)
+            c["seconds"] += float(seconds)
+            c["latency"].append(float(seconds))
+
+    def report(self) -> dict:
+        with self.lock:
+            ops = {}
+            for op, c in self.ops.items():
+                lat = sorted(c["latency"])
+                pick = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000.0, 1) if lat else None  # noqa: E731
+                ops[op] = {
+                    "requests": c["requests"],
+                    "items": c["items"],
+                    "batches": c["batches"],
+                    "seconds": round(c["seconds"], 3),
+                    "items_per_s": round(c["items"] / c["seconds"], 2) if c["seconds"] > 0 else None,
+                    "latency_ms_p50": pick(0.50),
+                    "latency_ms_p99": pick(0.99),
+                }
+            return {"uptime_s": round(time.time() - self.started, 1), "model_loads": self.model_loads, "ops": ops}
+
+
+class LocalEngine:
+    """In-process inference; models cached per (weights path, mtime)."""
+
+    remote = False
+
+    def __init__(self, device: str = "cpu"):
+        self.device = str(device)
+        self._models: dict[tuple[str, int], Any] = {}
+        self._lock = threading.Lock()
+        self.counters = _Counters()
+
+    def model(self, weights: str) -> Any:
+        p = Path(weights).resolve()
+        key = (str(p), int(p.stat().st_mtime_ns))
+        with self._lock:
+            m = self._models.get(key)
+            if m is None:
+                YOLO = _import_yolo()
+                for old in [k for k in self._models if k[0] == key[0]]:
+                    del self._models[old]
+                m = YOLO(str(p))
+                self._models[key] = m
+                self.counters.model_loads += 1
+            return m
+
+    def models(self) -> list[str]:
+        with self._lock:
+            return [k[0] for k in self._models]
+
+    def _predict(
+        self, model: Any, sources: list[Any], batch: int, *, by_shape: bool = False, **kw
+    ) -> tuple[list[Any], int]:
+        # With `by_shape`, a batch only holds images of one size: ultralytics
+        # letterboxes mixed-size batches to the full square, same-size ones
+        # exactly like a single-image call (so batching keeps outputs).
+        groups: dict[Any, list[int]] = {}
+        for i, src in enumerate(sources):
+            key = None
+            if by_shape:
+                key = src.size if isinstance(src, Image.Image) else Image.open(src).size
+            groups.setdefault(key, []).append(i)
+        out: list[Any] = [None] * len(sources)
+        batches = 0
+        step = max(1, int(batch))
+        for idxs in groups.values():
+            for b0 in range(0, len(idxs), step):
+                chunk = idxs[b0 : b0 + step]
+                res = list(model.predict(source=[sources[i] for i in chunk], device=self.device, verbose=False, **kw) or [])
+                for i, r in zip(chunk, res):
+                    out[i] = r
+                batches += 1
+        return out, batches
+
+    @staticmethod
+    def _dets(r: Any, dx: float = 0.0, dy: float = 0.0) -> list[dict]:
+        boxes = getattr(r, "boxes", None)
+        if boxes is None:
+            return []
+        xyxy = boxes.xyxy.cpu().numpy().tolist()  # type: ignore
+        confs = boxes.conf.cpu().numpy().tolist()  # type: ignore
+        return [
+            {"xyxy": [float(b[0]) + dx, float(b[1]) + dy, float(b[2]) + dx, float(b[3]) + dy], "score": float(c)}
+            for b, c in zip(xyxy, confs)
+        ]
+
+    def detect(
+        self,
+        weights: str,
+        images: list[Any],
+        *,
+        imgsz: int = 1280,
+        conf: float = 0.15,
+        batch: int = 4,
+        tile: int = 0,
+        tile_overlap: int = 256,
+    ) -> list[list[dict]]:
+        """Detections per image (`images`: paths or PIL images)."""
+
+        t0 = time.perf_counter()
+        model = self.model(weights)
+        kw = {"imgsz": int(imgsz), "conf": float(conf)}
+        if int(tile) <= 0:
+            srcs = [str(x) if isinstance(x, (str, Path)) else x for x in images]
+            res, batches = self._predict(model, srcs, batch, by_shape=True, **kw)
+            out = [self._dets(r) if r is not None else [] for r in res]
+        else:
+            # Tiles of all pages share batches; results are regrouped per page.
+            srcs, owners = [], []
+            for i, x in enumerate(images):
+                img = Image.open(x).convert("RGB") if isinstance(x, (str, Path)) else x
+                if max(img.width, img.height) <= int(tile):
+                    srcs.append(img)
+                    owners.append((i, 0, 0))
+                    continue
+                for box in tile_boxes(img.width, img.height, int(tile), int(tile_overlap)):
+                    srcs.append(img.crop(box))
+                    owners.append((i, box[0], box[1]))
+            res, batches = self._predict(model, srcs, batch, by_shape=True, **kw)
+            per_page: list[list[dict]] = [[] for _ in images]
+            for (i, dx, dy), r in zip(owners, res):
+                if r is not None:
+                    per_page[i].extend(self._dets(r, dx, dy))
+            out = []
+            for dets in per_page:
+                if len(dets) > 1:
+                    keep = nms(
+                        np.array([d["xyxy"] for d in dets], dtype=np.float64),
+                        np.array([d["score"] for d in dets], dtype=np.float64),
+                    )
+                    dets = [dets[k] for k in keep]
+                out.append(dets)
+        self.counters.record("detect", len(images), batches, time.perf_counter() - t0)
+        return out
+
+    def classify(
+        self,
+        weights: str,
+        crops: list[Any],
+        *,
+        imgsz: int = 224,
+        batch: int = 64,
+    ) -> list[list[dict]]:
+        """Top-5 `{label, p}` per crop (`crops`: PIL images or (path, xyxy))."""
+
+        t0 = time.perf_counter()
+        model = self.model(weights)
+        pages: dict[str, Image.Image] = {}
+        srcs = []
+        for c in crops:
+            if isinstance(c, Image.Image):
+                srcs.append(c)
+                continue
+            path, bb = str(c[0]), c[1]
+            img = pages.get(path)
+            if img is None:
+                img = pages[path] = Image.open(path).convert("RGB")
+            srcs.append(img.crop((int(bb[0]), int(bb[1]), int(bb[2]), int(bb[3]))))
+        res, batches = self._predict(model, srcs, batch, imgsz=int(imgsz))
+        out: list[list[dict]] = []
+        for r in res:
+            probs = getattr(r, "probs", None) if r is not None else None
+            names = getattr(r, "names", None) or {}
+            top: list[dict] = []
+            if probs is not None:
+                for idx in list(getattr(probs, "top5", [])):
+                    try:
+                        idx_int = int(idx)
+                    except Exception:
+                        continue
+                    try:
+                        p = float(probs.data[idx_int])  # type: ignore
+                    except Exception:
+                        p = 0.0
+                    top.append({"label": str(names.get(idx_int, "")), "p": p})
+            out.append(top)
+        self.counters.record("classify", len(crops), batches, time.perf_counter() - t0)
+        return out
+
+    def stats(self) -> dict:
+        return {**self.counters.report(), "device": self.device, "models": self.models()}
+
+
+class RemoteEngine:
+    """Client for a running worker; same call shape as `LocalEngine`."""
+
+    remote = True
+
+    def __init__(self, url: str, *, timeout: float = 3600.0):
+        self.url = str(url).rstrip("/")
+        self.timeout = float(timeout)
+
+    def _call(self, path: str, payload: dict | None = None, *, timeout: float | None = None) -> dict:
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        req = urllib.request.Request(
+            self.url + path, data=data, headers={"Content-Type": "application/json"}, method="GET" if data is None else "POST"
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout if timeout is None else timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def stats(self, *, timeout: float | None = None) -> dict:
+        return self._call("/stats", timeout=timeout)
+
+    def detect(self, weights: str, images: list[Any], **kw) -> list[list[dict]]:
+        payload = {"model": str(Path(weights).resolve()), "images": [str(Path(p).resolve()) for p in images], **kw}
+        return list(self._call("/detect", payload)["results"])
+
+    def classify(self, weights: str, crops: list[Any], **kw) -> list[list[dict]]:
+        items = [{"image": str(Path(p).resolve()), "xyxy": [int(v) for v in bb]} for p, bb in crops]
+        return list(self._call("/classify", {"model": str(Path(weights).resolve()), "crops": items, **kw})["results"])
+
+
+def yolo_engine(device: str = "cpu") -> LocalEngine | RemoteEngine:
+    """Worker from `INKGRID_YOLO_WORKER_URL` when reachable, else in-process."""
+
+    url = str(os.environ.get(WORKER_URL_ENV) or "").strip()
+    if url:
+        engine = RemoteEngine(url)
+        try:
+            engine.stats(timeout=2.0)
+            print(f"yolo: using resident worker {url}", flush=True)
+            return engine
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            print(f"yolo: worker {url} unavailable ({e}); running in-process", flush=True)
+    return LocalEngine(device)
+
+
+def serve(host: str, port: int, device: str) -> None:
+    engine = LocalEngine(device)
+    # One CPU-bound predict at a time; concurrent requests queue here.
+    infer_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, obj: dict) -> None:
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.rstrip("/") == "/stats":
+                self._send(200, engine.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(n).decode("utf-8") or "{}")
+                weights = str(req.get("model") or "")
+                if not weights:
+                    raise ValueError("missing model")
+                with infer_lock:
+                    if self.path == "/detect":
+                        kw = {k: req[k] for k in ("imgsz", "conf", "batch", "tile", "tile_overlap") if k in req}
+                        results = engine.detect(weights, [str(p) for p in req.get("images") or []], **kw)
+                    elif self.path == "/classify":
+                        kw = {k: req[k] for k in ("imgsz", "batch") if k in req}
+                        crops = [(str(c["image"]), c["xyxy"]) for c in req.get("crops") or []]
+                        results = engine.classify(weights, crops, **kw)
+                    else:
+                        self._send(404, {"error": "not found"})
+                        return
+                self._send(200, {"results": results})
+            except SystemExit as e:
+                self._send(500, {"error": str(e)})
+            except Exception as e:
+                self._send(400, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            return
+
+    httpd = ThreadingHTTPServer((host, int(port)), Handler)
+    print(f"yolo worker on http://{host}:{port} device={device}", flush=True)
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--device", default="cpu")
+    args = ap.parse_args(argv)
+    _import_yolo()
+    serve(str(args.host), int(args.port), str(args.device))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())